@@ -28,6 +28,29 @@ class Settings(BaseSettings):
     # Permite que un resumen asocie audio que ocurrió levemente antes del último punto.
     ALIGNER_TIME_TOLERANCE_SEC: float = 15.0
 
+    # --- Ingesta de corpus (IngestOrchestrator.process_batch) ---
+    # Procesos para parseo + sanitización de DOCX (0 = os.cpu_count())
+    INGEST_EXTRACT_WORKERS: int = 0
+    INGEST_EMBED_BATCH_SIZE: int = 128
+    # Hilos para subir en paralelo los XML de plantillas/esqueletos al almacenamiento
+    INGEST_UPLOAD_WORKERS: int = 8
+    # Documentos DOCX parseados que se mantienen abiertos durante la inducción (LRU)
+    INGEST_DOC_CACHE_SIZE: int = 64
+    # Caché persistente de embeddings por hash del texto sanitizado, opt-in: ruta en un volumen
+    # de datos escribible, p. ej. /data/cache/embeddings.sqlite3 ("" = desactivada)
+    EMBEDDING_CACHE_PATH: str = ""
+
+    # --- Minería (MiningOrchestrator) ---
+    # Caché de transcripciones y pares direccionada por contenido, compartida entre corridas. Opt-in:
+    # directorio en un volumen escribible, p. ej. /data/cache/mining ("" = desactivada)
+    MINING_CACHE_DIR: str = ""
+    MINING_CACHE_COMPRESS: bool = True
+    # Procesos para extracción de actas y DP de alineación (0 = os.cpu_count())
+    MINING_CPU_WORKERS: int = 0
+    # Servicio de embeddings compartido: textos máximos por lote y espera para juntar pedidos
+    MINING_EMBED_MAX_BATCH: int = 2048
+    MINING_EMBED_MAX_WAIT_MS: float = 20.0
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -4,7 +4,9 @@ import numpy as np
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass, field
 from sklearn.cluster import HDBSCAN
+from sklearn.decomposition import PCA
 from sklearn.metrics import silhouette_score
+from sklearn.neighbors import NearestNeighbors
 
 # Configuración de Logging
 logger = logging.getLogger(__name__)
@@ -40,6 +42,13 @@ class ClusterEngine:
     DEFAULT_MIN_SAMPLES = 2       # Sensibilidad al ruido (más bajo = menos conservador)
     METRIC = 'euclidean'          # Asumiendo vectores normalizados (equivale a cosine)
 
+    # Modo escalable (corpus grandes): PCA -> dedup por rejilla -> HDBSCAN sobre representantes
+    SCALABLE_THRESHOLD = 20000    # A partir de N muestras se activa automáticamente
+    SCALABLE_COMPONENTS = 32      # Dimensiones tras la reducción
+    PCA_FIT_SAMPLE = 20000        # Filas usadas para ajustar el PCA
+    DEDUP_GRID = 0.02             # Tamaño de celda: vectores en la misma celda se consideran idénticos
+    SILHOUETTE_SAMPLE = 5000      # Muestra acotada para estimar la calidad
+
     def __init__(self):
         pass
 
@@ -89,14 +98,15 @@ class ClusterEngine:
         Args:
             vectors: Lista de vectores (embeddings).
             tenant_id: ID del inquilino para contexto de seguridad.
-            **kwargs: Overrides para hiperparámetros de HDBSCAN.
+            **kwargs: Overrides para hiperparámetros de HDBSCAN. `scalable=True/False`
+                fuerza o desactiva el modo escalable (por defecto según SCALABLE_THRESHOLD).
 
         Returns:
             ClusteringResult con etiquetas y métricas.
         """
         # 1. Conversión y Validación
-        # Convertimos a numpy array para eficiencia
-        np_vectors = np.array(vectors)
+        # Convertimos a numpy array para eficiencia (sin copia si ya lo es)
+        np_vectors = np.asarray(vectors)
 
         if not self._validate_inputs(np_vectors, tenant_id):
             return ClusteringResult(
@@ -122,33 +132,39 @@ class ClusterEngine:
                 silhouette_score=0.0
             )
 
+        scalable = kwargs.get('scalable')
+        if scalable is None:
+            scalable = n_samples >= self.SCALABLE_THRESHOLD
+
         try:
-            # 3. Ejecución de HDBSCAN
-            logger.info(f"Tenant {tenant_id}: Ejecutando HDBSCAN sobre {n_samples} vectores.")
-            
-            clusterer = HDBSCAN(
-                min_cluster_size=min_cluster_size,
-                min_samples=min_samples,
-                metric=self.METRIC,
-                cluster_selection_method='eom' # Excess of Mass (bueno para clusters variables)
-            )
-            
-            labels = clusterer.fit_predict(np_vectors)
+            if scalable:
+                labels, score = self._cluster_scalable(np_vectors, tenant_id, min_cluster_size, min_samples)
+            else:
+                # 3. Ejecución de HDBSCAN
+                logger.info(f"Tenant {tenant_id}: Ejecutando HDBSCAN sobre {n_samples} vectores.")
+                
+                clusterer = HDBSCAN(
+                    min_cluster_size=min_cluster_size,
+                    min_samples=min_samples,
+                    metric=self.METRIC,
+                    cluster_selection_method='eom' # Excess of Mass (bueno para clusters variables)
+                )
+                
+                labels = clusterer.fit_predict(np_vectors)
+                score = None
             
             # 4. Post-Procesamiento
-            unique_labels = set(labels)
-            # El label -1 es ruido en HDBSCAN
-            n_clusters = len(unique_labels) - (1 if -1 in unique_labels else 0)
-            n_noise = list(labels).count(-1)
-            
+            unique_labels, label_counts = np.unique(labels, return_counts=True)
             # Distribución
-            distribution = {
-                int(lbl): int(np.sum(labels == lbl)) 
-                for lbl in unique_labels
-            }
+            distribution = {int(lbl): int(cnt) for lbl, cnt in zip(unique_labels, label_counts)}
+
+            # El label -1 es ruido en HDBSCAN
+            n_clusters = len(distribution) - (1 if -1 in distribution else 0)
+            n_noise = distribution.get(-1, 0)
 
             # 5. Métricas de Calidad
-            score = self._calculate_quality_metrics(np_vectors, labels)
+            if score is None:
+                score = self._calculate_quality_metrics(np_vectors, labels)
 
             logger.info(
                 f"Tenant {tenant_id}: Clustering completado. "
@@ -174,5 +190,88 @@ class ClusterEngine:
             # HDBSCAN puede generar árboles de distancia grandes en memoria
             if 'clusterer' in locals():
                 del clusterer
-            # Forzar recolección de basura para limpiar estructuras numpy temporales
-            gc.collect()
\ No newline at end of file
+                # Forzar recolección de basura para limpiar estructuras numpy temporales
+                # (el modo escalable no construye el árbol completo y libera por refcount)
+                gc.collect()
+
+    def _cluster_scalable(self, vectors: np.ndarray, tenant_id: str,
+                          min_cluster_size: int, min_samples: int):
+        """
+        Clustering aproximado para corpus grandes, compatible en etiquetas con el exacto:
+        1. Reducción de dimensionalidad (PCA ajustado sobre una muestra).
+        2. Deduplicación de vectores idénticos o casi idénticos (misma celda de la rejilla),
+           muy frecuente en boilerplate.
+        3. HDBSCAN sobre los representantes únicos. sklearn no acepta sample_weight, así que
+           cada representante se replica min(conteo, densidad mínima) veces: suficiente para
+           que un párrafo repetido forme su propio cluster sin expandir todo el corpus.
+        4. Las etiquetas vuelven a cada vector original vía el índice inverso.
+        """
+        n_samples = len(vectors)
+        rng = np.random.default_rng(0)
+
+        # 1. Reducción
+        fit_idx = rng.choice(n_samples, size=min(self.PCA_FIT_SAMPLE, n_samples), replace=False)
+        n_components = min(self.SCALABLE_COMPONENTS, vectors.shape[1], len(fit_idx))
+        pca = PCA(n_components=n_components, svd_solver='randomized', random_state=0)
+        pca.fit(vectors[fit_idx])
+        reduced = pca.transform(vectors).astype(np.float32)
+
+        # 2. Dedup por rejilla (una fila de enteros -> una llave binaria)
+        grid = np.ascontiguousarray(np.round(reduced / self.DEDUP_GRID).astype(np.int32))
+        keys = grid.view(np.dtype((np.void, grid.dtype.itemsize * grid.shape[1]))).ravel()
+        _, first_idx, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+        representatives = reduced[first_idx]
+        del grid, keys
+
+        # 3. HDBSCAN sobre representantes replicados hasta la densidad mínima
+        copies = np.minimum(counts, max(min_cluster_size, min_samples + 1))
+        fit_points = np.repeat(representatives, copies, axis=0)
+        logger.info(
+            f"Tenant {tenant_id}: HDBSCAN escalable sobre {len(representatives)} representantes "
+            f"({n_samples} vectores, {n_components} dims, {len(fit_points)} puntos de ajuste)."
+        )
+        clusterer = HDBSCAN(
+            min_cluster_size=min_cluster_size,
+            min_samples=min_samples,
+            metric=self.METRIC,
+            cluster_selection_method='eom'
+        )
+        fit_labels = clusterer.fit_predict(fit_points)
+        rep_labels = fit_labels[np.concatenate(([0], np.cumsum(copies)[:-1]))]
+
+        # 4. Etiquetas por vector original
+        labels = rep_labels[inverse.ravel()]
+        score = self._estimate_silhouette(reduced, labels, rng)
+        return labels, score
+
+    def _estimate_silhouette(self, vectors: np.ndarray, labels: np.ndarray, rng) -> float:
+        """
+        Silhouette simplificado sobre una muestra acotada: a = distancia al centroide propio,
+        b = distancia al centroide vecino más cercano (NearestNeighbors sobre centroides).
+        Costo O(muestra x clusters) en vez de O(N^2).
+        """
+        clustered = np.flatnonzero(labels != -1)
+        cluster_ids = np.unique(labels[clustered])
+        if len(cluster_ids) < 2:
+            return 0.0
+
+        try:
+            # Centroides en una sola pasada sobre los puntos asignados (no una máscara por cluster)
+            members = np.searchsorted(cluster_ids, labels[clustered])
+            sums = np.zeros((len(cluster_ids), vectors.shape[1]), dtype=np.float64)
+            np.add.at(sums, members, vectors[clustered])
+            counts = np.bincount(members, minlength=len(cluster_ids))
+            centroids = (sums / counts[:, None]).astype(vectors.dtype, copy=False)
+            sample = rng.choice(clustered, size=min(self.SILHOUETTE_SAMPLE, len(clustered)), replace=False)
+            points = vectors[sample]
+            own = np.searchsorted(cluster_ids, labels[sample])
+
+            distances, neighbors = NearestNeighbors(n_neighbors=2).fit(centroids).kneighbors(points)
+            a = np.linalg.norm(points - centroids[own], axis=1)
+            # El vecino más cercano puede ser el propio centroide o no
+            b = np.where(neighbors[:, 0] == own, distances[:, 1], distances[:, 0])
+            denom = np.maximum(a, b)
+            return float(np.mean(np.where(denom > 0, (b - a) / np.where(denom > 0, denom, 1), 0.0)))
+        except Exception as e:
+            logger.error(f"Error estimando Silhouette Score: {e}")
+            return 0.0
\ No newline at end of file
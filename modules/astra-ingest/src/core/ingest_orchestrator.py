@@ -1,10 +1,17 @@
 import hashlib
 import logging
-from typing import List, Dict
+import multiprocessing
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
 from src.db.models import Skeleton, Template, TableTemplate
-from src.core.parser.xml_engine import DocxAtomizer
+from src.core.parser.xml_engine import DocxAtomizer, DocxAtomizerCache
 from src.core.nlp.embedder import TextEmbedder
+from src.core.nlp.embedding_cache import EmbeddingCache
 from src.core.nlp.cleaner import TextSanitizer
 from src.core.analytics.cluster_engine import ClusterEngine
 from src.core.nlp.alignment_engine import SequenceAligner
@@ -14,16 +21,57 @@ from src.core.nlp.seed_engine import SeedEngine
 from src.core.mapping.auto_mapper import HeuristicMapper, BlockOccurrence
 from src.core.parser.style_parser import StyleParser
 from src.core.parser.style_mapper import StyleMapper
-from src.db.repositories import StyleMapRepository
+from src.db.repositories import StyleMapRepository, InductionRepository
 from src.core.admin.label_manager import LabelManager
 from src.db.models import EntityType
 from src.core.constants import PATH_STYLES
 from src.core.utils.storage import StorageManager
+from src.config import settings
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 
 logger = logging.getLogger(__name__)
 
+MIN_BLOCK_CHARS = 10 # Ignorar textos muy cortos
+
+# Sanitizador propio de cada proceso del pool de extracción (carga spaCy una vez por proceso)
+_worker_sanitizer: Optional[TextSanitizer] = None
+
+def _init_extraction_worker():
+    global _worker_sanitizer
+    _worker_sanitizer = TextSanitizer()
+
+def extract_document_blocks(path: str, sanitizer: Optional[TextSanitizer] = None) -> List[Dict]:
+    """
+    Etapa de extracción de un documento: parsea el DOCX y sanitiza sus párrafos.
+    Corre dentro del pool de procesos; no toca el modelo de embeddings ni la DB.
+    """
+    sanitizer = sanitizer or _worker_sanitizer
+    with DocxAtomizer(path) as atomizer:
+        content = atomizer.extract_content() # Lista de dicts {id, text, metadata}
+
+    selected = [
+        (b_idx, block) for b_idx, block in enumerate(content)
+        if block['type'] == 'paragraph' and len(block['text']) > MIN_BLOCK_CHARS
+    ]
+    # --- LIMPIEZA Y ANONIMIZACIÓN (Fase 1-T04) ---
+    # Limpiamos el texto antes de vectorizar para que el clustering
+    # agrupe por estructura semántica y no por nombres propios.
+    sanitized = sanitizer.sanitize_many([block['text'] for _, block in selected], anonymize=True)
+
+    return [
+        {
+            "text": block['text'],          # Guardamos original para inducir plantilla
+            "sanitized_text": sanitized_text, # Guardamos limpio para debug/comparación
+            "metadata": block['metadata'],
+            "original_doc": path,
+            "node_id": block['id'], # ID interno del DOCX
+            "block_index": b_idx,
+            "total_blocks": len(content)
+        }
+        for (b_idx, block), sanitized_text in zip(selected, sanitized)
+    ]
+
 class IngestOrchestrator:
     def __init__(self, db: Session):
         self.db = db
@@ -37,6 +85,36 @@ class IngestOrchestrator:
         self.mapper = HeuristicMapper(self.db)
         self.label_manager = LabelManager(self.db)
         self.storage = StorageManager()
+        # Se abre por lote en process_batch (EMBEDDING_CACHE_PATH) y se cierra al terminar
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        self.stage_timings: Dict[str, float] = {}
+
+    def extract_corpus(self, file_paths: List[str], workers: Optional[int] = None) -> List[List[Dict]]:
+        """
+        Parseo + sanitización de todos los documentos, en paralelo por archivo.
+        Retorna los bloques de cada documento en el mismo orden que `file_paths`.
+        """
+        workers = workers if workers is not None else settings.INGEST_EXTRACT_WORKERS
+        workers = min(workers or os.cpu_count() or 1, len(file_paths))
+
+        if workers <= 1:
+            return [extract_document_blocks(path, self.sanitizer) for path in file_paths]
+
+        # 'spawn': no heredar por fork el estado de torch/spaCy del proceso principal
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_extraction_worker) as pool:
+            return list(pool.map(extract_document_blocks, file_paths))
+
+    def embed_blocks(self, all_blocks: List[Dict]) -> np.ndarray:
+        """Vectoriza el corpus completo (texto SANITIZADO) en lotes grandes, con caché persistente."""
+        vectors = self.embedder.embed_corpus(
+            [b['sanitized_text'] for b in all_blocks],
+            batch_size=settings.INGEST_EMBED_BATCH_SIZE,
+            cache=self.embedding_cache
+        )
+        for block, vec in zip(all_blocks, vectors):
+            block['vector'] = vec # Vector basado en texto limpio
+        return vectors
 
     def process_styles(self, file_path: str, tenant_id: str):
         """
@@ -85,54 +163,52 @@ class IngestOrchestrator:
         """
         Procesa un lote de documentos para inducir plantillas y guardar skeletons.
         """
+        opened_cache = self.embedding_cache is None and self._open_embedding_cache()
+        try:
+            return self._run_batch(file_paths, tenant_id)
+        finally:
+            if opened_cache:
+                self.embedding_cache.close()
+                self.embedding_cache = None
+
+    def _open_embedding_cache(self) -> bool:
+        """Abre la caché de embeddings configurada; sin ruta o sin permisos se sigue sin caché."""
+        if not settings.EMBEDDING_CACHE_PATH:
+            return False
+        try:
+            self.embedding_cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH, TextEmbedder.MODEL_NAME)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Caché de embeddings no disponible en {settings.EMBEDDING_CACHE_PATH}: {e}")
+            return False
+        return True
+
+    def _run_batch(self, file_paths: List[str], tenant_id: str) -> str:
         all_blocks = []
         doc_maps = {} # file_index -> [block_indices]
+        self.stage_timings = {}
 
-        # 1. Extracción y Vectorización Global
+        # 1. Extracción (pool de procesos) y Vectorización Global (una etapa para todo el corpus)
         logger.info("Iniciando extracción y vectorización...")
-        global_idx = 0
-        
-        for f_idx, path in enumerate(file_paths):
-            atomizer = DocxAtomizer(path)
-            content = atomizer.extract_content() # Lista de dicts {id, text, metadata}
-            
-            doc_block_indices = []
-            for b_idx, block in enumerate(content):
-                if block['type'] == 'paragraph' and len(block['text']) > 10: # Ignorar textos muy cortos
-                    # --- NUEVO: LIMPIEZA Y ANONIMIZACIÓN (Fase 1-T04) ---
-                    # Limpiamos el texto antes de vectorizar para que el clustering
-                    # agrupe por estructura semántica y no por nombres propios.
-                    sanitized_text = self.sanitizer.sanitize(block['text'], anonymize=True)
-                    
-                    # Vectorizar el texto SANITIZADO
-                    vec = self.embedder.embed_batch([sanitized_text])[0]
-                    
-                    all_blocks.append({
-                        "text": block['text'],          # Guardamos original para inducir plantilla
-                        "sanitized_text": sanitized_text, # Guardamos limpio para debug/comparación
-                        "vector": vec,              # Vector basado en texto limpio
-                        "metadata": block['metadata'],
-                        "original_doc": path,
-                        "node_id": block['id'], # ID interno del DOCX
-                        "block_index": b_idx,
-                        "total_blocks": len(content)
-                    })
-                    doc_block_indices.append(global_idx)
-                    global_idx += 1
-            
-            doc_maps[f_idx] = doc_block_indices
-            atomizer.close()
+        started = time.perf_counter()
+        for f_idx, doc_blocks in enumerate(self.extract_corpus(file_paths)):
+            doc_maps[f_idx] = list(range(len(all_blocks), len(all_blocks) + len(doc_blocks)))
+            all_blocks.extend(doc_blocks)
+        self.stage_timings["extraction"] = time.perf_counter() - started
 
         if not all_blocks:
             return "No content found"
 
+        started = time.perf_counter()
+        block_vectors = self.embed_blocks(all_blocks)
+        self.stage_timings["embedding"] = time.perf_counter() - started
+        logger.info(f"Extracción {self.stage_timings['extraction']:.1f}s, vectorización {self.stage_timings['embedding']:.1f}s ({len(all_blocks)} bloques)")
+
         # 2. Anchored Search (Fase 2-T01)
         # Comparar bloques contra las anclas del Manual Maestro
         anchors = self.seed_engine.get_anchors()
         if anchors:
             logger.info(f"🔎 Ejecutando Anchored Search contra {len(anchors)} anclas...")
             anchor_vectors = np.array([a.vector for a in anchors])
-            block_vectors = np.array([b['vector'] for b in all_blocks])
             
             # Matriz de similitud coseno
             similarities = cosine_similarity(block_vectors, anchor_vectors)
@@ -151,8 +227,9 @@ class IngestOrchestrator:
 
         # 3. Clustering
         logger.info("Ejecutando clustering...")
-        vectors = [b['vector'] for b in all_blocks]
-        clustering_result = self.cluster_engine.perform_clustering(vectors, tenant_id)
+        started = time.perf_counter()
+        clustering_result = self.cluster_engine.perform_clustering(block_vectors, tenant_id)
+        self.stage_timings["clustering"] = time.perf_counter() - started
         
         # Mapear labels a bloques
         raw_cluster_groups = {}
@@ -188,135 +265,160 @@ class IngestOrchestrator:
                 cluster_groups[label] = blocks
                 merged_labels[label] = label
 
-        # 3. Inducción de Plantillas y Persistencia
-        logger.info("Induciendo plantillas...")
-        template_map = {} # cluster_label -> template_db_id
+        # Documentos parseados (con su índice de nodos) compartidos por las etapas 3 y 4
+        with DocxAtomizerCache(settings.INGEST_DOC_CACHE_SIZE) as documents:
+            # 3. Inducción de Plantillas y Persistencia (una transacción para la etapa)
+            logger.info("Induciendo plantillas...")
+            started = time.perf_counter()
+            template_map = self._persist_templates(tenant_id, cluster_groups, documents)
+            self.stage_timings["templates"] = time.perf_counter() - started
+
+            # 4. Construcción de Skeletons (JSON)
+            logger.info("Construyendo Skeletons...")
+            started = time.perf_counter()
+            # Corregir mapeo de labels originales a los fusionados
+            final_labels = [merged_labels.get(l, -1) for l in clustering_result.labels]
+            self._persist_skeletons(tenant_id, file_paths, doc_maps, all_blocks, final_labels, template_map, documents)
+            self.stage_timings["skeletons"] = time.perf_counter() - started
+            logger.info(f"Documentos: {documents.misses} parseados, {documents.hits} reutilizados")
 
+        return f"Procesamiento completado. Plantillas detectadas: {len(template_map)}"
+
+    def _persist_templates(self, tenant_id: str, cluster_groups: Dict, documents: DocxAtomizerCache) -> Dict:
+        """
+        Induce una plantilla por cluster y la persiste en bloque:
+        precarga hashes/etiquetas con consultas IN, sube los XML nuevos en paralelo,
+        inserta con ON CONFLICT DO NOTHING y confirma una sola vez.
+        Retorna cluster_label -> template_db_id.
+        """
+        repo = InductionRepository(self.db)
+
+        # A. Generar modelo lógico (Alineación) y hash de estructura para deduplicación
+        induced = []
         for label, blocks in cluster_groups.items():
-            texts = [b['text'] for b in blocks]
-            
-            # Generar modelo lógico (Alineación)
-            template_model = self.aligner.induce_template(texts)
-            
-            # Generar Hash de estructura para deduplicación
+            template_model = self.aligner.induce_template([b['text'] for b in blocks])
             struct_hash = hashlib.sha256(template_model.raw_pattern.encode()).hexdigest()
-            
-            # Determinar si es Boilerplate (0 variables)
-            variables = [t.variable_name for t in template_model.tokens if t.is_variable]
-            is_boilerplate = len(variables) == 0
+            induced.append((label, blocks, template_model, struct_hash))
 
-            # [NUEVO] Paso de Auto-Resolución de Etiquetas
-            auto_label = None
-            
-            # A. Si viene de una semilla, tiene prioridad (lógica simplificada para Fase 2)
-            if str(label).startswith("seed_"):
-                auto_label = None # Se mantiene is_seed logic
-            else:
-                # B. Consultar Catálogo Histórico
-                auto_label = self.label_manager.get_label_for_hash(
-                    tenant_id, 
-                    struct_hash, 
-                    EntityType.TEMPLATE
-                )
+        # B. Precarga: plantillas existentes y Catálogo Histórico de etiquetas
+        existing = repo.get_templates_by_hash(tenant_id, [item[3] for item in induced])
+        # Si viene de una semilla, tiene prioridad (no se consulta el catálogo)
+        catalog = repo.get_labels_by_hash(
+            tenant_id,
+            [item[3] for item in induced if not str(item[0]).startswith("seed_")],
+            EntityType.TEMPLATE
+        )
 
-            # Verificar si ya existe en DB
-            existing_tmpl = self.db.query(Template).filter_by(
-                tenant_id=tenant_id, structure_hash=struct_hash
-            ).first()
+        template_map = {}
+        pending = []
+        for label, blocks, template_model, struct_hash in induced:
+            auto_label = None if str(label).startswith("seed_") else catalog.get(struct_hash)
+            existing_tmpl = existing.get(struct_hash)
 
             if existing_tmpl:
                 # Si existe, actualizamos el label y el preview si son nulos
-                needs_commit = False
                 if auto_label and not existing_tmpl.user_label:
                     existing_tmpl.user_label = auto_label
-                    needs_commit = True
-                
                 if not existing_tmpl.preview_text:
                     existing_tmpl.preview_text = template_model.raw_pattern[:2000]
-                    needs_commit = True
-                
-                if needs_commit:
-                    self.db.commit()
                 template_map[label] = str(existing_tmpl.id)
             else:
-                # Generar XML físico usando el primer bloque como referencia de estilo
-                ref_doc_path = blocks[0]['original_doc']
-                ref_node_id = blocks[0]['node_id']
-                
-                with DocxAtomizer(ref_doc_path) as atm:
-                    ns = atm.namespaces
-                    w = f"{{{ns['w']}}}"
-                    nodes = atm.document_tree.xpath(f'//*[@w:rsidR="{ref_node_id}"]', namespaces=ns)
-                    ref_node = nodes[0] if nodes else None
-                    
-                    if ref_node is not None:
-                        xml_bytes = self.xml_factory.generate_ooxml_template(template_model, ref_node)
-                        
-                        # VALIDACIÓN DE CALIDAD (Fase 1-T07.2)
-                        is_valid, reason = self.validator.validate(
-                            template_model.raw_pattern, 
-                            len(blocks), 
-                            xml_bytes,
-                            tenant_id=tenant_id
-                        )
-                        
-                        if not is_valid:
-                            logger.warning(f"Plantilla RECHAZADA por calidad ({reason}): {template_model.raw_pattern[:50]}...")
-                            continue
-
-                        s3_key = f"s3://astra-templates/{tenant_id}/{struct_hash}.xml"
-                        
-                        # PERSISTENCIA FÍSICA (Fase 1-T11.2)
-                        tmpl_upload_res = self.storage.upload_bytes(xml_bytes, s3_key)
-                        s3_key = tmpl_upload_res["uri"]
-
-                        new_tmpl = Template(
-                            tenant_id=tenant_id,
-                            structure_hash=struct_hash,
-                            storage_path=s3_key,
-                            variables_metadata=variables,
-                            cluster_source_id=str(label),
-                            preview_text=template_model.raw_pattern[:2000],
-                            is_boilerplate=is_boilerplate,
-                            is_seed=str(label).startswith("seed_"),
-                            seed_label=str(label) if str(label).startswith("seed_") else None,
-                            user_label=auto_label
-                        )
-                        self.db.add(new_tmpl)
-                        self.db.commit()
-                        
-                        if auto_label:
-                            logger.info(f"🤖 AUTO-LABELED: Template {new_tmpl.id} reconocido como '{auto_label}'")
-
-                        template_map[label] = str(new_tmpl.id)
-                
-                # 3.1 MAPEO DE ZONAS (Fase 1-T07.1a)
-                # Calcular ocurrencias para este cluster
-                occurrences = [
-                    BlockOccurrence(
-                        doc_id=b['original_doc'], 
-                        block_index=b['block_index'], 
-                        total_blocks=b['total_blocks']
-                    ) for b in blocks
-                ]
-                self.mapper.process_mapping(tenant_id, template_map[label], occurrences)
-
-        # 4. Construcción de Skeletons (JSON)
-        logger.info("Construyendo Skeletons...")
-        # Corregir mapeo de labels originales a los fusionados
-        final_labels = []
-        for l in clustering_result.labels:
-            final_labels.append(merged_labels.get(l, -1))
-        
+                pending.append((label, blocks, template_model, struct_hash, auto_label))
+
+        # C. Generar XML físico de las nuevas (usando el primer bloque como referencia de estilo).
+        # Ordenadas por documento de referencia para aprovechar el LRU de documentos abiertos
+        created = {} # struct_hash -> template_id (clusters distintos pueden inducir el mismo patrón)
+        new_rows = []
+        pending.sort(key=lambda item: item[1][0]['original_doc'])
+        with ThreadPoolExecutor(max_workers=settings.INGEST_UPLOAD_WORKERS) as uploads:
+            for label, blocks, template_model, struct_hash, auto_label in pending:
+                if struct_hash in created:
+                    template_map[label] = created[struct_hash]
+                    continue
+
+                atm = documents.get(blocks[0]['original_doc'])
+                ref_node = atm.find_node(blocks[0]['node_id'])
+                if ref_node is None:
+                    continue
+                xml_bytes = self.xml_factory.generate_ooxml_template(template_model, ref_node)
+
+                # VALIDACIÓN DE CALIDAD (Fase 1-T07.2)
+                is_valid, reason = self.validator.validate(
+                    template_model.raw_pattern,
+                    len(blocks),
+                    xml_bytes,
+                    tenant_id=tenant_id
+                )
+                if not is_valid:
+                    logger.warning(f"Plantilla RECHAZADA por calidad ({reason}): {template_model.raw_pattern[:50]}...")
+                    continue
+
+                # PERSISTENCIA FÍSICA (Fase 1-T11.2), en paralelo
+                s3_key = f"s3://astra-templates/{tenant_id}/{struct_hash}.xml"
+                upload = uploads.submit(self.storage.upload_bytes, xml_bytes, s3_key)
+
+                template_id = uuid.uuid4()
+                variables = [t.variable_name for t in template_model.tokens if t.is_variable]
+                new_rows.append((upload, {
+                    "id": template_id,
+                    "tenant_id": tenant_id,
+                    "structure_hash": struct_hash,
+                    "variables_metadata": variables,
+                    "cluster_source_id": str(label),
+                    "preview_text": template_model.raw_pattern[:2000],
+                    # Boilerplate = 0 variables
+                    "is_boilerplate": len(variables) == 0,
+                    "is_seed": str(label).startswith("seed_"),
+                    "seed_label": str(label) if str(label).startswith("seed_") else None,
+                    "user_label": auto_label,
+                }))
+                created[struct_hash] = template_map[label] = str(template_id)
+
+                if auto_label:
+                    logger.info(f"🤖 AUTO-LABELED: Template {template_id} reconocido como '{auto_label}'")
+
+            rows = []
+            for upload, row in new_rows:
+                row["storage_path"] = upload.result()["uri"]
+                rows.append(row)
+
+        repo.insert_ignore(Template, rows)
+
+        # 3.1 MAPEO DE ZONAS (Fase 1-T07.1a)
+        # Solo plantillas creadas en este lote: las existentes conservan su mapeo.
+        # Ocurrencias de cada plantilla (clusters con el mismo patrón se suman)
+        new_ids = set(created.values())
+        occurrences = {}
+        for label, blocks in cluster_groups.items():
+            if template_map.get(label) not in new_ids:
+                continue
+            occurrences.setdefault(template_map[label], []).extend(
+                BlockOccurrence(
+                    doc_id=b['original_doc'],
+                    block_index=b['block_index'],
+                    total_blocks=b['total_blocks']
+                ) for b in blocks
+            )
+        self.mapper.process_mapping_batch(tenant_id, occurrences)
+
+        self.db.commit()
+        logger.info(f"Plantillas: {len(template_map)} ({len(rows)} nuevas, {len(existing)} existentes)")
+        return template_map
+
+    def _persist_skeletons(self, tenant_id: str, file_paths: List[str], doc_maps: Dict,
+                           all_blocks: List[Dict], final_labels: List, template_map: Dict,
+                           documents: DocxAtomizerCache) -> int:
+        """
+        Construye el esqueleto de cada documento y persiste los nuevos en bloque
+        (subidas en paralelo, INSERT ... ON CONFLICT DO NOTHING, un commit). Retorna cuántos creó.
+        """
+        repo = InductionRepository(self.db)
+
+        skeletons = []
         for f_idx, path in enumerate(file_paths):
-            block_indices = doc_maps[f_idx]
             skeleton_structure = []
-            
-            for b_idx in block_indices:
-                original_label = clustering_result.labels[b_idx]
-                label = merged_labels.get(original_label, -1)
-                block_data = all_blocks[b_idx]
-                
+            for b_idx in doc_maps[f_idx]:
+                label = final_labels[b_idx]
                 if label != -1 and label in template_map:
                     # Es una plantilla
                     skeleton_structure.append({
@@ -327,66 +429,61 @@ class IngestOrchestrator:
                     # Es ruido / texto estático
                     skeleton_structure.append({
                         "type": "static_text",
-                        "content": block_data['text']
+                        "content": all_blocks[b_idx]['text']
                     })
-            
-            # Guardar Skeleton en DB
             skel_hash = hashlib.sha256(str(skeleton_structure).encode()).hexdigest()
-            
-            existing_skel = self.db.query(Skeleton).filter_by(
-                tenant_id=tenant_id, content_hash=skel_hash
-            ).first()
-
-            if not existing_skel:
-                # 4.1 [NUEVO] Generar y Persistir Esqueleto OOXML Físico (Fase 1-T11.2)
-                ooxml_path = None
-                ooxml_version_id = None
-                
-                with DocxAtomizer(path) as atm:
-                    # Este método ahora inyecta anclas y CAPTURA tablas dinámicas
-                    skel_tree = atm.get_skeleton_tree()
-                    ooxml_bytes = atm.to_string(skel_tree)
-                    
-                    # A. Guardar Esqueleto OOXML
-                    ooxml_key = f"s3://astra-skeletons/{tenant_id}/{skel_hash}.xml"
-                    
-                    # [MODIFICADO] Capturar respuesta estructurada de almacenamiento (Fase 1-T13)
-                    upload_result = self.storage.upload_bytes(ooxml_bytes, ooxml_key)
-                    ooxml_path = upload_result["uri"]
-                    ooxml_version_id = upload_result.get("version_id")
-                    
-                    if ooxml_version_id:
-                        logger.info(f"Pinned Skeleton version: {ooxml_version_id}")
-                    
-                    # B. Guardar Tablas Dinámicas (Row Templates)
-                    for astra_id, table_xml in atm.dynamic_tables.items():
-                        table_key = f"s3://astra-templates/tables/{astra_id}.xml"
-                        
-                        # [MODIFICADO] Adaptarse al nuevo tipo de retorno
-                        table_upload_res = self.storage.upload_bytes(table_xml, table_key)
-                        
-                        # Registrar en DB
-                        if not self.db.query(TableTemplate).filter_by(id=astra_id).first():
-                            new_table_tmpl = TableTemplate(
-                                id=astra_id,
-                                tenant_id=tenant_id,
-                                storage_path=table_upload_res["uri"]
-                            )
-                            self.db.add(new_table_tmpl)
-                    
-                    self.db.commit()
-
-                new_skel = Skeleton(
-                    tenant_id=tenant_id,
-                    s3_path=f"s3://astra-skeletons/{tenant_id}/{skel_hash}.json",
-                    ooxml_path=ooxml_path,
-                    # [NUEVO] Persistencia del Version ID (Fase 1-T13)
-                    s3_version_id=ooxml_version_id,
-                    meta_xml=skeleton_structure,
-                    content_hash=skel_hash
-                )
-                self.db.add(new_skel)
-                self.db.commit()
-                logger.info(f"Skeleton OOXML y JSON guardados para {path} (Version: {ooxml_version_id})")
+            skeletons.append((path, skeleton_structure, skel_hash))
 
-        return f"Procesamiento completado. Plantillas detectadas: {len(template_map)}"
+        known_hashes = repo.get_existing_skeleton_hashes(item[2] for item in skeletons)
+
+        pending = []
+        table_uploads = {} # astra_id -> future
+        with ThreadPoolExecutor(max_workers=settings.INGEST_UPLOAD_WORKERS) as uploads:
+            for path, skeleton_structure, skel_hash in skeletons:
+                if skel_hash in known_hashes:
+                    continue
+                known_hashes.add(skel_hash)
+
+                # 4.1 Generar y Persistir Esqueleto OOXML Físico (Fase 1-T11.2)
+                atm = documents.get(path)
+                # Este método inyecta anclas y CAPTURA tablas dinámicas (sobre una copia del árbol)
+                skel_tree = atm.get_skeleton_tree()
+                ooxml_key = f"s3://astra-skeletons/{tenant_id}/{skel_hash}.xml"
+                upload = uploads.submit(self.storage.upload_bytes, atm.to_string(skel_tree), ooxml_key)
+
+                # Tablas Dinámicas (Row Templates)
+                for astra_id, table_xml in atm.dynamic_tables.items():
+                    table_key = f"s3://astra-templates/tables/{astra_id}.xml"
+                    table_uploads[astra_id] = uploads.submit(self.storage.upload_bytes, table_xml, table_key)
+
+                pending.append((path, skeleton_structure, skel_hash, upload))
+
+            skeleton_rows = []
+            for path, skeleton_structure, skel_hash, upload in pending:
+                # Respuesta estructurada de almacenamiento (Fase 1-T13)
+                upload_result = upload.result()
+                ooxml_version_id = upload_result.get("version_id")
+                if ooxml_version_id:
+                    logger.info(f"Pinned Skeleton version: {ooxml_version_id} ({path})")
+                skeleton_rows.append({
+                    "tenant_id": tenant_id,
+                    "s3_path": f"s3://astra-skeletons/{tenant_id}/{skel_hash}.json",
+                    "ooxml_path": upload_result["uri"],
+                    # Persistencia del Version ID (Fase 1-T13)
+                    "s3_version_id": ooxml_version_id,
+                    "meta_xml": skeleton_structure,
+                    "content_hash": skel_hash,
+                })
+
+            known_tables = repo.get_existing_table_ids(table_uploads)
+            table_rows = [
+                {"id": table_id, "tenant_id": tenant_id, "storage_path": upload.result()["uri"]}
+                for table_id, upload in ((uuid.UUID(str(a)), u) for a, u in table_uploads.items())
+                if table_id not in known_tables
+            ]
+
+        repo.insert_ignore(TableTemplate, table_rows)
+        repo.insert_ignore(Skeleton, skeleton_rows)
+        self.db.commit()
+        logger.info(f"Skeletons OOXML y JSON guardados: {len(skeleton_rows)} nuevos, {len(table_rows)} tablas dinámicas")
+        return len(skeleton_rows)
@@ -1,3 +1,4 @@
+import uuid
 import numpy as np
 import logging
 from typing import List, Dict, Any, Tuple
@@ -120,3 +121,45 @@ class HeuristicMapper:
         self.db.commit()
         logger.info(f"Auto-mapped template {template_id} to {zone_id} (conf: {confidence:.2f})")
         return existing_mapping or new_mapping
+
+    def process_mapping_batch(self, tenant_id: str, occurrences_by_template: Dict[str, List[BlockOccurrence]]) -> int:
+        """
+        Versión en bloque de process_mapping: una consulta IN para los mapeos existentes
+        y sin commit (lo hace el llamador al cerrar la etapa). Retorna cuántos mapeos escribió.
+        """
+        template_ids = [uuid.UUID(str(t)) for t in occurrences_by_template]
+        existing = {}
+        for start in range(0, len(template_ids), 500):
+            chunk = template_ids[start:start + 500]
+            for mapping in self.db.query(ZoneMapping).filter(ZoneMapping.template_id.in_(chunk)):
+                existing[mapping.template_id] = mapping
+
+        written = 0
+        for template_id, (raw_id, occurrences) in zip(template_ids, occurrences_by_template.items()):
+            mapping = existing.get(template_id)
+            if mapping and mapping.is_locked:
+                logger.info(f"Mapping para template {raw_id} está bloqueado por humano. Saltando auto-update.")
+                continue
+
+            stats = self.calculate_stats(occurrences)
+            zone_id, confidence = self.infer_zone(stats)
+
+            if mapping:
+                mapping.zone_id = zone_id
+                mapping.position_stats = stats
+                mapping.confidence_score = confidence
+                mapping.origin = MappingOrigin.AUTO
+            else:
+                self.db.add(ZoneMapping(
+                    tenant_id=tenant_id,
+                    template_id=template_id,
+                    zone_id=zone_id,
+                    position_stats=stats,
+                    confidence_score=confidence,
+                    origin=MappingOrigin.AUTO,
+                    is_locked=False
+                ))
+            written += 1
+
+        logger.info(f"Auto-mapped {written} templates en bloque")
+        return written
@@ -1,6 +1,11 @@
-import difflib
-from typing import List, Tuple
+import logging
+import random
+from collections import Counter
+from typing import Dict, List, Tuple
 from dataclasses import dataclass
+from rapidfuzz.distance import Levenshtein
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class Token:
@@ -17,11 +22,28 @@ class SequenceAligner:
     """
     Motor algorítmico para inducir plantillas a partir de variaciones de texto.
     Utiliza heurísticas de distancia de edición para detectar slots dinámicos.
+
+    Alineación progresiva contra un pivote:
+    - Los textos se tokenizan a IDs enteros y se deduplican (las listas de votación
+      repiten la misma línea cientos de veces).
+    - El pivote es el medoide de una muestra, no el primer texto del cluster.
+    - Cada secuencia única se alinea con Levenshtein.opcodes (rapidfuzz, en C) y se
+      acumula un perfil de frecuencias por posición del pivote y por hueco entre tokens
+      (inserciones), ponderado por las repeticiones de cada secuencia.
+    - Un token del pivote reemplazado o borrado en cualquier muestra es variable (un valor
+      poco frecuente, p. ej. un voto "NO", sigue siendo un valor). Los huecos con inserciones
+      solo abren slot si aparecen en más de `threshold` de las muestras, para no convertir
+      en variable el texto de una variante aislada.
+    - La alineación se detiene cuando el mapa de varianza deja de cambiar.
     """
 
+    PIVOT_SAMPLE = 32          # Secuencias candidatas a medoide
+    CONVERGENCE_WINDOW = 256   # Secuencias seguidas sin cambios en el mapa para detenerse
+
     def __init__(self, threshold: float = 0.3):
-        # Umbral: Si un token varía en más del 30% de las muestras, es variable.
+        # Umbral: un hueco con inserciones en más del 30% de las muestras abre un slot variable.
         self.threshold = threshold
+        self.last_stats: Dict[str, int] = {}
 
     def _tokenize(self, text: str) -> List[str]:
         """Tokenización simple preservando puntuación básica."""
@@ -40,58 +62,117 @@ class SequenceAligner:
             tokens = [Token(t, False) for t in self._tokenize(texts[0])]
             return TemplateModel(tokens, texts[0])
 
-        # 1. Usar la primera cadena como "pivote" o referencia
-        reference_tokens = self._tokenize(texts[0])
-        n_tokens = len(reference_tokens)
-        
-        # Mapa de varianza: [False, False, True, False] (True = es variable)
+        # 1. Tokens -> IDs enteros, deduplicando secuencias idénticas
+        vocab: Dict[str, int] = {}
+        words: List[str] = []
+        sequences = Counter()
+        for text in texts:
+            ids = []
+            for tok in self._tokenize(text):
+                if tok not in vocab:
+                    vocab[tok] = len(words)
+                    words.append(tok)
+                ids.append(vocab[tok])
+            sequences[tuple(ids)] += 1
+        unique = list(sequences.items())
+
+        # 2. Pivote: medoide (ponderado por frecuencia) de una muestra de secuencias
+        pivot_idx = self._select_pivot(unique)
+        pivot = unique[pivot_idx][0]
+        n_tokens = len(pivot)
+
+        # 3. Perfil posicional: reemplazos/borrados por token del pivote e inserciones
+        # por hueco (hueco i = antes del token i; hueco n_tokens = al final)
+        changed = [0] * n_tokens
+        inserted = [0] * (n_tokens + 1)
         variance_map = [False] * n_tokens
-        
-        # 2. Comparar cada texto contra el pivote usando SequenceMatcher
-        # Esto es O(N*M) donde N=docs y M=tokens. Aceptable para clusters < 100 items.
-        for text in texts[1:]:
-            current_tokens = self._tokenize(text)
-            matcher = difflib.SequenceMatcher(None, reference_tokens, current_tokens)
-            
-            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-                if tag == 'replace':
-                    # Si hubo reemplazo en el rango [i1:i2], marcar como variable
-                    for k in range(i1, i2):
-                        if k < n_tokens:
-                            variance_map[k] = True
-                elif tag == 'delete':
-                    # Si se borró algo que estaba en la referencia, la referencia en ese punto es inestable
-                    for k in range(i1, i2):
-                        if k < n_tokens:
-                            variance_map[k] = True
-                elif tag == 'insert':
-                    # Inserciones complejas rompen la alineación posicional simple del pivote.
-                    # Estrategia MVP: Ignorar inserciones puras que no reemplazan, 
-                    # o marcar el token previo/posterior como variable expansiva.
-                    # Para este nivel, asumimos estructura rígida.
-                    pass
-
-        # 3. Construir el modelo final
+        slot_map = [False] * (n_tokens + 1)
+        # Muestras vistas (el pivote cuenta con sus repeticiones: coincide consigo mismo)
+        total = unique[pivot_idx][1]
+
+        order = [i for i in range(len(unique)) if i != pivot_idx]
+        random.Random(0).shuffle(order)
+
+        aligned = 0
+        stable_for = 0
+        for i in order:
+            ids, count = unique[i]
+            aligned += 1
+            total += count
+            for op in Levenshtein.opcodes(pivot, ids):
+                if op.tag in ('replace', 'delete'):
+                    for k in range(op.src_start, op.src_end):
+                        changed[k] += count
+                elif op.tag == 'insert':
+                    inserted[op.src_start] += count
+
+            # Reemplazo/borrado observado => variable; inserción => slot si supera `threshold`
+            limit = self.threshold * total
+            current_variance = [c > 0 for c in changed]
+            current_slots = [c > limit for c in inserted]
+            flipped = current_variance != variance_map or current_slots != slot_map
+            variance_map, slot_map = current_variance, current_slots
+
+            stable_for = 0 if flipped else stable_for + 1
+            if stable_for >= self.CONVERGENCE_WINDOW:
+                break
+
+        self.last_stats = {
+            "texts": len(texts),
+            "unique": len(unique),
+            "aligned": aligned,
+            "pivot_tokens": n_tokens,
+        }
+        if aligned < len(order):
+            logger.debug(f"Inducción convergió tras {aligned}/{len(order)} secuencias únicas")
+
+        # 4. Construir el modelo final
         final_tokens = []
         var_counter = 1
-        
-        for i, token_text in enumerate(reference_tokens):
+
+        def add_variable():
+            nonlocal var_counter
+            # Fusión de variables contiguas
+            # Si el anterior ya era variable, no creamos uno nuevo, asumimos slot continuo
+            if final_tokens and final_tokens[-1].is_variable:
+                return
+            final_tokens.append(Token(
+                text="{VAR}", 
+                is_variable=True, 
+                variable_name=f"VAR_{var_counter}"
+            ))
+            var_counter += 1
+
+        for i, token_id in enumerate(pivot):
+            if slot_map[i]:
+                add_variable()
             if variance_map[i]:
-                # Fusión de variables contiguas
-                # Si el anterior ya era variable, no creamos uno nuevo, asumimos slot continuo
-                if final_tokens and final_tokens[-1].is_variable:
-                    continue
-                
-                final_tokens.append(Token(
-                    text="{VAR}", 
-                    is_variable=True, 
-                    variable_name=f"VAR_{var_counter}"
-                ))
-                var_counter += 1
+                add_variable()
             else:
-                final_tokens.append(Token(text=token_text, is_variable=False))
+                final_tokens.append(Token(text=words[token_id], is_variable=False))
+        if slot_map[n_tokens]:
+            add_variable()
 
         # Reconstruir patrón string para debugging/hashing
         raw_pattern = " ".join([t.text if not t.is_variable else f"{{{t.variable_name}}}" for t in final_tokens])
 
-        return TemplateModel(tokens=final_tokens, raw_pattern=raw_pattern)
\ No newline at end of file
+        return TemplateModel(tokens=final_tokens, raw_pattern=raw_pattern)
+
+    def _select_pivot(self, unique: List[Tuple[tuple, int]]) -> int:
+        """
+        Índice de la secuencia con menor distancia de edición total (ponderada por cuántas
+        veces aparece cada secuencia) contra una muestra de las más frecuentes.
+        """
+        if len(unique) == 1:
+            return 0
+        candidates = sorted(range(len(unique)), key=lambda i: -unique[i][1])[:self.PIVOT_SAMPLE]
+
+        best_idx, best_cost = candidates[0], None
+        for i in candidates:
+            cost = sum(
+                Levenshtein.normalized_distance(unique[i][0], unique[j][0]) * unique[j][1]
+                for j in candidates if j != i
+            )
+            if best_cost is None or cost < best_cost:
+                best_idx, best_cost = i, cost
+        return best_idx
@@ -67,8 +67,9 @@ class TextSanitizer:
         if not self.nlp:
             return text
 
-        doc = self.nlp(text)
-        
+        return self._replace_entities(text, self.nlp(text))
+
+    def _replace_entities(self, text: str, doc) -> str:
         # Creamos una lista de reemplazos.
         # Es crítico iterar en reverso para no alterar los índices de caracteres
         # de entidades que aparecen antes en el string.
@@ -89,6 +90,17 @@ class TextSanitizer:
             
         return "".join(text_list)
 
+    def sanitize_many(self, texts: List[str], anonymize: bool = True, batch_size: int = 64) -> List[str]:
+        """Versión en lote de `sanitize`: el NER corre con `nlp.pipe` sobre todos los textos."""
+        clean_texts = [self._clean_regex(t) if t else "" for t in texts]
+        if not anonymize or not self.nlp:
+            return clean_texts
+
+        results = []
+        for text, doc in zip(clean_texts, self.nlp.pipe(clean_texts, batch_size=batch_size)):
+            results.append(self._replace_entities(text, doc))
+        return results
+
     def sanitize(self, text: str, anonymize: bool = True) -> str:
         """
         Ejecuta el pipeline completo de limpieza.
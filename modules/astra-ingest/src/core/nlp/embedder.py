@@ -1,8 +1,10 @@
 import logging
+import numpy as np
 import torch
 import threading  # <--- NUEVO IMPORT
 from typing import List, Optional
 from sentence_transformers import SentenceTransformer
+from src.core.nlp.embedding_cache import EmbeddingCache
 
 # Configuración de Logging
 logger = logging.getLogger(__name__)
@@ -75,6 +77,10 @@ class TextEmbedder:
         if not texts:
             return []
 
+        # Convertir numpy array a lista nativa de Python (serializable)
+        return self._encode(texts, batch_size).tolist()
+
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
         # Asegurar que el modelo esté cargado de forma segura entre hilos
         if self._model is None:
             with self._lock:  # <--- NUEVO
@@ -87,7 +93,7 @@ class TextEmbedder:
             
             # <--- NUEVO: Bloqueamos el uso del modelo para evitar colisiones de memoria en el Mac
             with self._lock:
-                embeddings = self._model.encode(
+                return self._model.encode(
                     texts,
                     batch_size=batch_size,
                     show_progress_bar=False,
@@ -95,13 +101,40 @@ class TextEmbedder:
                     normalize_embeddings=True
                 )
             
-            # Convertir numpy array a lista nativa de Python (serializable)
-            return embeddings.tolist()
-            
         except Exception as e:
             logger.error(f"Error generando embeddings para batch de tamaño {len(texts)}: {e}")
             raise
 
+    def embed_corpus(self, texts: List[str], batch_size: int = 128,
+                     cache: Optional[EmbeddingCache] = None, chunk_size: int = 8192) -> np.ndarray:
+        """
+        Vectoriza un corpus completo en pocas pasadas grandes del modelo.
+
+        - Deduplica los textos y consulta la caché persistente (si se entrega).
+        - Ordena los faltantes por longitud para minimizar el padding de cada lote.
+        - Codifica de a `chunk_size` textos y persiste cada tramo en la caché.
+        - Retorna una matriz float32 (N x dim) alineada con `texts`.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        hashes = [EmbeddingCache.text_hash(t) for t in texts]
+        unique = dict(zip(hashes, texts))
+        vectors = cache.get_many(list(unique)) if cache is not None else {}
+
+        missing = [h for h in unique if h not in vectors]
+        missing.sort(key=lambda h: len(unique[h]), reverse=True)
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            encoded = np.asarray(self._encode([unique[h] for h in chunk], batch_size), dtype=np.float32)
+            new_vectors = dict(zip(chunk, encoded))
+            vectors.update(new_vectors)
+            if cache is not None:
+                cache.put_many(new_vectors.items())
+
+        logger.info(f"Corpus vectorizado: {len(texts)} textos, {len(unique)} únicos, {len(missing)} codificados")
+        return np.stack([vectors[h] for h in hashes])
+
     @property
     def is_loaded(self) -> bool:
         """Verifica si el modelo ya está en memoria."""
@@ -0,0 +1,134 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional
+
+import numpy as np
+
+from src.core.nlp.embedder import TextEmbedder
+from src.core.nlp.embedding_cache import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class EmbeddingBatcher:
+    """
+    Servicio de embeddings con un único hilo dueño del modelo.
+    Varios productores (hilos o tareas asyncio) envían listas de textos con submit(); el hilo
+    junta los pedidos que llegan dentro de `max_wait_ms` (hasta `max_batch_texts` textos) y los
+    codifica en una sola pasada de embed_corpus, que además deduplica y ordena por longitud.
+    Así el lock de TextEmbedder deja de ser un punto de contención entre filas.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[TextEmbedder] = None,
+        max_batch_texts: int = 2048,
+        max_wait_ms: float = 20.0,
+        batch_size: int = 128,
+        cache: Optional[EmbeddingCache] = None
+    ):
+        self.embedder = embedder or TextEmbedder()
+        self.max_batch_texts = max_batch_texts
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_size = batch_size
+        self.cache = cache
+
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        # Protege _thread/_closed: ningún submit() puede encolar detrás de _STOP
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self) -> "EmbeddingBatcher":
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("EmbeddingBatcher cerrado")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """Atiende los pedidos ya encolados y detiene el hilo; submit() posteriores fallan."""
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Encola textos; el Future resuelve a una matriz float32 (len(texts) x dim) alineada con ellos."""
+        future: Future = Future()
+        if not texts:
+            future.set_result(np.empty((0, 0), dtype=np.float32))
+            return future
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("EmbeddingBatcher cerrado")
+            if self._thread is None:
+                raise RuntimeError("EmbeddingBatcher no iniciado (usar start() o 'with')")
+            self._queue.put((list(texts), future))
+        return future
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Versión bloqueante de submit()."""
+        return self.submit(texts).result()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            pending = [item]
+            n_texts = len(item[0])
+            deadline = time.monotonic() + self.max_wait
+            while n_texts < self.max_batch_texts:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                pending.append(item)
+                n_texts += len(item[0])
+
+            self._encode(pending)
+
+    def _encode(self, pending):
+        texts = [t for request_texts, _ in pending for t in request_texts]
+        try:
+            vectors = self.embedder.embed_corpus(texts, batch_size=self.batch_size, cache=self.cache)
+        except Exception as e:
+            logger.error(f"Error en lote de embeddings ({len(pending)} pedidos, {len(texts)} textos): {e}")
+            for _, future in pending:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.requests += len(pending)
+        self.texts += len(texts)
+
+        offset = 0
+        for request_texts, future in pending:
+            future.set_result(vectors[offset:offset + len(request_texts)])
+            offset += len(request_texts)
@@ -1,4 +1,4 @@
-from .xml_engine import DocxAtomizer
+from .xml_engine import DocxAtomizer, DocxAtomizerCache
 from .style_parser import StyleParser
 from .style_mapper import StyleMapper
 from .table_standardizer import TableStandardizer
@@ -3,7 +3,7 @@ import zipfile
 import io
 import copy
 from lxml import etree
-from src.core.parser.xml_engine import DocxAtomizer
+from src.core.parser.xml_engine import DocxAtomizer, DocxAtomizerCache
 from src.core.constants import OOXML_NAMESPACES
 
 # ... (Helper create_dummy_docx existente del T02a) ...
@@ -206,3 +206,52 @@ class TestDocxExtraction:
             # 5. Verificar que el blob XML fue capturado en el atomizer
             assert astra_tbl_id in atomizer.dynamic_tables
             assert b'Juan Perez' not in atomizer.dynamic_tables[astra_tbl_id]
+
+
+NODE_INDEX_XML = (
+    b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    b'<w:body>'
+    b'<w:p w:rsidR="00A1"><w:r><w:t>Primero</w:t></w:r></w:p>'
+    b'<w:tbl><w:tr w:rsidR="00B2"><w:tc><w:p w:rsidR="00C3"><w:r><w:t>Celda</w:t></w:r></w:p></w:tc></w:tr></w:tbl>'
+    b'<w:p w:rsidR="00C3"><w:r><w:t>Repetido</w:t></w:r></w:p>'
+    b'</w:body></w:document>'
+)
+
+
+class TestDocxAtomizerNodeIndex:
+
+    @pytest.mark.parametrize("node_id", ["00A1", "00B2", "00C3", "FFFF"])
+    def test_find_node_matches_xpath(self, node_id):
+        with DocxAtomizer(create_dummy_docx(NODE_INDEX_XML)) as atomizer:
+            nodes = atomizer.document_tree.xpath(f'//*[@w:rsidR="{node_id}"]', namespaces=OOXML_NAMESPACES)
+            expected = nodes[0] if nodes else None
+            assert atomizer.find_node(node_id) is expected
+
+
+class TestDocxAtomizerCache:
+
+    def _write(self, tmp_path, name):
+        path = tmp_path / name
+        path.write_bytes(create_dummy_docx(NODE_INDEX_XML).getvalue())
+        return str(path)
+
+    def test_reuses_open_documents(self, tmp_path):
+        path = self._write(tmp_path, "a.docx")
+        with DocxAtomizerCache(max_open=2) as cache:
+            first = cache.get(path)
+            assert cache.get(path) is first
+            assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_evicts_least_recently_used_and_closes_it(self, tmp_path):
+        a, b, c = (self._write(tmp_path, f"{n}.docx") for n in "abc")
+        with DocxAtomizerCache(max_open=2) as cache:
+            atm_a = cache.get(a)
+            cache.get(b)
+            cache.get(a)  # 'b' pasa a ser el menos reciente
+            atm_b = cache._open[b]
+            cache.get(c)
+
+            assert list(cache._open) == [a, c]
+            assert atm_b._zip_file.fp is None
+            assert atm_a._zip_file.fp is not None
+        assert atm_a._zip_file.fp is None
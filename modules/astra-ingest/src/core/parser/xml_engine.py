@@ -1,5 +1,6 @@
 import zipfile
 import copy
+from collections import OrderedDict
 from pathlib import Path
 from typing import Union, BinaryIO, Optional
 from lxml import etree
@@ -19,6 +20,7 @@ class DocxAtomizer:
         self._source = source
         self._zip_file: Optional[zipfile.ZipFile] = None
         self._document_tree: Optional[etree._ElementTree] = None
+        self._node_index: Optional[dict] = None # w:rsidR -> primer nodo con ese valor
         self.dynamic_tables: dict[str, bytes] = {} # astra_id -> xml_template_row
         
         # Configuración de Seguridad del Parser XML
@@ -67,6 +69,21 @@ class DocxAtomizer:
     def namespaces(self) -> dict:
         return OOXML_NAMESPACES
 
+    def find_node(self, node_id: str) -> Optional[etree._Element]:
+        """
+        Equivalente a xpath('//*[@w:rsidR=node_id]')[0] en O(1).
+        El índice se construye con una sola pasada sobre el árbol en la primera consulta.
+        """
+        if self._node_index is None:
+            rsid_attr = f"{{{self.namespaces['w']}}}rsidR"
+            index = {}
+            for node in self.document_tree.getroot().iter():
+                value = node.get(rsid_attr)
+                if value is not None and value not in index:
+                    index[value] = node
+            self._node_index = index
+        return self._node_index.get(node_id)
+
     def _get_node_style(self, node: etree._Element) -> Optional[str]:
         """Extrae el nombre del estilo aplicado a un párrafo o run."""
         w_ns = self.namespaces['w']
@@ -275,4 +292,44 @@ class DocxAtomizer:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
\ No newline at end of file
+        self.close()
+
+class DocxAtomizerCache:
+    """
+    LRU acotado de DocxAtomizer abiertos (ZIP + árbol parseado + índice de nodos) para
+    reutilizar un mismo documento entre clusters y esqueletos durante un batch de ingesta.
+    Los atomizers expulsados se cierran; el resto se cierra con close() o al salir del `with`.
+    """
+
+    def __init__(self, max_open: int = 64):
+        self.max_open = max(1, max_open)
+        self._open: "OrderedDict[str, DocxAtomizer]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Union[str, Path]) -> DocxAtomizer:
+        key = str(path)
+        atomizer = self._open.get(key)
+        if atomizer is not None:
+            self._open.move_to_end(key)
+            self.hits += 1
+            return atomizer
+
+        self.misses += 1
+        atomizer = DocxAtomizer(path)
+        self._open[key] = atomizer
+        if len(self._open) > self.max_open:
+            _, evicted = self._open.popitem(last=False)
+            evicted.close()
+        return atomizer
+
+    def close(self):
+        while self._open:
+            _, atomizer = self._open.popitem()
+            atomizer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
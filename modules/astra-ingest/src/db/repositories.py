@@ -1,6 +1,10 @@
+import uuid
+from typing import Dict, Iterable, List, Set
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
-from src.db.models import StyleMap
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.db.models import StyleMap, Template, LabelCatalog, EntityType, Skeleton, TableTemplate
 import json
 
 class StyleMapRepository:
@@ -25,4 +29,62 @@ class StyleMapRepository:
 
     def get_mapping(self, tenant_id: str) -> dict:
         result = self.db.query(StyleMap).filter(StyleMap.tenant_id == tenant_id).first()
-        return result.mapping_dict if result else {}
\ No newline at end of file
+        return result.mapping_dict if result else {}
+
+class InductionRepository:
+    """
+    Acceso en bloque para la persistencia de IngestOrchestrator.process_batch.
+    Las existencias se precargan con pocas consultas IN y las filas nuevas entran con
+    INSERT ... ON CONFLICT DO NOTHING. Nunca hace commit: el llamador confirma una vez por etapa.
+    """
+
+    IN_CHUNK_SIZE = 500
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _chunks(self, values: Iterable) -> Iterable[List]:
+        values = list(dict.fromkeys(values))
+        for start in range(0, len(values), self.IN_CHUNK_SIZE):
+            yield values[start:start + self.IN_CHUNK_SIZE]
+
+    def get_templates_by_hash(self, tenant_id: str, hashes: Iterable[str]) -> Dict[str, Template]:
+        found = {}
+        for chunk in self._chunks(hashes):
+            rows = self.db.query(Template).filter(
+                Template.tenant_id == tenant_id, Template.structure_hash.in_(chunk)
+            ).all()
+            for tmpl in rows:
+                found.setdefault(tmpl.structure_hash, tmpl)
+        return found
+
+    def get_labels_by_hash(self, tenant_id: str, hashes: Iterable[str], entity_type: EntityType) -> Dict[str, str]:
+        found = {}
+        for chunk in self._chunks(hashes):
+            rows = self.db.query(LabelCatalog.entity_hash, LabelCatalog.label_name).filter(
+                LabelCatalog.tenant_id == tenant_id,
+                LabelCatalog.entity_type == entity_type,
+                LabelCatalog.entity_hash.in_(chunk)
+            )
+            found.update(rows)
+        return found
+
+    def get_existing_skeleton_hashes(self, hashes: Iterable[str]) -> Set[str]:
+        # content_hash es único global (no por tenant)
+        found = set()
+        for chunk in self._chunks(hashes):
+            found.update(h for (h,) in self.db.query(Skeleton.content_hash).filter(Skeleton.content_hash.in_(chunk)))
+        return found
+
+    def get_existing_table_ids(self, table_ids: Iterable[str]) -> Set[uuid.UUID]:
+        found = set()
+        for chunk in self._chunks(uuid.UUID(str(t)) for t in table_ids):
+            found.update(t for (t,) in self.db.query(TableTemplate.id).filter(TableTemplate.id.in_(chunk)))
+        return found
+
+    def insert_ignore(self, model, rows: List[dict]) -> None:
+        """INSERT multi-fila que ignora conflictos de llave (Postgres en producción, SQLite en tests)."""
+        if not rows:
+            return
+        dialect_insert = sqlite_insert if self.db.get_bind().dialect.name == "sqlite" else insert
+        self.db.execute(dialect_insert(model).on_conflict_do_nothing(), rows)
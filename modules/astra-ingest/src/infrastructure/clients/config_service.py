@@ -1,6 +1,6 @@
 import logging
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -9,36 +9,66 @@ class ConfigServiceClient:
     Cliente para comunicarse con el Tenant Config Service.
     Maneja la propagación de configuraciones.
     """
-    
+
     def __init__(self, base_url: str = "http://tenant-config-service:8080", api_key: str = ""):
         self.base_url = base_url
         self.headers = {
             "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
+            "Content-Type": "application/merge-patch+json"
         }
+        # Sesión keep-alive: las sincronizaciones automáticas son frecuentes
+        self.session = requests.Session()
+
+    def patch_config(
+        self,
+        tenant_id: str,
+        patch: Dict[str, Any],
+        expected_version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Aplica un JSON Merge Patch (RFC 7386) sobre la configuración del tenant.
+        Solo viajan las entradas modificadas; una llave con valor None se elimina del mapa.
+
+        Args:
+            expected_version: Si se indica, el servicio rechaza (412) el cambio cuando
+                la versión actual es otra (control de concurrencia optimista).
+
+        Returns:
+            Configuración resultante (incluye la nueva `version`).
+        """
+        url = f"{self.base_url}/v1/config/{tenant_id}"
+        headers = dict(self.headers)
+        if expected_version is not None:
+            headers["If-Match"] = f'"{expected_version}"'
+
+        response = self.session.patch(url, json=patch, headers=headers, timeout=5)
+        response.raise_for_status()
+        return response.json()
 
     def update_zone_mappings(self, tenant_id: str, mappings: Dict[str, Any]) -> bool:
         """
         Envía los mapeos al servicio de configuración.
-        
+
         Args:
             tenant_id: ID del inquilino.
-            mappings: Payload con formato {"mappings": [{"template_id": "...", "zone": "..."}]}
-            
+            mappings: Payload con formato {"mappings": [{"template_id": "...", "target_placeholder": "..."}]}
+
         Returns:
             True si fue exitoso (200 OK), False o Exception en caso contrario.
         """
-        url = f"{self.base_url}/config/{tenant_id}/zones"
-        
+        # Solo las zonas modificadas: el servicio las fusiona con el zone_map existente
+        zone_patch = {
+            item["template_id"]: item["target_placeholder"]
+            for item in mappings.get("mappings", [])
+        }
+        if not zone_patch:
+            return True
+
         try:
-            # En producción, usar requests.put o .post según contrato
-            # response = requests.post(url, json=mappings, headers=self.headers, timeout=5)
-            # response.raise_for_status()
-            
-            # Simulación de éxito para desarrollo local sin el servicio levantado
-            logger.info(f"📡 [SIMULACIÓN] Enviando a {url}: {len(mappings.get('mappings', []))} reglas.")
+            result = self.patch_config(tenant_id, {"zone_map": zone_patch})
+            logger.info(f"📡 {len(zone_patch)} zonas sincronizadas para {tenant_id} (config v{result.get('version')}).")
             return True
-            
+
         except requests.exceptions.RequestException as e:
             logger.error(f"❌ Error comunicando con Tenant Config Service: {e}")
-            raise e
\ No newline at end of file
+            raise e
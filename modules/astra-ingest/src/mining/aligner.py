@@ -1,7 +1,7 @@
 import logging
 import numpy as np
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
 from sklearn.metrics.pairwise import cosine_similarity
 from numba import njit
@@ -18,6 +18,12 @@ class AlignerConfig(BaseModel):
     threshold: float = Field(0.35, description="Similitud mínima")
     gap_penalty_base: float = Field(0.0, description="Penalización por saltos (Desactivada)")
     merge_discount: float = Field(1.0, description="Descuento al fusionar (Desactivado)")
+    dp_mode: str = Field("auto", description="'full', 'banded' o 'auto' (banded por encima de full_dp_max_cells)")
+    full_dp_max_cells: int = Field(4_000_000, description="Celdas N×M máximas para la DP completa en modo auto")
+    band_ratio: float = Field(0.1, description="Semiancho de la banda diagonal como fracción de los nodos XML")
+    band_min_cols: int = Field(64, description="Semiancho mínimo de la banda (columnas)")
+    band_block_rows: int = Field(256, description="Filas de audio por bloque de similitud calculado")
+    debug_dump_path: Optional[str] = Field(None, description="Si se define, vuelca la matriz S parcial a este CSV")
 
 # ==========================================
 # DEBUGGER INTERNO
@@ -50,7 +56,7 @@ def dump_debug_matrix(S: np.ndarray, filename="debug_similarity_matrix.csv"):
 def compute_dp_matrix(S: np.ndarray, threshold: float, gap_pen: float, merge_disc: float):
     N, M = S.shape
     DP = np.zeros((N + 1, M + 1), dtype=np.float32)
-    pointers = np.zeros((N + 1, M + 1), dtype=np.int32) 
+    pointers = np.zeros((N + 1, M + 1), dtype=np.int8) 
     
     MATCH = 0; MERGE_AUDIO = 1; MERGE_XML = 2; SKIP_AUDIO = 3; SKIP_XML = 4
 
@@ -92,6 +98,87 @@ def compute_dp_matrix(S: np.ndarray, threshold: float, gap_pen: float, merge_dis
 
     return DP, pointers
 
+@njit
+def compute_banded_dp_rows(S_blk: np.ndarray, col0: int, row0: int, lo: np.ndarray, hi: np.ndarray,
+                           prev: np.ndarray, cur: np.ndarray, pointers: np.ndarray,
+                           threshold: float, gap_pen: float, merge_disc: float):
+    """
+    Mismas transiciones que compute_dp_matrix, pero solo dentro de la banda [lo[i], hi[i]]
+    (columnas DP, inclusivas) de cada fila i. Procesa las filas DP row0+1 .. row0+len(S_blk);
+    S_blk[k, c] = S[row0 + k, col0 + c]. `prev` trae la fila row0 (en coordenadas de su banda)
+    y al terminar contiene la última fila procesada. Fuera de la banda la celda es inalcanzable,
+    salvo la fila 0 y la columna 0 (valen 0, igual que en la DP completa).
+    """
+    NEG = -1e30
+    MATCH = 0; MERGE_AUDIO = 1; MERGE_XML = 2; SKIP_AUDIO = 3; SKIP_XML = 4
+
+    for k in range(S_blk.shape[0]):
+        i = row0 + k + 1
+        a = lo[i]; b = hi[i]
+        pa = lo[i - 1]; pb = hi[i - 1]
+        for j in range(a, b + 1):
+            sim = S_blk[k, j - 1 - col0]
+            score_gain = sim if sim >= threshold else -0.1
+
+            if i == 1 or j == 1:
+                diag = 0.0
+            elif pa <= j - 1 and j - 1 <= pb:
+                diag = prev[j - 1 - pa]
+            else:
+                diag = NEG
+            if i == 1:
+                up = 0.0
+            elif pa <= j and j <= pb:
+                up = prev[j - pa]
+            else:
+                up = NEG
+            if j == 1:
+                left = 0.0
+            elif j - 1 >= a:
+                left = cur[j - 1 - a]
+            else:
+                left = NEG
+
+            s_match   = diag + score_gain
+            s_merge_a = up   + (score_gain * merge_disc)
+            s_merge_x = left + (score_gain * merge_disc)
+            s_skip_a  = up   - gap_pen
+            s_skip_x  = left - gap_pen
+
+            best_s = s_match
+            best_ptr = MATCH
+
+            if s_merge_a > best_s: best_s = s_merge_a; best_ptr = MERGE_AUDIO
+            if s_merge_x > best_s: best_s = s_merge_x; best_ptr = MERGE_XML
+            if s_skip_a > best_s:  best_s = s_skip_a;  best_ptr = SKIP_AUDIO
+            if s_skip_x > best_s:  best_s = s_skip_x;  best_ptr = SKIP_XML
+
+            cur[j - a] = best_s
+            pointers[i, j - a] = best_ptr
+
+        for t in range(b - a + 1):
+            prev[t] = cur[t]
+
+class EmbeddingSimilarity:
+    """
+    Vista perezosa de S = audio · xmlᵀ sobre embeddings normalizados: indexable como la
+    matriz densa (S[a, x], S.shape) pero solo calcula las celdas que se consultan.
+    """
+
+    def __init__(self, audio_emb: np.ndarray, xml_emb: np.ndarray):
+        self.audio_emb = audio_emb
+        self.xml_emb = xml_emb
+        self.shape = (len(audio_emb), len(xml_emb))
+
+    def __getitem__(self, idx) -> float:
+        a, x = idx
+        return float(self.audio_emb[a] @ self.xml_emb[x])
+
+def _normalize_rows(emb: np.ndarray) -> np.ndarray:
+    emb = np.asarray(emb, dtype=np.float32)
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    return emb / np.maximum(norms, 1e-12)
+
 # ==========================================
 # ALINEADOR
 # ==========================================
@@ -104,11 +191,29 @@ class SemanticAligner:
             soft_max_duration_sec=40.0
         )
 
+    def cache_fingerprint(self) -> Dict[str, Any]:
+        """Todo lo que determina los pares alineados además de las entradas (llave de caché)."""
+        chunker = self.chunker
+        return {
+            "aligner": self.config.model_dump(exclude={"debug_dump_path"}),
+            "chunker": {
+                "base_threshold": chunker.base_threshold,
+                "min_duration": chunker.min_duration,
+                "soft_max": chunker.soft_max,
+                "hard_max": chunker.hard_max,
+                "silence_penalty": chunker.silence_penalty,
+                "speaker_change_penalty": chunker.speaker_change_penalty,
+                "ema_alpha": chunker.ema_alpha,
+                "overlap": chunker.overlap,
+            },
+            "embedding_model": self.embedder.MODEL_NAME,
+        }
+
     def align(self, transcript_segments: List, xml_nodes: List) -> List[Dict[str, Any]]:
         # 1. Validaciones de Entrada
         logger.info(f"🔍 [DEBUG] Input Raw: {len(transcript_segments)} segmentos, {len(xml_nodes)} nodos XML.")
         
-        valid_xmls = [n for n in xml_nodes if n.get("text") and len(n.get("text", "").strip()) > 5]
+        valid_xmls = self.filter_xml_nodes(xml_nodes)
         audio_chunks = self.chunker.chunk_transcript(transcript_segments)
         
         logger.info(f"🔍 [DEBUG] Pre-processed: {len(audio_chunks)} Audio Chunks, {len(valid_xmls)} XML Nodes.")
@@ -128,14 +233,30 @@ class SemanticAligner:
         logger.info("🧠 Generando embeddings...")
         xml_emb = np.array(self.embedder.embed_batch(xml_texts))
         audio_emb = np.array(self.embedder.embed_batch(audio_texts))
-        
+
+        return self.align_embedded(audio_chunks, valid_xmls, audio_emb, xml_emb)
+
+    @staticmethod
+    def filter_xml_nodes(xml_nodes: List) -> List:
+        return [n for n in xml_nodes if n.get("text") and len(n.get("text", "").strip()) > 5]
+
+    def align_embedded(self, audio_chunks: List, valid_xmls: List, audio_emb: np.ndarray, xml_emb: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Similitud, DP y backtracking con los embeddings ya calculados (no usa el modelo):
+        permite correr esta etapa en otro proceso mientras el modelo atiende otras filas.
+        """
+        if not valid_xmls or not audio_chunks:
+            return []
+
+        if self._use_banded(len(audio_chunks), len(valid_xmls)):
+            return self._align_banded(audio_emb, xml_emb, audio_chunks, valid_xmls)
+
         # 4. Cálculo de Matriz S
         logger.info(f"🧮 Calculando Similitud Coseno ({len(audio_chunks)}x{len(valid_xmls)})...")
         S = cosine_similarity(audio_emb, xml_emb).astype(np.float32)
         
-        # ---> DEBUG DUMP <---
-        dump_debug_matrix(S, "debug_S.csv")
-        # --------------------
+        if self.config.debug_dump_path:
+            dump_debug_matrix(S, self.config.debug_dump_path)
 
         # 5. Programación Dinámica
         DP, pointers = compute_dp_matrix(
@@ -148,7 +269,83 @@ class SemanticAligner:
         # 6. Backtracking
         return self._backtrack_and_assemble(pointers, S, audio_chunks, valid_xmls)
 
-    def _backtrack_and_assemble(self, pointers: np.ndarray, S: np.ndarray, audio_chunks: List, valid_xmls: List) -> List:
+    def _use_banded(self, n_audio: int, n_xml: int) -> bool:
+        if self.config.dp_mode == "auto":
+            return n_audio * n_xml > self.config.full_dp_max_cells
+        return self.config.dp_mode == "banded"
+
+    def estimate_band(self, audio_chunks: List, valid_xmls: List):
+        """
+        Banda diagonal por fila DP (lo[i], hi[i], columnas 1..M inclusivas; la fila 0 no se usa).
+        El centro de cada chunk de audio sale de su posición temporal en la sesión comparada con
+        la posición de cada nodo en el documento (largo de texto acumulado). La banda se fuerza
+        monótona y contigua entre filas para que la DP siempre tenga un camino, y la última
+        fila llega a la columna M (origen del backtracking).
+        """
+        N, M = len(audio_chunks), len(valid_xmls)
+
+        starts = [c.get("start") for c in audio_chunks]
+        if all(t is not None for t in starts) and max(starts) > min(starts):
+            t = np.asarray(starts, dtype=np.float64)
+            audio_pos = (t - t.min()) / (t.max() - t.min())
+        else:
+            audio_pos = np.arange(N) / max(N - 1, 1)
+
+        lengths = np.array([max(len(n.get("text", "")), 1) for n in valid_xmls], dtype=np.float64)
+        doc_pos = (np.cumsum(lengths) - lengths) / lengths.sum() # Inicio relativo de cada nodo
+
+        centers = np.searchsorted(doc_pos, audio_pos, side="right") # Columna DP (1..M)
+        half = max(self.config.band_min_cols, int(self.config.band_ratio * M))
+
+        lo = np.maximum.accumulate(np.clip(centers - half, 1, M))
+        hi = np.maximum.accumulate(np.clip(centers + half, 1, M))
+        hi[-1] = M
+        lo[1:] = np.minimum(lo[1:], hi[:-1])
+
+        lo = np.concatenate(([1], lo)).astype(np.int64)
+        hi = np.concatenate(([M], hi)).astype(np.int64)
+        return lo, hi
+
+    def compute_banded_pointers(self, audio_emb: np.ndarray, xml_emb: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """
+        DP por bloques de filas: la similitud de cada bloque se calcula solo sobre las columnas
+        que toca su banda y se descarta al avanzar. Retorna punteros int8 (N+1, ancho de banda).
+        """
+        N = len(audio_emb)
+        width = int((hi[1:] - lo[1:]).max()) + 1
+        pointers = np.zeros((N + 1, width), dtype=np.int8)
+        prev = np.zeros(width, dtype=np.float32)
+        cur = np.zeros(width, dtype=np.float32)
+
+        block_rows = max(1, self.config.band_block_rows)
+        for row0 in range(0, N, block_rows):
+            row1 = min(row0 + block_rows, N)
+            col0, col1 = int(lo[row0 + 1]) - 1, int(hi[row1])
+            S_blk = np.ascontiguousarray(audio_emb[row0:row1] @ xml_emb[col0:col1].T, dtype=np.float32)
+
+            if row0 == 0 and self.config.debug_dump_path:
+                dump_debug_matrix(S_blk, self.config.debug_dump_path)
+
+            compute_banded_dp_rows(
+                S_blk, col0, row0, lo, hi, prev, cur, pointers,
+                self.config.threshold, self.config.gap_penalty_base, self.config.merge_discount
+            )
+        return pointers
+
+    def _align_banded(self, audio_emb, xml_emb, audio_chunks: List, valid_xmls: List) -> List[Dict[str, Any]]:
+        audio_emb = _normalize_rows(audio_emb)
+        xml_emb = _normalize_rows(xml_emb)
+        lo, hi = self.estimate_band(audio_chunks, valid_xmls)
+        logger.info(
+            f"🧮 DP en banda ({len(audio_chunks)}x{len(valid_xmls)}, "
+            f"ancho {int((hi[1:] - lo[1:]).max()) + 1} columnas)..."
+        )
+        pointers = self.compute_banded_pointers(audio_emb, xml_emb, lo, hi)
+        S = EmbeddingSimilarity(audio_emb, xml_emb)
+        return self._backtrack_and_assemble(pointers, S, audio_chunks, valid_xmls, band_lo=lo)
+
+    def _backtrack_and_assemble(self, pointers: np.ndarray, S: np.ndarray, audio_chunks: List, valid_xmls: List,
+                                band_lo: Optional[np.ndarray] = None) -> List:
         N, M = S.shape
         i, j = N, M
         alignment_map = {} 
@@ -156,7 +353,8 @@ class SemanticAligner:
         matches_found = 0
 
         while i > 0 and j > 0:
-            move = pointers[i, j]
+            # En modo banda la columna j de la fila i está en pointers[i, j - lo[i]]
+            move = pointers[i, j] if band_lo is None else pointers[i, j - band_lo[i]]
             a_idx, x_idx = i - 1, j - 1 
             
             # Verificación de sanity check en el score
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from typing import Any, Optional
+
+# orjson es opcional: serializa más rápido, pero el formato en disco es JSON en ambos casos
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Cambiar si cambia la forma de los artefactos: invalida todas las entradas existentes
+CACHE_SCHEMA_VERSION = 1
+
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def content_digest(value: Any) -> str:
+    """SHA-256 de la serialización canónica (llaves ordenadas) de un valor JSON."""
+    canonical = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 de los bytes de un archivo (p. ej. el DOCX de un acta)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class MiningArtifactCache:
+    """
+    Caché de artefactos de minería (transcripciones, pares alineados) direccionada por contenido.
+    La llave es un hash de todo lo que determina el artefacto (bytes del acta, transcripción,
+    proveedor, configuración del chunker/alineador, modelo de embeddings), así que un cambio
+    en cualquiera de ellos es simplemente otra entrada y no hace falta invalidar nada.
+
+    Formato: 1 byte de codificación + JSON (comprimido con zlib por defecto), en
+    <root>/<kind>/<hh>/<hash>. Las escrituras van a un temporal en el mismo directorio y se
+    publican con os.replace, por lo que varios hilos, procesos o corridas pueden compartir
+    la raíz sin leer archivos a medio escribir.
+    """
+
+    def __init__(self, root: str, compress: bool = True, compress_level: int = 1):
+        self.root = root
+        self.compress = compress
+        self.compress_level = compress_level
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(kind: str, **parts: Any) -> str:
+        """Llave del artefacto `kind` a partir de sus entradas (valores serializables a JSON)."""
+        return content_digest({"kind": kind, "schema": CACHE_SCHEMA_VERSION, **parts})
+
+    def path_for(self, kind: str, key: str) -> str:
+        return os.path.join(self.root, kind, key[:2], key)
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        """Retorna el artefacto cacheado o None (ausente o ilegible)."""
+        path = self.path_for(kind, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            payload = zlib.decompress(data[1:]) if data[:1] == _ZLIB else data[1:]
+            value = _loads(payload)
+        except FileNotFoundError:
+            self._count(hit=False)
+            return None
+        except (OSError, ValueError, zlib.error) as e:
+            # Entrada corrupta (disco lleno, edición manual...): se trata como fallo y se reescribirá
+            logger.warning(f"Entrada de caché ilegible {path}: {e}")
+            self._count(hit=False)
+            return None
+
+        self._count(hit=True)
+        return value
+
+    def put(self, kind: str, key: str, value: Any) -> str:
+        """Escribe el artefacto de forma atómica. Retorna la ruta final."""
+        path = self.path_for(kind, key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        payload = _dumps(value)
+        data = _ZLIB + zlib.compress(payload, self.compress_level) if self.compress else _RAW + payload
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
@@ -1,7 +1,11 @@
+import os
 import json
 import random
+import shutil
+import hashlib
 import logging
-from typing import List, Dict, Any, Tuple
+from datetime import datetime
+from typing import List, Dict, Any, Tuple, Optional, Iterable
 from pathlib import Path
 from collections import defaultdict
 
@@ -38,7 +42,8 @@ class DatasetBuilder:
         train_ratio: float = 0.9,
         min_score: float = 0.0,
         augment_factor: int = 0,
-        seed: int = 42
+        seed: int = 42,
+        doc_splits: Optional[Dict[str, str]] = None
     ) -> Dict[str, int]:
         """
         Genera train.jsonl y val.jsonl asegurando que no haya fuga de datos entre documentos.
@@ -50,6 +55,8 @@ class DatasetBuilder:
             min_score: Score mínimo de alineación para incluir el par.
             augment_factor: Factor de aumento de datos con ruido.
             seed: Semilla para reproducibilidad del split.
+            doc_splits: (Opcional) doc_id -> 'train' | 'val' ya decidido (p. ej. por
+                        IncrementalDatasetWriter); reemplaza el split aleatorio por documento.
 
         Returns:
             Dict con estadísticas {'train': N, 'val': N}.
@@ -59,12 +66,7 @@ class DatasetBuilder:
         out_path.mkdir(parents=True, exist_ok=True)
 
         # 1. Filtrado Inicial por Calidad
-        valid_pairs = [
-            p for p in aligned_pairs 
-            if p.get("score", 1.0) >= min_score 
-            and p.get("input", "").strip() 
-            and p.get("output", "").strip()
-        ]
+        valid_pairs = [p for p in aligned_pairs if self.is_valid_pair(p, min_score)]
 
         if not valid_pairs:
             logger.warning("No hay pares válidos para generar el dataset.")
@@ -75,18 +77,22 @@ class DatasetBuilder:
         grouped_docs = defaultdict(list)
         for pair in valid_pairs:
             # Intentar obtener ID del documento desde metadata
-            meta = pair.get("metadata", {})
-            # Soporte para varias convenciones de nombres en metadata
-            doc_id = meta.get("source_doc_id") or meta.get("doc_id") or meta.get("filename") or "unknown_doc"
-            grouped_docs[doc_id].append(pair)
+            grouped_docs[self.doc_id_of(pair)].append(pair)
 
         doc_ids = list(grouped_docs.keys())
         random.shuffle(doc_ids)
 
         # 3. Split Determinista a Nivel de Documento
         
+        if doc_splits is not None:
+            # Split ya asignado por documento (documentos sin asignar van a train)
+            train_docs = [d for d in doc_ids if doc_splits.get(d, "train") == "train"]
+            val_docs = [d for d in doc_ids if doc_splits.get(d, "train") == "val"]
+            train_pairs = [p for d in train_docs for p in grouped_docs[d]]
+            val_pairs = [p for d in val_docs for p in grouped_docs[d]]
+
         # --- PARCHE PARA DEBUG/PRUEBAS CON UN SOLO DOC ---
-        if len(doc_ids) == 1:
+        elif len(doc_ids) == 1:
             # Si solo hay un documento, no podemos dividir por documento.
             # Ponemos todo en Train para que el fine-tuning funcione, 
             # o hacemos un split aleatorio simple ignorando la fuga de datos.
@@ -152,23 +158,217 @@ class DatasetBuilder:
             "val_docs": len(val_docs)
         }
 
+    @staticmethod
+    def is_valid_pair(pair: Dict[str, Any], min_score: float = 0.0) -> bool:
+        """Filtro de calidad: score mínimo y input/output no vacíos."""
+        return bool(
+            pair.get("score", 1.0) >= min_score
+            and pair.get("input", "").strip()
+            and pair.get("output", "").strip()
+        )
+
+    @staticmethod
+    def doc_id_of(pair: Dict[str, Any]) -> str:
+        """Documento origen del par (varias convenciones de nombres en metadata)."""
+        meta = pair.get("metadata", {})
+        return meta.get("source_doc_id") or meta.get("doc_id") or meta.get("filename") or "unknown_doc"
+
     def _write_jsonl(self, pairs: List[Dict], filepath: Path):
         """Escribe la lista de pares en formato JSONL Alpaca estricto."""
         with open(filepath, 'w', encoding='utf-8') as f:
             for p in pairs:
                 # Selección aleatoria del System Prompt
-                instruction = random.choice(self.SYSTEM_INSTRUCTIONS)
-                
-                # Estructura Alpaca
-                row = {
-                    "instruction": instruction,
-                    "input": p["input"],
-                    "output": p["output"],
-                    # Preservar metadatos útiles para debugging pero fuera del schema core de entrenamiento si se desea
-                    # Algunas herramientas de training ignoran llaves extra, otras fallan.
-                    # Unsloth suele ignorar extras. Lo dejamos por trazabilidad.
-                    "metadata": p.get("metadata", {})
-                }
-                
-                # Serialización segura (sin escapeo ASCII para soportar tildes/ñ)
-                f.write(json.dumps(row, ensure_ascii=False) + "\n")
\ No newline at end of file
+                f.write(self.to_jsonl_line(p, random.choice(self.SYSTEM_INSTRUCTIONS)))
+
+    @staticmethod
+    def to_jsonl_line(p: Dict[str, Any], instruction: str) -> str:
+        """Serializa un par como una línea JSONL Alpaca."""
+        # Estructura Alpaca
+        row = {
+            "instruction": instruction,
+            "input": p["input"],
+            "output": p["output"],
+            # Preservar metadatos útiles para debugging pero fuera del schema core de entrenamiento si se desea
+            # Algunas herramientas de training ignoran llaves extra, otras fallan.
+            # Unsloth suele ignorar extras. Lo dejamos por trazabilidad.
+            "metadata": p.get("metadata", {})
+        }
+        
+        # Serialización segura (sin escapeo ASCII para soportar tildes/ñ)
+        return json.dumps(row, ensure_ascii=False) + "\n"
+
+
+class IncrementalDatasetWriter:
+    """
+    Escritura append-only del dataset durante el minado: cada fuente (video) se agrega una
+    sola vez y sus pares se anexan al shard del split de su documento, asignado por hash
+    (determinista, sin fuga entre train y val). Un manifiesto escrito atómicamente registra
+    fuentes, splits y bytes válidos de cada shard para poder reanudar una corrida cortada.
+    DatasetBuilder.build queda como compactación final (compact()).
+    """
+
+    MANIFEST_NAME = "dataset_manifest.json"
+    STAGING_DIR = ".compaction"
+    SPLITS = ("train", "val")
+
+    def __init__(self, output_dir: str, train_ratio: float = 0.9, min_score: float = 0.0, salt: str = "astra-split"):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.output_dir / self.MANIFEST_NAME
+        self.min_score = min_score
+
+        self.manifest = self._load_manifest() or {
+            "version": 1,
+            "train_ratio": train_ratio,
+            "salt": salt,
+            "sources": {},
+            "shards": {split: {"rows": 0, "bytes": 0} for split in self.SPLITS},
+            "compacted": False,
+        }
+        if self.manifest["train_ratio"] != train_ratio:
+            logger.warning(
+                f"Manifiesto existente con train_ratio={self.manifest['train_ratio']}; se conserva "
+                f"para no mover documentos entre splits (pedido: {train_ratio})."
+            )
+        if "pending_compaction" in self.manifest:
+            logger.warning("Compactación interrumpida tras confirmarse en el manifiesto: se completa")
+            self._finish_compaction()
+        self._truncate_to_manifest()
+
+    def shard_path(self, split: str) -> Path:
+        return self.output_dir / f"{split}.jsonl"
+
+    def split_for(self, doc_id: str) -> str:
+        """Split determinista del documento: hash(salt, doc_id) en [0, 1) contra train_ratio."""
+        digest = hashlib.sha1(f"{self.manifest['salt']}:{doc_id}".encode("utf-8")).hexdigest()
+        return "train" if int(digest[:8], 16) / 0x100000000 < self.manifest["train_ratio"] else "val"
+
+    def has_source(self, source_id: str) -> bool:
+        return source_id in self.manifest["sources"]
+
+    @property
+    def doc_splits(self) -> Dict[str, str]:
+        return {src["doc_id"]: src["split"] for src in self.manifest["sources"].values()}
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return {split: shard["rows"] for split, shard in self.manifest["shards"].items()}
+
+    def add_source(self, source_id: str, doc_id: str, pairs: List[Dict[str, Any]]) -> int:
+        """
+        Anexa los pares válidos de una fuente al shard de su documento.
+        Idempotente: una fuente ya registrada en el manifiesto no se vuelve a escribir.
+        Retorna cuántas filas escribió.
+        """
+        if self.has_source(source_id):
+            return 0
+
+        split = self.split_for(doc_id)
+        rng = random.Random(source_id)
+        lines = [
+            DatasetBuilder.to_jsonl_line(p, rng.choice(DatasetBuilder.SYSTEM_INSTRUCTIONS))
+            for p in pairs if DatasetBuilder.is_valid_pair(p, self.min_score)
+        ]
+
+        shard = self.manifest["shards"][split]
+        if lines:
+            with open(self.shard_path(split), "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+                shard["bytes"] = f.tell()
+            shard["rows"] += len(lines)
+
+        self.manifest["sources"][source_id] = {"doc_id": doc_id, "split": split, "pairs": len(lines)}
+        self.manifest["compacted"] = False
+        self._write_manifest()
+        return len(lines)
+
+    def iter_pairs(self) -> Iterable[Dict[str, Any]]:
+        """Relee los pares escritos en los shards (para la compactación)."""
+        for split in self.SPLITS:
+            path = self.shard_path(split)
+            if not path.exists():
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    row = json.loads(line)
+                    yield {"input": row["input"], "output": row["output"], "metadata": row.get("metadata", {})}
+
+    def compact(self, builder: DatasetBuilder, augment_factor: int = 0, seed: int = 42) -> Dict[str, int]:
+        """
+        Compactación final con DatasetBuilder.build (barajado, aumento de datos) respetando
+        el split ya asignado a cada documento.
+
+        Los shards compactados se generan en un directorio de staging y el manifiesto registra
+        su tamaño (`pending_compaction`) antes de reemplazar los shards con os.replace. Un corte
+        antes de ese punto deja intactos los shards anexados; uno posterior se completa al reabrir.
+        """
+        pairs = list(self.iter_pairs())
+        staging = self.output_dir / self.STAGING_DIR
+        shutil.rmtree(staging, ignore_errors=True)
+
+        stats = builder.build(
+            pairs, str(staging),
+            train_ratio=self.manifest["train_ratio"],
+            augment_factor=augment_factor,
+            seed=seed,
+            doc_splits=self.doc_splits
+        )
+
+        pending = {}
+        for split in self.SPLITS:
+            staged = staging / self.shard_path(split).name
+            staged.parent.mkdir(parents=True, exist_ok=True)
+            with open(staged, "ab") as f:
+                os.fsync(f.fileno())
+                pending[split] = {"rows": stats.get(split, 0), "bytes": f.tell()}
+
+        self.manifest["pending_compaction"] = pending
+        self._write_manifest()
+        self._finish_compaction()
+        return stats
+
+    def _finish_compaction(self):
+        """Mueve los shards compactados a su lugar y adopta sus tamaños (idempotente)."""
+        staging = self.output_dir / self.STAGING_DIR
+        for split in self.SPLITS:
+            staged = staging / self.shard_path(split).name
+            if staged.exists():
+                os.replace(staged, self.shard_path(split))
+
+        self.manifest["shards"] = self.manifest.pop("pending_compaction")
+        self.manifest["compacted"] = True
+        self._write_manifest()
+        shutil.rmtree(staging, ignore_errors=True)
+
+    def _load_manifest(self) -> Optional[Dict[str, Any]]:
+        if not self.manifest_path.exists():
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        logger.info(f"Reanudando dataset: {len(manifest['sources'])} fuentes ya escritas ({manifest['shards']})")
+        return manifest
+
+    def _truncate_to_manifest(self):
+        """Descarta filas anexadas después del último manifiesto confirmado (corte a mitad de escritura)."""
+        for split in self.SPLITS:
+            path = self.shard_path(split)
+            expected = self.manifest["shards"][split]["bytes"]
+            size = path.stat().st_size if path.exists() else 0
+            if size > expected:
+                logger.warning(f"{path.name}: descartando {size - expected} bytes no confirmados en el manifiesto")
+                with open(path, "r+b") as f:
+                    f.truncate(expected)
+            elif size < expected:
+                logger.error(f"{path.name} es más corto ({size} B) que lo registrado en el manifiesto ({expected} B)")
+
+    def _write_manifest(self):
+        """Escritura atómica: archivo temporal en el mismo directorio + os.replace."""
+        self.manifest["updated_at"] = datetime.utcnow().isoformat()
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
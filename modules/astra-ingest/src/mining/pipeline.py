@@ -1,154 +1,316 @@
 import os
 # APAGAR PARALELISMO DE RUST PARA EVITAR ERROR "Already borrowed" EN MAC
-os.environ["TOKENIZERS_PARALLELISM"] = "false"
+# (el modelo ahora lo usa un solo hilo, el EmbeddingBatcher; se puede reactivar por entorno)
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
 
+import asyncio
 import csv
 import json
 import time
 import logging
 import hashlib
+import multiprocessing
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Set, Any
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
 
 # Componentes internos
 from src.mining.downloader import MediaDownloader, DownloadError
 from src.mining.core_client import CoreTranscriptionClient
 from src.mining.extractor import SemanticExtractor
 from src.mining.aligner import SemanticAligner, AlignerConfig
-from src.mining.dataset_builder import DatasetBuilder
+from src.mining.dataset_builder import DatasetBuilder, IncrementalDatasetWriter
 from src.mining.analyzer import CorpusAnalyzer
+from src.mining.artifact_cache import MiningArtifactCache, content_digest, file_digest
+from src.core.nlp.embedding_batcher import EmbeddingBatcher
+from src.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Alineadores de cada proceso del pool de CPU, por configuración (evita reconstruirlos por fila)
+_worker_aligners: Dict[str, SemanticAligner] = {}
+
+def extract_document_fragments(docx_path: str, static_hashes: Set[str]) -> List[Dict[str, Any]]:
+    """Etapa de extracción de un acta. Corre en el pool de procesos."""
+    return SemanticExtractor(static_hashes).extract_from_document(docx_path)
+
+def align_embedded_fragments(config: Dict[str, Any], audio_chunks: List, valid_xmls: List,
+                             audio_emb: np.ndarray, xml_emb: np.ndarray) -> List[Dict[str, Any]]:
+    """Etapa de DP + backtracking con embeddings ya calculados. Corre en el pool de procesos."""
+    key = json.dumps(config, sort_keys=True)
+    aligner = _worker_aligners.get(key)
+    if aligner is None:
+        aligner = _worker_aligners[key] = SemanticAligner(AlignerConfig(**config))
+    return aligner.align_embedded(audio_chunks, valid_xmls, audio_emb, xml_emb)
+
+
+class _BatchStages:
+    """Recursos compartidos por las filas de un process_batch."""
+
+    def __init__(self, io_pool: ThreadPoolExecutor, cpu_pool: ProcessPoolExecutor,
+                 batcher: EmbeddingBatcher, max_in_flight: int,
+                 writer: Optional[IncrementalDatasetWriter] = None):
+        self.loop = asyncio.get_running_loop()
+        self.io_pool = io_pool
+        self.cpu_pool = cpu_pool
+        self.batcher = batcher
+        # Dataset de la corrida: las fuentes ya escritas (reanudación) se omiten antes de cualquier E/S
+        self.writer = writer
+        # Contrapresión: filas con transcripción/fragmentos en memoria al mismo tiempo
+        self.slots = asyncio.Semaphore(max_in_flight)
+
+    def io(self, fn, *args):
+        return self.loop.run_in_executor(self.io_pool, fn, *args)
+
+    def cpu(self, fn, *args):
+        return self.loop.run_in_executor(self.cpu_pool, fn, *args)
+
+    def embed(self, texts: List[str]):
+        return asyncio.wrap_future(self.batcher.submit(texts))
+
+
 class MiningOrchestrator:
-    def __init__(self, output_dir: str, tenant_id: str = "default_miner"):
+    def __init__(self, output_dir: str, tenant_id: str = "default_miner", cache_dir: Optional[str] = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.tenant_id = tenant_id
-        
+
         # Inicialización de servicios
         self.downloader = MediaDownloader()
         self.core_client = CoreTranscriptionClient()
         self.aligner = SemanticAligner(config=AlignerConfig(threshold=0.35))
         self.analyzer = CorpusAnalyzer()
-        self.static_hashes = set() 
+        self.static_hashes = set()
+
+        # Caché compartida entre corridas y workers (None = settings, "" = desactivada)
+        cache_root = settings.MINING_CACHE_DIR if cache_dir is None else cache_dir
+        self.cache = self._open_cache(cache_root) if cache_root else None
+
+    @staticmethod
+    def _open_cache(cache_root: str) -> Optional[MiningArtifactCache]:
+        """Sin permisos de escritura (p. ej. HOME de solo lectura) se sigue sin caché."""
+        try:
+            return MiningArtifactCache(cache_root, compress=settings.MINING_CACHE_COMPRESS)
+        except OSError as e:
+            logger.warning(f"Caché de minería no disponible en {cache_root}: {e}")
+            return None
+
+    def _cache_get(self, kind: str, key: str):
+        return self.cache.get(kind, key) if self.cache else None
+
+    def _cache_put(self, kind: str, key: str, value):
+        if self.cache:
+            self.cache.put(kind, key, value)
+
+    def _fetch_transcript(self, idx: int, video_url: str, video_id: str, provider: str) -> List[Dict]:
+        """Etapa de E/S (bloqueante): transcripción cacheada o descarga + transcripción remota."""
+        legacy_transcript_path = self.output_dir / f"transcript_{video_id}.json"
+
+        # La transcripción depende solo del audio de origen y del proveedor
+        transcript_key = MiningArtifactCache.key("transcript", source=video_url, provider=provider)
+        segments = self._cache_get("transcript", transcript_key)
+        if segments is not None:
+            logger.info(f"🟢 [{idx+1}] Usando transcripción CACHEADA")
+        elif legacy_transcript_path.exists():
+            # Transcripción de una corrida anterior (caché por output_dir): se migra a la compartida
+            logger.info(f"🟢 [{idx+1}] Usando transcripción CACHEADA (legado)")
+            with open(legacy_transcript_path, 'r', encoding='utf-8') as cf:
+                segments = json.load(cf)
+            self._cache_put("transcript", transcript_key, segments)
+        else:
+            s3_uri = self.downloader.download_and_upload(video_url, self.tenant_id)
+            transcript_result = self.core_client.transcribe_url(
+                audio_url=s3_uri,
+                tenant_id=self.tenant_id,
+                provider=provider
+            )
+            segments = transcript_result.get("segments", [])
+            if not segments:
+                raise ValueError("La transcripción no retornó segmentos válidos.")
+
+            self._cache_put("transcript", transcript_key, segments)
+        return segments
+
+    def _pairs_key(self, segments: List[Dict], docx_path: str) -> str:
+        # Los pares cambian con la transcripción, los bytes del acta y la configuración del alineador
+        return MiningArtifactCache.key(
+            "pairs",
+            transcript=content_digest(segments),
+            docx=file_digest(docx_path),
+            static_hashes=content_digest(sorted(self.static_hashes)),
+            **self.aligner.cache_fingerprint()
+        )
+
+    async def _align_staged(self, segments: List[Dict], fragments: List[Dict], stages: _BatchStages) -> List[Dict]:
+        """
+        SemanticAligner.align repartido en etapas: los embeddings van al servicio compartido
+        (que los agrupa con los de otras filas) y la DP a un proceso del pool de CPU.
+        """
+        chunker = self.aligner.chunker
+        valid_xmls = self.aligner.filter_xml_nodes(fragments)
+
+        segment_emb = await stages.embed(chunker.segment_texts(segments))
+        # Fuera del hilo del event loop (la primera llamada compila el kernel numba)
+        audio_chunks = await stages.io(chunker.chunk_transcript, segments, segment_emb)
+        logger.info(f"🔍 [DEBUG] Pre-processed: {len(audio_chunks)} Audio Chunks, {len(valid_xmls)} XML Nodes.")
+        if not valid_xmls or not audio_chunks:
+            return []
 
-    def _process_single_row(self, idx: int, row: dict, total_rows: int, provider: str, dry_run: bool):
+        # Chunks de audio y nodos XML en un solo pedido
+        texts = [c.get("text", "") for c in audio_chunks] + [n.get("text", "") for n in valid_xmls]
+        embeddings = await stages.embed(texts)
+        audio_emb, xml_emb = embeddings[:len(audio_chunks)], embeddings[len(audio_chunks):]
+
+        return await stages.cpu(
+            align_embedded_fragments, self.aligner.config.model_dump(), audio_chunks, valid_xmls, audio_emb, xml_emb
+        )
+
+    async def _process_row(self, idx: int, row: dict, total_rows: int, provider: str, dry_run: bool,
+                           stages: _BatchStages) -> Dict[str, Any]:
         video_url = (row.get("video_url") or row.get("url") or "").strip()
         docx_path = (row.get("docx_path") or row.get("path") or "").strip()
 
         if not video_url or not docx_path:
             return {"status": "failed", "pairs": [], "error": "Datos incompletos"}
 
-        logger.info(f"▶️ [Hilo Iniciado] Procesando [{idx+1}/{total_rows}]: {video_url}")
+        async with stages.slots:
+            logger.info(f"▶️ [Fila Iniciada] Procesando [{idx+1}/{total_rows}]: {video_url}")
 
-        try:
-            if not os.path.exists(docx_path):
-                raise FileNotFoundError(f"Documento no encontrado: {docx_path}")
-
-            if dry_run:
-                return {"status": "success", "pairs": []}
-
-            video_id = hashlib.md5(video_url.encode()).hexdigest()[:10]
-            transcript_cache_path = self.output_dir / f"transcript_{video_id}.json"
-            pairs_cache_path = self.output_dir / f"pairs_{video_id}.json"
-
-            if pairs_cache_path.exists():
-                logger.info(f"🟣 [{idx+1}] Usando PARES CACHEADOS (Saltando Alineación)")
-                with open(pairs_cache_path, 'r', encoding='utf-8') as pf:
-                    pairs = json.load(pf)
-                return {"status": "success", "pairs": pairs, "url": video_url}
-
-            segments = []
-            if transcript_cache_path.exists():
-                logger.info(f"🟢 [{idx+1}] Usando transcripción CACHEADA")
-                with open(transcript_cache_path, 'r', encoding='utf-8') as cf:
-                    segments = json.load(cf)
-            else:
-                s3_uri = self.downloader.download_and_upload(video_url, self.tenant_id)
-                transcript_result = self.core_client.transcribe_url(
-                    audio_url=s3_uri, 
-                    tenant_id=self.tenant_id,
-                    provider=provider
-                )
-                segments = transcript_result.get("segments", [])
-                if not segments:
-                    raise ValueError("La transcripción no retornó segmentos válidos.")
-                
-                with open(transcript_cache_path, 'w', encoding='utf-8') as cf:
-                    json.dump(segments, cf, ensure_ascii=False, indent=2)
-
-            extractor = SemanticExtractor(self.static_hashes)
-            docx_fragments = extractor.extract_from_document(docx_path)
-
-            pairs = self.aligner.align(segments, docx_fragments)
-            
-            # Guardar en caché para no volver a calcular nunca más
-            with open(pairs_cache_path, 'w', encoding='utf-8') as pf:
-                json.dump(pairs, pf, ensure_ascii=False, indent=2)
-                
-            logger.info(f"✅ [{idx+1}] FIN. Alineados {len(pairs)} pares de este video.")
-
-            return {"status": "success", "pairs": pairs, "url": video_url}
-
-        except Exception as e:
-            logger.error(f"❌ Error en fila {idx+1} ({video_url}): {str(e)}")
-            return {"status": "failed", "pairs": [], "error": str(e), "url": video_url, "row": idx+1}
-
-    def process_batch(self, csv_path: str, provider: str = "deepgram", dry_run: bool = False, max_workers: int = 3):
+            try:
+                if not os.path.exists(docx_path):
+                    raise FileNotFoundError(f"Documento no encontrado: {docx_path}")
+
+                if dry_run:
+                    return {"status": "success", "pairs": []}
+
+                video_id = hashlib.md5(video_url.encode()).hexdigest()[:10]
+                result = {"status": "success", "url": video_url, "source_id": video_id, "doc_id": docx_path}
+
+                if stages.writer is not None and stages.writer.has_source(video_id):
+                    logger.info(f"⏭️ [{idx+1}] Video ya escrito en el dataset (reanudación): se omite")
+                    return {**result, "status": "skipped", "pairs": []}
+
+                # 1. E/S: descarga + transcripción (hilos)
+                segments = await stages.io(self._fetch_transcript, idx, video_url, video_id, provider)
+
+                pairs_key = await stages.io(self._pairs_key, segments, docx_path)
+                pairs = await stages.io(self._cache_get, "pairs", pairs_key)
+                if pairs is not None:
+                    logger.info(f"🟣 [{idx+1}] Usando PARES CACHEADOS (Saltando Alineación)")
+                    return {**result, "pairs": pairs}
+
+                # 2. CPU: extracción del acta (procesos)
+                docx_fragments = await stages.cpu(extract_document_fragments, docx_path, self.static_hashes)
+
+                # 3-4. Embeddings (servicio compartido) + DP (procesos)
+                pairs = await self._align_staged(segments, docx_fragments, stages)
+
+                # Guardar en caché: la misma entrada con la misma configuración no se vuelve a alinear
+                await stages.io(self._cache_put, "pairs", pairs_key, pairs)
+
+                logger.info(f"✅ [{idx+1}] FIN. Alineados {len(pairs)} pares de este video.")
+                return {**result, "pairs": pairs}
+
+            except Exception as e:
+                logger.error(f"❌ Error en fila {idx+1} ({video_url}): {str(e)}")
+                return {"status": "failed", "pairs": [], "error": str(e), "url": video_url, "row": idx+1}
+
+    async def _run_rows(self, rows: List[dict], provider: str, dry_run: bool, io_workers: int,
+                        cpu_workers: int, on_result, writer: Optional[IncrementalDatasetWriter] = None) -> None:
+        # 'spawn': no heredar por fork el estado de torch/tokenizers del proceso principal
+        context = multiprocessing.get_context("spawn")
+        batcher = EmbeddingBatcher(
+            self.aligner.embedder,
+            max_batch_texts=settings.MINING_EMBED_MAX_BATCH,
+            max_wait_ms=settings.MINING_EMBED_MAX_WAIT_MS,
+            batch_size=settings.INGEST_EMBED_BATCH_SIZE
+        )
+        with ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="mining-io") as io_pool, \
+                ProcessPoolExecutor(max_workers=cpu_workers, mp_context=context) as cpu_pool, \
+                batcher:
+            stages = _BatchStages(io_pool, cpu_pool, batcher, max_in_flight=io_workers + 2 * cpu_workers, writer=writer)
+            tasks = [
+                asyncio.create_task(self._process_row(idx, row, len(rows), provider, dry_run, stages))
+                for idx, row in enumerate(rows)
+            ]
+            # Los resultados se consumen en el hilo del event loop: el escritor del dataset no necesita locks
+            for next_done in asyncio.as_completed(tasks):
+                on_result(await next_done)
+
+        logger.info(
+            f"🧠 Embeddings: {batcher.texts} textos de {batcher.requests} pedidos en {batcher.batches} lotes"
+        )
+
+    def process_batch(self, csv_path: str, provider: str = "deepgram", dry_run: bool = False, max_workers: int = 3,
+                      cpu_workers: Optional[int] = None):
+        """
+        Pipeline por etapas: descarga/transcripción en `max_workers` hilos de E/S, extracción de
+        actas y DP de alineación en `cpu_workers` procesos (por defecto MINING_CPU_WORKERS o
+        os.cpu_count()), y un único servicio de embeddings que agrupa los pedidos de todas las filas.
+        """
         report = {
             "job_id": f"job_{int(time.time())}",
             "start_time": datetime.utcnow().isoformat(),
             "total_rows": 0,
             "success": 0,
+            "skipped": 0,
             "failed": 0,
             "errors": []
         }
 
-        all_aligned_pairs = []
+        aligned_pairs_count = 0
+        # Dataset append-only: cada video se anexa una vez a su shard (split por hash del acta)
+        writer = None if dry_run else IncrementalDatasetWriter(str(self.output_dir), train_ratio=0.9)
 
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"Archivo CSV no encontrado: {csv_path}")
 
-        logger.info(f"🚀 Iniciando Pipeline MULTIHILO (Workers: {max_workers})")
+        cpu_workers = cpu_workers or settings.MINING_CPU_WORKERS or os.cpu_count() or 1
+        logger.info(f"🚀 Iniciando Pipeline POR ETAPAS (E/S: {max_workers} hilos, CPU: {cpu_workers} procesos)")
 
         with open(csv_path, mode='r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
             rows = list(reader)
             report["total_rows"] = len(rows)
 
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = {
-                    executor.submit(self._process_single_row, idx, row, len(rows), provider, dry_run): idx 
-                    for idx, row in enumerate(rows)
-                }
-
-                for future in as_completed(futures):
-                    res = future.result()
-                    if res["status"] == "success":
-                        report["success"] += 1
-                        if res["pairs"]:
-                            all_aligned_pairs.extend(res["pairs"])
-                            
-                            # ✨ MAGIA: GUARDADO INCREMENTAL ✨
-                            # Guarda el train.jsonl en tiempo real después de cada video exitoso.
-                            if not dry_run:
-                                builder = DatasetBuilder()
-                                builder.build(all_aligned_pairs, str(self.output_dir), train_ratio=0.9)
-                                logger.info(f"💾 Dataset actualizado con éxito ({len(all_aligned_pairs)} pares totales)")
-                    else:
-                        report["failed"] += 1
-                        report["errors"].append({
-                            "row": res.get("row"), "url": res.get("url"), "error": res.get("error")
-                        })
+        def on_result(res: Dict[str, Any]):
+            nonlocal aligned_pairs_count
+            if res["status"] == "skipped":
+                report["skipped"] += 1
+            elif res["status"] == "success":
+                report["success"] += 1
+                if res["pairs"]:
+                    aligned_pairs_count += len(res["pairs"])
+
+                    # ✨ GUARDADO INCREMENTAL ✨
+                    # Solo se anexan los pares de este video; el split lo decide el acta de origen.
+                    if writer is not None:
+                        for pair in res["pairs"]:
+                            pair.setdefault("metadata", {}).setdefault("source_doc_id", res["doc_id"])
+                        written = writer.add_source(res["source_id"], res["doc_id"], res["pairs"])
+                        logger.info(f"💾 Dataset actualizado: +{written} filas ({writer.counts})")
+            else:
+                report["failed"] += 1
+                report["errors"].append({
+                    "row": res.get("row"), "url": res.get("url"), "error": res.get("error")
+                })
+
+        asyncio.run(self._run_rows(rows, provider, dry_run, max_workers, cpu_workers, on_result, writer))
+
+        if writer is not None:
+            # Compactación final (mismo formato que antes), respetando el split ya asignado
+            report["dataset"] = writer.compact(DatasetBuilder())
 
         report["end_time"] = datetime.utcnow().isoformat()
-        report["aligned_pairs_count"] = len(all_aligned_pairs)
+        report["aligned_pairs_count"] = aligned_pairs_count
+        if self.cache:
+            report["cache"] = {"hits": self.cache.hits, "misses": self.cache.misses}
         report_path = self.output_dir / f"mining_report_{report['job_id']}.json"
-        
+
         with open(report_path, "w", encoding="utf-8") as f:
             json.dump(report, f, indent=2)
-            
-        return report
\ No newline at end of file
+
+        return report
@@ -1,7 +1,7 @@
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from src.core.nlp.embedder import TextEmbedder
-from sklearn.metrics.pairwise import cosine_similarity
+from numba import njit
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,125 +28,146 @@ class EnterpriseSemanticChunker:
         self.ema_alpha = ema_alpha
         self.overlap = overlap_segments
 
-    def chunk_transcript(self, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    @staticmethod
+    def segment_texts(segments: List[Dict[str, Any]]) -> List[str]:
+        return [s.get('text', '').strip() for s in segments]
+
+    def chunk_transcript(self, segments: List[Dict[str, Any]], embeddings: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Agrupa segmentos en chunks semánticos. `embeddings` (opcional) son los vectores de
+        segment_texts(segments) ya calculados fuera (p. ej. por un EmbeddingBatcher compartido).
+        """
         if not segments:
             return []
 
         # 1. Vectorización Batch
-        sentences = [s.get('text', '').strip() for s in segments]
-        
-        # --- CORRECCIÓN AQUÍ: Convertir la lista a NumPy Array ---
-        embeddings_list = self.embedder.embed_batch(sentences)
-        embeddings = np.array(embeddings_list) 
-        # ---------------------------------------------------------
-        
-        chunks = []
-        
-        # Inicializar estado con el primer segmento
-        current_indices = [0] 
-        current_segments = [segments[0]]
-        current_text = segments[0].get('text', '')
-        chunk_start = segments[0].get('start', 0.0)
-        chunk_end = segments[0].get('end', 0.0)
-        
-        # Centroide Inicial
-        current_centroid = embeddings[0].reshape(1, -1)
-
-        # Iteramos desde el segundo segmento
-        i = 1
-        while i < len(segments):
-            next_seg = segments[i]
-            next_emb = embeddings[i].reshape(1, -1)
-            
-            # Calculamos similitud contra el "Tema Reciente" (Centroide EMA)
-            raw_similarity = cosine_similarity(current_centroid, next_emb)[0][0]
-            adjusted_sim = raw_similarity
-
-            # --- Multi-modalidad (Tiempo + Hablantes) ---
-            
-            # A. Penalización por Silencio
-            silence_gap = next_seg.get('start', 0.0) - chunk_end
-            if silence_gap > 2.0:
-                adjusted_sim -= self.silence_penalty
-                
-            # B. Penalización por Cambio de Orador
-            last_speaker = current_segments[-1].get('speaker')
-            next_speaker = next_seg.get('speaker')
-            
-            if last_speaker and next_speaker and last_speaker != next_speaker:
-                adjusted_sim -= self.speaker_change_penalty
-
-            # --- Zonas de Corte Inteligentes ---
-            current_duration = chunk_end - chunk_start
-            
-            is_in_warning_zone = current_duration >= self.soft_max
-            is_guillotine_cut = current_duration >= self.hard_max
-            is_safe_to_cut = current_duration >= self.min_duration
-
-            # CONDICIÓN DE CORTE
-            should_cut = False
-            
-            if is_safe_to_cut and adjusted_sim < self.base_threshold:
-                should_cut = True
-            elif is_in_warning_zone and adjusted_sim < (self.base_threshold + 0.1):
-                should_cut = True
-            elif is_guillotine_cut:
-                should_cut = True
-
-            if should_cut:
-                # CERRAR CHUNK ACTUAL
-                chunks.append({
-                    "text": current_text.strip(),
-                    "segments": current_segments.copy(),
-                    "start": chunk_start,
-                    "end": chunk_end,
-                    "duration": current_duration,
-                    "avg_similarity": float(adjusted_sim)
-                })
-                
-                # --- Overlap ---
-                overlap_count = min(self.overlap, len(current_segments))
-                
-                if overlap_count > 0:
-                    overlap_segs = current_segments[-overlap_count:]
-                    overlap_idxs = current_indices[-overlap_count:]
-                else:
-                    overlap_segs = []
-                    overlap_idxs = []
-
-                # INICIAR NUEVO CHUNK (Con overlap)
-                current_segments = overlap_segs + [next_seg]
-                current_indices = overlap_idxs + [i]
-                
-                current_text = " ".join([s.get('text', '').strip() for s in current_segments])
-                chunk_start = current_segments[0].get('start', next_seg.get('start', 0.0))
-                chunk_end = next_seg.get('end', 0.0)
-                
-                # Resetear el Centroide (Promedio del overlap + nuevo)
-                relevant_embeddings = embeddings[current_indices] # Indexación NumPy
-                current_centroid = np.mean(relevant_embeddings, axis=0).reshape(1, -1)
+        sentences = self.segment_texts(segments)
+        if embeddings is None:
+            embeddings = self.embedder.embed_batch(sentences)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float64)
+        norms = np.linalg.norm(embeddings, axis=1)
 
-            else:
-                # FUSIONAR
-                current_segments.append(next_seg)
-                current_indices.append(i)
-                current_text += " " + next_seg.get('text', '').strip()
-                chunk_end = next_seg.get('end', 0.0)
-                
-                # Actualizar EMA del centroide
-                current_centroid = (self.ema_alpha * next_emb) + ((1 - self.ema_alpha) * current_centroid)
-
-            i += 1
-
-        # Agregar el último chunk pendiente
-        if current_segments:
-            chunks.append({
-                "text": current_text.strip(),
-                "segments": current_segments,
+        # 2. Señales de tiempo y orador precalculadas por segmento.
+        # Al evaluar el segmento i, el chunk abierto siempre termina en el segmento i-1:
+        # el silencio y el cambio de orador solo dependen del par (i-1, i).
+        has_start = np.array(['start' in s for s in segments], dtype=np.bool_)
+        starts = np.array([s.get('start', 0.0) for s in segments], dtype=np.float64)
+        ends = np.array([s.get('end', 0.0) for s in segments], dtype=np.float64)
+        gaps = np.zeros(len(segments), dtype=np.float64)
+        gaps[1:] = starts[1:] - ends[:-1]
+        speakers = [s.get('speaker') for s in segments]
+        speaker_change = np.array(
+            [False] + [bool(a and b and a != b) for a, b in zip(speakers, speakers[1:])], dtype=np.bool_
+        )
+
+        # 3. Cortes (kernel numba): rangos [first, last] de cada chunk
+        firsts, lasts, sims, chunk_starts, n_chunks = _chunk_boundaries(
+            embeddings, norms, gaps, speaker_change, starts, has_start, ends,
+            self.base_threshold, self.min_duration, self.soft_max, self.hard_max,
+            self.silence_penalty, self.speaker_change_penalty, self.ema_alpha, self.overlap
+        )
+
+        # 4. Ensamblar texto y segmentos una sola vez por chunk
+        # (el primer chunk conserva el texto crudo del segmento 0, como antes)
+        pieces = sentences.copy()
+        pieces[0] = segments[0].get('text', '')
+        chunks = []
+        for k in range(n_chunks):
+            first, last = int(firsts[k]), int(lasts[k])
+            chunk_start = float(chunk_starts[k])
+            chunk_end = float(ends[last])
+            chunk = {
+                "text": " ".join(pieces[first:last + 1] if k == 0 else sentences[first:last + 1]).strip(),
+                "segments": segments[first:last + 1],
                 "start": chunk_start,
                 "end": chunk_end,
                 "duration": chunk_end - chunk_start
-            })
+            }
+            if k < n_chunks - 1:
+                chunk["avg_similarity"] = float(sims[k])
+            chunks.append(chunk)
 
         logger.info(f"🧠 Chunking Empresarial: {len(segments)} oraciones procesadas en {len(chunks)} bloques cognitivos.")
-        return chunks
\ No newline at end of file
+        return chunks
+
+
+@njit
+def _chunk_boundaries(embeddings, norms, gaps, speaker_change, starts, has_start, ends,
+                      base_threshold, min_duration, soft_max, hard_max,
+                      silence_penalty, speaker_change_penalty, ema_alpha, overlap):
+    """
+    Recorrido secuencial del chunker: similitud coseno contra el centroide EMA del chunk
+    abierto, penalizaciones de silencio/orador y zonas de corte por duración.
+    Retorna (firsts, lasts, similitud ajustada en el corte, inicio de cada chunk, n_chunks).
+    """
+    n, dim = embeddings.shape
+    firsts = np.empty(n, dtype=np.int64)
+    lasts = np.empty(n, dtype=np.int64)
+    sims = np.zeros(n, dtype=np.float64)
+    chunk_starts = np.empty(n, dtype=np.float64)
+    n_chunks = 0
+
+    # Inicializar estado con el primer segmento
+    first = 0
+    chunk_start = starts[0]
+    chunk_end = ends[0]
+    centroid = embeddings[0].copy()
+
+    for i in range(1, n):
+        # Similitud contra el "Tema Reciente" (Centroide EMA)
+        dot = 0.0
+        centroid_sq = 0.0
+        for d in range(dim):
+            dot += centroid[d] * embeddings[i, d]
+            centroid_sq += centroid[d] * centroid[d]
+        denom = np.sqrt(centroid_sq) * norms[i]
+        adjusted_sim = dot / denom if denom > 0.0 else 0.0
+
+        # A. Penalización por Silencio / B. Penalización por Cambio de Orador
+        if gaps[i] > 2.0:
+            adjusted_sim -= silence_penalty
+        if speaker_change[i]:
+            adjusted_sim -= speaker_change_penalty
+
+        # Zonas de Corte Inteligentes
+        current_duration = chunk_end - chunk_start
+        should_cut = (
+            (current_duration >= min_duration and adjusted_sim < base_threshold)
+            or (current_duration >= soft_max and adjusted_sim < base_threshold + 0.1)
+            or current_duration >= hard_max
+        )
+
+        if should_cut:
+            firsts[n_chunks] = first
+            lasts[n_chunks] = i - 1
+            sims[n_chunks] = adjusted_sim
+            chunk_starts[n_chunks] = chunk_start
+            n_chunks += 1
+
+            # Nuevo chunk = overlap del anterior + segmento i; centroide = promedio
+            overlap_count = min(overlap, i - first)
+            first = i - overlap_count if overlap_count > 0 else i
+            if has_start[first]:
+                chunk_start = starts[first]
+            else:
+                chunk_start = starts[i]
+            count = i - first + 1
+            for d in range(dim):
+                acc = 0.0
+                for k in range(first, i + 1):
+                    acc += embeddings[k, d]
+                centroid[d] = acc / count
+        else:
+            # Actualizar EMA del centroide
+            for d in range(dim):
+                centroid[d] = (ema_alpha * embeddings[i, d]) + ((1 - ema_alpha) * centroid[d])
+
+        chunk_end = ends[i]
+
+    # Último chunk pendiente
+    firsts[n_chunks] = first
+    lasts[n_chunks] = n - 1
+    chunk_starts[n_chunks] = chunk_start
+    n_chunks += 1
+
+    return firsts, lasts, sims, chunk_starts, n_chunks
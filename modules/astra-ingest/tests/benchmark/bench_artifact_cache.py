@@ -0,0 +1,115 @@
+"""
+Benchmark del camino de acierto (hit) de la caché de artefactos de minería con N entradas
+cacheadas (por defecto 10.000 transcripciones sintéticas de --segments segmentos).
+
+  - legacy:   un JSON con indent=2 por video en output_dir, nombrado por MD5 de la URL
+              (comportamiento previo de MiningOrchestrator).
+  - cache:    MiningArtifactCache direccionada por contenido (JSON compacto + zlib).
+  - cache_raw: igual, sin compresión.
+
+Reporta latencia de lectura por entrada (media, p50, p99) y espacio en disco.
+
+Uso:
+    python -m tests.benchmark.bench_artifact_cache [--entries 10000] [--segments 200] [--reads 5000]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+
+from src.mining.artifact_cache import MiningArtifactCache
+from tests.benchmark.harness import dir_bytes
+
+WORDS = ["el", "concejal", "solicita", "la", "palabra", "presupuesto", "sesión", "acuerdo", "vota", "municipio"]
+
+
+def synthetic_segments(n: int, rng: random.Random):
+    t = 0.0
+    segments = []
+    for _ in range(n):
+        duration = rng.uniform(1.5, 8.0)
+        segments.append({
+            "start": round(t, 2), "end": round(t + duration, 2), "speaker": rng.randint(0, 4),
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 25))),
+        })
+        t += duration
+    return segments
+
+
+def _latency(samples) -> dict:
+    samples = sorted(samples)
+    return {
+        "mean_ms": round(1000 * sum(samples) / len(samples), 3),
+        "p50_ms": round(1000 * samples[len(samples) // 2], 3),
+        "p99_ms": round(1000 * samples[int(len(samples) * 0.99)], 3),
+    }
+
+
+def run_legacy(urls, payloads, reads) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        started = time.perf_counter()
+        for url, segments in zip(urls, payloads):
+            path = os.path.join(tmp, f"transcript_{hashlib.md5(url.encode()).hexdigest()[:10]}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(segments, f, ensure_ascii=False, indent=2)
+            paths.append(path)
+        fill = time.perf_counter() - started
+
+        samples = []
+        for i in reads:
+            started = time.perf_counter()
+            if os.path.exists(paths[i]):
+                with open(paths[i], "r", encoding="utf-8") as f:
+                    json.load(f)
+            samples.append(time.perf_counter() - started)
+        return {"fill_s": round(fill, 2), "disk_mb": round(dir_bytes(tmp) / 2**20, 1), **_latency(samples)}
+
+
+def run_cache(urls, payloads, reads, compress: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = MiningArtifactCache(tmp, compress=compress)
+        started = time.perf_counter()
+        keys = []
+        for url, segments in zip(urls, payloads):
+            key = MiningArtifactCache.key("transcript", source=url, provider="deepgram")
+            cache.put("transcript", key, segments)
+            keys.append(key)
+        fill = time.perf_counter() - started
+
+        samples = []
+        for i in reads:
+            started = time.perf_counter()
+            # El camino de acierto incluye calcular la llave
+            key = MiningArtifactCache.key("transcript", source=urls[i], provider="deepgram")
+            assert cache.get("transcript", key) is not None
+            samples.append(time.perf_counter() - started)
+        return {"fill_s": round(fill, 2), "disk_mb": round(dir_bytes(tmp) / 2**20, 1), **_latency(samples)}
+
+
+def run(n_entries: int, n_segments: int, n_reads: int) -> list:
+    rng = random.Random(11)
+    urls = [f"https://www.youtube.com/watch?v=sesion{i:06d}" for i in range(n_entries)]
+    # Pocas transcripciones distintas reutilizadas: el costo medido es E/S + decodificación, no generación
+    distinct = [synthetic_segments(n_segments, rng) for _ in range(50)]
+    payloads = [distinct[i % len(distinct)] for i in range(n_entries)]
+    reads = [rng.randrange(n_entries) for _ in range(n_reads)]
+
+    common = {"entries": n_entries, "segments": n_segments, "reads": n_reads}
+    return [
+        {"mode": "legacy", **common, **run_legacy(urls, payloads, reads)},
+        {"mode": "cache", **common, **run_cache(urls, payloads, reads, compress=True)},
+        {"mode": "cache_raw", **common, **run_cache(urls, payloads, reads, compress=False)},
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--segments", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.entries, args.segments, args.reads), indent=2))
@@ -0,0 +1,98 @@
+"""
+Benchmark de la DP de SemanticAligner (src/mining/aligner.py) sobre alineamientos
+sintéticos N×N (por defecto 2k×2k y 10k×10k) con embeddings de 384 dims: el audio
+sigue el orden del acta con ritmo irregular, algunos nodos sin audio y ruido.
+
+  - full:   cosine_similarity N×M + compute_dp_matrix completa.
+  - banded: banda diagonal estimada por tiempo/posición + similitud por bloques + punteros int8.
+
+El pico de RSS se toma de un proceso aislado por corrida (tests.benchmark.harness).
+La primera llamada a cada kernel numba se hace antes de medir (compilación JIT).
+
+Uso:
+    python -m tests.benchmark.bench_banded_aligner [--sizes 2000 10000] [--full-max 10000]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from src.mining.aligner import AlignerConfig, SemanticAligner, compute_dp_matrix
+from tests.benchmark.harness import RssMeter, run_isolated
+
+
+def synthetic_session(n: int, dim: int = 384, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    xml = rng.normal(size=(n, dim)).astype(np.float32)
+    xml /= np.linalg.norm(xml, axis=1, keepdims=True)
+
+    # Cada chunk de audio habla de un nodo cercano al "avance" de la sesión; 10% de nodos sin audio
+    spoken = np.sort(rng.choice(n, size=int(n * 0.9), replace=False))
+    targets = np.sort(np.concatenate([spoken, rng.choice(spoken, size=n - len(spoken))]))
+    audio = xml[targets] + rng.normal(scale=0.05, size=(n, dim)).astype(np.float32)
+    audio /= np.linalg.norm(audio, axis=1, keepdims=True)
+
+    durations = rng.gamma(2.0, 5.0, size=n)
+    starts = np.concatenate([[0.0], np.cumsum(durations)[:-1]])
+    audio_chunks = [{"text": f"chunk {i}", "start": float(s), "end": float(s + d)} for i, (s, d) in enumerate(zip(starts, durations))]
+    valid_xmls = [{"text": "x" * int(rng.integers(40, 400)), "xml": f"<w:p>{j}</w:p>", "id": str(j)} for j in range(n)]
+    return audio, xml, audio_chunks, valid_xmls, targets
+
+
+def _warmup(aligner: SemanticAligner):
+    audio, xml, chunks, nodes, _ = synthetic_session(50, dim=8)
+    compute_dp_matrix(cosine_similarity(audio, xml).astype(np.float32), 0.35, 0.0, 1.0)
+    lo, hi = aligner.estimate_band(chunks, nodes)
+    aligner.compute_banded_pointers(audio, xml, lo, hi)
+
+
+def _measure(n: int, mode: str) -> dict:
+    aligner = SemanticAligner(config=AlignerConfig(threshold=0.35, dp_mode=mode))
+    _warmup(aligner)
+    audio, xml, chunks, nodes, targets = synthetic_session(n)
+
+    rss = RssMeter()
+    started = time.perf_counter()
+    if mode == "full":
+        S = cosine_similarity(audio, xml).astype(np.float32)
+        _, pointers = compute_dp_matrix(S, aligner.config.threshold, 0.0, 1.0)
+        pairs = aligner._backtrack_and_assemble(pointers, S, chunks, nodes)
+    else:
+        pairs = aligner._align_banded(audio, xml, chunks, nodes)
+    elapsed = time.perf_counter() - started
+
+    correct = sum(
+        1 for p in pairs for a in p["metadata"]["audio_chunk_indices"]
+        if targets[a] == p["metadata"]["xml_index"]
+    )
+    assigned = sum(len(p["metadata"]["audio_chunk_indices"]) for p in pairs)
+    return {
+        "mode": mode,
+        "size": f"{n}x{n}",
+        "elapsed_s": round(elapsed, 2),
+        **rss.report(),
+        "pairs": len(pairs),
+        "assigned_chunks": assigned,
+        "correct_chunks": correct,
+    }
+
+
+def run(sizes, full_max: int) -> list:
+    results = []
+    for n in sizes:
+        for mode in ("full", "banded"):
+            if mode == "full" and n > full_max:
+                results.append({"mode": "full", "size": f"{n}x{n}", "skipped": f"> --full-max {full_max}"})
+                continue
+            results.append(run_isolated(_measure, n, mode))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2_000, 10_000])
+    parser.add_argument("--full-max", type=int, default=10_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.full_max), indent=2))
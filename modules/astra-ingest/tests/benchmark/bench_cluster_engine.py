@@ -0,0 +1,71 @@
+"""
+Benchmark de ClusterEngine.perform_clustering sobre vectores sintéticos de 768 dims
+(por defecto 10k / 50k / 200k), con una fracción de boilerplate repetido como en actas reales.
+
+  - exact:    HDBSCAN euclidiano sobre los vectores crudos + silhouette de sklearn
+              (comportamiento previo). Se omite por encima de --exact-max.
+  - scalable: PCA + dedup por rejilla + HDBSCAN sobre representantes + silhouette estimado.
+
+Cada corrida se hace en un proceso nuevo para reportar su pico de RSS (ru_maxrss).
+
+Uso:
+    python -m tests.benchmark.bench_cluster_engine [--sizes 10000 50000 200000] [--exact-max 50000]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.core.analytics.cluster_engine import ClusterEngine
+from tests.benchmark.harness import RssMeter, run_isolated
+
+
+def synthetic_vectors(n: int, dim: int = 768, n_templates: int = 60, boilerplate_ratio: float = 0.4, seed: int = 0):
+    """Párrafos 'plantilla' con ruido + boilerplate idéntico repetido, normalizados."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_templates, dim)).astype(np.float32)
+    n_boiler = int(n * boilerplate_ratio)
+    n_varied = n - n_boiler
+
+    varied = centers[rng.integers(0, n_templates, n_varied)] + rng.normal(scale=0.35, size=(n_varied, dim)).astype(np.float32)
+    boiler = centers[rng.integers(0, 10, n_boiler)] * 1.5
+    vectors = np.vstack([varied, boiler])
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors[rng.permutation(n)]
+
+
+def _measure(n: int, scalable: bool) -> dict:
+    vectors = synthetic_vectors(n)
+    rss = RssMeter()
+    started = time.perf_counter()
+    result = ClusterEngine().perform_clustering(vectors, tenant_id="bench", scalable=scalable)
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": "scalable" if scalable else "exact",
+        "samples": n,
+        "elapsed_s": round(elapsed, 2),
+        **rss.report(),
+        "clusters": result.num_clusters,
+        "noise": result.noise_count,
+        "silhouette": round(result.silhouette_score, 3),
+    }
+
+
+def run(sizes, exact_max: int) -> list:
+    results = []
+    for n in sizes:
+        for scalable in (False, True):
+            if not scalable and n > exact_max:
+                results.append({"mode": "exact", "samples": n, "skipped": f"> --exact-max {exact_max}"})
+                continue
+            results.append(run_isolated(_measure, n, scalable))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--exact-max", type=int, default=50_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.exact_max), indent=2))
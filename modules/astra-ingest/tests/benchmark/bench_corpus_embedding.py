@@ -0,0 +1,133 @@
+"""
+Benchmark de la etapa de extracción + vectorización de IngestOrchestrator.process_batch
+sobre un corpus sintético (por defecto 200 actas), en CPU y con un sentence-transformer
+pequeño. Reporta el tiempo de pared por etapa.
+
+  - legacy:   DocxAtomizer + sanitize por párrafo, en serie, y embed_batch([texto]) por
+              párrafo (comportamiento previo).
+  - pipeline: extract_corpus (pool de procesos) + embed_corpus (lotes grandes ordenados
+              por longitud), con la caché de embeddings vacía.
+  - cached:   pipeline de nuevo sobre el mismo corpus, con la caché ya poblada.
+
+No requiere DB ni MinIO.
+
+Uso:
+    python -m tests.benchmark.bench_corpus_embedding [--docs 200] [--paragraphs 150] \\
+        [--workers 4] [--model sentence-transformers/paraphrase-MiniLM-L3-v2]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import zipfile
+
+from src.core.ingest_orchestrator import IngestOrchestrator, MIN_BLOCK_CHARS
+from src.core.nlp.cleaner import TextSanitizer
+from src.core.nlp.embedder import TextEmbedder
+from src.core.nlp.embedding_cache import EmbeddingCache
+from src.core.parser.xml_engine import DocxAtomizer
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+BOILERPLATE = [
+    "En la ciudad de {lugar}, siendo las {hora} del día {dia}, se reunió el Honorable Concejo Municipal en sesión ordinaria.",
+    "El presidente {nombre} solicita a la secretaría verificar el quórum reglamentario.",
+    "La secretaria informa que existe quórum para deliberar y decidir.",
+    "Se somete a consideración el orden del día, el cual es aprobado por unanimidad.",
+    "Interviene el concejal {nombre} quien manifiesta su preocupación por el presupuesto de {lugar}.",
+    "Se da lectura al proyecto de acuerdo número {num} de {anio}.",
+]
+NAMES = ["Juan Pérez", "María Gómez", "Carlos Ruiz", "Ana López", "Luis Martínez"]
+PLACES = ["Medellín", "Envigado", "Itagüí", "Bello", "Sabaneta"]
+
+
+def build_corpus(directory: str, n_docs: int, n_paragraphs: int, seed: int = 21):
+    rng = random.Random(seed)
+    paths = []
+    for d in range(n_docs):
+        paragraphs = []
+        for p in range(n_paragraphs):
+            template = rng.choice(BOILERPLATE)
+            paragraphs.append(template.format(
+                lugar=rng.choice(PLACES), hora=f"{rng.randint(7, 19)}:00", dia=rng.randint(1, 28),
+                nombre=rng.choice(NAMES), num=rng.randint(1, 300), anio=rng.randint(2015, 2024)
+            ))
+        body = "".join(f'<w:p w:rsidR="{d:04d}{i:04d}"><w:r><w:t>{text}</w:t></w:r></w:p>' for i, text in enumerate(paragraphs))
+        xml = f'<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>'
+        path = os.path.join(directory, f"acta_{d:03d}.docx")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("word/document.xml", xml)
+        paths.append(path)
+    return paths
+
+
+def run_legacy(paths, sanitizer, embedder) -> dict:
+    extraction = embedding = 0.0
+    blocks = 0
+    for path in paths:
+        started = time.perf_counter()
+        atomizer = DocxAtomizer(path)
+        content = atomizer.extract_content()
+        atomizer.close()
+        extraction += time.perf_counter() - started
+        for block in content:
+            if block["type"] == "paragraph" and len(block["text"]) > MIN_BLOCK_CHARS:
+                started = time.perf_counter()
+                sanitized = sanitizer.sanitize(block["text"], anonymize=True)
+                extraction += time.perf_counter() - started
+                started = time.perf_counter()
+                embedder.embed_batch([sanitized])
+                embedding += time.perf_counter() - started
+                blocks += 1
+    return {"blocks": blocks, "extraction_s": round(extraction, 2), "embedding_s": round(embedding, 2)}
+
+
+def run_pipeline(orchestrator, paths, workers) -> dict:
+    started = time.perf_counter()
+    docs = orchestrator.extract_corpus(paths, workers=workers)
+    extraction = time.perf_counter() - started
+    all_blocks = [b for doc in docs for b in doc]
+    started = time.perf_counter()
+    orchestrator.embed_blocks(all_blocks)
+    embedding = time.perf_counter() - started
+    return {"blocks": len(all_blocks), "extraction_s": round(extraction, 2), "embedding_s": round(embedding, 2)}
+
+
+def run(n_docs: int, n_paragraphs: int, workers: int, model: str) -> list:
+    TextEmbedder.MODEL_NAME = model
+    embedder = TextEmbedder()
+    sanitizer = TextSanitizer()
+    embedder.embed_batch(["calentamiento"])  # Cargar el modelo fuera de la medición
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = build_corpus(tmp, n_docs, n_paragraphs)
+
+        results.append({"mode": "legacy", **run_legacy(paths, sanitizer, embedder)})
+
+        # Orquestador sin DB/almacenamiento: solo las etapas medidas
+        orchestrator = IngestOrchestrator.__new__(IngestOrchestrator)
+        orchestrator.embedder = embedder
+        orchestrator.sanitizer = sanitizer
+        orchestrator.embedding_cache = EmbeddingCache(os.path.join(tmp, "emb.sqlite3"), model)
+
+        results.append({"mode": "pipeline", "workers": workers, **run_pipeline(orchestrator, paths, workers)})
+        results.append({"mode": "cached", "workers": workers, **run_pipeline(orchestrator, paths, workers)})
+        orchestrator.embedding_cache.close()
+
+    for r in results:
+        r["total_s"] = round(r["extraction_s"] + r["embedding_s"], 2)
+        r["docs"] = n_docs
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=150)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--model", default="sentence-transformers/paraphrase-MiniLM-L3-v2")
+    args = parser.parse_args()
+    print(json.dumps(run(args.docs, args.paragraphs, args.workers, args.model), indent=2))
@@ -0,0 +1,97 @@
+"""
+Benchmark de la escritura del dataset durante MiningOrchestrator.process_batch, simulando
+una corrida de minado de N videos (por defecto 1.000) con pares sintéticos por video.
+
+  - legacy:      DatasetBuilder.build sobre todos los pares acumulados después de cada video
+                 (comportamiento previo, O(N²) en bytes escritos). Se limita a --legacy-videos
+                 y se extrapola el total.
+  - incremental: IncrementalDatasetWriter.add_source por video (append + manifiesto atómico)
+                 y una compactación final con DatasetBuilder.build.
+
+Uso:
+    python -m tests.benchmark.bench_dataset_writer [--videos 1000] [--pairs 60] [--legacy-videos 200]
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from src.mining.dataset_builder import DatasetBuilder, IncrementalDatasetWriter
+from tests.benchmark.harness import dir_bytes
+
+
+def synthetic_video(idx: int, n_pairs: int, rng: random.Random):
+    doc_id = f"acta_{idx // 2:04d}.docx"  # Dos videos por acta, como en sesiones partidas
+    pairs = [
+        {
+            "input": " ".join(rng.choice(["el", "concejal", "vota", "presupuesto", "sesión", "acuerdo"]) for _ in range(40)),
+            "output": f"<w:p><w:t>Fragmento {idx}-{j} del acta</w:t></w:p>",
+            "score": 0.8,
+            "metadata": {"source_doc_id": doc_id, "segment": j},
+        }
+        for j in range(n_pairs)
+    ]
+    return f"video_{idx:05d}", doc_id, pairs
+
+
+def run_legacy(videos) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        builder = DatasetBuilder()
+        all_pairs = []
+        written = 0
+        started = time.perf_counter()
+        for _, _, pairs in videos:
+            all_pairs.extend(pairs)
+            builder.build(all_pairs, tmp, train_ratio=0.9)
+            written += dir_bytes(tmp)
+        elapsed = time.perf_counter() - started
+    return {"elapsed_s": round(elapsed, 2), "bytes_written_mb": round(written / 2**20, 1)}
+
+
+def run_incremental(videos) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = IncrementalDatasetWriter(tmp, train_ratio=0.9)
+        started = time.perf_counter()
+        for source_id, doc_id, pairs in videos:
+            writer.add_source(source_id, doc_id, pairs)
+        streaming = time.perf_counter() - started
+        appended = dir_bytes(tmp)
+
+        started = time.perf_counter()
+        stats = writer.compact(DatasetBuilder())
+        compaction = time.perf_counter() - started
+        rewritten = dir_bytes(tmp)
+    return {
+        "elapsed_s": round(streaming + compaction, 2),
+        "streaming_s": round(streaming, 2),
+        "compaction_s": round(compaction, 2),
+        # Lo anexado en streaming + la reescritura única de la compactación
+        "bytes_written_mb": round((appended + rewritten) / 2**20, 1),
+        "rows": stats["train"] + stats["val"],
+    }
+
+
+def run(n_videos: int, n_pairs: int, legacy_videos: int) -> list:
+    rng = random.Random(7)
+    videos = [synthetic_video(i, n_pairs, rng) for i in range(n_videos)]
+
+    legacy_n = min(legacy_videos, n_videos)
+    legacy = {"mode": "legacy", "videos": legacy_n, **run_legacy(videos[:legacy_n])}
+    if legacy_n < n_videos:
+        # Costo cuadrático: cada video reescribe todo lo acumulado
+        factor = (n_videos * (n_videos + 1)) / (legacy_n * (legacy_n + 1))
+        legacy["extrapolated_s"] = round(legacy["elapsed_s"] * factor, 1)
+        legacy["extrapolated_to"] = n_videos
+
+    incremental = {"mode": "incremental", "videos": n_videos, **run_incremental(videos)}
+    return [legacy, incremental]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=1000)
+    parser.add_argument("--pairs", type=int, default=60)
+    parser.add_argument("--legacy-videos", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.videos, args.pairs, args.legacy_videos), indent=2))
@@ -0,0 +1,172 @@
+"""
+Benchmark de MiningOrchestrator.process_batch con descarga y transcripción simuladas (latencia
+fija por llamada, sin red) y un sentence-transformer pequeño. Reporta filas por minuto a
+medida que crecen los workers.
+
+  - legacy: ThreadPoolExecutor de `workers` hilos; cada fila descarga, transcribe, extrae el
+            acta y llama a SemanticAligner.align, compartiendo el lock de TextEmbedder
+            (comportamiento previo).
+  - staged: pipeline por etapas con `workers` hilos de E/S y `workers` procesos de CPU, y un
+            único EmbeddingBatcher que agrupa los pedidos de todas las filas.
+
+La caché de artefactos se desactiva para medir el trabajo completo. El arranque del pool de
+procesos (import de torch y compilación numba por proceso) se incluye en el tiempo de staged.
+
+Uso:
+    python -m tests.benchmark.bench_mining_pipeline [--rows 48] [--workers 1 2 4 8] \\
+        [--io-latency 0.5] [--model sentence-transformers/paraphrase-MiniLM-L3-v2]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.core.nlp.embedder import TextEmbedder
+from src.mining.aligner import SemanticAligner, AlignerConfig
+from src.mining.analyzer import CorpusAnalyzer
+from src.mining.extractor import SemanticExtractor
+from src.mining.pipeline import MiningOrchestrator
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+SENTENCES = [
+    "El presidente {nombre} somete a consideración el proyecto de acuerdo número {num}.",
+    "Interviene el concejal {nombre} para referirse al presupuesto de {lugar}.",
+    "La secretaría informa que el orden del día fue aprobado por unanimidad.",
+    "Se da lectura a la proposición presentada por la bancada de {lugar}.",
+    "El concejal {nombre} solicita que se incluya en el acta su constancia de voto negativo.",
+    "Se cierra la discusión y se procede a la votación nominal del artículo {num}.",
+]
+NAMES = ["Juan Pérez", "María Gómez", "Carlos Ruiz", "Ana López", "Luis Martínez"]
+PLACES = ["Medellín", "Envigado", "Itagüí", "Bello", "Sabaneta"]
+
+
+class StubDownloader:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def download_and_upload(self, url: str, tenant_id: str) -> str:
+        time.sleep(self.latency)
+        return f"s3://astra-raw/mining/{tenant_id}/{url.rsplit('=', 1)[-1]}.mp3"
+
+
+class StubTranscriber:
+    def __init__(self, transcripts: dict, latency: float):
+        self.transcripts = transcripts
+        self.latency = latency
+
+    def transcribe_url(self, audio_url: str, tenant_id: str, provider: str = "deepgram") -> dict:
+        time.sleep(self.latency)
+        return {"segments": self.transcripts[audio_url.rsplit("/", 1)[-1][:-4]]}
+
+
+def build_corpus(directory: str, n_rows: int, n_paragraphs: int, seed: int = 5):
+    """Un acta DOCX por fila y su transcripción sintética (1-2 segmentos por párrafo)."""
+    rng = random.Random(seed)
+    rows, transcripts = [], {}
+    for r in range(n_rows):
+        paragraphs = [
+            rng.choice(SENTENCES).format(nombre=rng.choice(NAMES), lugar=rng.choice(PLACES), num=rng.randint(1, 300))
+            for _ in range(n_paragraphs)
+        ]
+        body = "".join(f'<w:p w:rsidR="{r:04d}{i:04d}"><w:r><w:t>{text}</w:t></w:r></w:p>' for i, text in enumerate(paragraphs))
+        path = os.path.join(directory, f"acta_{r:03d}.docx")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("word/document.xml", f'<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>')
+
+        segments, t = [], 0.0
+        for text in paragraphs:
+            words = text.split()
+            cut = len(words) // 2 if rng.random() < 0.5 else len(words)
+            for piece in (words[:cut], words[cut:]):
+                if piece:
+                    duration = 0.4 * len(piece)
+                    segments.append({"start": round(t, 2), "end": round(t + duration, 2),
+                                     "text": " ".join(piece), "speaker": rng.randint(0, 3)})
+                    t += duration + rng.choice([0.2, 0.5, 2.5])
+        video = f"sesion{r:04d}"
+        transcripts[video] = segments
+        rows.append({"video_url": f"https://www.youtube.com/watch?v={video}", "docx_path": path})
+    return rows, transcripts
+
+
+def make_orchestrator(output_dir: str, transcripts: dict, io_latency: float) -> MiningOrchestrator:
+    # Sin MinIO ni Core: servicios simulados y caché de artefactos desactivada
+    orchestrator = MiningOrchestrator.__new__(MiningOrchestrator)
+    orchestrator.output_dir = Path(output_dir)
+    orchestrator.output_dir.mkdir(parents=True, exist_ok=True)
+    orchestrator.tenant_id = "bench"
+    orchestrator.downloader = StubDownloader(io_latency)
+    orchestrator.core_client = StubTranscriber(transcripts, io_latency)
+    orchestrator.aligner = SemanticAligner(config=AlignerConfig(threshold=0.35))
+    orchestrator.analyzer = CorpusAnalyzer()
+    orchestrator.static_hashes = set()
+    orchestrator.cache = None
+    return orchestrator
+
+
+def run_legacy(orchestrator: MiningOrchestrator, rows, workers: int) -> dict:
+    def one(row):
+        s3_uri = orchestrator.downloader.download_and_upload(row["video_url"], orchestrator.tenant_id)
+        segments = orchestrator.core_client.transcribe_url(s3_uri, orchestrator.tenant_id)["segments"]
+        fragments = SemanticExtractor(orchestrator.static_hashes).extract_from_document(row["docx_path"])
+        return orchestrator.aligner.align(segments, fragments)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pairs = sum(len(p) for p in executor.map(one, rows))
+    return {"elapsed_s": time.perf_counter() - started, "pairs": pairs}
+
+
+def run_staged(orchestrator: MiningOrchestrator, rows, workers: int) -> dict:
+    csv_path = os.path.join(orchestrator.output_dir, "rows.csv")
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["video_url", "docx_path"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+    started = time.perf_counter()
+    report = orchestrator.process_batch(csv_path, max_workers=workers, cpu_workers=workers)
+    return {"elapsed_s": time.perf_counter() - started, "pairs": report["aligned_pairs_count"]}
+
+
+def run(n_rows: int, n_paragraphs: int, workers_list, io_latency: float, model: str) -> list:
+    TextEmbedder.MODEL_NAME = model
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        rows, transcripts = build_corpus(tmp, n_rows, n_paragraphs)
+
+        # Calentamiento: carga del modelo y compilación numba fuera de la medición
+        warm = make_orchestrator(os.path.join(tmp, "warm"), transcripts, 0.0)
+        run_legacy(warm, rows[:1], 1)
+
+        for workers in workers_list:
+            for mode, runner in (("legacy", run_legacy), ("staged", run_staged)):
+                orchestrator = make_orchestrator(os.path.join(tmp, f"{mode}_{workers}"), transcripts, io_latency)
+                measured = runner(orchestrator, rows, workers)
+                results.append({
+                    "mode": mode,
+                    "workers": workers,
+                    "rows": n_rows,
+                    "elapsed_s": round(measured["elapsed_s"], 2),
+                    "rows_per_min": round(60 * n_rows / measured["elapsed_s"], 1),
+                    "pairs": measured["pairs"],
+                })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=48)
+    parser.add_argument("--paragraphs", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--io-latency", type=float, default=0.5, help="Segundos por descarga y por transcripción simuladas")
+    parser.add_argument("--model", default="sentence-transformers/paraphrase-MiniLM-L3-v2")
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.paragraphs, args.workers, args.io_latency, args.model), indent=2))
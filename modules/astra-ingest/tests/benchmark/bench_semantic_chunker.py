@@ -0,0 +1,113 @@
+"""
+Benchmark de EnterpriseSemanticChunker.chunk_transcript sobre una transcripción sintética
+(por defecto 50k segmentos, embeddings de 768 dims precalculados: no mide el modelo).
+
+  - legacy:     while + sklearn cosine_similarity 1×768 por paso + concatenación de texto
+                (comportamiento previo, replicado aquí).
+  - vectorized: señales de tiempo/orador como arrays + kernel numba + texto ensamblado por rangos.
+
+Reporta tiempos y si los cortes coinciden. La compilación JIT se hace antes de medir.
+
+Uso:
+    python -m tests.benchmark.bench_semantic_chunker [--segments 50000] [--dim 768]
+"""
+import argparse
+import json
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from src.mining.semantic_chunker import EnterpriseSemanticChunker
+
+
+def synthetic_transcript(n: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(40, dim)).astype(np.float32)
+    topic_ids = np.cumsum(rng.random(n) < 0.1) % len(topics)
+    embeddings = topics[topic_ids] + rng.normal(scale=0.8, size=(n, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    durations = rng.uniform(1.5, 9.0, size=n)
+    pauses = rng.choice([0.2, 0.5, 3.0], size=n, p=[0.6, 0.3, 0.1])
+    starts = np.cumsum(pauses + np.concatenate([[0.0], durations[:-1]]))
+    speakers = rng.choice(["Presidente", "Secretaria", "Concejal 1", "Concejal 2"], size=n)
+    segments = [
+        {"text": f"Intervención {i} sobre el punto {topic_ids[i]}.", "start": float(starts[i]),
+         "end": float(starts[i] + durations[i]), "speaker": str(speakers[i])}
+        for i in range(n)
+    ]
+    return segments, embeddings
+
+
+def legacy_chunk(chunker, segments, embeddings):
+    chunks = []
+    current_indices, current_segments = [0], [segments[0]]
+    current_text = segments[0].get('text', '')
+    chunk_start, chunk_end = segments[0].get('start', 0.0), segments[0].get('end', 0.0)
+    current_centroid = embeddings[0].reshape(1, -1)
+    for i in range(1, len(segments)):
+        next_seg, next_emb = segments[i], embeddings[i].reshape(1, -1)
+        adjusted_sim = cosine_similarity(current_centroid, next_emb)[0][0]
+        if next_seg.get('start', 0.0) - chunk_end > 2.0:
+            adjusted_sim -= chunker.silence_penalty
+        last_speaker, next_speaker = current_segments[-1].get('speaker'), next_seg.get('speaker')
+        if last_speaker and next_speaker and last_speaker != next_speaker:
+            adjusted_sim -= chunker.speaker_change_penalty
+        current_duration = chunk_end - chunk_start
+        if ((current_duration >= chunker.min_duration and adjusted_sim < chunker.base_threshold)
+                or (current_duration >= chunker.soft_max and adjusted_sim < chunker.base_threshold + 0.1)
+                or current_duration >= chunker.hard_max):
+            chunks.append({"text": current_text.strip(), "segments": current_segments.copy(),
+                           "start": chunk_start, "end": chunk_end, "duration": current_duration,
+                           "avg_similarity": float(adjusted_sim)})
+            overlap_count = min(chunker.overlap, len(current_segments))
+            current_segments = (current_segments[-overlap_count:] if overlap_count > 0 else []) + [next_seg]
+            current_indices = (current_indices[-overlap_count:] if overlap_count > 0 else []) + [i]
+            current_text = " ".join([s.get('text', '').strip() for s in current_segments])
+            chunk_start = current_segments[0].get('start', next_seg.get('start', 0.0))
+            chunk_end = next_seg.get('end', 0.0)
+            current_centroid = np.mean(embeddings[current_indices], axis=0).reshape(1, -1)
+        else:
+            current_segments.append(next_seg)
+            current_indices.append(i)
+            current_text += " " + next_seg.get('text', '').strip()
+            chunk_end = next_seg.get('end', 0.0)
+            current_centroid = (chunker.ema_alpha * next_emb) + ((1 - chunker.ema_alpha) * current_centroid)
+    chunks.append({"text": current_text.strip(), "segments": current_segments,
+                   "start": chunk_start, "end": chunk_end, "duration": chunk_end - chunk_start})
+    return chunks
+
+
+def run(n_segments: int, dim: int) -> list:
+    segments, embeddings = synthetic_transcript(n_segments, dim)
+    chunker = EnterpriseSemanticChunker()
+    chunker.embedder = MagicMock()
+    chunker.embedder.embed_batch.return_value = embeddings
+
+    chunker.chunk_transcript(segments[:50]) # Compilación JIT fuera de la medición
+
+    started = time.perf_counter()
+    legacy = legacy_chunk(chunker, segments, embeddings.astype(np.float64))
+    legacy_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vectorized = chunker.chunk_transcript(segments)
+    vectorized_s = time.perf_counter() - started
+
+    same = [len(c["segments"]) for c in legacy] == [len(c["segments"]) for c in vectorized] and \
+        all(a["text"] == b["text"] for a, b in zip(legacy, vectorized))
+    return [
+        {"mode": "legacy", "segments": n_segments, "chunks": len(legacy), "elapsed_s": round(legacy_s, 2)},
+        {"mode": "vectorized", "segments": n_segments, "chunks": len(vectorized), "elapsed_s": round(vectorized_s, 3),
+         "speedup": round(legacy_s / vectorized_s, 1), "same_boundaries": same},
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+    print(json.dumps(run(args.segments, args.dim), indent=2))
@@ -0,0 +1,88 @@
+"""
+Benchmark de SequenceAligner.induce_template sobre clusters sintéticos de líneas de actas
+(por defecto 10 / 1k / 20k líneas): listas de votación, asistencia y encabezados.
+
+  - legacy:  pivote = primer texto + difflib.SequenceMatcher contra cada muestra
+             (comportamiento previo, replicado aquí).
+  - induced: IDs enteros + medoide + Levenshtein.opcodes + parada por convergencia.
+
+Reporta el tiempo de cada modo y si el patrón inducido coincide con el previo.
+
+Uso:
+    python -m tests.benchmark.bench_sequence_aligner [--sizes 10 1000 20000]
+"""
+import argparse
+import difflib
+import json
+import random
+import time
+
+from src.core.nlp.alignment_engine import SequenceAligner
+
+NAMES = ["Juan Pérez", "María Gómez", "Carlos Ruiz", "Ana López", "Luis Martínez", "Rosa Díaz"]
+CLUSTERS = {
+    "votacion": lambda rng: f"El concejal {rng.choice(NAMES)} vota {rng.choice(['SI', 'NO'])}",
+    "asistencia": lambda rng: f"Se registra la asistencia de {rng.choice(NAMES)} a las {rng.randint(7, 19)}:{rng.choice(['00', '15', '30'])}",
+    "encabezado": lambda rng: f"Acta número {rng.randint(1, 999)} de la sesión ordinaria del día {rng.randint(1, 28)} de {rng.choice(['enero', 'marzo', 'junio'])}",
+}
+
+
+def legacy_induce(texts):
+    """Copia del alineador previo (difflib, pivote = texts[0], inserciones ignoradas)."""
+    if len(texts) == 1:
+        return texts[0]
+    pivot = texts[0].split()
+    variance = [False] * len(pivot)
+    for text in texts[1:]:
+        matcher = difflib.SequenceMatcher(None, pivot, text.split())
+        for tag, i1, i2, _, _ in matcher.get_opcodes():
+            if tag in ("replace", "delete"):
+                for k in range(i1, i2):
+                    variance[k] = True
+    parts, n = [], 1
+    for token, is_var in zip(pivot, variance):
+        if is_var:
+            if parts and parts[-1].startswith("{VAR_"):
+                continue
+            parts.append(f"{{VAR_{n}}}")
+            n += 1
+        else:
+            parts.append(token)
+    return " ".join(parts)
+
+
+def run(sizes) -> list:
+    results = []
+    for name, make in CLUSTERS.items():
+        for n in sizes:
+            rng = random.Random(n)
+            texts = [make(rng) for _ in range(n)]
+
+            started = time.perf_counter()
+            legacy = legacy_induce(texts)
+            legacy_s = time.perf_counter() - started
+
+            aligner = SequenceAligner()
+            started = time.perf_counter()
+            induced = aligner.induce_template(texts).raw_pattern
+            induced_s = time.perf_counter() - started
+
+            results.append({
+                "cluster": name,
+                "lines": n,
+                "legacy_s": round(legacy_s, 4),
+                "induced_s": round(induced_s, 4),
+                "speedup": round(legacy_s / induced_s, 1) if induced_s else None,
+                "same_pattern": legacy == induced,
+                "legacy_pattern": legacy,
+                "induced_pattern": induced,
+                **aligner.last_stats,
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1_000, 20_000])
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes), indent=2, ensure_ascii=False))
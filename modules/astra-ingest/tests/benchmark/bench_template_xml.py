@@ -0,0 +1,123 @@
+"""
+Benchmark de la generación de XML de plantillas + esqueletos durante la inducción
+(etapas 3 y 4 de IngestOrchestrator.process_batch), sin DB ni almacenamiento.
+Por defecto 50 documentos, cada uno referencia de 100 clusters.
+
+  - legacy: DocxAtomizer(ref_doc) + xpath //*[@w:rsidR=...] por cluster, y el documento
+            reabierto otra vez para su esqueleto (comportamiento previo).
+  - cached: DocxAtomizerCache (LRU de documentos parseados) + find_node (índice por rsidR).
+
+Uso:
+    python -m tests.benchmark.bench_template_xml [--docs 50] [--clusters-per-doc 100] \\
+        [--paragraphs 600] [--cache-size 64]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import zipfile
+
+from src.core.builder.xml_factory import XmlFactory
+from src.core.nlp.alignment_engine import TemplateModel, Token
+from src.core.parser.xml_engine import DocxAtomizer, DocxAtomizerCache
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def build_corpus(directory: str, n_docs: int, n_paragraphs: int):
+    paths = []
+    for d in range(n_docs):
+        body = "".join(
+            f'<w:p w:rsidR="{d:04X}{i:04X}"><w:pPr><w:pStyle w:val="Normal"/></w:pPr>'
+            f'<w:r><w:rPr><w:b/></w:rPr><w:t>Párrafo {i} del acta {d}, con texto de relleno.</w:t></w:r></w:p>'
+            for i in range(n_paragraphs)
+        )
+        xml = f'<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>'
+        path = os.path.join(directory, f"acta_{d:03d}.docx")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("word/document.xml", xml)
+        paths.append(path)
+    return paths
+
+
+def build_clusters(paths, clusters_per_doc: int, n_paragraphs: int):
+    """(ref_doc, ref_node_id, modelo) por cluster; los referenciados se reparten por el documento."""
+    step = max(1, n_paragraphs // clusters_per_doc)
+    model = TemplateModel(
+        tokens=[Token("Se aprueba el acta", False), Token("{VAR}", True, "VAR_1")],
+        raw_pattern="Se aprueba el acta {VAR_1}"
+    )
+    return [
+        (path, f"{d:04X}{(c * step) % n_paragraphs:04X}", model)
+        for c in range(clusters_per_doc)
+        for d, path in enumerate(paths)
+    ]
+
+
+def run_legacy(paths, clusters, factory) -> dict:
+    started = time.perf_counter()
+    generated = 0
+    for ref_doc, node_id, model in clusters:
+        with DocxAtomizer(ref_doc) as atm:
+            nodes = atm.document_tree.xpath(f'//*[@w:rsidR="{node_id}"]', namespaces=atm.namespaces)
+            if nodes:
+                factory.generate_ooxml_template(model, nodes[0])
+                generated += 1
+    templates_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for path in paths:
+        with DocxAtomizer(path) as atm:
+            atm.to_string(atm.get_skeleton_tree())
+    skeletons_s = time.perf_counter() - started
+    return {"templates": generated, "templates_s": round(templates_s, 2), "skeletons_s": round(skeletons_s, 2)}
+
+
+def run_cached(paths, clusters, factory, cache_size: int) -> dict:
+    with DocxAtomizerCache(cache_size) as documents:
+        started = time.perf_counter()
+        generated = 0
+        for ref_doc, node_id, model in sorted(clusters, key=lambda c: c[0]):
+            node = documents.get(ref_doc).find_node(node_id)
+            if node is not None:
+                factory.generate_ooxml_template(model, node)
+                generated += 1
+        templates_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for path in paths:
+            atm = documents.get(path)
+            atm.to_string(atm.get_skeleton_tree())
+        skeletons_s = time.perf_counter() - started
+        parsed = documents.misses
+    return {
+        "templates": generated, "templates_s": round(templates_s, 2), "skeletons_s": round(skeletons_s, 2),
+        "documents_parsed": parsed,
+    }
+
+
+def run(n_docs: int, clusters_per_doc: int, n_paragraphs: int, cache_size: int) -> list:
+    factory = XmlFactory()
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = build_corpus(tmp, n_docs, n_paragraphs)
+        clusters = build_clusters(paths, clusters_per_doc, n_paragraphs)
+        results = [
+            {"mode": "legacy", **run_legacy(paths, clusters, factory)},
+            {"mode": "cached", "cache_size": cache_size, **run_cached(paths, clusters, factory, cache_size)},
+        ]
+    for r in results:
+        r["total_s"] = round(r["templates_s"] + r["skeletons_s"], 2)
+        r["docs"] = n_docs
+        r["clusters"] = len(clusters)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--clusters-per-doc", type=int, default=100)
+    parser.add_argument("--paragraphs", type=int, default=600)
+    parser.add_argument("--cache-size", type=int, default=64)
+    args = parser.parse_args()
+    print(json.dumps(run(args.docs, args.clusters_per_doc, args.paragraphs, args.cache_size), indent=2))
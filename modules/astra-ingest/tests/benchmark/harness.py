@@ -0,0 +1,46 @@
+"""
+Utilidades compartidas por los scripts bench_*: corrida aislada en un proceso nuevo con
+pico de RSS (ru_maxrss) y tamaño en disco de un directorio.
+"""
+import multiprocessing
+import os
+import resource
+from typing import Callable, Dict
+
+
+def _maxrss_mb() -> float:
+    # ru_maxrss se reporta en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RssMeter:
+    """Pico de RSS del proceso y su crecimiento desde que se creó el medidor (tras preparar los datos)."""
+
+    def __init__(self):
+        self.before = _maxrss_mb()
+
+    def report(self) -> Dict[str, float]:
+        peak = _maxrss_mb()
+        return {"peak_rss_mb": round(peak, 1), "rss_growth_mb": round(peak - self.before, 1)}
+
+
+def _run_child(target: Callable[..., dict], args: tuple, queue) -> None:
+    queue.put(target(*args))
+
+
+def run_isolated(target: Callable[..., dict], *args) -> dict:
+    """
+    Ejecuta `target(*args)` en un proceso nuevo y retorna el dict que produce, para que el
+    pico de RSS que reporte corresponda solo a esa corrida.
+    """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_child, args=(target, args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def dir_bytes(root: str) -> int:
+    """Bytes de todos los archivos bajo `root`, recursivo."""
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
@@ -78,4 +78,51 @@ class TestClusterEngine:
         X = np.random.rand(50, 10)
         for _ in range(5):
             engine.perform_clustering(X.tolist(), tenant_id="gc_test")
-        assert True
\ No newline at end of file
+        assert True
+    def test_scalable_mode_dedups_and_keeps_label_shape(self, engine):
+        """
+        Modo escalable: PCA + dedup + HDBSCAN sobre representantes.
+        Un párrafo repetido 300 veces debe quedar en un solo cluster y las etiquetas
+        deben volver a cada vector original.
+        """
+        X, _ = make_blobs(n_samples=600, centers=3, n_features=768, random_state=7, cluster_std=0.5)
+        boilerplate = np.repeat(X[:1] + 25.0, 300, axis=0)
+        vectors = np.vstack([X, boilerplate])
+
+        result = engine.perform_clustering(vectors, tenant_id="test_tenant", scalable=True)
+
+        assert result.total_samples == 900
+        assert len(result.labels) == 900
+        boiler_labels = set(result.labels[600:])
+        assert len(boiler_labels) == 1 and boiler_labels != {-1}
+        assert result.num_clusters >= 3
+        assert sum(result.cluster_distribution.values()) == 900
+        assert result.silhouette_score > 0.5
+
+    def test_scalable_mode_auto_threshold(self, engine, monkeypatch):
+        calls = []
+        original = engine._cluster_scalable
+        monkeypatch.setattr(engine, "SCALABLE_THRESHOLD", 50)
+        monkeypatch.setattr(engine, "_cluster_scalable", lambda *a: calls.append(1) or original(*a))
+
+        engine.perform_clustering(np.random.rand(49, 10), tenant_id="t")
+        engine.perform_clustering(np.random.rand(60, 10), tenant_id="t")
+
+        assert calls == [1]
+
+    def test_estimated_silhouette_matches_per_cluster_centroids(self, engine):
+        X, labels = make_blobs(n_samples=300, centers=4, n_features=8, random_state=3)
+        labels = np.where(np.arange(300) % 17 == 0, -1, labels * 7)  # Ids no contiguos y ruido
+        X = X.astype(np.float32)
+
+        estimated = engine._estimate_silhouette(X, labels, np.random.default_rng(0))
+
+        cluster_ids = np.unique(labels[labels != -1])
+        centroids = np.stack([X[labels == c].mean(axis=0) for c in cluster_ids])
+        points = X[labels != -1]
+        dist = np.linalg.norm(points[:, None, :] - centroids[None, :, :], axis=2)
+        own = np.searchsorted(cluster_ids, labels[labels != -1])
+        a = dist[np.arange(len(points)), own]
+        dist[np.arange(len(points)), own] = np.inf
+        b = dist.min(axis=1)
+        assert estimated == pytest.approx(np.mean((b - a) / np.maximum(a, b)), abs=1e-4)
@@ -0,0 +1,82 @@
+import pytest
+from src.core.nlp.alignment_engine import SequenceAligner
+
+
+class TestSequenceAligner:
+
+    def test_empty_input_raises(self):
+        with pytest.raises(ValueError):
+            SequenceAligner().induce_template([])
+
+    def test_single_text_is_static(self):
+        template = SequenceAligner().induce_template(["Se abre la sesión"])
+        assert template.raw_pattern == "Se abre la sesión"
+        assert not any(t.is_variable for t in template.tokens)
+
+    @pytest.mark.parametrize("texts, expected", [
+        # Fixtures con la salida del alineador basado en difflib (pivote = primer texto)
+        (
+            ["Se aprueba el acta número 12 de la sesión", "Se aprueba el acta número 13 de la sesión"],
+            "Se aprueba el acta número {VAR_1} de la sesión",
+        ),
+        (
+            ["El concejal Pérez vota SI", "El concejal Gómez vota NO", "El concejal Ruiz vota SI"],
+            "El concejal {VAR_1} vota {VAR_2}",
+        ),
+        (
+            ["Siendo las 9:00 del día 3", "Siendo las 10:30 del día 14"],
+            "Siendo las {VAR_1} del día {VAR_2}",
+        ),
+    ])
+    def test_matches_legacy_patterns(self, texts, expected):
+        assert SequenceAligner().induce_template(texts).raw_pattern == expected
+
+    def test_contiguous_variables_are_merged(self):
+        template = SequenceAligner().induce_template([
+            "Interviene el concejal Juan Pérez hoy",
+            "Interviene el concejal María Gómez hoy",
+        ])
+        assert template.raw_pattern == "Interviene el concejal {VAR_1} hoy"
+
+    def test_insertion_slot_becomes_variable(self):
+        template = SequenceAligner().induce_template([
+            "Se levanta la sesión",
+            "Se levanta la sesión",
+            "Se levanta formalmente la sesión",
+        ])
+        assert template.raw_pattern == "Se levanta {VAR_1} la sesión"
+
+    def test_medoid_pivot_ignores_outlier_first_text(self):
+        texts = ["El concejal Pérez vota SI con salvamento de voto"] + [
+            f"El concejal {name} vota SI" for name in ("Pérez", "Gómez", "Ruiz", "López")
+        ]
+        aligner = SequenceAligner()
+        template = aligner.induce_template(texts)
+        assert aligner.last_stats["pivot_tokens"] == 5
+        # La cola del outlier aparece en 1 de 5 muestras (< threshold): no abre slot
+        assert template.raw_pattern == "El concejal {VAR_1} vota SI"
+
+    def test_rare_replacements_stay_variable(self):
+        texts = ["El concejal Pérez vota SI"] * 6 + ["El concejal Gómez vota NO"] * 2
+
+        assert SequenceAligner().induce_template(texts).raw_pattern == "El concejal {VAR_1} vota {VAR_2}"
+
+    def test_threshold_applies_to_insertion_slots(self):
+        texts = ["Se levanta la sesión"] * 4 + ["Se levanta formalmente la sesión"]
+
+        assert SequenceAligner().induce_template(texts).raw_pattern == "Se levanta la sesión"
+        assert SequenceAligner(threshold=0.1).induce_template(texts).raw_pattern == "Se levanta {VAR_1} la sesión"
+
+    def test_duplicates_are_aligned_once(self):
+        aligner = SequenceAligner()
+        aligner.induce_template(["El concejal Pérez vota SI"] * 500 + ["El concejal Gómez vota NO"] * 500)
+        assert aligner.last_stats["unique"] == 2
+        assert aligner.last_stats["aligned"] == 1
+
+    def test_stops_early_once_variance_map_converges(self):
+        aligner = SequenceAligner()
+        aligner.CONVERGENCE_WINDOW = 20
+        texts = [f"Registro número {i} aprobado" for i in range(1000)]
+        template = aligner.induce_template(texts)
+        assert template.raw_pattern == "Registro número {VAR_1} aprobado"
+        assert aligner.last_stats["aligned"] < 100
@@ -96,4 +96,51 @@ class TestTextEmbedder:
         embedder = TextEmbedder()
         # No mockeamos el modelo porque con input vacío no debería llegar a cargarlo/usarlo
         result = embedder.embed_batch([])
-        assert result == []
\ No newline at end of file
+        assert result == []
+class TestEmbedCorpus:
+
+    @pytest.fixture(autouse=True)
+    def reset_singleton(self):
+        TextEmbedder._instance = None
+        TextEmbedder._model = None
+        TextEmbedder._device = None
+
+    @pytest.fixture
+    def embedder(self):
+        """Modelo falso: vector = [len(texto), 1, 0], registrando cada llamada a encode."""
+        embedder = TextEmbedder()
+        model = MagicMock()
+        model.encode.side_effect = lambda texts, **kwargs: np.array([[len(t), 1.0, 0.0] for t in texts], dtype=np.float32)
+        TextEmbedder._model = model
+        return embedder
+
+    def test_order_dedup_and_length_sorting(self, embedder):
+        texts = ["bb", "a", "cccc", "a", "bb"]
+
+        vectors = embedder.embed_corpus(texts, batch_size=64)
+
+        assert vectors.shape == (5, 3)
+        assert vectors[:, 0].tolist() == [2, 1, 4, 1, 2]
+        # Un único encode, textos únicos ordenados por longitud descendente
+        embedder._model.encode.assert_called_once()
+        assert embedder._model.encode.call_args[0][0] == ["cccc", "bb", "a"]
+        assert embedder._model.encode.call_args[1]["batch_size"] == 64
+
+    def test_persistent_cache_skips_known_texts(self, embedder, tmp_path):
+        from src.core.nlp.embedding_cache import EmbeddingCache
+        path = str(tmp_path / "emb.sqlite3")
+
+        cache = EmbeddingCache(path, "tiny")
+        embedder.embed_corpus(["uno", "dos"], cache=cache)
+        cache.close()
+
+        # Nueva instancia sobre el mismo archivo: solo el texto nuevo pasa por el modelo
+        cache = EmbeddingCache(path, "tiny")
+        embedder._model.encode.reset_mock()
+        vectors = embedder.embed_corpus(["dos", "tres!", "uno"], cache=cache)
+
+        assert embedder._model.encode.call_args[0][0] == ["tres!"]
+        assert vectors[:, 0].tolist() == [3, 5, 3]
+        assert len(cache) == 3
+        # Otro modelo no comparte entradas
+        assert EmbeddingCache(path, "otro").get_many([EmbeddingCache.text_hash("uno")]) == {}
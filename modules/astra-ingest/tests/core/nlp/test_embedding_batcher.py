@@ -0,0 +1,103 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.core.nlp.embedding_batcher import EmbeddingBatcher
+
+
+class FakeEmbedder:
+    """Vector = [len(texto), índice de llamada]; registra cada lote recibido."""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+        self.release = threading.Event()
+        self.release.set()
+
+    def embed_corpus(self, texts, batch_size=128, cache=None):
+        self.release.wait(timeout=5)
+        if self.fail:
+            raise RuntimeError("modelo caído")
+        self.calls.append(list(texts))
+        return np.array([[len(t), len(self.calls)] for t in texts], dtype=np.float32)
+
+
+class TestEmbeddingBatcher:
+
+    def test_results_are_aligned_with_each_request(self):
+        embedder = FakeEmbedder()
+        with EmbeddingBatcher(embedder, max_wait_ms=50) as batcher:
+            futures = [batcher.submit(["a" * (i + 1)] * (i + 1)) for i in range(5)]
+            results = [f.result(timeout=5) for f in futures]
+
+        for i, vectors in enumerate(results):
+            assert vectors.shape == (i + 1, 2)
+            assert (vectors[:, 0] == i + 1).all()
+
+    def test_concurrent_requests_share_one_batch(self):
+        embedder = FakeEmbedder()
+        embedder.release.clear()  # Retener el primer lote mientras llegan los demás
+        with EmbeddingBatcher(embedder, max_wait_ms=1) as batcher:
+            first = batcher.submit(["primero"])
+            rest = [batcher.submit([f"fila {i}", f"nodo {i}"]) for i in range(20)]
+            embedder.release.set()
+            first.result(timeout=5)
+            for f in rest:
+                f.result(timeout=5)
+
+        assert len(embedder.calls) <= 2
+        assert sum(len(c) for c in embedder.calls) == 41
+        assert batcher.requests == 21
+
+    def test_max_batch_texts_splits_batches(self):
+        embedder = FakeEmbedder()
+        embedder.release.clear()
+        with EmbeddingBatcher(embedder, max_batch_texts=4, max_wait_ms=50) as batcher:
+            futures = [batcher.submit(["x", "y"]) for _ in range(6)]
+            embedder.release.set()
+            for f in futures:
+                f.result(timeout=5)
+
+        assert all(len(c) <= 4 for c in embedder.calls)
+        assert batcher.texts == 12
+
+    def test_empty_request_resolves_immediately(self):
+        batcher = EmbeddingBatcher(FakeEmbedder())
+        assert batcher.submit([]).result(timeout=1).shape[0] == 0
+
+    def test_errors_propagate_to_every_request_in_the_batch(self):
+        with EmbeddingBatcher(FakeEmbedder(fail=True), max_wait_ms=20) as batcher:
+            futures = [batcher.submit(["a"]), batcher.submit(["b"])]
+            for f in futures:
+                with pytest.raises(RuntimeError, match="modelo caído"):
+                    f.result(timeout=5)
+
+    def test_close_drains_pending_requests(self):
+        embedder = FakeEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_wait_ms=200).start()
+        futures = [batcher.submit([str(i)]) for i in range(10)]
+        batcher.close()
+
+        assert all(f.done() for f in futures)
+        with pytest.raises(RuntimeError):
+            batcher.submit(["tarde"])
+
+    def test_submits_racing_close_are_served_or_rejected(self):
+        batcher = EmbeddingBatcher(FakeEmbedder(), max_wait_ms=1).start()
+        accepted = []
+
+        def producer():
+            while True:
+                try:
+                    accepted.append(batcher.submit(["fila"]))
+                except RuntimeError:
+                    return
+
+        thread = threading.Thread(target=producer)
+        thread.start()
+        batcher.close()
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert all(f.done() for f in accepted)
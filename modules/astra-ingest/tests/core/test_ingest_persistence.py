@@ -0,0 +1,205 @@
+import hashlib
+import threading
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from src.core.ingest_orchestrator import IngestOrchestrator
+from src.core.mapping.auto_mapper import HeuristicMapper
+from src.core.nlp.alignment_engine import TemplateModel, Token
+from src.db.models import Base, EntityType, LabelCatalog, Skeleton, TableTemplate, Template, ZoneMapping
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+class FakeStorage:
+    """Registra las subidas en memoria (se llama desde varios hilos)."""
+
+    def __init__(self):
+        self.uploads = {}
+        self._lock = threading.Lock()
+
+    def upload_bytes(self, data: bytes, s3_uri: str):
+        with self._lock:
+            self.uploads[s3_uri] = data
+        return {"uri": s3_uri, "version_id": None}
+
+
+class FakeAtomizer:
+    TABLES = {}
+
+    def __init__(self, path):
+        self.path = path
+        self.dynamic_tables = {}
+
+    def find_node(self, node_id):
+        return object()
+
+    def get_skeleton_tree(self):
+        self.dynamic_tables = dict(self.TABLES.get(self.path, {}))
+        return self.path
+
+    def to_string(self, tree):
+        return f"<skeleton doc='{tree}'/>".encode()
+
+
+class FakeDocuments:
+    """Sustituto de DocxAtomizerCache: un FakeAtomizer por ruta."""
+
+    def __init__(self):
+        self.opened = {}
+
+    def get(self, path):
+        return self.opened.setdefault(path, FakeAtomizer(path))
+
+
+class StaticAligner:
+    def induce_template(self, texts):
+        return TemplateModel([Token(texts[0], False)], texts[0])
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.statements = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*args, **kwargs):
+        session.statements += 1
+
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def orchestrator(db):
+    orch = IngestOrchestrator.__new__(IngestOrchestrator)
+    orch.db = db
+    orch.aligner = StaticAligner()
+    orch.xml_factory = MagicMock()
+    orch.xml_factory.generate_ooxml_template.return_value = b"<w:p/>"
+    orch.validator = MagicMock()
+    orch.validator.validate.return_value = (True, "")
+    orch.mapper = HeuristicMapper(db)
+    orch.storage = FakeStorage()
+    orch.stage_timings = {}
+    return orch
+
+
+def make_clusters(n_clusters: int, n_docs: int = 20):
+    return {
+        label: [
+            {
+                "text": f"Plantilla número {label} del concejo",
+                "original_doc": f"doc_{(label + k) % n_docs}.docx",
+                "node_id": f"{label:08d}",
+                "block_index": k,
+                "total_blocks": 10,
+            }
+            for k in range(3)
+        ]
+        for label in range(n_clusters)
+    }
+
+
+def struct_hash(label: int) -> str:
+    return hashlib.sha256(f"Plantilla número {label} del concejo".encode()).hexdigest()
+
+
+class TestPersistTemplates:
+
+    def test_2000_clusters_bulk_round_trips(self, db, orchestrator):
+        clusters = make_clusters(2000)
+        db.statements = 0
+        template_map = orchestrator._persist_templates("tenant_a", clusters, FakeDocuments())
+
+        assert len(template_map) == 2000
+        assert db.query(Template).count() == 2000
+        assert db.query(ZoneMapping).count() == 2000
+        assert len(orchestrator.storage.uploads) == 2000
+        # Antes: ~2 consultas + 1 commit por cluster (y otro tanto del mapper)
+        assert db.statements < 60
+
+    def test_rerun_reuses_existing_templates(self, db, orchestrator):
+        clusters = make_clusters(300)
+        first = orchestrator._persist_templates("tenant_a", clusters, FakeDocuments())
+        orchestrator.storage.uploads.clear()
+
+        second = orchestrator._persist_templates("tenant_a", clusters, FakeDocuments())
+
+        assert second == first
+        assert db.query(Template).count() == 300
+        assert db.query(ZoneMapping).count() == 300
+        assert orchestrator.storage.uploads == {}
+
+    def test_rerun_keeps_existing_zone_mappings(self, db, orchestrator):
+        clusters = make_clusters(3)
+        orchestrator._persist_templates("tenant_a", clusters, FakeDocuments())
+        mapping = db.query(ZoneMapping).first()
+        mapping.zone_id = "CUSTOM"
+        db.commit()
+
+        for blocks in clusters.values():
+            for b in blocks:
+                b["block_index"] = 9
+        orchestrator._persist_templates("tenant_a", clusters, FakeDocuments())
+
+        db.refresh(mapping)
+        assert mapping.zone_id == "CUSTOM"
+
+    def test_catalog_label_and_duplicate_patterns(self, db, orchestrator):
+        db.add(LabelCatalog(tenant_id="tenant_a", entity_type=EntityType.TEMPLATE,
+                            entity_hash=struct_hash(1), label_name="APERTURA"))
+        db.commit()
+        clusters = make_clusters(3)
+        clusters["seed_0"] = [dict(b) for b in clusters[1]]  # Mismo patrón que el cluster 1
+
+        template_map = orchestrator._persist_templates("tenant_a", clusters, FakeDocuments())
+
+        assert db.query(Template).count() == 3
+        assert template_map["seed_0"] == template_map[1]
+        labelled = db.query(Template).filter_by(structure_hash=struct_hash(1)).one()
+        assert labelled.user_label == "APERTURA"
+
+    def test_rejected_templates_are_not_persisted(self, db, orchestrator):
+        orchestrator.validator.validate.side_effect = lambda pattern, *a, **k: ("1" not in pattern, "corta")
+        template_map = orchestrator._persist_templates("tenant_a", make_clusters(3), FakeDocuments())
+
+        assert set(template_map) == {0, 2}
+        assert db.query(Template).count() == 2
+
+
+@pytest.fixture
+def tables():
+    yield FakeAtomizer.TABLES
+    FakeAtomizer.TABLES.clear()
+
+
+class TestPersistSkeletons:
+
+    def test_skeletons_and_tables_bulk_and_idempotent(self, db, orchestrator, tables):
+        table_id = str(uuid.uuid4())
+        tables.update({"a.docx": {table_id: b"<w:tr/>"}, "b.docx": {table_id: b"<w:tr/>"}})
+        paths = ["a.docx", "b.docx", "c.docx"]
+        all_blocks = [{"text": f"bloque {i}"} for i in range(3)]
+        doc_maps = {0: [0], 1: [1], 2: [2]}
+
+        db.statements = 0
+        created = orchestrator._persist_skeletons("tenant_a", paths, doc_maps, all_blocks, [-1, -1, -1], {}, FakeDocuments())
+        assert created == 3
+        assert db.query(Skeleton).count() == 3
+        assert db.query(TableTemplate).count() == 1
+        assert db.statements < 15
+
+        assert orchestrator._persist_skeletons("tenant_a", paths, doc_maps, all_blocks, [-1, -1, -1], {}, FakeDocuments()) == 0
+        assert db.query(Skeleton).count() == 3
@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from src.mining.artifact_cache import MiningArtifactCache, content_digest, file_digest
+
+SEGMENTS = [
+    {"start": 0.0, "end": 4.2, "text": "Se abre la sesión ordinaria", "speaker": 0},
+    {"start": 4.2, "end": 9.8, "text": "El concejal Pérez solicita la palabra", "speaker": 1},
+]
+
+ALIGNER = {
+    "aligner": {"threshold": 0.35, "gap_penalty_base": 0.0, "merge_discount": 1.0, "dp_mode": "auto"},
+    "chunker": {"base_threshold": 0.6, "min_duration": 10.0, "soft_max": 40.0},
+    "embedding_model": "paraphrase-multilingual-mpnet-base-v2",
+}
+
+
+class TestMiningArtifactCache(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache = MiningArtifactCache(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _write_docx(self, name, content):
+        path = os.path.join(self.root, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def _pairs_key(self, docx_path, segments=SEGMENTS, fingerprint=ALIGNER):
+        return MiningArtifactCache.key(
+            "pairs", transcript=content_digest(segments), docx=file_digest(docx_path), **fingerprint
+        )
+
+    def test_roundtrip_and_stats(self):
+        key = MiningArtifactCache.key("transcript", source="https://youtu.be/abc", provider="deepgram")
+        self.assertIsNone(self.cache.get("transcript", key))
+        self.cache.put("transcript", key, SEGMENTS)
+
+        self.assertEqual(self.cache.get("transcript", key), SEGMENTS)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_shared_root_across_instances(self):
+        key = MiningArtifactCache.key("transcript", source="u", provider="deepgram")
+        MiningArtifactCache(self.root, compress=False).put("transcript", key, SEGMENTS)
+        # Otra corrida (u otro worker), con otra opción de compresión, lee la misma entrada
+        self.assertEqual(MiningArtifactCache(self.root, compress=True).get("transcript", key), SEGMENTS)
+
+    def test_key_is_order_independent(self):
+        a = MiningArtifactCache.key("pairs", docx="d", aligner={"threshold": 0.35, "dp_mode": "auto"})
+        b = MiningArtifactCache.key("pairs", aligner={"dp_mode": "auto", "threshold": 0.35}, docx="d")
+        self.assertEqual(a, b)
+
+    def test_invalidation_on_aligner_config_change(self):
+        docx = self._write_docx("acta.docx", b"PK-contenido")
+        key = self._pairs_key(docx)
+        self.cache.put("pairs", key, [{"input": "a", "output": "<b/>"}])
+
+        changed = {**ALIGNER, "aligner": {**ALIGNER["aligner"], "threshold": 0.45}}
+        self.assertNotEqual(self._pairs_key(docx, fingerprint=changed), key)
+        self.assertIsNone(self.cache.get("pairs", self._pairs_key(docx, fingerprint=changed)))
+        self.assertIsNotNone(self.cache.get("pairs", self._pairs_key(docx)))
+
+    def test_invalidation_on_chunker_and_model_change(self):
+        docx = self._write_docx("acta.docx", b"PK-contenido")
+        key = self._pairs_key(docx)
+        chunker = {**ALIGNER, "chunker": {**ALIGNER["chunker"], "soft_max": 60.0}}
+        model = {**ALIGNER, "embedding_model": "otro-modelo"}
+        self.assertNotEqual(self._pairs_key(docx, fingerprint=chunker), key)
+        self.assertNotEqual(self._pairs_key(docx, fingerprint=model), key)
+
+    def test_invalidation_on_docx_bytes_and_transcript_change(self):
+        docx = self._write_docx("acta.docx", b"PK-version-1")
+        key = self._pairs_key(docx)
+        self._write_docx("acta.docx", b"PK-version-2")  # Mismo nombre, contenido editado
+        self.assertNotEqual(self._pairs_key(docx), key)
+
+        docx = self._write_docx("acta.docx", b"PK-version-1")
+        retranscribed = [dict(SEGMENTS[0]), {**SEGMENTS[1], "text": "El concejal Peres solicita la palabra"}]
+        self.assertNotEqual(self._pairs_key(docx, segments=retranscribed), key)
+        self.assertEqual(self._pairs_key(docx), key)
+
+    def test_transcript_key_depends_on_provider(self):
+        a = MiningArtifactCache.key("transcript", source="u", provider="deepgram")
+        b = MiningArtifactCache.key("transcript", source="u", provider="whisper")
+        self.assertNotEqual(a, b)
+
+    def test_corrupt_entry_is_a_miss(self):
+        key = MiningArtifactCache.key("pairs", docx="x")
+        path = self.cache.put("pairs", key, [{"input": "a"}])
+        with open(path, "wb") as f:
+            f.write(b"\x01basura")
+
+        self.assertIsNone(self.cache.get("pairs", key))
+        self.cache.put("pairs", key, [{"input": "a"}])
+        self.assertEqual(self.cache.get("pairs", key), [{"input": "a"}])
+
+    def test_concurrent_writers_leave_no_partial_files(self):
+        key = MiningArtifactCache.key("transcript", source="u", provider="deepgram")
+        payload = SEGMENTS * 500
+
+        def writer():
+            for _ in range(20):
+                self.cache.put("transcript", key, payload)
+                self.assertEqual(self.cache.get("transcript", key), payload)
+
+        threads = [threading.Thread(target=writer) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        directory = os.path.dirname(self.cache.path_for("transcript", key))
+        self.assertEqual(os.listdir(directory), [key])
+        self.assertEqual(self.cache.misses, 0)
+
+    def test_unwritable_root_disables_cache(self):
+        from src.mining.pipeline import MiningOrchestrator
+        blocker = os.path.join(self.root, "archivo")
+        with open(blocker, "w") as f:
+            f.write("no es un directorio")
+
+        self.assertIsNone(MiningOrchestrator._open_cache(os.path.join(blocker, "mining")))
+
+
+if __name__ == '__main__':
+    unittest.main()
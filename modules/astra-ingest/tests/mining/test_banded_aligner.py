@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from src.mining.aligner import (
+    SemanticAligner, AlignerConfig, EmbeddingSimilarity, compute_dp_matrix
+)
+
+
+def make_aligner(**overrides) -> SemanticAligner:
+    aligner = SemanticAligner(config=AlignerConfig(threshold=0.5, **overrides))
+    aligner.embedder = MagicMock()
+    return aligner
+
+
+def trace(pointers, N, M, lo=None):
+    """Camino del backtracking como lista de (i, j, movimiento)."""
+    path, i, j = [], N, M
+    while i > 0 and j > 0:
+        move = int(pointers[i, j] if lo is None else pointers[i, j - lo[i]])
+        path.append((i, j, move))
+        if move in (0,):
+            i -= 1; j -= 1
+        elif move in (1, 3):
+            i -= 1
+        else:
+            j -= 1
+    return path
+
+
+def diagonal_embeddings(n: int, dim: int = 64, noise: float = 0.3, seed: int = 0):
+    """Audio i ~ XML i: el alineamiento correcto es la diagonal."""
+    rng = np.random.default_rng(seed)
+    xml = rng.normal(size=(n, dim)).astype(np.float32)
+    audio = xml + rng.normal(scale=noise, size=(n, dim)).astype(np.float32)
+    xml /= np.linalg.norm(xml, axis=1, keepdims=True)
+    audio /= np.linalg.norm(audio, axis=1, keepdims=True)
+    return audio, xml
+
+
+def chunks_and_nodes(n: int):
+    audio_chunks = [{"text": f"chunk {i}", "start": 10.0 * i, "end": 10.0 * i + 9} for i in range(n)]
+    valid_xmls = [{"text": f"Nodo número {i:04d}", "xml": f"<w:p>{i}</w:p>", "id": str(i)} for i in range(n)]
+    return audio_chunks, valid_xmls
+
+
+class TestBandedDP:
+
+    def test_full_width_band_matches_full_dp(self):
+        rng = np.random.default_rng(3)
+        N, M = 70, 50
+        audio = rng.normal(size=(N, 16)).astype(np.float32)
+        xml = rng.normal(size=(M, 16)).astype(np.float32)
+        audio /= np.linalg.norm(audio, axis=1, keepdims=True)
+        xml /= np.linalg.norm(xml, axis=1, keepdims=True)
+
+        aligner = make_aligner(band_block_rows=16)
+        S = (audio @ xml.T).astype(np.float32)
+        _, full_pointers = compute_dp_matrix(S, 0.5, 0.0, 1.0)
+
+        lo = np.ones(N + 1, dtype=np.int64)
+        hi = np.full(N + 1, M, dtype=np.int64)
+        banded = aligner.compute_banded_pointers(audio, xml, lo, hi)
+
+        assert banded.dtype == np.int8
+        assert np.array_equal(banded[1:], full_pointers[1:, 1:])
+
+    def test_narrow_band_recovers_diagonal(self):
+        n = 400
+        audio, xml = diagonal_embeddings(n)
+        audio_chunks, valid_xmls = chunks_and_nodes(n)
+
+        aligner = make_aligner(band_ratio=0.0, band_min_cols=20, band_block_rows=64)
+        lo, hi = aligner.estimate_band(audio_chunks, valid_xmls)
+        pointers = aligner.compute_banded_pointers(audio, xml, lo, hi)
+        _, full_pointers = compute_dp_matrix((audio @ xml.T).astype(np.float32), 0.5, 0.0, 1.0)
+
+        assert pointers.shape[1] <= 41
+        assert trace(pointers, n, n, lo) == trace(full_pointers, n, n)
+
+    def test_band_is_monotone_contiguous_and_ends_at_last_column(self):
+        audio_chunks, valid_xmls = chunks_and_nodes(300)
+        # Nodos de largo desigual y audio con un hueco de tiempo
+        for k, node in enumerate(valid_xmls):
+            node["text"] = "x" * (10 + (k % 7) * 40)
+        for chunk in audio_chunks[150:]:
+            chunk["start"] += 3600
+
+        lo, hi = make_aligner(band_ratio=0.05, band_min_cols=8).estimate_band(audio_chunks, valid_xmls)
+
+        assert np.all(np.diff(lo[1:]) >= 0) and np.all(np.diff(hi[1:]) >= 0)
+        assert np.all(lo[2:] <= hi[1:-1])
+        assert np.all((1 <= lo) & (lo <= hi) & (hi <= 300))
+        assert hi[-1] == 300
+
+    def test_lazy_similarity_matches_dense(self):
+        audio, xml = diagonal_embeddings(20)
+        S = EmbeddingSimilarity(audio, xml)
+        assert S.shape == (20, 20)
+        assert S[3, 7] == pytest.approx(float(audio[3] @ xml[7]), abs=1e-6)
+
+
+class TestAlignModes:
+
+    def _run(self, aligner, n=60):
+        audio, xml = diagonal_embeddings(n, noise=0.1)
+        audio_chunks, valid_xmls = chunks_and_nodes(n)
+        aligner.chunker = MagicMock()
+        aligner.chunker.chunk_transcript.return_value = audio_chunks
+        aligner.embedder.embed_batch.side_effect = [xml.tolist(), audio.tolist()]
+        return aligner.align([{"text": "irrelevante"}], valid_xmls)
+
+    def test_banded_and_full_modes_agree(self):
+        full = self._run(make_aligner(dp_mode="full"))
+        banded = self._run(make_aligner(dp_mode="banded", band_min_cols=10))
+
+        assert [p["metadata"]["audio_chunk_indices"] for p in banded] == \
+               [p["metadata"]["audio_chunk_indices"] for p in full]
+        assert [p["score"] for p in banded] == pytest.approx([p["score"] for p in full], abs=1e-4)
+
+    def test_align_embedded_matches_align(self):
+        """La etapa sin modelo (usada por el pool de procesos) da los mismos pares que align()."""
+        n = 40
+        audio, xml = diagonal_embeddings(n, noise=0.1)
+        audio_chunks, valid_xmls = chunks_and_nodes(n)
+
+        expected = self._run(make_aligner(dp_mode="full"), n=n)
+        staged = make_aligner(dp_mode="full").align_embedded(audio_chunks, valid_xmls, audio, xml)
+        # align() recibe listas (float64) y align_embedded matrices float32: el score difiere en el último bit
+        assert [{**p, "score": None} for p in staged] == [{**p, "score": None} for p in expected]
+        assert [p["score"] for p in staged] == pytest.approx([p["score"] for p in expected], abs=1e-5)
+        assert make_aligner().align_embedded([], valid_xmls, audio[:0], xml) == []
+
+    def test_auto_mode_switches_on_cell_count(self):
+        aligner = make_aligner(full_dp_max_cells=100)
+        assert aligner._use_banded(10, 11)
+        assert not aligner._use_banded(10, 10)
+
+    def test_debug_dump_is_opt_in(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        self._run(make_aligner(dp_mode="full"))
+        assert list(tmp_path.iterdir()) == []
+
+        dump = tmp_path / "S.csv"
+        self._run(make_aligner(dp_mode="banded", debug_dump_path=str(dump)))
+        assert dump.exists()
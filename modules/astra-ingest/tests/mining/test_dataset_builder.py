@@ -4,12 +4,13 @@ import tempfile
 import json
 import os
 from pathlib import Path
+from unittest.mock import patch
 
 # Ajustar path si es necesario según estructura de ejecución de tests
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
-from src.mining.dataset_builder import DatasetBuilder
+from src.mining.dataset_builder import DatasetBuilder, IncrementalDatasetWriter
 
 class TestDatasetBuilderLeakage(unittest.TestCase):
 
@@ -112,5 +113,176 @@ class TestDatasetBuilderLeakage(unittest.TestCase):
         self.assertEqual(stats['train_docs'], 1)
         self.assertEqual(stats['val_docs'], 1)
 
+    def test_build_respects_doc_splits(self):
+        """Con doc_splits, cada documento cae en el split indicado (sin split aleatorio)."""
+        pairs = self._create_mock_pairs(num_docs=4, pairs_per_doc=3)
+        splits = {"acta_municipal_0.docx": "val", "acta_municipal_1.docx": "val"}
+        stats = self.builder.build(pairs, self.test_dir, train_ratio=0.9, doc_splits=splits)
+
+        self.assertEqual(stats["val"], 6)
+        self.assertEqual(stats["train"], 6)
+        with open(os.path.join(self.test_dir, "val.jsonl"), "r") as f:
+            val_ids = {json.loads(line)["metadata"]["source_doc_id"] for line in f}
+        self.assertEqual(val_ids, set(splits))
+
+
+class TestIncrementalDatasetWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _pairs(self, doc_id, n=3, tag="v"):
+        return [
+            {"input": f"audio {tag} {j}", "output": f"<xml>{tag} {j}</xml>", "score": 0.9,
+             "metadata": {"source_doc_id": doc_id}}
+            for j in range(n)
+        ]
+
+    def _read(self, split):
+        path = os.path.join(self.test_dir, f"{split}.jsonl")
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_hash_split_is_deterministic_and_leak_free(self):
+        writer = IncrementalDatasetWriter(self.test_dir, train_ratio=0.7)
+        docs = [f"acta_{i}.docx" for i in range(40)]
+        for i, doc in enumerate(docs):
+            # Dos videos por acta: ambos deben caer en el mismo split
+            writer.add_source(f"video_{i}_a", doc, self._pairs(doc, tag=f"{i}a"))
+            writer.add_source(f"video_{i}_b", doc, self._pairs(doc, tag=f"{i}b"))
+
+        train_docs = {r["metadata"]["source_doc_id"] for r in self._read("train")}
+        val_docs = {r["metadata"]["source_doc_id"] for r in self._read("val")}
+        self.assertFalse(train_docs & val_docs)
+        self.assertEqual(train_docs | val_docs, set(docs))
+        self.assertTrue(train_docs and val_docs)
+
+        other = IncrementalDatasetWriter(tempfile.mkdtemp(dir=self.test_dir), train_ratio=0.7)
+        self.assertEqual([other.split_for(d) for d in docs], [writer.split_for(d) for d in docs])
+
+    def test_appends_only_new_rows(self):
+        writer = IncrementalDatasetWriter(self.test_dir, train_ratio=1.0)
+        self.assertEqual(writer.add_source("v1", "acta_1.docx", self._pairs("acta_1.docx", tag="a")), 3)
+        first = self._read("train")
+        self.assertEqual(writer.add_source("v2", "acta_2.docx", self._pairs("acta_2.docx", tag="b")), 3)
+        rows = self._read("train")
+
+        self.assertEqual(rows[:3], first)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(writer.counts, {"train": 6, "val": 0})
+
+    def test_invalid_pairs_are_filtered(self):
+        writer = IncrementalDatasetWriter(self.test_dir, train_ratio=1.0, min_score=0.5)
+        pairs = self._pairs("acta.docx", n=2) + [
+            {"input": "  ", "output": "<xml/>", "metadata": {}},
+            {"input": "bajo", "output": "<xml/>", "score": 0.1, "metadata": {}},
+        ]
+        self.assertEqual(writer.add_source("v1", "acta.docx", pairs), 2)
+
+    def test_resume_skips_known_sources(self):
+        writer = IncrementalDatasetWriter(self.test_dir, train_ratio=1.0)
+        writer.add_source("v1", "acta_1.docx", self._pairs("acta_1.docx"))
+
+        resumed = IncrementalDatasetWriter(self.test_dir, train_ratio=1.0)
+        self.assertTrue(resumed.has_source("v1"))
+        self.assertEqual(resumed.add_source("v1", "acta_1.docx", self._pairs("acta_1.docx")), 0)
+        self.assertEqual(len(self._read("train")), 3)
+
+    def test_resume_truncates_unconfirmed_append(self):
+        writer = IncrementalDatasetWriter(self.test_dir, train_ratio=1.0)
+        writer.add_source("v1", "acta_1.docx", self._pairs("acta_1.docx"))
+
+        # Corte a mitad de escritura: bytes anexados sin manifiesto que los confirme
+        with open(os.path.join(self.test_dir, "train.jsonl"), "a", encoding="utf-8") as f:
+            f.write('{"instruction": "x", "input": "corta')
+
+        resumed = IncrementalDatasetWriter(self.test_dir, train_ratio=1.0)
+        self.assertEqual(len(self._read("train")), 3)
+        resumed.add_source("v2", "acta_2.docx", self._pairs("acta_2.docx", tag="b"))
+        self.assertEqual(len(self._read("train")), 6)
+
+    def test_manifest_written_atomically(self):
+        writer = IncrementalDatasetWriter(self.test_dir, train_ratio=0.5)
+        writer.add_source("v1", "acta_1.docx", self._pairs("acta_1.docx"))
+
+        files = sorted(os.listdir(self.test_dir))
+        self.assertNotIn("dataset_manifest.json.tmp", files)
+        with open(os.path.join(self.test_dir, "dataset_manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        source = manifest["sources"]["v1"]
+        self.assertEqual(source, {"doc_id": "acta_1.docx", "split": writer.split_for("acta_1.docx"), "pairs": 3})
+        shard_path = os.path.join(self.test_dir, f"{source['split']}.jsonl")
+        self.assertEqual(manifest["shards"][source["split"]]["bytes"], os.path.getsize(shard_path))
+
+    def test_compact_preserves_document_splits(self):
+        writer = IncrementalDatasetWriter(self.test_dir, train_ratio=0.6)
+        for i in range(20):
+            doc = f"acta_{i}.docx"
+            writer.add_source(f"video_{i}", doc, self._pairs(doc, tag=str(i)))
+        before = {split: sorted(r["input"] for r in self._read(split)) for split in ("train", "val")}
+
+        stats = writer.compact(DatasetBuilder())
+
+        after = {split: sorted(r["input"] for r in self._read(split)) for split in ("train", "val")}
+        self.assertEqual(before, after)
+        self.assertEqual(stats["train"] + stats["val"], 60)
+        self.assertTrue(writer.manifest["compacted"])
+
+        # Tras compactar se puede seguir anexando sobre los archivos nuevos
+        resumed = IncrementalDatasetWriter(self.test_dir, train_ratio=0.6)
+        resumed.add_source("video_extra", "acta_0.docx", self._pairs("acta_0.docx", tag="x"))
+        self.assertEqual(sum(len(self._read(s)) for s in ("train", "val")), 63)
+
+    def _filled_writer(self):
+        writer = IncrementalDatasetWriter(self.test_dir, train_ratio=0.6)
+        for i in range(10):
+            doc = f"acta_{i}.docx"
+            writer.add_source(f"video_{i}", doc, self._pairs(doc, tag=str(i)))
+        return writer
+
+    def test_crash_while_building_keeps_appended_shards(self):
+        writer = self._filled_writer()
+        before = {split: self._read(split) for split in ("train", "val")}
+
+        builder = DatasetBuilder()
+        with patch.object(builder, "_write_jsonl", side_effect=OSError("disco lleno")):
+            with self.assertRaises(OSError):
+                writer.compact(builder)
+
+        resumed = IncrementalDatasetWriter(self.test_dir, train_ratio=0.6)
+        self.assertEqual({split: self._read(split) for split in ("train", "val")}, before)
+        self.assertFalse(resumed.manifest["compacted"])
+        self.assertEqual(len(resumed.manifest["sources"]), 10)
+
+    def test_crash_while_replacing_completes_on_reopen(self):
+        writer = self._filled_writer()
+        real_replace = os.replace
+        calls = []
+
+        def crash_after_first_shard(src, dst):
+            # 1: manifiesto con pending_compaction, 2: train.jsonl, 3: val.jsonl
+            calls.append(dst)
+            if len(calls) == 3:
+                raise OSError("corte")
+            real_replace(src, dst)
+
+        with patch("src.mining.dataset_builder.os.replace", side_effect=crash_after_first_shard):
+            with self.assertRaises(OSError):
+                writer.compact(DatasetBuilder())
+
+        resumed = IncrementalDatasetWriter(self.test_dir, train_ratio=0.6)
+        self.assertTrue(resumed.manifest["compacted"])
+        self.assertNotIn("pending_compaction", resumed.manifest)
+        self.assertEqual(sum(len(self._read(s)) for s in ("train", "val")), 30)
+        for split in ("train", "val"):
+            shard_path = os.path.join(self.test_dir, f"{split}.jsonl")
+            self.assertEqual(resumed.manifest["shards"][split]["bytes"], os.path.getsize(shard_path))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
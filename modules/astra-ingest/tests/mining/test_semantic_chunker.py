@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from sklearn.metrics.pairwise import cosine_similarity
+
+from src.mining.semantic_chunker import EnterpriseSemanticChunker
+
+
+def reference_chunk(chunker, segments, embeddings):
+    """Recorrido previo (while + sklearn por paso), como referencia de los cortes."""
+    chunks = []
+    current_indices = [0]
+    current_segments = [segments[0]]
+    current_text = segments[0].get('text', '')
+    chunk_start = segments[0].get('start', 0.0)
+    chunk_end = segments[0].get('end', 0.0)
+    current_centroid = embeddings[0].reshape(1, -1)
+
+    for i in range(1, len(segments)):
+        next_seg = segments[i]
+        next_emb = embeddings[i].reshape(1, -1)
+        adjusted_sim = cosine_similarity(current_centroid, next_emb)[0][0]
+        if next_seg.get('start', 0.0) - chunk_end > 2.0:
+            adjusted_sim -= chunker.silence_penalty
+        last_speaker = current_segments[-1].get('speaker')
+        next_speaker = next_seg.get('speaker')
+        if last_speaker and next_speaker and last_speaker != next_speaker:
+            adjusted_sim -= chunker.speaker_change_penalty
+
+        current_duration = chunk_end - chunk_start
+        should_cut = (
+            (current_duration >= chunker.min_duration and adjusted_sim < chunker.base_threshold)
+            or (current_duration >= chunker.soft_max and adjusted_sim < chunker.base_threshold + 0.1)
+            or current_duration >= chunker.hard_max
+        )
+        if should_cut:
+            chunks.append({
+                "text": current_text.strip(), "segments": current_segments.copy(),
+                "start": chunk_start, "end": chunk_end, "duration": current_duration,
+                "avg_similarity": float(adjusted_sim)
+            })
+            overlap_count = min(chunker.overlap, len(current_segments))
+            overlap_segs = current_segments[-overlap_count:] if overlap_count > 0 else []
+            overlap_idxs = current_indices[-overlap_count:] if overlap_count > 0 else []
+            current_segments = overlap_segs + [next_seg]
+            current_indices = overlap_idxs + [i]
+            current_text = " ".join([s.get('text', '').strip() for s in current_segments])
+            chunk_start = current_segments[0].get('start', next_seg.get('start', 0.0))
+            chunk_end = next_seg.get('end', 0.0)
+            current_centroid = np.mean(embeddings[current_indices], axis=0).reshape(1, -1)
+        else:
+            current_segments.append(next_seg)
+            current_indices.append(i)
+            current_text += " " + next_seg.get('text', '').strip()
+            chunk_end = next_seg.get('end', 0.0)
+            current_centroid = (chunker.ema_alpha * next_emb) + ((1 - chunker.ema_alpha) * current_centroid)
+
+    chunks.append({
+        "text": current_text.strip(), "segments": current_segments,
+        "start": chunk_start, "end": chunk_end, "duration": chunk_end - chunk_start
+    })
+    return chunks
+
+
+def synthetic_transcript(n: int, dim: int = 32, seed: int = 0):
+    """Temas que cambian cada pocos segmentos, silencios ocasionales y varios oradores."""
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(12, dim))
+    segments, embeddings, t = [], [], 0.0
+    topic = 0
+    for i in range(n):
+        if rng.random() < 0.15:
+            topic = int(rng.integers(0, len(topics)))
+        t += float(rng.choice([0.2, 0.5, 3.5]))
+        duration = float(rng.uniform(2.0, 12.0))
+        segments.append({
+            "text": f"  frase {i} del tema {topic} ",
+            "start": round(t, 2), "end": round(t + duration, 2),
+            "speaker": rng.choice(["A", "B", "C", None]),
+        })
+        embeddings.append(topics[topic] + rng.normal(scale=0.8, size=dim))
+        t += duration
+    return segments, np.array(embeddings)
+
+
+def make_chunker(embeddings, **kwargs):
+    chunker = EnterpriseSemanticChunker(**kwargs)
+    chunker.embedder = MagicMock()
+    chunker.embedder.embed_batch.return_value = embeddings.tolist()
+    return chunker
+
+
+class TestEnterpriseSemanticChunker:
+
+    @pytest.mark.parametrize("seed, kwargs", [
+        (0, {}),
+        (1, {"min_duration_sec": 10.0, "soft_max_duration_sec": 40.0}),
+        (2, {"overlap_segments": 0}),
+        (3, {"overlap_segments": 3, "ema_alpha": 0.7, "base_threshold": 0.3}),
+        (4, {"hard_max_duration_sec": 20.0}),
+    ])
+    def test_boundaries_match_previous_implementation(self, seed, kwargs):
+        segments, embeddings = synthetic_transcript(400, seed=seed)
+        chunker = make_chunker(embeddings, **kwargs)
+
+        chunks = chunker.chunk_transcript(segments)
+        expected = reference_chunk(chunker, segments, embeddings)
+
+        assert len(chunks) == len(expected)
+        for got, exp in zip(chunks, expected):
+            assert got["segments"] == exp["segments"]
+            assert got["text"] == exp["text"]
+            assert (got["start"], got["end"]) == (exp["start"], exp["end"])
+            assert got["duration"] == pytest.approx(exp["duration"])
+            assert got.get("avg_similarity") == pytest.approx(exp.get("avg_similarity"))
+
+    def test_precomputed_embeddings_skip_the_model(self):
+        segments, embeddings = synthetic_transcript(120, seed=5)
+        chunker = make_chunker(embeddings)
+        expected = chunker.chunk_transcript(segments)
+
+        chunker.embedder.embed_batch.reset_mock()
+        assert chunker.chunk_transcript(segments, embeddings=embeddings) == expected
+        chunker.embedder.embed_batch.assert_not_called()
+
+    def test_missing_times_and_speakers(self):
+        segments = [{"text": "uno"}, {"text": "dos", "end": 30.0}, {"text": "tres", "start": 31.0, "end": 50.0}]
+        embeddings = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+        chunker = make_chunker(embeddings, min_duration_sec=5.0)
+
+        assert chunker.chunk_transcript(segments) == reference_chunk(chunker, segments, embeddings)
+
+    def test_single_and_empty(self):
+        chunker = make_chunker(np.ones((1, 4)))
+        assert chunker.chunk_transcript([]) == []
+        chunks = chunker.chunk_transcript([{"text": " hola ", "start": 1.0, "end": 2.0}])
+        assert chunks == [{"text": "hola", "segments": [{"text": " hola ", "start": 1.0, "end": 2.0}],
+                           "start": 1.0, "end": 2.0, "duration": 1.0}]
@@ -28,3 +28,16 @@ def verify_snapshot_ownership(
         raise HTTPException(403, "ACCESO DENEGADO: Este recurso pertenece a otro inquilino.")
         
     return snapshot
+
+def get_authenticated_tenant(request: Request) -> str:
+    """Tenant del JWT validado por TenantFirewallMiddleware."""
+    tenant_id = getattr(request.state, "tenant_id", None)
+    if not tenant_id:
+        raise HTTPException(401, "No authenticated tenant context found.")
+    return tenant_id
+
+def ensure_same_tenant(authenticated_tenant: str, claimed_tenant: str) -> str:
+    """Rechaza cuerpos/formularios que declaran un tenant distinto al del token."""
+    if claimed_tenant != authenticated_tenant:
+        raise HTTPException(403, "ACCESO DENEGADO: El tenant del cuerpo no coincide con el del token.")
+    return authenticated_tenant
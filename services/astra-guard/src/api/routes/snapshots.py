@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 import json
 
+from src.config import settings
 from src.db.database import get_db
-from src.logic.guard_manager import GuardManager
-from src.api.schemas.snapshot_dto import SnapshotResponse, VerificationResponse
-from src.api.dependencies import verify_snapshot_ownership
+from src.logic.guard_manager import GuardManager, BatchArtifact, resolve_source_location
+from src.api.schemas.snapshot_dto import (
+    SnapshotResponse, VerificationResponse, BatchSealRequest, BatchSealResponse
+)
+from src.api.dependencies import verify_snapshot_ownership, get_authenticated_tenant, ensure_same_tenant
 from src.db.models import Snapshot
 
 router = APIRouter(prefix="/v1", tags=["Snapshots"])
@@ -57,11 +60,121 @@ async def create_snapshot(
             signature=f"sig_{snapshot.id}_{snapshot.root_hash[:8]}", 
             artifact_url=snapshot.artifact_url,
             s3_version_id=snapshot.s3_version_id,
+            hash_scheme=snapshot.hash_scheme,
             created_at=snapshot.created_at.isoformat()
         )
     except Exception as e:
         raise HTTPException(500, f"Error interno de sellado: {str(e)}")
 
+@router.post(
+    "/snapshots/batch",
+    response_model=BatchSealResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Sellar Lote de Documentos (WORM)"
+)
+async def create_snapshot_batch(
+    files: List[UploadFile] = File(..., description="Archivos DOCX originales"),
+    tenant_id: str = Form(...),
+    session_ids_json: str = Form(..., description="JSON list con el session_id de cada archivo, en el mismo orden"),
+    metadata_json: Optional[str] = Form("{}", description="JSON string con metadatos comunes al lote"),
+    authenticated_tenant: str = Depends(get_authenticated_tenant),
+    db: Session = Depends(get_db)
+):
+    """
+    Sella muchos documentos de un mismo tenant en una sola petición (cierre diario).
+    Una única llave de datos KMS y una única transacción por lote.
+    El tenant del formulario debe coincidir con el del token.
+    """
+    tenant_id = ensure_same_tenant(authenticated_tenant, tenant_id)
+    try:
+        session_ids = json.loads(session_ids_json)
+    except json.JSONDecodeError:
+        raise HTTPException(422, "session_ids_json no es un JSON válido")
+
+    if not isinstance(session_ids, list) or len(session_ids) != len(files):
+        raise HTTPException(422, "session_ids_json debe tener un session_id por archivo")
+
+    artifacts = [
+        BatchArtifact(session_id=str(session_id), stream=file.file)
+        for session_id, file in zip(session_ids, files)
+    ]
+    return await _seal_batch(db, tenant_id, artifacts, _parse_metadata(metadata_json))
+
+@router.post(
+    "/snapshots/batch/s3",
+    response_model=BatchSealResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Sellar Lote de Documentos desde S3"
+)
+async def create_snapshot_batch_from_s3(
+    req: BatchSealRequest,
+    authenticated_tenant: str = Depends(get_authenticated_tenant),
+    db: Session = Depends(get_db)
+):
+    """
+    Variante por referencias: el Guard descarga cada artefacto desde S3,
+    evitando re-subir los binarios a través del orquestador.
+    Solo se aceptan buckets de GUARD_SOURCE_BUCKETS y claves bajo `{tenant_id}/`
+    del tenant autenticado (el del cuerpo debe coincidir con el del token).
+    """
+    tenant_id = ensure_same_tenant(authenticated_tenant, req.tenant_id)
+    for item in req.items:
+        try:
+            resolve_source_location(item.source_uri, tenant_id)
+        except ValueError as e:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e))
+        except PermissionError as e:
+            raise HTTPException(status.HTTP_403_FORBIDDEN, str(e))
+
+    artifacts = [
+        BatchArtifact(
+            session_id=item.session_id,
+            source_uri=item.source_uri,
+            source_version_id=item.source_version_id,
+            metadata=item.metadata
+        )
+        for item in req.items
+    ]
+    return await _seal_batch(db, tenant_id, artifacts, req.metadata)
+
+def _parse_metadata(metadata_json: Optional[str]) -> dict:
+    try:
+        return json.loads(metadata_json) if metadata_json else {}
+    except json.JSONDecodeError:
+        return {}
+
+async def _seal_batch(db: Session, tenant_id: str, artifacts: List[BatchArtifact], metadata: dict) -> BatchSealResponse:
+    if not artifacts:
+        raise HTTPException(422, "El lote no contiene artefactos")
+    if len(artifacts) > settings.GUARD_BATCH_MAX_ITEMS:
+        raise HTTPException(413, f"El lote excede el máximo de {settings.GUARD_BATCH_MAX_ITEMS} artefactos")
+
+    manager = GuardManager(db)
+
+    try:
+        result = await manager.seal_batch(artifacts, tenant_id, metadata)
+    except Exception as e:
+        raise HTTPException(500, f"Error interno de sellado por lote: {str(e)}")
+
+    return BatchSealResponse(
+        batch_id=result["batch_id"],
+        tenant_id=tenant_id,
+        sealed=[
+            SnapshotResponse(
+                snapshot_id=str(row["id"]),
+                tenant_id=row["tenant_id"],
+                root_hash=row["root_hash"],
+                signature=f"sig_{row['id']}_{row['root_hash'][:8]}",
+                artifact_url=row["artifact_url"],
+                s3_version_id=row["s3_version_id"],
+                hash_scheme=row["hash_scheme"],
+                created_at=row["created_at"].isoformat()
+            )
+            for row in result["sealed"]
+        ],
+        failed=result["failed"]
+    )
+
 @router.post(
     "/verify",
     response_model=VerificationResponse,
@@ -70,17 +183,19 @@ async def create_snapshot(
 async def verify_snapshot(
     snapshot: Snapshot = Depends(verify_snapshot_ownership),
     file: UploadFile = File(...),
+    fail_fast: bool = Form(True, description="Detener en la primera hoja alterada (False = localizar todas)"),
     db: Session = Depends(get_db)
 ):
     """
     Recibe un archivo (que pudo haber sido abierto y guardado en Word) y verifica
     si su contenido semántico sigue siendo idéntico al original sellado.
+    Reporta las hojas Merkle y partes canónicas que difieren.
     """
     manager = GuardManager(db)
     
     try:
         # Pasamos el id del snapshot validado por la dependencia
-        result = await manager.verify_integrity(str(snapshot.id), file)
+        result = await manager.verify_integrity(str(snapshot.id), file, fail_fast=fail_fast)
         
         return VerificationResponse(
             is_valid=result["is_valid"],
@@ -89,7 +204,47 @@ async def verify_snapshot(
             audit_report={
                 "stored_hash": result["stored_hash"],
                 "calculated_hash": result["calculated_hash"],
-                "match_status": "INTEGRO" if result["is_valid"] else "ALTERADO"
+                "match_status": "INTEGRO" if result["is_valid"] else "ALTERADO",
+                "mismatched_leaves": result["mismatched_leaves"],
+                "tampered_parts": result["tampered_parts"],
+                "short_circuited": result["short_circuited"],
+                "hash_scheme": result["hash_scheme"]
+            }
+        )
+    except ValueError:
+        raise HTTPException(404, "Snapshot no encontrado")
+    except Exception as e:
+        raise HTTPException(500, f"Error de verificación: {str(e)}")
+
+@router.post(
+    "/verify/root",
+    response_model=VerificationResponse,
+    summary="Verificar Integridad por Root Hash"
+)
+async def verify_snapshot_root(
+    snapshot: Snapshot = Depends(verify_snapshot_ownership),
+    root_hash: str = Form(..., pattern=r"^[0-9a-fA-F]{64}$", description="Merkle Root (SHA-256 hex) calculado por el cliente"),
+    db: Session = Depends(get_db)
+):
+    """
+    Verificación ligera: el cliente calcula la raíz Merkle canónica localmente y
+    solo envía el hash, sin subir el documento.
+    """
+    manager = GuardManager(db)
+
+    try:
+        result = manager.verify_root_hash(str(snapshot.id), root_hash)
+
+        return VerificationResponse(
+            is_valid=result["is_valid"],
+            snapshot_id=str(snapshot.id),
+            verification_timestamp=result["timestamp"],
+            audit_report={
+                "stored_hash": result["stored_hash"],
+                "calculated_hash": result["calculated_hash"],
+                "match_status": "INTEGRO" if result["is_valid"] else "ALTERADO",
+                # El cliente debe calcular la raíz con el mismo esquema del sellado
+                "hash_scheme": result["hash_scheme"]
             }
         )
     except ValueError:
@@ -8,6 +8,7 @@ class SnapshotResponse(BaseModel):
     signature: str
     artifact_url: str
     s3_version_id: str
+    hash_scheme: str = "stream-v1"
     created_at: str
     status: str = "SEALED"
 
@@ -22,3 +23,24 @@ class IntegrityReport(BaseModel):
     stored_hash: str
     match: bool
     details: Optional[str] = None
+
+class BatchSealItem(BaseModel):
+    session_id: str
+    source_uri: str = Field(..., description="Referencia s3://bucket/key del artefacto a sellar")
+    source_version_id: Optional[str] = None
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+class BatchSealRequest(BaseModel):
+    tenant_id: str
+    items: List[BatchSealItem]
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+class BatchSealFailure(BaseModel):
+    session_id: str
+    error: str
+
+class BatchSealResponse(BaseModel):
+    batch_id: str
+    tenant_id: str
+    sealed: List[SnapshotResponse]
+    failed: List[BatchSealFailure]
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Dict
+from typing import Dict, List
 
 class Settings(BaseSettings):
     # AWS / LocalStack Configuration
@@ -12,6 +12,15 @@ class Settings(BaseSettings):
     GUARD_AUDIO_VAULT_BUCKET: str = "astra-audio-vault"
     SYSTEM_SECRET_KEY: str = "astra_internal_secret_change_me"
 
+    # Integridad Canónica
+    GUARD_HASH_SCHEME: str = "stream-v1"     # Esquema para nuevos sellados (stream-v1 | parts-v2)
+    GUARD_PART_HASH_WORKERS: int = 4         # Hilos para hashear partes OOXML en paralelo
+
+    # Sellado por lotes (cierre diario / re-sellado mensual)
+    GUARD_BATCH_MAX_ITEMS: int = 1000        # Máximo de artefactos por request de lote
+    GUARD_BATCH_MAX_WORKERS: int = 8         # Paralelismo acotado (hash + subida WORM)
+    GUARD_SOURCE_BUCKETS: List[str] = []     # Buckets legibles por /snapshots/batch/s3 (vacío = ninguno)
+
     # Security Configuration
     JWT_SECRET_KEY: str = "guard_secret_key_change_me"
     JWT_ALGORITHM: str = "HS256"
@@ -18,3 +18,26 @@ VOLATILE_FILES = {
 
 # Tamaño de bloque para el árbol Merkle (4MB)
 MERKLE_CHUNK_SIZE = 4 * 1024 * 1024 
+
+# Esquemas de hash canónico (versionados para que los snapshots antiguos sigan verificando)
+HASH_SCHEME_STREAM_V1 = "stream-v1" # Stream concatenado de partes, hojas de MERKLE_CHUNK_SIZE
+HASH_SCHEME_PARTS_V2 = "parts-v2"   # Hojas por parte del ZIP (nombre + bloque), hasheadas en paralelo
+SUPPORTED_HASH_SCHEMES = {HASH_SCHEME_STREAM_V1, HASH_SCHEME_PARTS_V2}
+
+# Partes mayores a este tamaño (descomprimido) no pasan por la caché de digests:
+# el boilerplate (theme, styles, fonts, logos) es pequeño. Ver también UNCACHED_PART_PREFIXES.
+PART_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Partes con el contenido propio de cada documento: no se repiten entre actas, así que no
+# pasan por la caché. Calcular su clave exigiría leerlas completas antes de emitir la
+# primera hoja (una lectura extra de la parte principal y sin fail-fast hoja a hoja).
+UNCACHED_PART_PREFIXES = (
+    "word/document.xml",
+    "word/footnotes.xml",
+    "word/endnotes.xml",
+    "word/comments.xml",
+    "xl/sharedStrings.xml",
+    "xl/worksheets/",
+    "ppt/slides/",
+    "ppt/notesSlides/",
+)
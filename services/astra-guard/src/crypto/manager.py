@@ -6,7 +6,7 @@ from src.config import settings
 from src.crypto.kms_provider import IKMSProvider
 from dataclasses import dataclass
 import base64
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +71,43 @@ class EncryptionManager:
                 data_key.plaintext = b"" 
                 del data_key.plaintext
     
+    def seal_many(self, items: List[bytes], tenant_id: str) -> List[SealedEnvelope]:
+        """
+        Envelope Encryption para un lote del mismo tenant:
+        una única DEK (una sola llamada al KMS) y un IV distinto por elemento.
+        """
+        if not items:
+            return []
+
+        cmk_arn = self._get_cmk_for_tenant(tenant_id)
+        data_key = self.provider.generate_data_key(cmk_arn)
+        encrypted_dek_b64 = base64.b64encode(data_key.ciphertext).decode('utf-8')
+
+        try:
+            envelopes = []
+            for data in items:
+                # GCM exige IV único por mensaje bajo la misma llave
+                iv = os.urandom(12)
+                encryptor = Cipher(
+                    algorithms.AES(data_key.plaintext),
+                    modes.GCM(iv),
+                    backend=default_backend()
+                ).encryptor()
+                ciphertext = encryptor.update(data) + encryptor.finalize()
+
+                envelopes.append(SealedEnvelope(
+                    key_id=cmk_arn,
+                    encrypted_dek_b64=encrypted_dek_b64,
+                    ciphertext_b64=base64.b64encode(ciphertext).decode('utf-8'),
+                    iv_b64=base64.b64encode(iv).decode('utf-8'),
+                    tag_b64=base64.b64encode(encryptor.tag).decode('utf-8')
+                ))
+            return envelopes
+        finally:
+            if hasattr(data_key, 'plaintext'):
+                data_key.plaintext = b""
+                del data_key.plaintext
+
     def unseal_data(self, envelope: SealedEnvelope) -> bytes:
         """
         Abre el sobre:
@@ -38,33 +38,16 @@ class MerkleEngine:
         if buffer:
             yield bytes(buffer)
 
-    def calculate_root(self, stream_iterator: Iterator[bytes]) -> Dict[str, Any]:
+    def iter_stream_leaves(self, stream_iterator: Iterator[bytes]) -> Iterator[str]:
+        """Emite el hash de cada hoja (bloque de MERKLE_CHUNK_SIZE) a medida que se lee el stream."""
+        for chunk in self._chunk_stream_generator(stream_iterator, MERKLE_CHUNK_SIZE):
+            yield self._hash_node(chunk)
+
+    def build_levels(self, leaves: List[str]) -> List[List[str]]:
         """
-        Construye el árbol Merkle desde un stream.
-        Retorna el Root Hash y el Manifiesto (lista de hojas).
-        
-        Args:
-            stream_iterator: Generador que emite bytes del contenido normalizado.
+        Construye todos los niveles del árbol a partir de las hojas.
+        El primer nivel son las hojas y el último contiene únicamente la raíz.
         """
-        leaves = []
-        
-        # 1. Generar Hojas (Leaf Nodes)
-        chunk_gen = self._chunk_stream_generator(stream_iterator, MERKLE_CHUNK_SIZE)
-        
-        for chunk in chunk_gen:
-            leaf_hash = self._hash_node(chunk)
-            leaves.append(leaf_hash)
-            
-        if not leaves:
-            # Caso archivo vacío o sin contenido semántico
-            empty_hash = self._hash_node(b"")
-            return {
-                "root_hash": empty_hash,
-                "leaves": [],
-                "levels": 1
-            }
-
-        # 2. Construir Árbol hacia arriba
         current_level = leaves
         tree_structure = [leaves] # Guardamos niveles para auditoría (Merkle Path)
 
@@ -90,7 +73,42 @@ class MerkleEngine:
             current_level = next_level
             tree_structure.append(current_level)
 
-        root_hash = current_level[0]
+        return tree_structure
+
+    def root_from_leaves(self, leaves: List[str]) -> str:
+        """Recalcula la raíz a partir de una lista de hojas ya conocida (sin releer contenido)."""
+        if not leaves:
+            return self._hash_node(b"")
+        return self.build_levels(list(leaves))[-1][0]
+
+    def calculate_root(self, stream_iterator: Iterator[bytes]) -> Dict[str, Any]:
+        """
+        Construye el árbol Merkle desde un stream (esquema `stream-v1`).
+        Retorna el Root Hash y el Manifiesto (lista de hojas).
+        
+        Args:
+            stream_iterator: Generador que emite bytes del contenido normalizado.
+        """
+        # 1. Generar Hojas (Leaf Nodes)
+        return self.calculate_root_from_leaves(list(self.iter_stream_leaves(stream_iterator)))
+
+    def calculate_root_from_leaves(self, leaves: List[str]) -> Dict[str, Any]:
+        """
+        Construye el árbol Merkle a partir de hojas ya calculadas
+        (p.ej. las hojas por parte del esquema `parts-v2`).
+        """
+        if not leaves:
+            # Caso archivo vacío o sin contenido semántico
+            empty_hash = self._hash_node(b"")
+            return {
+                "root_hash": empty_hash,
+                "leaf_count": 0,
+                "tree_structure": []
+            }
+
+        # 2. Construir Árbol hacia arriba
+        tree_structure = self.build_levels(leaves)
+        root_hash = tree_structure[-1][0]
         
         logger.info(f"Merkle Tree construido. Hojas: {len(leaves)}, Root: {root_hash[:10]}...")
 
@@ -99,3 +117,55 @@ class MerkleEngine:
             "leaf_count": len(leaves),
             "tree_structure": tree_structure # En producción esto iría a S3/DB si es gigante
         }
+
+    def verify_leaves(
+        self,
+        stream_iterator: Iterator[bytes],
+        stored_leaves: List[str],
+        fail_fast: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Compara hoja por hoja el stream entrante contra las hojas persistidas en el sellado.
+
+        A diferencia de `calculate_root`, no construye el árbol: cada hoja se compara
+        en cuanto se calcula. Con `fail_fast` la lectura del stream se detiene en la
+        primera discrepancia, por lo que una alteración temprana se detecta sin
+        descomprimir el resto del documento.
+        """
+        return self.compare_leaves(self.iter_stream_leaves(stream_iterator), stored_leaves, fail_fast)
+
+    def compare_leaves(
+        self,
+        leaf_iterator: Iterator[str],
+        stored_leaves: List[str],
+        fail_fast: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Compara un iterador de hojas contra las hojas almacenadas.
+
+        Returns:
+            Dict con `match`, los índices de hojas que difieren (`mismatched_leaves`)
+            y el número de hojas leídas frente a las almacenadas.
+        """
+        mismatched: List[int] = []
+        leaves_read = 0
+
+        for index, leaf_hash in enumerate(leaf_iterator):
+            leaves_read = index + 1
+            if index >= len(stored_leaves) or leaf_hash != stored_leaves[index]:
+                mismatched.append(index)
+                if fail_fast:
+                    break
+
+        # Hojas faltantes: el documento entrante es más corto que el sellado
+        if leaves_read < len(stored_leaves) and not (fail_fast and mismatched):
+            missing = range(leaves_read, len(stored_leaves))
+            mismatched.extend(missing[:1] if fail_fast else missing)
+
+        return {
+            "match": not mismatched,
+            "mismatched_leaves": mismatched,
+            "leaves_read": leaves_read,
+            "stored_leaf_count": len(stored_leaves),
+            "short_circuited": fail_fast and bool(mismatched)
+        }
@@ -1,8 +1,17 @@
 import zipfile
 import io
+import hashlib
 import logging
-from typing import Iterator, BinaryIO
-from .constants import VOLATILE_PREFIXES
+import struct
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, BinaryIO, List, Optional
+from .constants import VOLATILE_PREFIXES, MERKLE_CHUNK_SIZE, PART_CACHE_MAX_BYTES, UNCACHED_PART_PREFIXES
+from .part_cache import PartDigestCache, PartKey
+
+# Lectura interna de miembros del ZIP
+READ_BUFFER_SIZE = 64 * 1024
+# Cabecera local de archivo ZIP: 30 bytes fijos + nombre + campo extra
+_LOCAL_HEADER_SIZE = 30
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +23,11 @@ class OOXMLNormalizer:
 
     def __init__(self, stream: BinaryIO):
         self._stream = stream
+        # Rango de bytes [inicio, fin) que ocupa cada parte dentro del stream canónico.
+        # Se llena a medida que se consume `get_canonical_stream`.
+        self.part_spans: List[List] = []
+        # Parte propietaria de cada hoja (índice de hoja -> nombre). Lo llena `iter_part_leaves`.
+        self.leaf_parts: List[str] = []
 
     def _is_volatile(self, filename: str) -> bool:
         """Determina si un archivo interno debe ser ignorado."""
@@ -22,6 +36,12 @@ class OOXMLNormalizer:
                 return True
         return False
 
+    def _semantic_members(self, zf: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+        """Miembros no volátiles, ordenados alfabéticamente (determinismo)."""
+        members = [info for info in zf.infolist() if not self._is_volatile(info.filename)]
+        members.sort(key=lambda info: info.filename)
+        return members
+
     def get_canonical_stream(self) -> Iterator[bytes]:
         """
         Genera un flujo de bytes ordenado y limpio.
@@ -52,19 +72,174 @@ class OOXMLNormalizer:
                 logger.info(f"Normalizando {len(semantic_files)} archivos internos para hash semántico.")
 
                 # 3. Streaming de contenido
+                self.part_spans = []
+                offset = 0
                 for filename in semantic_files:
                     # Opcional: Inyectar el nombre del archivo en el stream para evitar
                     # ataques de colisión donde el contenido se mueve de un archivo a otro.
                     # yield filename.encode('utf-8') 
                     
+                    span = [filename, offset, offset]
+                    self.part_spans.append(span)
                     with zf.open(filename) as f:
                         while True:
                             # Leer en pequeños buffers para no saturar RAM
-                            chunk = f.read(64 * 1024) # 64KB chunks de lectura interna
+                            chunk = f.read(READ_BUFFER_SIZE) # 64KB chunks de lectura interna
                             if not chunk:
                                 break
+                            offset += len(chunk)
+                            span[2] = offset
                             yield chunk
 
         except Exception as e:
             logger.error(f"Error durante la normalización OOXML: {e}")
             raise e
+
+    def parts_for_range(self, start: int, end: int) -> List[str]:
+        """
+        Devuelve las partes del ZIP que aportan bytes al rango [start, end) del stream canónico.
+        Permite traducir una hoja Merkle alterada a los archivos internos afectados.
+        """
+        return [
+            name for name, part_start, part_end in self.part_spans
+            if part_start < end and part_end > start
+        ]
+
+    def get_part_leaves(
+        self,
+        tenant_id: Optional[str] = None,
+        cache: Optional[PartDigestCache] = None,
+        max_workers: int = 4
+    ) -> List[str]:
+        """
+        Esquema `parts-v2` materializado: lista plana de hojas en orden canónico.
+        Ver `iter_part_leaves`; `self.leaf_parts` queda alineada con la lista.
+        """
+        return list(self.iter_part_leaves(tenant_id=tenant_id, cache=cache, max_workers=max_workers))
+
+    def iter_part_leaves(
+        self,
+        tenant_id: Optional[str] = None,
+        cache: Optional[PartDigestCache] = None,
+        max_workers: int = 4
+    ) -> Iterator[str]:
+        """
+        Esquema `parts-v2`: emite las hojas Merkle de cada parte del ZIP en orden canónico.
+
+        Cada parte aporta una hoja por bloque de MERKLE_CHUNK_SIZE (mínimo una), y cada hoja
+        liga el nombre de la parte y su índice al contenido, evitando colisiones por mover
+        contenido entre archivos. Si hay caché, las partes repetidas del tenant no se
+        descomprimen: basta con hashear sus bytes comprimidos para construir la clave. Las
+        partes de contenido (document.xml, hojas, slides) no pasan por la caché ni se leen antes.
+
+        Es perezoso: solo se adelantan en paralelo (zlib y hashlib liberan el GIL) las
+        `max_workers` partes siguientes a la que se está emitiendo. Si el consumidor se detiene
+        (p. ej. `compare_leaves(..., fail_fast=True)`), las partes posteriores no se descomprimen.
+        `self.leaf_parts` crece alineada con las hojas ya emitidas.
+        """
+        if not zipfile.is_zipfile(self._stream):
+            raise ValueError("El archivo proporcionado no es un contenedor ZIP válido (OOXML).")
+
+        self.leaf_parts = []
+        with zipfile.ZipFile(self._stream, 'r') as zf:
+            members = self._semantic_members(zf)
+            logger.info(f"Hasheando {len(members)} partes OOXML (parts-v2).")
+
+            # 1. Resolver aciertos de caché antes de abrir el pool: `_part_key` lee el stream
+            #    directamente y no puede intercalarse con las lecturas de los hilos. Solo aplica
+            #    al boilerplate (ver `_is_cacheable`), así que el costo es acotado.
+            part_leaves: List[Optional[List[str]]] = [None] * len(members)
+            keys: List[Optional[PartKey]] = [None] * len(members)
+            if cache is not None and tenant_id:
+                for i, info in enumerate(members):
+                    if not self._is_cacheable(info):
+                        continue
+                    keys[i] = self._part_key(zf, info)
+                    part_leaves[i] = cache.get(tenant_id, keys[i])
+
+            # 2. Emitir en orden, con ventana de look-ahead sobre las partes sin caché
+            window = max(1, max_workers)
+            pool = ThreadPoolExecutor(max_workers=window)
+            futures: Dict[int, Future] = {}
+            scheduled = 0
+            try:
+                for i, info in enumerate(members):
+                    while scheduled < len(members) and scheduled < i + window:
+                        if part_leaves[scheduled] is None:
+                            futures[scheduled] = pool.submit(self._hash_part, zf, members[scheduled].filename)
+                        scheduled += 1
+
+                    leaves = part_leaves[i]
+                    if leaves is None:
+                        leaves = futures.pop(i).result()
+                        if keys[i] is not None:
+                            cache.put(tenant_id, keys[i], leaves)
+
+                    self.leaf_parts.extend([info.filename] * len(leaves))
+                    yield from leaves
+            finally:
+                # Corte temprano: descartar lo no iniciado y esperar lo en curso antes de cerrar el ZIP
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _is_cacheable(info: zipfile.ZipInfo) -> bool:
+        """Solo partes pequeñas que no sean contenido propio del documento (document.xml, hojas, slides)."""
+        return info.file_size <= PART_CACHE_MAX_BYTES and not info.filename.startswith(UNCACHED_PART_PREFIXES)
+
+    def _part_key(self, zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> PartKey:
+        """
+        Clave de caché de una parte: metadatos del ZIP + SHA-256 de los bytes comprimidos.
+        Se ejecuta antes de abrir miembros en paralelo, por lo que el acceso al stream es exclusivo.
+        """
+        fp = zf.fp
+        fp.seek(info.header_offset)
+        header = fp.read(_LOCAL_HEADER_SIZE)
+        name_len, extra_len = struct.unpack("<HH", header[26:30])
+        fp.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_len + extra_len)
+
+        digest = hashlib.sha256()
+        remaining = info.compress_size
+        while remaining > 0:
+            chunk = fp.read(min(READ_BUFFER_SIZE, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+
+        return (
+            info.filename, info.compress_type, info.CRC,
+            info.file_size, info.compress_size, digest.hexdigest()
+        )
+
+    @staticmethod
+    def _new_leaf_hasher(filename: str, index: int):
+        hasher = hashlib.sha256()
+        hasher.update(f"{filename}\0{index}\0".encode('utf-8'))
+        return hasher
+
+    def _hash_part(self, zf: zipfile.ZipFile, filename: str) -> List[str]:
+        """Descomprime una parte en streaming y emite una hoja por bloque de MERKLE_CHUNK_SIZE."""
+        leaves: List[str] = []
+        hasher = self._new_leaf_hasher(filename, 0)
+        filled = 0
+
+        with zf.open(filename) as f:
+            while True:
+                chunk = f.read(READ_BUFFER_SIZE)
+                if not chunk:
+                    break
+                view = memoryview(chunk)
+                while view:
+                    take = min(len(view), MERKLE_CHUNK_SIZE - filled)
+                    hasher.update(view[:take])
+                    filled += take
+                    view = view[take:]
+                    if filled == MERKLE_CHUNK_SIZE:
+                        leaves.append(hasher.hexdigest())
+                        hasher = self._new_leaf_hasher(filename, len(leaves))
+                        filled = 0
+
+        # Remanente (o parte vacía: su existencia también queda sellada)
+        if filled or not leaves:
+            leaves.append(hasher.hexdigest())
+        return leaves
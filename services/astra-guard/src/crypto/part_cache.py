@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+# Clave de caché: (nombre, método de compresión, CRC32, tamaño, tamaño comprimido, sha256 comprimido)
+PartKey = Tuple[str, int, int, int, int, str]
+
+
+class PartDigestCache:
+    """
+    Caché LRU en proceso de hojas Merkle por parte OOXML, aislada por tenant.
+
+    Las partes de boilerplate (theme, styles, fonts, numbering, logos) se repiten
+    en todas las actas de un tenant. La clave incluye el SHA-256 de los bytes
+    comprimidos, por lo que un acierto garantiza contenido idéntico sin necesidad
+    de descomprimir; el CRC32 y los tamaños solo abaratan la comparación.
+    """
+
+    def __init__(self, max_entries_per_tenant: int = 512, max_tenants: int = 256):
+        self.max_entries_per_tenant = max_entries_per_tenant
+        self.max_tenants = max_tenants
+        self._tenants: "OrderedDict[str, OrderedDict[PartKey, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tenant_id: str, key: PartKey) -> Optional[List[str]]:
+        with self._lock:
+            entries = self._tenants.get(tenant_id)
+            if entries is None or key not in entries:
+                self.misses += 1
+                return None
+            self._tenants.move_to_end(tenant_id)
+            entries.move_to_end(key)
+            self.hits += 1
+            return list(entries[key])
+
+    def put(self, tenant_id: str, key: PartKey, leaves: List[str]) -> None:
+        with self._lock:
+            entries = self._tenants.get(tenant_id)
+            if entries is None:
+                entries = OrderedDict()
+                self._tenants[tenant_id] = entries
+                if len(self._tenants) > self.max_tenants:
+                    self._tenants.popitem(last=False)
+            self._tenants.move_to_end(tenant_id)
+            entries[key] = list(leaves)
+            entries.move_to_end(key)
+            if len(entries) > self.max_entries_per_tenant:
+                entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tenants.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Instancia compartida por el proceso (GuardManager se crea por request)
+part_digest_cache = PartDigestCache()
@@ -0,0 +1,25 @@
+"""hash_scheme_versioning
+
+Revision ID: 003_hash_scheme
+Revises: 002_audio
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003_hash_scheme'
+down_revision = '002_audio'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Los snapshots existentes fueron sellados con el stream canónico concatenado (v1)
+    op.add_column(
+        'snapshots',
+        sa.Column('hash_scheme', sa.String(), nullable=False, server_default='stream-v1')
+    )
+
+def downgrade():
+    op.drop_column('snapshots', 'hash_scheme')
@@ -5,6 +5,8 @@ from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import declarative_base, relationship
 import enum
 
+from src.crypto.constants import HASH_SCHEME_STREAM_V1
+
 Base = declarative_base()
 
 class HashAlgorithm(str, enum.Enum):
@@ -28,6 +30,8 @@ class Snapshot(Base):
     # Integridad Criptográfica
     root_hash = Column(String(64), nullable=False, index=True) # Merkle Root
     algorithm = Column(Enum(HashAlgorithm), default=HashAlgorithm.SHA256)
+    # Versión del esquema de normalización/hojas (stream-v1 | parts-v2)
+    hash_scheme = Column(String, nullable=False, default=HASH_SCHEME_STREAM_V1, server_default=HASH_SCHEME_STREAM_V1)
     
     # Cifrado (Envelope Encryption)
     kms_key_id = Column(String, nullable=False) # ID de la llave maestra usada
@@ -1,8 +1,16 @@
+import asyncio
+import hmac
 import logging
+import shutil
+import tempfile
 import uuid
 import boto3
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
 from fastapi import UploadFile
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from botocore.config import Config
 
@@ -10,11 +18,53 @@ from src.config import settings
 from src.db.models import Snapshot, MerkleTree, AuditLog
 from src.crypto.normalizer import OOXMLNormalizer
 from src.crypto.merkle import MerkleEngine
+from src.crypto.constants import (
+    MERKLE_CHUNK_SIZE, HASH_SCHEME_STREAM_V1, HASH_SCHEME_PARTS_V2, SUPPORTED_HASH_SCHEMES
+)
+from src.crypto.part_cache import part_digest_cache
 from src.crypto.manager import EncryptionManager
 from src.infrastructure.kms_client import AWSKMSDriver
 
 logger = logging.getLogger(__name__)
 
+# Retención legal WORM (5 años)
+VAULT_RETENTION_DAYS = 1825
+# Artefactos referenciados por S3 se descargan a memoria hasta este tamaño, luego a disco
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+@dataclass
+class BatchArtifact:
+    """Artefacto de un lote de sellado: binario subido (multipart) o referencia S3."""
+    session_id: str
+    stream: Optional[BinaryIO] = None
+    source_uri: Optional[str] = None
+    source_version_id: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+def resolve_source_location(source_uri: Optional[str], tenant_id: str) -> Tuple[str, str]:
+    """
+    Valida una referencia s3://bucket/key de un lote y retorna (bucket, key).
+
+    El Guard lee con sus propias credenciales IAM, así que solo acepta buckets de
+    GUARD_SOURCE_BUCKETS y claves bajo el prefijo `{tenant_id}/` del tenant que sella.
+
+    Raises:
+        ValueError: referencia mal formada.
+        PermissionError: bucket o clave fuera de lo permitido para el tenant.
+    """
+    if not source_uri or not source_uri.startswith("s3://"):
+        raise ValueError(f"Referencia de origen inválida: {source_uri!r}")
+
+    bucket, _, key = source_uri[len("s3://"):].partition("/")
+    if not bucket or not key:
+        raise ValueError(f"Referencia de origen inválida: {source_uri!r}")
+
+    if bucket not in settings.GUARD_SOURCE_BUCKETS:
+        raise PermissionError(f"Bucket de origen no permitido: {bucket}")
+    if not tenant_id or "/" in tenant_id or not key.startswith(f"{tenant_id}/") or ".." in key.split("/"):
+        raise PermissionError(f"La clave {key} no pertenece al tenant {tenant_id}")
+    return bucket, key
+
 class GuardManager:
     def __init__(self, db: Session):
         self.db = db
@@ -49,14 +99,12 @@ class GuardManager:
         5. Registro en DB.
         """
         try:
-            # 1. & 2. Normalización y Hashing (Streaming)
+            # 1. & 2. Normalización y Hashing
             await file.seek(0)
-            normalizer = OOXMLNormalizer(file.file)
-            canonical_stream = normalizer.get_canonical_stream()
-            
-            merkle_engine = MerkleEngine()
-            # El cálculo consume el stream canónico
-            merkle_result = merkle_engine.calculate_root(canonical_stream)
+            hash_scheme = self._resolve_hash_scheme()
+            merkle_result = self._hash_document(
+                file.file, tenant_id, hash_scheme, settings.GUARD_PART_HASH_WORKERS
+            )
             root_hash = merkle_result["root_hash"]
             
             logger.info(f"Root Hash calculado para sesión {session_id}: {root_hash}")
@@ -67,27 +115,16 @@ class GuardManager:
 
             # 4. Persistencia en WORM Storage (S3 Object Lock)
             await file.seek(0) # Resetear puntero para subir el original
-            object_key = f"{tenant_id}/{session_id}/{uuid.uuid4()}.docx"
-            
-            # Subida con Retención Legal
-            s3_resp = self.s3.put_object(
-                Bucket=self.vault_bucket,
-                Key=object_key,
-                Body=file.file,
-                ObjectLockMode='COMPLIANCE',
-                ObjectLockRetention={'Mode': 'COMPLIANCE', 'Days': 1825}, # 5 años
-                Metadata={'astra-hash': root_hash}
-            )
-            
-            s3_version_id = s3_resp.get('VersionId', 'null')
+            artifact_url, s3_version_id = self._store_in_vault(file.file, tenant_id, session_id, root_hash)
 
             # 5. Registro en Base de Datos
             snapshot = Snapshot(
                 tenant_id=tenant_id,
                 session_id=session_id,
-                artifact_url=f"s3://{self.vault_bucket}/{object_key}",
+                artifact_url=artifact_url,
                 s3_version_id=s3_version_id,
                 root_hash=root_hash,
+                hash_scheme=hash_scheme,
                 kms_key_id=envelope.key_id,
                 encrypted_data_key=envelope.encrypted_dek_b64
             )
@@ -114,36 +151,304 @@ class GuardManager:
             self._log_audit(tenant_id, None, "SEAL", f"FAILURE: {str(e)}", metadata)
             raise e
 
-    async def verify_integrity(self, snapshot_id: str, file: UploadFile) -> dict:
+    async def seal_batch(
+        self,
+        artifacts: List[BatchArtifact],
+        tenant_id: str,
+        metadata: dict
+    ) -> Dict[str, Any]:
+        """
+        Sellado por lotes para un tenant (cierre diario / re-sellado masivo).
+
+        1. Normalización, hashing y subida WORM de cada artefacto con paralelismo acotado.
+        2. Un único Data Key del KMS para todo el lote.
+        3. Inserción masiva de Snapshot, MerkleTree y AuditLog en una sola transacción.
+
+        Los artefactos que fallan en el paso 1 se reportan en `failed` sin abortar el lote.
+        """
+        hash_scheme = self._resolve_hash_scheme()
+        batch_id = str(uuid.uuid4())
+        loop = asyncio.get_running_loop()
+
+        # 1. Preparación en paralelo (el paralelismo es entre documentos, no dentro de cada uno)
+        with ThreadPoolExecutor(max_workers=settings.GUARD_BATCH_MAX_WORKERS) as pool:
+            outcomes = await asyncio.gather(
+                *[
+                    loop.run_in_executor(pool, self._prepare_batch_item, artifact, tenant_id, hash_scheme)
+                    for artifact in artifacts
+                ],
+                return_exceptions=True
+            )
+
+        prepared, failed = [], []
+        for artifact, outcome in zip(artifacts, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error preparando sesión {artifact.session_id} del lote {batch_id}: {outcome}")
+                failed.append({"session_id": artifact.session_id, "error": str(outcome)})
+            else:
+                prepared.append(outcome)
+
+        # 2. Cifrado de sobre con una sola DEK por lote
+        envelopes = self.crypto_manager.seal_many(
+            [item["root_hash"].encode('utf-8') for item in prepared], tenant_id
+        )
+
+        # 3. Persistencia masiva
+        now = datetime.utcnow()
+        snapshot_rows, tree_rows, audit_rows = [], [], []
+        for item, envelope in zip(prepared, envelopes):
+            snapshot_id = uuid.uuid4()
+            snapshot_rows.append({
+                "id": snapshot_id,
+                "tenant_id": tenant_id,
+                "session_id": item["session_id"],
+                "artifact_url": item["artifact_url"],
+                "s3_version_id": item["s3_version_id"],
+                "root_hash": item["root_hash"],
+                "hash_scheme": hash_scheme,
+                "kms_key_id": envelope.key_id,
+                "encrypted_data_key": envelope.encrypted_dek_b64,
+                "created_at": now
+            })
+            tree_rows.append({
+                "id": uuid.uuid4(),
+                "snapshot_id": snapshot_id,
+                "tree_structure": item["tree_structure"]
+            })
+            audit_rows.append(self._audit_row(
+                tenant_id, snapshot_id, "SEAL", "SUCCESS",
+                {**metadata, **item["metadata"], "batch_id": batch_id}, now
+            ))
+        for failure in failed:
+            audit_rows.append(self._audit_row(
+                tenant_id, None, "SEAL", f"FAILURE: {failure['error']}",
+                {**metadata, "batch_id": batch_id, "session_id": failure["session_id"]}, now
+            ))
+
+        try:
+            if snapshot_rows:
+                self.db.execute(insert(Snapshot), snapshot_rows)
+                self.db.execute(insert(MerkleTree), tree_rows)
+            if audit_rows:
+                self.db.execute(insert(AuditLog), audit_rows)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error persistiendo lote {batch_id}: {e}")
+            raise e
+
+        logger.info(f"Lote {batch_id} sellado: {len(snapshot_rows)} ok, {len(failed)} fallidos.")
+        return {"batch_id": batch_id, "sealed": snapshot_rows, "failed": failed}
+
+    async def verify_integrity(self, snapshot_id: str, file: UploadFile, fail_fast: bool = True) -> dict:
         """
         Verifica si el archivo subido coincide con el snapshot registrado.
+
+        Si el snapshot tiene su árbol Merkle persistido, compara hoja por hoja contra
+        las hojas almacenadas (deteniéndose en la primera discrepancia si `fail_fast`)
+        e informa qué hojas y partes canónicas difieren. Los snapshots sin árbol
+        (legacy) se verifican recalculando la raíz completa.
         """
         snapshot = self.db.query(Snapshot).filter(Snapshot.id == snapshot_id).first()
         if not snapshot:
             raise ValueError("Snapshot not found")
 
+        merkle_engine = MerkleEngine()
+        stored_leaves = self._get_stored_leaves(snapshot, merkle_engine)
+        # Cada snapshot se verifica con el esquema con el que fue sellado
+        hash_scheme = snapshot.hash_scheme or HASH_SCHEME_STREAM_V1
+
         # 1. Recalcular Hash Canónico del archivo entrante
         await file.seek(0)
         normalizer = OOXMLNormalizer(file.file)
-        merkle_engine = MerkleEngine()
-        current_result = merkle_engine.calculate_root(normalizer.get_canonical_stream())
-        current_hash = current_result["root_hash"]
+        current_leaves = self._iter_leaves(
+            normalizer, merkle_engine, hash_scheme, snapshot.tenant_id, settings.GUARD_PART_HASH_WORKERS
+        )
 
-        # 2. Comparar con Hash almacenado (Verdad en DB)
-        is_valid_hash = (current_hash == snapshot.root_hash)
+        if stored_leaves is None:
+            current_result = merkle_engine.calculate_root_from_leaves(list(current_leaves))
+            current_hash = current_result["root_hash"]
+            is_valid_hash = (current_hash == snapshot.root_hash)
+            mismatched_leaves, tampered_parts, short_circuited = [], [], False
+        else:
+            # 2. Comparación incremental contra las hojas de la verdad en DB
+            leaf_report = merkle_engine.compare_leaves(current_leaves, stored_leaves, fail_fast=fail_fast)
+            # Tras un corte temprano, liberar ya el look-ahead de partes y el ZIP
+            current_leaves.close()
+            is_valid_hash = leaf_report["match"]
+            mismatched_leaves = leaf_report["mismatched_leaves"]
+            short_circuited = leaf_report["short_circuited"]
+            tampered_parts = self._locate_parts(normalizer, mismatched_leaves)
+            # Si hubo corte temprano no existe raíz del archivo entrante
+            current_hash = snapshot.root_hash if is_valid_hash else None
 
         # 3. Registrar auditoría
         audit_status = "VERIFIED" if is_valid_hash else "TAMPERED"
-        self._log_audit(snapshot.tenant_id, snapshot.id, "VERIFY", audit_status, {})
+        audit_meta = {"mismatched_leaves": mismatched_leaves[:50], "tampered_parts": tampered_parts}
+        self._log_audit(snapshot.tenant_id, snapshot.id, "VERIFY", audit_status, audit_meta)
         self.db.commit()
 
         return {
             "is_valid": is_valid_hash,
             "stored_hash": snapshot.root_hash,
             "calculated_hash": current_hash,
+            "mismatched_leaves": mismatched_leaves,
+            "tampered_parts": tampered_parts,
+            "short_circuited": short_circuited,
+            "hash_scheme": hash_scheme,
             "timestamp": datetime.utcnow().isoformat()
         }
 
+    def verify_root_hash(self, snapshot_id: str, root_hash: str) -> dict:
+        """
+        Verificación ligera: compara una raíz calculada por el cliente contra la sellada,
+        sin necesidad de subir el documento.
+        """
+        snapshot = self.db.query(Snapshot).filter(Snapshot.id == snapshot_id).first()
+        if not snapshot:
+            raise ValueError("Snapshot not found")
+
+        # compare_digest lanza TypeError con str no ASCII: se comparan bytes y un hash
+        # malformado simplemente no coincide (TAMPERED), en vez de terminar en 500
+        is_valid_hash = hmac.compare_digest(
+            root_hash.lower().encode("utf-8"), snapshot.root_hash.lower().encode("utf-8")
+        )
+
+        audit_status = "VERIFIED" if is_valid_hash else "TAMPERED"
+        self._log_audit(snapshot.tenant_id, snapshot.id, "VERIFY_ROOT", audit_status, {})
+        self.db.commit()
+
+        return {
+            "is_valid": is_valid_hash,
+            "stored_hash": snapshot.root_hash,
+            "calculated_hash": root_hash,
+            "hash_scheme": snapshot.hash_scheme or HASH_SCHEME_STREAM_V1,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    @staticmethod
+    def _resolve_hash_scheme() -> str:
+        hash_scheme = settings.GUARD_HASH_SCHEME
+        if hash_scheme not in SUPPORTED_HASH_SCHEMES:
+            raise ValueError(f"Esquema de hash no soportado: {hash_scheme}")
+        return hash_scheme
+
+    def _hash_document(
+        self,
+        stream: BinaryIO,
+        tenant_id: str,
+        hash_scheme: str,
+        part_workers: int
+    ) -> Dict[str, Any]:
+        """Normaliza el documento y construye su árbol Merkle según el esquema indicado."""
+        normalizer = OOXMLNormalizer(stream)
+        merkle_engine = MerkleEngine()
+        leaves = list(self._iter_leaves(normalizer, merkle_engine, hash_scheme, tenant_id, part_workers))
+        return merkle_engine.calculate_root_from_leaves(leaves)
+
+    def _store_in_vault(self, stream: BinaryIO, tenant_id: str, session_id: str, root_hash: str) -> Tuple[str, str]:
+        """Sube el original al bucket WORM con retención legal. Retorna (artifact_url, version_id)."""
+        object_key = f"{tenant_id}/{session_id}/{uuid.uuid4()}.docx"
+
+        # Subida con Retención Legal. put_object no admite `ObjectLockRetention` (solo existe en
+        # put_object_retention): la retención COMPLIANCE se fija con una fecha absoluta de fin
+        s3_resp = self.s3.put_object(
+            Bucket=self.vault_bucket,
+            Key=object_key,
+            Body=stream,
+            ObjectLockMode='COMPLIANCE',
+            ObjectLockRetainUntilDate=datetime.utcnow() + timedelta(days=VAULT_RETENTION_DAYS),
+            Metadata={'astra-hash': root_hash}
+        )
+
+        return f"s3://{self.vault_bucket}/{object_key}", s3_resp.get('VersionId', 'null')
+
+    def _prepare_batch_item(self, artifact: BatchArtifact, tenant_id: str, hash_scheme: str) -> Dict[str, Any]:
+        """Hash + subida WORM de un artefacto del lote (se ejecuta en un hilo del pool)."""
+        stream = artifact.stream if artifact.stream is not None else self._download_source(artifact, tenant_id)
+        try:
+            stream.seek(0)
+            # Un hilo por documento: las partes de cada documento se hashean secuencialmente
+            merkle_result = self._hash_document(stream, tenant_id, hash_scheme, part_workers=1)
+            stream.seek(0)
+            artifact_url, s3_version_id = self._store_in_vault(
+                stream, tenant_id, artifact.session_id, merkle_result["root_hash"]
+            )
+        finally:
+            if artifact.stream is None:
+                stream.close()
+
+        return {
+            "session_id": artifact.session_id,
+            "root_hash": merkle_result["root_hash"],
+            "tree_structure": merkle_result["tree_structure"],
+            "artifact_url": artifact_url,
+            "s3_version_id": s3_version_id,
+            "metadata": artifact.metadata
+        }
+
+    def _download_source(self, artifact: BatchArtifact, tenant_id: str) -> BinaryIO:
+        """Descarga una referencia s3://bucket/key a un archivo temporal (memoria acotada)."""
+        bucket, key = resolve_source_location(artifact.source_uri, tenant_id)
+        params = {"Bucket": bucket, "Key": key}
+        if artifact.source_version_id:
+            params["VersionId"] = artifact.source_version_id
+
+        response = self.s3.get_object(**params)
+        buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        shutil.copyfileobj(response['Body'], buffer, 64 * 1024)
+        buffer.seek(0)
+        return buffer
+
+    @staticmethod
+    def _iter_leaves(
+        normalizer: OOXMLNormalizer,
+        merkle_engine: MerkleEngine,
+        hash_scheme: str,
+        tenant_id: str,
+        part_workers: int = 1
+    ) -> Iterator[str]:
+        """Fuente de hojas Merkle del documento según el esquema de hash versionado."""
+        if hash_scheme == HASH_SCHEME_PARTS_V2:
+            return normalizer.iter_part_leaves(
+                tenant_id=tenant_id,
+                cache=part_digest_cache,
+                max_workers=part_workers
+            )
+        return merkle_engine.iter_stream_leaves(normalizer.get_canonical_stream())
+
+    def _get_stored_leaves(self, snapshot: Snapshot, merkle_engine: MerkleEngine) -> Optional[List[str]]:
+        """
+        Obtiene las hojas persistidas del snapshot y comprueba que reconstruyen la raíz sellada.
+        Retorna None si no hay árbol utilizable (snapshots legacy o árbol inconsistente).
+        """
+        tree = snapshot.merkle_tree
+        if tree is None or not tree.tree_structure:
+            return None
+
+        leaves = tree.tree_structure[0]
+        # El árbol en DB no es la fuente de verdad: debe reproducir el root_hash sellado
+        if merkle_engine.root_from_leaves(leaves) != snapshot.root_hash:
+            logger.warning(f"Árbol Merkle inconsistente para snapshot {snapshot.id}. Se usa verificación completa.")
+            return None
+        return leaves
+
+    @staticmethod
+    def _locate_parts(normalizer: OOXMLNormalizer, mismatched_leaves: List[int]) -> List[str]:
+        """Traduce índices de hojas alteradas a las partes canónicas (archivos del ZIP) que cubren."""
+        parts: List[str] = []
+        for leaf_index in mismatched_leaves:
+            if normalizer.leaf_parts:
+                # parts-v2: cada hoja pertenece a una única parte
+                if leaf_index < len(normalizer.leaf_parts) and normalizer.leaf_parts[leaf_index] not in parts:
+                    parts.append(normalizer.leaf_parts[leaf_index])
+                continue
+            start = leaf_index * MERKLE_CHUNK_SIZE
+            for name in normalizer.parts_for_range(start, start + MERKLE_CHUNK_SIZE):
+                if name not in parts:
+                    parts.append(name)
+        return parts
+
     def _log_audit(self, tenant, snap_id, action, status, meta):
         log = AuditLog(
             tenant_id=tenant,
@@ -151,6 +456,20 @@ class GuardManager:
             actor_id="SYSTEM_API", # Debería venir del token
             action=action,
             status=status,
-            metadata=meta
+            extra_metadata=meta
         )
         self.db.add(log)
+
+    @staticmethod
+    def _audit_row(tenant, snap_id, action, status, meta, timestamp) -> Dict[str, Any]:
+        """Fila de AuditLog para inserción masiva (mismos campos que `_log_audit`)."""
+        return {
+            "id": uuid.uuid4(),
+            "tenant_id": tenant,
+            "snapshot_id": snap_id,
+            "actor_id": "SYSTEM_API",
+            "action": action,
+            "status": status,
+            "timestamp": timestamp,
+            "extra_metadata": meta
+        }
@@ -0,0 +1,117 @@
+"""
+Benchmark de sellado por documento vs. por lote sobre SQLite + moto (S3 y KMS simulados).
+
+  - per-item: `seal_artifact` una vez por documento (commit + refresh + commit, una DEK por documento).
+  - batch:    `seal_batch` en lotes (una DEK por lote, inserción masiva en una transacción).
+
+Requiere `moto>=5` además de las dependencias del servicio.
+
+Uso:
+    python -m tests.benchmark.bench_batch_seal [--docs 1000] [--batch-size 250]
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import time
+import zipfile
+
+import boto3
+from moto import mock_aws
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from starlette.datastructures import UploadFile
+
+from src.config import settings
+from src.db.models import Base, Snapshot
+from src.logic.guard_manager import GuardManager, BatchArtifact
+
+logging.basicConfig(level=logging.WARNING)
+
+TENANT_ID = "bench-tenant"
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    # SQLite no conoce JSONB; para el benchmark basta con JSON
+    return "JSON"
+
+
+def build_docs(n: int) -> list:
+    docs = []
+    for i in range(n):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("word/styles.xml", b"<w:styles/>" * 100)
+            zf.writestr("word/document.xml", f"<w:body><w:t>Acta {i}</w:t></w:body>".encode() * 50)
+        docs.append((f"session-{i}", buf.getvalue()))
+    return docs
+
+
+def setup_aws() -> None:
+    # moto intercepta los endpoints de AWS: anulamos los de LocalStack/MinIO
+    settings.S3_ENDPOINT_URL = None
+    settings.KMS_ENDPOINT_URL = None
+    s3 = boto3.client("s3", region_name=settings.AWS_REGION)
+    s3.create_bucket(Bucket=settings.GUARD_VAULT_BUCKET, ObjectLockEnabledForBucket=True)
+    key = boto3.client("kms", region_name=settings.AWS_REGION).create_key()["KeyMetadata"]
+    settings.KMS_TENANT_MAP_JSON = json.dumps({TENANT_ID: key["Arn"]})
+
+
+def new_session_factory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+async def run_per_item(docs: list) -> float:
+    db = new_session_factory()()
+    manager = GuardManager(db)
+    start = time.perf_counter()
+    for session_id, content in docs:
+        await manager.seal_artifact(UploadFile(file=io.BytesIO(content), filename="acta.docx"), TENANT_ID, session_id, {})
+    elapsed = time.perf_counter() - start
+    assert db.query(Snapshot).count() == len(docs)
+    db.close()
+    return elapsed
+
+
+async def run_batch(docs: list, batch_size: int) -> float:
+    db = new_session_factory()()
+    manager = GuardManager(db)
+    start = time.perf_counter()
+    for offset in range(0, len(docs), batch_size):
+        artifacts = [
+            BatchArtifact(session_id=session_id, stream=io.BytesIO(content))
+            for session_id, content in docs[offset:offset + batch_size]
+        ]
+        result = await manager.seal_batch(artifacts, TENANT_ID, {})
+        assert not result["failed"], result["failed"][:3]
+    elapsed = time.perf_counter() - start
+    assert db.query(Snapshot).count() == len(docs)
+    db.close()
+    return elapsed
+
+
+def run(n_docs: int, batch_size: int) -> list:
+    docs = build_docs(n_docs)
+    with mock_aws():
+        setup_aws()
+        per_item = asyncio.run(run_per_item(docs))
+        batch = asyncio.run(run_batch(docs, batch_size))
+
+    return [
+        {"mode": "per-item", "docs": n_docs, "total_s": round(per_item, 2), "docs_per_s": round(n_docs / per_item, 1)},
+        {"mode": "batch", "docs": n_docs, "batch_size": batch_size, "total_s": round(batch, 2), "docs_per_s": round(n_docs / batch, 1)},
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=250)
+    args = parser.parse_args()
+    print(json.dumps(run(args.docs, args.batch_size), indent=2))
@@ -0,0 +1,94 @@
+"""
+Benchmark de sellado de 100 actas que comparten esqueleto (theme, styles, fonts, logos).
+
+Compara el cálculo de raíz Merkle con:
+  - stream-v1: stream canónico concatenado y secuencial.
+  - parts-v2 sin caché: hojas por parte hasheadas en paralelo.
+  - parts-v2 con caché: boilerplate del tenant hasheado una sola vez.
+
+Uso:
+    python -m tests.benchmark.bench_part_hashing [--docs 100] [--workers 4]
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import time
+import zipfile
+
+from src.crypto.merkle import MerkleEngine
+from src.crypto.normalizer import OOXMLNormalizer
+from src.crypto.part_cache import PartDigestCache
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def build_skeleton() -> dict:
+    rng = random.Random(7)
+    return {
+        "[Content_Types].xml": b"<Types>" + b"<Default/>" * 200 + b"</Types>",
+        "word/styles.xml": b"".join(f'<w:style w:styleId="S{i}"><w:name w:val="Estilo {i}"/></w:style>'.encode() for i in range(4000)),
+        "word/numbering.xml": b"<w:abstractNum/>" * 8000,
+        "word/theme/theme1.xml": b"<a:theme>" + b"<a:clrScheme/>" * 10000 + b"</a:theme>",
+        "word/fontTable.xml": b"<w:font/>" * 3000,
+        "word/fonts/font1.odttf": rng.randbytes(1024 * 1024),
+        "word/media/image1.png": rng.randbytes(512 * 1024),
+        "word/media/image2.png": rng.randbytes(256 * 1024),
+    }
+
+
+def build_acta(skeleton: dict, index: int) -> bytes:
+    body = b"".join(
+        f"<w:p><w:r><w:t>Acta {index}, intervencion {i}: el concejal expone el punto.</w:t></w:r></w:p>".encode()
+        for i in range(3000)
+    )
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in skeleton.items():
+            zf.writestr(name, content)
+        zf.writestr("word/document.xml", body)
+        zf.writestr("docProps/core.xml", f"<core>{index}</core>".encode())
+    return buf.getvalue()
+
+
+def seal_all(actas: list, mode: str, workers: int) -> float:
+    cache = PartDigestCache() if mode == "parts-v2+cache" else None
+    engine = MerkleEngine()
+    start = time.perf_counter()
+    for data in actas:
+        normalizer = OOXMLNormalizer(io.BytesIO(data))
+        if mode == "stream-v1":
+            engine.calculate_root(normalizer.get_canonical_stream())
+        else:
+            leaves = normalizer.get_part_leaves(tenant_id="bench", cache=cache, max_workers=workers)
+            engine.calculate_root_from_leaves(leaves)
+    return time.perf_counter() - start
+
+
+def run(n_docs: int, workers: int) -> list:
+    skeleton = build_skeleton()
+    actas = [build_acta(skeleton, i) for i in range(n_docs)]
+    total_mb = sum(len(a) for a in actas) / (1024 * 1024)
+
+    results = []
+    for mode in ["stream-v1", "parts-v2", "parts-v2+cache"]:
+        elapsed = seal_all(actas, mode, workers)
+        results.append({
+            "mode": mode,
+            "docs": n_docs,
+            "workers": workers if mode != "stream-v1" else 1,
+            "zip_mb": round(total_mb, 1),
+            "total_s": round(elapsed, 3),
+            "per_doc_ms": round(elapsed / n_docs * 1000, 2),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+    print(json.dumps(run(args.docs, args.workers), indent=2))
@@ -0,0 +1,90 @@
+"""
+Benchmark de verificación incremental (hoja por hoja) frente al recálculo completo.
+
+Genera un documento OOXML sintético (300 MB por defecto) y una copia alterada
+al inicio y otra al final del stream canónico, y mide:
+  - Recálculo completo de la raíz (comportamiento previo de verify_integrity).
+  - Verificación incremental con corte en la primera hoja alterada.
+
+Uso:
+    python -m tests.benchmark.bench_partial_verify [--size-mb 300]
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+import zipfile
+
+from src.crypto.merkle import MerkleEngine
+from src.crypto.normalizer import OOXMLNormalizer
+
+logging.basicConfig(level=logging.WARNING)
+
+BLOCK = (b'<w:p><w:r><w:t>Texto del acta del concejo municipal. </w:t></w:r></w:p>' * 16384)[:1024 * 1024]
+
+
+def build_docx(path: str, size_mb: int, tamper_at: float = None) -> None:
+    """Escribe un docx sin compresión (ZIP_STORED) con `size_mb` MB en word/document.xml."""
+    tamper_block = int(size_mb * tamper_at) if tamper_at is not None else -1
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        zf.writestr("[Content_Types].xml", b"<Types/>")
+        zf.writestr("docProps/core.xml", b"<core/>")
+        zf.writestr("word/styles.xml", b"<w:styles/>")
+        with zf.open("word/document.xml", "w", force_zip64=True) as f:
+            for i in range(size_mb):
+                if i == tamper_block:
+                    f.write(b"X" + BLOCK[1:])
+                else:
+                    f.write(BLOCK)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(size_mb: int) -> list:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        original = os.path.join(tmp, "original.docx")
+        build_docx(original, size_mb)
+
+        with open(original, "rb") as f:
+            sealed = MerkleEngine().calculate_root(OOXMLNormalizer(f).get_canonical_stream())
+        stored_leaves = sealed["tree_structure"][0]
+
+        for label, position in [("early", 0.0), ("late", 0.99)]:
+            tampered = os.path.join(tmp, f"tampered_{label}.docx")
+            build_docx(tampered, size_mb, tamper_at=position)
+
+            with open(tampered, "rb") as f:
+                full_s, _ = timed(lambda: MerkleEngine().calculate_root(OOXMLNormalizer(f).get_canonical_stream()))
+
+            with open(tampered, "rb") as f:
+                normalizer = OOXMLNormalizer(f)
+                incr_s, report = timed(lambda: MerkleEngine().verify_leaves(
+                    normalizer.get_canonical_stream(), stored_leaves, fail_fast=True
+                ))
+
+            results.append({
+                "size_mb": size_mb,
+                "tamper_position": label,
+                "full_recompute_s": round(full_s, 3),
+                "incremental_s": round(incr_s, 3),
+                "speedup": round(full_s / incr_s, 1) if incr_s else None,
+                "mismatched_leaves": report["mismatched_leaves"],
+                "leaves_read": report["leaves_read"],
+                "stored_leaf_count": report["stored_leaf_count"],
+            })
+            os.remove(tampered)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=300)
+    args = parser.parse_args()
+    print(json.dumps(run(args.size_mb), indent=2))
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from src.api.dependencies import ensure_same_tenant, get_authenticated_tenant
+from src.config import settings
+from src.logic.guard_manager import resolve_source_location
+
+
+class TestBatchSourceAccess:
+    """Referencias S3 de /snapshots/batch/s3: allowlist de buckets y prefijo del tenant."""
+
+    @pytest.fixture(autouse=True)
+    def allowed_buckets(self, monkeypatch):
+        monkeypatch.setattr(settings, "GUARD_SOURCE_BUCKETS", ["astra-raw"])
+
+    def test_accepts_key_under_tenant_prefix(self):
+        assert resolve_source_location("s3://astra-raw/tenant-a/actas/1.docx", "tenant-a") == (
+            "astra-raw", "tenant-a/actas/1.docx"
+        )
+
+    @pytest.mark.parametrize("uri", [None, "", "https://astra-raw/tenant-a/1.docx", "s3://astra-raw", "s3:///tenant-a/1.docx"])
+    def test_rejects_malformed_uri(self, uri):
+        with pytest.raises(ValueError):
+            resolve_source_location(uri, "tenant-a")
+
+    @pytest.mark.parametrize("uri", [
+        "s3://astra-guard-vault/tenant-a/1.docx",   # Bucket fuera de la allowlist
+        "s3://astra-raw/tenant-b/1.docx",           # Otro tenant
+        "s3://astra-raw/tenant-ab/1.docx",          # Prefijo parcial
+        "s3://astra-raw/tenant-a/../tenant-b/1.docx",
+    ])
+    def test_rejects_foreign_objects(self, uri):
+        with pytest.raises(PermissionError):
+            resolve_source_location(uri, "tenant-a")
+
+    def test_empty_allowlist_rejects_everything(self, monkeypatch):
+        monkeypatch.setattr(settings, "GUARD_SOURCE_BUCKETS", [])
+
+        with pytest.raises(PermissionError):
+            resolve_source_location("s3://astra-raw/tenant-a/1.docx", "tenant-a")
+
+
+class TestBatchTenantBinding:
+    """El tenant de los lotes sale del JWT; el del cuerpo/formulario solo puede repetirlo."""
+
+    def test_body_tenant_must_match_token(self):
+        assert ensure_same_tenant("tenant-a", "tenant-a") == "tenant-a"
+        with pytest.raises(HTTPException) as exc:
+            ensure_same_tenant("tenant-a", "tenant-b")
+        assert exc.value.status_code == 403
+
+    def test_requires_authenticated_tenant(self):
+        request = SimpleNamespace(state=SimpleNamespace())
+        with pytest.raises(HTTPException) as exc:
+            get_authenticated_tenant(request)
+        assert exc.value.status_code == 401
+
+        request.state.tenant_id = "tenant-a"
+        assert get_authenticated_tenant(request) == "tenant-a"
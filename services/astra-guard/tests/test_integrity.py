@@ -3,6 +3,7 @@ import zipfile
 import pytest
 from src.crypto.normalizer import OOXMLNormalizer
 from src.crypto.merkle import MerkleEngine
+from src.crypto.part_cache import PartDigestCache
 
 def create_docx_mock(files: dict) -> io.BytesIO:
     """Crea un ZIP en memoria con el contenido dado."""
@@ -79,3 +80,171 @@ class TestIntegrityEngine:
         root2 = MerkleEngine().calculate_root(OOXMLNormalizer(doc2).get_canonical_stream())["root_hash"]
         
         assert root1 == root2, "El orden de archivos en el ZIP afectó al hash (Fallo de determinismo)."
+
+
+class TestIncrementalVerification:
+    """Verificación hoja por hoja contra el árbol Merkle persistido."""
+
+    @pytest.fixture(autouse=True)
+    def small_chunks(self, monkeypatch):
+        # Bloques pequeños para obtener varias hojas con documentos diminutos
+        monkeypatch.setattr("src.crypto.merkle.MERKLE_CHUNK_SIZE", 8)
+
+    def _seal(self, files: dict) -> dict:
+        return MerkleEngine().calculate_root(OOXMLNormalizer(create_docx_mock(files)).get_canonical_stream())
+
+    def test_identical_document_matches(self):
+        files = {"a.xml": b"A" * 20, "b.xml": b"B" * 20}
+        sealed = self._seal(files)
+
+        report = MerkleEngine().verify_leaves(
+            OOXMLNormalizer(create_docx_mock(files)).get_canonical_stream(),
+            sealed["tree_structure"][0]
+        )
+
+        assert report["match"]
+        assert report["mismatched_leaves"] == []
+        assert report["leaves_read"] == sealed["leaf_count"]
+
+    def test_fail_fast_stops_at_first_mismatch(self):
+        sealed = self._seal({"a.xml": b"A" * 20, "b.xml": b"B" * 20})
+        tampered = create_docx_mock({"a.xml": b"X" + b"A" * 19, "b.xml": b"B" * 21})
+
+        report = MerkleEngine().verify_leaves(
+            OOXMLNormalizer(tampered).get_canonical_stream(), sealed["tree_structure"][0]
+        )
+
+        assert not report["match"]
+        assert report["mismatched_leaves"] == [0]
+        assert report["short_circuited"]
+        assert report["leaves_read"] == 1
+
+    def test_locates_tampered_parts(self):
+        sealed = self._seal({"a.xml": b"A" * 20, "b.xml": b"B" * 20})
+        normalizer = OOXMLNormalizer(create_docx_mock({"a.xml": b"A" * 20, "b.xml": b"B" * 19 + b"X"}))
+
+        report = MerkleEngine().verify_leaves(
+            normalizer.get_canonical_stream(), sealed["tree_structure"][0], fail_fast=False
+        )
+
+        # Stream canónico: 40 bytes -> hojas [0..4]; la alteración cae en el último byte
+        assert report["mismatched_leaves"] == [4]
+        assert normalizer.parts_for_range(4 * 8, 5 * 8) == ["b.xml"]
+
+    def test_truncated_document_reports_missing_leaves(self):
+        sealed = self._seal({"a.xml": b"A" * 20, "b.xml": b"B" * 20})
+
+        report = MerkleEngine().verify_leaves(
+            OOXMLNormalizer(create_docx_mock({"a.xml": b"A" * 20})).get_canonical_stream(),
+            sealed["tree_structure"][0],
+            fail_fast=False
+        )
+
+        assert not report["match"]
+        assert report["mismatched_leaves"] == [2, 3, 4]
+
+    def test_root_from_leaves_matches_sealed_root(self):
+        sealed = self._seal({"a.xml": b"A" * 30})
+
+        assert MerkleEngine().root_from_leaves(sealed["tree_structure"][0]) == sealed["root_hash"]
+
+
+class TestPartLevelHashing:
+    """Esquema parts-v2: hojas por parte OOXML con caché de boilerplate por tenant."""
+
+    SKELETON = {
+        "word/styles.xml": b"<style>Normal</style>" * 50,
+        "word/theme/theme1.xml": b"<theme/>" * 50,
+        "word/media/logo.png": bytes(range(256)) * 20,
+    }
+
+    def _doc(self, body: bytes, **extra) -> io.BytesIO:
+        return create_docx_mock({**self.SKELETON, "word/document.xml": body, **extra})
+
+    def _root(self, doc, cache=None, tenant="tenant-a") -> str:
+        leaves = OOXMLNormalizer(doc).get_part_leaves(tenant_id=tenant, cache=cache)
+        return MerkleEngine().calculate_root_from_leaves(leaves)["root_hash"]
+
+    def test_ignores_volatile_parts(self):
+        doc1 = self._doc(b"<xml>Acta</xml>", **{"docProps/core.xml": b"<core>hoy</core>"})
+        doc2 = self._doc(b"<xml>Acta</xml>", **{"docProps/core.xml": b"<core>manana</core>"})
+
+        assert self._root(doc1) == self._root(doc2)
+
+    def test_detects_content_and_part_moves(self):
+        base = self._root(create_docx_mock({"a.xml": b"1", "b.xml": b"2"}))
+
+        assert base != self._root(create_docx_mock({"a.xml": b"1", "b.xml": b"3"}))
+        # Mismo stream concatenado, distinta asignación a partes
+        assert base != self._root(create_docx_mock({"a.xml": b"12", "b.xml": b""}))
+
+    def test_differs_from_stream_scheme(self):
+        files = {"word/document.xml": b"<xml>Acta</xml>"}
+        stream_root = MerkleEngine().calculate_root(
+            OOXMLNormalizer(create_docx_mock(files)).get_canonical_stream()
+        )["root_hash"]
+
+        assert stream_root != self._root(create_docx_mock(files))
+
+    def test_cache_reuses_skeleton_parts(self):
+        cache = PartDigestCache()
+        cold = self._root(self._doc(b"<xml>Acta 1</xml>"), cache=cache)
+        assert cache.hits == 0
+
+        warm = self._root(self._doc(b"<xml>Acta 2</xml>"), cache=cache)
+
+        assert cache.hits == len(self.SKELETON)
+        assert cold != warm
+        # El resultado con caché es idéntico al cálculo sin caché
+        assert warm == self._root(self._doc(b"<xml>Acta 2</xml>"))
+
+    def test_content_parts_are_not_read_for_cache_keys(self, monkeypatch):
+        keyed = []
+        original = OOXMLNormalizer._part_key
+        monkeypatch.setattr(
+            OOXMLNormalizer, "_part_key",
+            lambda self, zf, info: keyed.append(info.filename) or original(self, zf, info)
+        )
+        cache = PartDigestCache()
+        self._root(self._doc(b"<xml>Acta</xml>"), cache=cache)
+
+        assert sorted(keyed) == sorted(self.SKELETON)
+        assert "word/document.xml" not in keyed
+
+    def test_cache_is_isolated_per_tenant(self):
+        cache = PartDigestCache()
+        self._root(self._doc(b"<xml>Acta</xml>"), cache=cache, tenant="tenant-a")
+        self._root(self._doc(b"<xml>Acta</xml>"), cache=cache, tenant="tenant-b")
+
+        assert cache.hits == 0
+
+    def test_leaf_parts_align_with_leaves(self, monkeypatch):
+        monkeypatch.setattr("src.crypto.normalizer.MERKLE_CHUNK_SIZE", 8)
+        normalizer = OOXMLNormalizer(create_docx_mock({"a.xml": b"A" * 20, "b.xml": b""}))
+
+        leaves = normalizer.get_part_leaves()
+
+        assert len(leaves) == 4
+        assert normalizer.leaf_parts == ["a.xml", "a.xml", "a.xml", "b.xml"]
+
+    def test_lazy_leaves_stop_hashing_after_first_mismatch(self, monkeypatch):
+        monkeypatch.setattr("src.crypto.normalizer.MERKLE_CHUNK_SIZE", 8)
+        files = {f"part{i:02d}.xml": b"P" * 20 for i in range(12)}
+        stored = OOXMLNormalizer(create_docx_mock(files)).get_part_leaves()
+
+        hashed = []
+        original = OOXMLNormalizer._hash_part
+        monkeypatch.setattr(
+            OOXMLNormalizer, "_hash_part",
+            lambda self, zf, name: hashed.append(name) or original(self, zf, name)
+        )
+        normalizer = OOXMLNormalizer(create_docx_mock({**files, "part00.xml": b"X" * 20}))
+        leaves = normalizer.iter_part_leaves(max_workers=2)
+
+        report = MerkleEngine().compare_leaves(leaves, stored, fail_fast=True)
+        leaves.close()
+
+        assert report["mismatched_leaves"] == [0]
+        # Solo la parte alterada y la ventana de look-ahead llegaron a descomprimirse
+        assert len(hashed) <= 3
+        assert normalizer.leaf_parts[0] == "part00.xml"
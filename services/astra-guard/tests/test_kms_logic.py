@@ -10,7 +10,7 @@ from src.config import settings
 class TestKMSLogic:
     
     @pytest.fixture
-    def manager(self):
+    def manager(self, monkeypatch):
         # Mock del driver para no depender de LocalStack en unit tests
         driver = MagicMock(spec=AWSKMSDriver)
         
@@ -24,8 +24,9 @@ class TestKMSLogic:
         driver.generate_data_key.return_value = mock_dek
         driver.decrypt_data_key.return_value = b"\x00" * 32
         
-        # Mock de settings para que devuelva una llave válida
-        settings.get_tenant_key_arn = MagicMock(return_value="arn:aws:kms:key/tenant-a")
+        # Mock de settings para que devuelva una llave válida (BaseSettings no admite asignar
+        # atributos en la instancia: se parchea el método en la clase)
+        monkeypatch.setattr(type(settings), "get_tenant_key_arn", lambda self, tenant_id: "arn:aws:kms:key/tenant-a")
         
         return EncryptionManager(driver)
 
@@ -43,3 +44,12 @@ class TestKMSLogic:
         recovered_data = manager.unseal_data(envelope)
         
         assert recovered_data == original_hash
+
+    def test_seal_many_uses_single_data_key(self, manager):
+        hashes = [f"{i:064x}".encode() for i in range(5)]
+
+        envelopes = manager.seal_many(hashes, "tenant-a")
+
+        assert manager.provider.generate_data_key.call_count == 1
+        assert len({e.iv_b64 for e in envelopes}) == len(hashes)
+        assert [manager.unseal_data(e) for e in envelopes] == hashes
@@ -5,6 +5,7 @@ import requests
 import shutil
 import zipfile
 import logging
+from urllib.parse import urlparse
 
 # Configuración de Logging para RunPod (stdout)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -30,6 +31,10 @@ def download_file(url: str, local_path: str):
                 f.write(chunk)
     logger.info(f"✅ Dataset descargado en {local_path}")
 
+def dataset_suffix(url: str) -> str:
+    """Extensión local según el objeto firmado: los lotes se exportan como .jsonl.gz."""
+    return ".jsonl.gz" if urlparse(url).path.endswith(".gz") else ".jsonl"
+
 def upload_file(local_path: str, upload_url: str):
     """Sube un archivo usando una URL Presigned PUT."""
     logger.info(f"⬆️ Subiendo resultado a {upload_url[:20]}...")
@@ -75,8 +80,8 @@ def handler(event):
     if not upload_url:
         return {"error": "Missing 'upload_url' in input."}
 
-    local_train_path = "train.jsonl"
-    local_val_path = "val.jsonl"
+    local_train_path = "train" + dataset_suffix(dataset_url)
+    local_val_path = "val" + dataset_suffix(validation_url or dataset_url)
     output_dir = "astra-lora-adapter"
     output_zip = "adapter.zip"
 
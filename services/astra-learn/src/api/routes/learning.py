@@ -80,7 +80,8 @@ async def validate_pair(req: ValidateRequest):
 # --- BATCH INGEST ---
 
 from typing import List, Dict, Any
-from src.db.models.queue import TrainingQueue, QueueStatus
+from src.db.models.queue import QueueStatus
+from src.infrastructure.queue_manager import QueueManager
 
 class IngestPair(BaseModel):
     raw_text: str
@@ -88,50 +89,48 @@ class IngestPair(BaseModel):
     metadata: Dict[str, Any] = {}
     tenant_id: str
 
+STATUS_MAP = {
+    "GREEN": QueueStatus.READY,
+    "YELLOW": QueueStatus.PENDING_REVIEW,
+    "RED": QueueStatus.DISCARDED,
+}
+
 @router.post("/batch_ingest")
 async def batch_ingest(pairs: List[IngestPair], db: Session = Depends(get_db)):
     """
     Ingests and validates a batch of training pairs.
+    Embeddings are computed in a single batch; only ambiguous pairs reach the LLM Judge.
     """
     global validator_instance
     if not validator_instance:
          validator_instance = SemanticValidator()
-    
+
+    if not pairs:
+        return {"processed": 0, "details": []}
+
+    validations = await validator_instance.validate_batch(
+        [(p.raw_text, p.target_text) for p in pairs],
+        current_starts=[p.metadata.get("start", 0.0) for p in pairs]
+    )
+
+    rows = []
     results = []
-    
-    for p in pairs:
-        # Validate
-        start_time = p.metadata.get("start", 0.0)
-        val_res = await validator_instance.validate_pair( 
-             p.raw_text, 
-             p.target_text, 
-             current_start=start_time
-        )
-        
-        # Map status
-        status = QueueStatus.PENDING 
-        if val_res["status"] == "GREEN":
-            status = QueueStatus.READY
-        elif val_res["status"] == "YELLOW":
-            status = QueueStatus.PENDING_REVIEW
-        elif val_res["status"] == "RED":
-            status = QueueStatus.DISCARDED
-            
-        # Create Queue Item
-        item = TrainingQueue(
-            tenant_id=p.tenant_id,
-            data_json={
+    for p, val_res in zip(pairs, validations):
+        status = STATUS_MAP.get(val_res["status"], QueueStatus.PENDING)
+        rows.append({
+            "tenant_id": p.tenant_id,
+            "data_json": {
                 "instruction": "Transcribe the audio exactly.",
                 "input": p.raw_text,
                 "output": p.target_text,
-                "metadata": {**p.metadata, **val_res} 
+                "metadata": {**p.metadata, **val_res}
             },
-            status=status,
-            validation_score=val_res["score"], 
-            validation_reasoning=val_res["reasoning"]
-        )
-        db.add(item)
+            "status": status,
+            "validation_score": val_res["score"],
+            "validation_reasoning": val_res["reasoning"]
+        })
         results.append({ "status": status, "score": val_res["score"], "reason": val_res["reasoning"] })
-    
-    db.commit()
+
+    # Un solo INSERT multi-fila para todo el lote; los contadores PENDING en la misma transacción
+    QueueManager(db).insert_validated_rows(rows)
     return {"processed": len(results), "details": results}
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Dict
 import os
 
 class Settings(BaseSettings):
@@ -11,6 +12,7 @@ class Settings(BaseSettings):
     
     # Training Thresholds
     BATCH_SIZE_THRESHOLD: int = 500
+    QUEUE_STREAM_CHUNK_SIZE: int = 2000 # Filas por fetch del cursor de servidor en checkout
     MAX_WAIT_HOURS: int = 168  # 1 week
     
     # Model Config
@@ -30,6 +32,26 @@ class Settings(BaseSettings):
     # S3 Config for Presigning (Needed for RunPod)
     S3_BUCKET_NAME: str = "astra-models"
 
+    # Redis (locks de entrenamiento / eventos)
+    REDIS_URL: str = "redis://redis:6379/0"
+
+    # Comparison Workers (cola durable en Postgres)
+    COMPARISON_WORKERS: int = 2
+    COMPARISON_POLL_SECONDS: float = 2.0
+    COMPARISON_MAX_ATTEMPTS: int = 3
+    COMPARISON_LEASE_SECONDS: int = 1800 # Jobs RUNNING más viejos se consideran huérfanos
+
+    # Validación semántica (/batch_ingest)
+    VALIDATION_ENCODE_BATCH_SIZE: int = 256
+    VALIDATION_JUDGE_CONCURRENCY: int = 8
+
+    # Comparator Metrics
+    COMPARATOR_SIMILARITY_MODE: str = "bertscore" # Values: 'bertscore', 'tiny', 'fuzzy'
+    COMPARATOR_TENANT_SIMILARITY_MODES: Dict[str, str] = {} # JSON: {"tenant_id": "fuzzy"}
+    COMPARATOR_TINY_MODEL: str = "distilbert-base-multilingual-cased"
+    COMPARATOR_BERT_BATCH_SIZE: int = 64
+    COMPARATOR_CPU_THREADS: int = 0 # 0 = todos los núcleos
+
     class Config:
         env_file = ".env"
         extra = "ignore" # Permitir variables extra en .env
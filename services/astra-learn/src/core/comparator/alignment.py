@@ -2,13 +2,56 @@ import logging
 import boto3
 import os
 import shutil
-from typing import Dict, Any, List
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
 from .metadata import ForensicExtractor, TextSegment
 from .metrics import MetricsEngine
 
 logger = logging.getLogger(__name__)
 
+def monotone_assignment(similarity: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+    """
+    Emparejamiento que preserva el orden (filas y columnas crecientes) maximizando la
+    suma de similitudes, considerando solo celdas >= threshold. Programación dinámica
+    O(n*m) vectorizada por filas:
+
+        dp[i][j] = max(dp[i-1][j], dp[i][j-1], dp[i-1][j-1] + w[i-1][j-1])
+
+    Retorna pares (fila, columna) en orden.
+    """
+    n, m = similarity.shape
+    if n == 0 or m == 0:
+        return []
+
+    weights = np.where(similarity >= threshold, similarity, -np.inf).astype(np.float64)
+    dp = np.zeros((n + 1, m + 1), dtype=np.float64)
+    for i in range(1, n + 1):
+        prev = dp[i - 1]
+        # Mejor entre saltar la fila i o emparejarla con la columna j; el máximo acumulado
+        # sobre j resuelve el término dp[i][j-1] (saltar la columna)
+        candidates = np.maximum(prev[1:], prev[:-1] + weights[i - 1])
+        dp[i, 1:] = np.maximum.accumulate(candidates)
+
+    pairs = []
+    i, j = n, m
+    while i > 0 and j > 0:
+        if dp[i, j] == dp[i - 1, j]:
+            i -= 1
+        elif dp[i, j] == dp[i, j - 1]:
+            j -= 1
+        else:
+            pairs.append((i - 1, j - 1))
+            i -= 1
+            j -= 1
+    pairs.reverse()
+    return pairs
+
 class ComparatorEngine:
+    # Similitud mínima para aceptar un emparejamiento sin chunk_id
+    FUZZY_MATCH_THRESHOLD = 0.85
+    # Solo se buscan segmentos finales lo bastante largos para que valga la pena
+    MIN_FUZZY_LENGTH = 20
+
     def __init__(self, s3_client=None):
         self.s3 = s3_client or boto3.client('s3')
         self.extractor = ForensicExtractor()
@@ -43,97 +86,124 @@ class ComparatorEngine:
             gen_segments = self.extractor.extract_segments(gen_path)
             fin_segments = self.extractor.extract_segments(fin_path)
 
-            # Indexar segmentos generados por chunk_id para búsqueda O(1)
-            gen_map = {s.chunk_id: s for s in gen_segments if s.chunk_id}
-            
-            deltas = []
-            global_wer_accum = 0.0
-            matched_chunks = 0
-            used_gen_ids = set()
-
-            # 2. Alineación y Cálculo (Lógica Real)
-            for fin_seg in fin_segments:
-                original_seg = None
-                match_method = "NONE"
-                
-                # A. Alineación por ID (Fuerte)
-                if fin_seg.chunk_id and fin_seg.chunk_id in gen_map:
-                    original_seg = gen_map[fin_seg.chunk_id]
-                    match_method = "ID_MATCH"
-                    used_gen_ids.add(fin_seg.chunk_id)
-                
-                # B. Alineación Semántica (Fallback si Word destruyó el ID)
-                # Solo buscamos si el segmento final es largo de forma que valga la pena
-                elif len(fin_seg.text) > 20:
-                    best_match = None
-                    max_sim = 0.0
-                    for g_id, g_seg in gen_map.items():
-                        if g_id in used_gen_ids: continue
-                        sim = self.metrics.calculate_semantic_similarity(g_seg.text, fin_seg.text)
-                        if sim > 0.85 and sim > max_sim:
-                            max_sim = sim
-                            best_match = g_seg
-                    
-                    if best_match:
-                        original_seg = best_match
-                        match_method = "FUZZY_SEMANTIC"
-                        used_gen_ids.add(best_match.chunk_id)
-
-                if original_seg:
-                    calc_wer = self.metrics.calculate_wer(original_seg.text, fin_seg.text)
-                    calc_sim = self.metrics.calculate_semantic_similarity(original_seg.text, fin_seg.text)
-                    change_class = self.metrics.classify_change(calc_wer, calc_sim)
-                    
-                    deltas.append({
-                        "chunk_id": original_seg.chunk_id,
-                        "original_text": original_seg.text,
-                        "final_text": fin_seg.text,
-                        "metrics": {
-                            "wer": calc_wer,
-                            "similarity": calc_sim,
-                            "classification": change_class
-                        },
-                        "alignment_method": match_method
-                    })
-                    
-                    global_wer_accum += calc_wer
-                    matched_chunks += 1
-                else:
-                    # Texto nuevo insertado por humano
-                    deltas.append({
-                        "chunk_id": None,
-                        "original_text": None,
-                        "final_text": fin_seg.text,
-                        "metrics": {"classification": "USER_INSERTION"},
-                        "alignment_method": "NONE"
-                    })
-
-            # 3. Detectar Eliminaciones (Lo que estaba en el original y no llegó al final)
-            for gen_id, gen_seg in gen_map.items():
-                if gen_id not in used_gen_ids:
-                    deltas.append({
-                        "chunk_id": gen_id,
-                        "original_text": gen_seg.text,
-                        "final_text": None,
-                        "metrics": {"classification": "USER_DELETION"},
-                        "alignment_method": "RESIDUAL"
-                    })
-
-            avg_wer = global_wer_accum / matched_chunks if matched_chunks > 0 else 0
-
-            return {
-                "job_id": job_id,
-                "tenant_id": tenant_id,
-                "stats": {
-                    "total_segments_final": len(fin_segments),
-                    "matched_segments": matched_chunks,
-                    "deleted_segments": len(gen_map) - matched_chunks,
-                    "average_wer": avg_wer
-                },
-                "deltas": deltas
-            }
+            report = self.align_segments(gen_segments, fin_segments, metrics=MetricsEngine.for_tenant(tenant_id))
+            return {"job_id": job_id, "tenant_id": tenant_id, **report}
 
         finally:
             # Limpieza segura
             if os.path.exists(gen_path): os.remove(gen_path)
             if os.path.exists(fin_path): os.remove(fin_path)
+
+    def align_segments(
+        self,
+        gen_segments: List[TextSegment],
+        fin_segments: List[TextSegment],
+        metrics: Optional[MetricsEngine] = None
+    ) -> Dict[str, Any]:
+        """
+        Alinea los segmentos finales con los generados y calcula métricas por delta.
+
+        A. Alineación por chunk_id (fuerte).
+        B. Fallback semántico para los segmentos cuyo ID destruyó Word: una matriz de
+           similitud calculada en lote entre los pendientes de ambos documentos y un
+           emparejamiento que preserva el orden del documento.
+        Las métricas de los pares emparejados se calculan al final en un solo lote,
+        con `metrics` (p.ej. el motor del tenant) o el motor por defecto.
+        """
+        metrics = metrics or self.metrics
+        # Indexar segmentos generados por chunk_id para búsqueda O(1)
+        gen_map = {s.chunk_id: s for s in gen_segments if s.chunk_id}
+
+        matches: List[Optional[TextSegment]] = [None] * len(fin_segments)
+        methods = ["NONE"] * len(fin_segments)
+        used_gen_ids = set()
+
+        # A. Alineación por ID (Fuerte)
+        for idx, fin_seg in enumerate(fin_segments):
+            if fin_seg.chunk_id and fin_seg.chunk_id in gen_map:
+                matches[idx] = gen_map[fin_seg.chunk_id]
+                methods[idx] = "ID_MATCH"
+                used_gen_ids.add(fin_seg.chunk_id)
+
+        # B. Alineación Semántica (Fallback si Word destruyó el ID)
+        pending_fin = [
+            idx for idx, fin_seg in enumerate(fin_segments)
+            if matches[idx] is None and len(fin_seg.text) > self.MIN_FUZZY_LENGTH
+        ]
+        pending_gen = [g_seg for g_id, g_seg in gen_map.items() if g_id not in used_gen_ids]
+
+        if pending_fin and pending_gen:
+            similarity = metrics.similarity_matrix(
+                [fin_segments[idx].text for idx in pending_fin],
+                [g_seg.text for g_seg in pending_gen]
+            )
+            for row, col in monotone_assignment(similarity, self.FUZZY_MATCH_THRESHOLD):
+                idx = pending_fin[row]
+                matches[idx] = pending_gen[col]
+                methods[idx] = "FUZZY_SEMANTIC"
+                used_gen_ids.add(pending_gen[col].chunk_id)
+
+        # 2. Métricas de los pares emparejados (en lote)
+        matched_idx = [idx for idx, seg in enumerate(matches) if seg is not None]
+        originals = [matches[idx].text for idx in matched_idx]
+        finals = [fin_segments[idx].text for idx in matched_idx]
+        wers = dict(zip(matched_idx, metrics.wer_many(originals, finals)))
+        similarities = dict(zip(matched_idx, metrics.similarity_many(originals, finals)))
+
+        deltas = []
+        global_wer_accum = 0.0
+        matched_chunks = 0
+
+        for idx, fin_seg in enumerate(fin_segments):
+            original_seg = matches[idx]
+            if original_seg:
+                calc_wer = wers[idx]
+                calc_sim = similarities[idx]
+                change_class = metrics.classify_change(calc_wer, calc_sim)
+
+                deltas.append({
+                    "chunk_id": original_seg.chunk_id,
+                    "original_text": original_seg.text,
+                    "final_text": fin_seg.text,
+                    "metrics": {
+                        "wer": calc_wer,
+                        "similarity": calc_sim,
+                        "classification": change_class
+                    },
+                    "alignment_method": methods[idx]
+                })
+
+                global_wer_accum += calc_wer
+                matched_chunks += 1
+            else:
+                # Texto nuevo insertado por humano
+                deltas.append({
+                    "chunk_id": None,
+                    "original_text": None,
+                    "final_text": fin_seg.text,
+                    "metrics": {"classification": "USER_INSERTION"},
+                    "alignment_method": "NONE"
+                })
+
+        # 3. Detectar Eliminaciones (Lo que estaba en el original y no llegó al final)
+        for gen_id, gen_seg in gen_map.items():
+            if gen_id not in used_gen_ids:
+                deltas.append({
+                    "chunk_id": gen_id,
+                    "original_text": gen_seg.text,
+                    "final_text": None,
+                    "metrics": {"classification": "USER_DELETION"},
+                    "alignment_method": "RESIDUAL"
+                })
+
+        avg_wer = global_wer_accum / matched_chunks if matched_chunks > 0 else 0
+
+        return {
+            "stats": {
+                "total_segments_final": len(fin_segments),
+                "matched_segments": matched_chunks,
+                "deleted_segments": len(gen_map) - matched_chunks,
+                "average_wer": avg_wer
+            },
+            "deltas": deltas
+        }
@@ -1,8 +1,8 @@
 import logging
 import spacy
+from collections import Counter, defaultdict
 from typing import Dict, List, Tuple
-# Note: Since the previous code used .metrics, I'll follow that if it's in the same package
-# but it was src/core/comparator/metrics.py, and this file is in same dir.
+from rapidfuzz.distance import Levenshtein
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +12,14 @@ class HotfixDetector:
     Identifica si un cambio en el texto corresponde únicamente a una corrección de entidad (Nombre/Lugar).
     """
 
-    def __init__(self):
+    ENTITY_LABELS = ("PER", "LOC", "ORG")
+    MAX_SPAN_TOKENS = 4     # Spans más largos son reescrituras, no correcciones de nombre
+    MAX_SPANS_PER_DELTA = 3 # Deltas con más cambios no son ediciones puntuales
+    PUNCTUATION = ".,;:()"
+
+    def __init__(self, batch_size: int = 256, min_occurrences: int = 1):
+        self.batch_size = batch_size
+        self.min_occurrences = min_occurrences
         # Usamos el modelo grande para máxima precisión en NER
         try:
             self.nlp = spacy.load("es_core_news_md")
@@ -23,12 +30,13 @@ class HotfixDetector:
     def detect_hotfixes(self, delta_report: Dict) -> Dict[str, str]:
         """
         Analiza un reporte de deltas y extrae pares {error: corrección} para el diccionario.
+        Alinea cada delta a nivel de token, valida todos los spans candidatos con un solo
+        `nlp.pipe` (solo NER) y agrega frecuencias entre deltas antes de emitir.
         """
-        hotfixes = {}
-        
         if not self.nlp:
-            return hotfixes
+            return {}
 
+        candidates: List[Tuple[str, str]] = []
         for delta in delta_report.get("deltas", []):
             # Solo analizamos ediciones menores (MINOR_EDIT) o cambios ortográficos
             classification = delta.get("metrics", {}).get("classification")
@@ -41,48 +49,86 @@ class HotfixDetector:
             if not original or not final:
                 continue
 
-            # Análisis token por token (simplificado para MVP)
-            candidate = self._analyze_pair(original, final)
-            if candidate:
-                err_term, fix_term = candidate
-                # Normalización: Las llaves del dict siempre en minúsculas para búsqueda
-                hotfixes[err_term.lower()] = fix_term
+            candidates.extend(self._substitution_spans(original, final))
+
+        if not candidates:
+            return {}
+
+        entities = self._entity_fixes({fix for _, fix in candidates})
+
+        # Frecuencia de cada corrección por término erróneo
+        # Normalización: Las llaves del dict siempre en minúsculas para búsqueda
+        votes: Dict[str, Counter] = defaultdict(Counter)
+        for err_term, fix_term in candidates:
+            if fix_term in entities:
+                votes[err_term.lower()][fix_term] += 1
+
+        hotfixes = {}
+        for err_term, counter in votes.items():
+            ranked = counter.most_common(2)
+            fix_term, count = ranked[0]
+            # Un término corregido de dos formas igual de frecuentes es ambiguo
+            if count < self.min_occurrences or (len(ranked) > 1 and ranked[1][1] == count):
+                continue
+            hotfixes[err_term] = fix_term
 
         if hotfixes:
             logger.info(f"Detectados {len(hotfixes)} hotfixes de entidades.")
-            
+
         return hotfixes
 
-    def _analyze_pair(self, original: str, final: str) -> Tuple[str, str]:
+    def _substitution_spans(self, original: str, final: str) -> List[Tuple[str, str]]:
+        """
+        Alinea los tokens de ambas frases y retorna los spans sustituidos (error, corrección),
+        de cualquier largo. Inserciones y borrados puros no producen candidatos, pero ya no
+        descartan el resto del delta.
+        """
+        # Tokenización básica; la puntuación no cuenta como diferencia
+        tokens_orig = [t.strip(self.PUNCTUATION) for t in original.split()]
+        tokens_final = [t.strip(self.PUNCTUATION) for t in final.split()]
+        tokens_orig = [t for t in tokens_orig if t]
+        tokens_final = [t for t in tokens_final if t]
+
+        # Bloques no-iguales contiguos (p.ej. replace + insert) forman un solo span
+        spans = []
+        current = None
+        for op in Levenshtein.opcodes(tokens_orig, tokens_final):
+            if op.tag == "equal":
+                current = None
+                continue
+            if current is None:
+                current = [op.src_start, op.src_end, op.dest_start, op.dest_end]
+                spans.append(current)
+            else:
+                current[1], current[3] = op.src_end, op.dest_end
+
+        if len(spans) > self.MAX_SPANS_PER_DELTA:
+            return []
+
+        pairs = []
+        for src_start, src_end, dest_start, dest_end in spans:
+            n_src, n_dest = src_end - src_start, dest_end - dest_start
+            if not n_src or not n_dest or max(n_src, n_dest) > self.MAX_SPAN_TOKENS:
+                continue
+            err = " ".join(tokens_orig[src_start:src_end])
+            fix = " ".join(tokens_final[dest_start:dest_end])
+            if err != fix:
+                pairs.append((err, fix))
+        return pairs
+
+    def _entity_fixes(self, fixes) -> set:
         """
-        Compara dos frases cortas. Si la única diferencia es una entidad, retorna el par.
+        Valida con NER (un solo batch, solo el componente 'ner') que el término corregido
+        sea una entidad completa de tipo persona/lugar/organización.
         """
-        # Tokenización básica
-        tokens_orig = original.split()
-        tokens_final = final.split()
-
-        # Solo soportamos cambios 1-a-1 por ahora para seguridad
-        if len(tokens_orig) != len(tokens_final):
-            return None
-
-        diffs = []
-        for o_tok, f_tok in zip(tokens_orig, tokens_final):
-            if o_tok != f_tok:
-                # Limpiar puntuación para comparar
-                o_clean = o_tok.strip(".,;:()")
-                f_clean = f_tok.strip(".,;:()")
-                if o_clean != f_clean:
-                    diffs.append((o_clean, f_clean))
-
-        # Si hay exactamente 1 diferencia, analizamos si es entidad
-        if len(diffs) == 1:
-            err, fix = diffs[0]
-            
-            # Validar con NER: El término corregido debe ser una entidad válida
-            doc = self.nlp(fix)
-            if doc.ents and doc.ents[0].label_ in ["PER", "LOC", "ORG"]:
-                # Filtro adicional: No aceptar si son verbos o stop words
-                if not doc[0].is_stop and doc[0].pos_ != "VERB":
-                    return (err, fix)
-        
-        return None
+        fixes = sorted(fixes)
+        valid = set()
+        with self.nlp.select_pipes(enable=["ner"]):
+            for fix, doc in zip(fixes, self.nlp.pipe(fixes, batch_size=self.batch_size)):
+                if len(doc.ents) != 1:
+                    continue
+                ent = doc.ents[0]
+                # La entidad debe cubrir todo el span; filtro adicional: no aceptar stop words
+                if ent.label_ in self.ENTITY_LABELS and ent.start == 0 and ent.end == len(doc) and not doc[0].is_stop:
+                    valid.add(fix)
+        return valid
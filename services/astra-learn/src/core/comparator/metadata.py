@@ -25,48 +25,91 @@ class ForensicExtractor:
         'astra': 'https://astra.ai/ooxml'
     }
 
+    W_P = f"{{{NS['w']}}}p"
+    W_PPR = f"{{{NS['w']}}}pPr"
+    W_PSTYLE = f"{{{NS['w']}}}pStyle"
+    W_T = f"{{{NS['w']}}}t"
+    W_DEL = f"{{{NS['w']}}}del"
+    W_VAL = f"{{{NS['w']}}}val"
+    ASTRA_CHUNK_ID = f"{{{NS['astra']}}}chunkId"
+
     def extract_segments(self, docx_path: str) -> List[TextSegment]:
+        """
+        Recorre word/document.xml en streaming (iterparse filtrado a w:p) directo desde el
+        zip, sin cargar el XML completo. Cada párrafo se procesa en una sola pasada y los
+        párrafos de primer nivel se liberan al terminar, así la memoria no crece con el acta.
+        """
         try:
-            with zipfile.ZipFile(docx_path, 'r') as zf:
-                xml_content = zf.read('word/document.xml')
-                
-            root = etree.fromstring(xml_content)
             segments = []
-            
-            # Iterar sobre párrafos
-            for idx, p_node in enumerate(root.xpath('//w:p', namespaces=self.NS)):
-                # 1. Intentar recuperar ID explícito (Inyectado por Builder)
-                # El Builder inyecta astra:chunkId="{UUID}" en w:p
-                chunk_id = p_node.get(f"{{{self.NS['astra']}}}chunkId")
-                
-                # 2. Si no hay ID explícito, buscar en los runs (w:r) por si el ID se movió
-                if not chunk_id:
-                    # Buscar en atributos de la propiedad del párrafo (w:pPr)
-                    ppr = p_node.find('w:pPr', namespaces=self.NS)
-                    if ppr is not None:
-                        chunk_id = ppr.get(f"{{{self.NS['astra']}}}chunkId")
+            with zipfile.ZipFile(docx_path, 'r') as zf, zf.open('word/document.xml') as xml_stream:
+                # order_index = posición del párrafo en orden de documento (evento start),
+                # también para párrafos anidados (cuadros de texto)
+                next_index = 0
+                open_paragraphs = []
+
+                for event, p_node in etree.iterparse(xml_stream, events=("start", "end"), tag=self.W_P, huge_tree=True):
+                    if event == "start":
+                        open_paragraphs.append(next_index)
+                        next_index += 1
+                        continue
 
-                # 3. Extraer texto limpio concatenando todos los runs
-                texts = p_node.xpath('.//w:t/text()', namespaces=self.NS)
-                full_text = "".join(texts).strip()
+                    idx = open_paragraphs.pop()
+                    segment = self._read_paragraph(p_node, idx)
+                    if segment:
+                        segments.append(segment)
 
-                # 4. Extraer estilos básicos (Bold, Italic, Style Name)
-                styles = {}
-                p_style = p_node.xpath('.//w:pStyle/@w:val', namespaces=self.NS)
-                if p_style:
-                    styles['paragraph_style'] = p_style[0]
+                    # Liberar solo párrafos de primer nivel: el padre aún necesita el texto anidado
+                    if not open_paragraphs:
+                        p_node.clear(keep_tail=True)
+                        while p_node.getprevious() is not None:
+                            del p_node.getparent()[0]
 
-                if full_text: # Ignorar párrafos vacíos
-                    segments.append(TextSegment(
-                        chunk_id=chunk_id,
-                        text=full_text,
-                        order_index=idx,
-                        styles=styles
-                    ))
-            
+            # Los párrafos anidados terminan antes que su contenedor
+            segments.sort(key=lambda s: s.order_index)
             logger.info(f"Extraídos {len(segments)} segmentos del documento final.")
             return segments
 
         except Exception as e:
             logger.error(f"Error forense extrayendo metadata: {e}")
             raise ValueError(f"Documento corrupto o ilegible: {str(e)}")
+
+    def _read_paragraph(self, p_node, idx: int) -> Optional[TextSegment]:
+        """Chunk ID, texto y estilo de un w:p en un único recorrido de sus descendientes."""
+        # 1. Intentar recuperar ID explícito (Inyectado por Builder)
+        # El Builder inyecta astra:chunkId="{UUID}" en w:p
+        chunk_id = p_node.get(self.ASTRA_CHUNK_ID)
+        paragraph_style = None
+        texts = []
+
+        for node in p_node.iter(self.W_PPR, self.W_PSTYLE, self.W_T):
+            tag = node.tag
+            if tag == self.W_T:
+                # 3. Texto aceptado: w:ins entra; lo borrado (w:del) va en w:delText,
+                # pero se descarta también un w:t bajo w:del por robustez
+                run = node.getparent()
+                if run is not None and run.getparent() is not None and run.getparent().tag == self.W_DEL:
+                    continue
+                if node.text:
+                    texts.append(node.text)
+            elif tag == self.W_PSTYLE:
+                # 4. Extraer estilos básicos (Style Name)
+                if paragraph_style is None:
+                    paragraph_style = node.get(self.W_VAL)
+            elif not chunk_id and node.getparent() is p_node:
+                # 2. Si no hay ID explícito, buscar en las propiedades del párrafo (w:pPr)
+                chunk_id = node.get(self.ASTRA_CHUNK_ID)
+
+        full_text = "".join(texts).strip()
+        if not full_text: # Ignorar párrafos vacíos
+            return None
+
+        styles = {}
+        if paragraph_style:
+            styles['paragraph_style'] = paragraph_style
+
+        return TextSegment(
+            chunk_id=chunk_id,
+            text=full_text,
+            order_index=idx,
+            styles=styles
+        )
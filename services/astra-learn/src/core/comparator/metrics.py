@@ -1,22 +1,101 @@
 import logging
-from typing import Dict
+import os
+import threading
+from typing import Dict, List, Optional
 import numpy as np
 from jiwer import wer
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+from rapidfuzz.distance import Levenshtein
+from src.config import settings
 
 # Carga perezosa de BERTScore para no bloquear inicio si no hay GPU/Recursos
 try:
-    from bert_score import score as bert_score
+    from bert_score import BERTScorer
     import torch
-    BERT_AVAILABLE = torch.cuda.is_available() or torch.backends.mps.is_available() or True 
+    BERT_AVAILABLE = True
 except ImportError:
-    bert_score = None
+    BERTScorer = None
+    torch = None
     BERT_AVAILABLE = False
 
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+_embedding_model = None
+
+# Modos de similitud (seleccionables por tenant):
+#   bertscore: BERTScore con el modelo por defecto para español (máxima calidad)
+#   tiny:      BERTScore con un modelo destilado (COMPARATOR_TINY_MODEL), ~3x más rápido en CPU
+#   fuzzy:     Token Sort Ratio de RapidFuzz, sin modelo
+SIMILARITY_MODES = ("bertscore", "tiny", "fuzzy")
+
+# Scorers compartidos por el proceso: construir un BERTScorer carga el modelo y el tokenizer
+_scorers: Dict[str, "BERTScorer"] = {}
+_scorers_lock = threading.Lock()
+_threads_configured = False
+
+def get_embedding_model():
+    """Modelo de embeddings compartido por el proceso (se carga una sola vez)."""
+    global _embedding_model
+    if _embedding_model is None and SentenceTransformer is not None:
+        logger.info(f"Cargando modelo de alineación: {EMBEDDING_MODEL_NAME}")
+        _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return _embedding_model
+
+def configure_cpu_threads(num_threads: Optional[int] = None) -> None:
+    """
+    Ajusta los hilos de torch para inferencia en CPU (una sola vez por proceso).
+    Paralelismo intra-op en todos los núcleos disponibles e inter-op en 1: los lotes
+    ya saturan la CPU y los hilos inter-op solo añaden contención.
+    """
+    global _threads_configured
+    if _threads_configured or torch is None or torch.cuda.is_available():
+        return
+    num_threads = num_threads or settings.COMPARATOR_CPU_THREADS or os.cpu_count() or 1
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Solo puede fijarse antes del primer trabajo paralelo de torch
+        pass
+    _threads_configured = True
+
+def get_bert_scorer(mode: str = "bertscore"):
+    """BERTScorer del modo indicado, creado una sola vez por proceso."""
+    scorer = _scorers.get(mode)
+    if scorer is not None:
+        return scorer
+
+    with _scorers_lock:
+        if mode not in _scorers:
+            configure_cpu_threads()
+            logger.info(f"Inicializando BERTScorer (modo {mode})")
+            if mode == "tiny":
+                _scorers[mode] = BERTScorer(model_type=settings.COMPARATOR_TINY_MODEL, lang="es")
+            else:
+                _scorers[mode] = BERTScorer(lang="es")
+        return _scorers[mode]
+
 class MetricsEngine:
-    
+
+    def __init__(self, mode: Optional[str] = None, batch_size: Optional[int] = None):
+        mode = mode or settings.COMPARATOR_SIMILARITY_MODE
+        if mode not in SIMILARITY_MODES:
+            raise ValueError(f"Modo de similitud no soportado: {mode}")
+        # Sin bert_score instalado, cualquier modo neuronal degrada a fuzzy
+        self.mode = mode if BERT_AVAILABLE else "fuzzy"
+        self.batch_size = batch_size or settings.COMPARATOR_BERT_BATCH_SIZE
+
+    @classmethod
+    def for_tenant(cls, tenant_id: str) -> "MetricsEngine":
+        """Motor con el modo configurado para el tenant (o el global por defecto)."""
+        return cls(mode=settings.COMPARATOR_TENANT_SIMILARITY_MODES.get(tenant_id))
+
     @staticmethod
     def calculate_wer(reference: str, hypothesis: str) -> float:
         """
@@ -28,7 +107,7 @@ class MetricsEngine:
             return 0.0
         if not reference:
             return 1.0
-            
+
         try:
             return float(wer(reference, hypothesis))
         except Exception as e:
@@ -36,48 +115,118 @@ class MetricsEngine:
             return 1.0
 
     @staticmethod
-    def calculate_semantic_similarity(reference: str, hypothesis: str) -> float:
+    def wer_many(references: List[str], hypotheses: List[str]) -> List[float]:
+        """
+        WER por par para listas alineadas. Distancia de Levenshtein sobre listas de
+        palabras (RapidFuzz, en C), equivalente a la transformación por defecto de jiwer
+        sin su costo de preparación por llamada.
+        """
+        scores = []
+        for reference, hypothesis in zip(references, hypotheses):
+            ref_words = reference.split() if reference else []
+            if not ref_words:
+                scores.append(0.0 if not (hypothesis or "").split() else 1.0)
+                continue
+            hyp_words = hypothesis.split() if hypothesis else []
+            scores.append(Levenshtein.distance(ref_words, hyp_words) / len(ref_words))
+        return scores
+
+    def calculate_semantic_similarity(self, reference: str, hypothesis: str) -> float:
         """
         Calcula similitud semántica.
         Usa BERTScore si está disponible, sino fallback a Levenshtein (RapidFuzz).
         Retorna 0.0 (diferente) a 1.0 (igual).
         """
-        if not reference or not hypothesis:
-            return 0.0
+        return self.similarity_many([reference], [hypothesis])[0]
 
-        # Fast Path: Identicos
-        if reference.strip() == hypothesis.strip():
-            return 1.0
+    def similarity_many(self, references: List[str], hypotheses: List[str], bucket_size: int = 1024) -> List[float]:
+        """
+        Versión por lotes de `calculate_semantic_similarity` sobre pares alineados.
 
-        # Si BERTScore está disponible, lo usamos para entender el significado
-        if BERT_AVAILABLE and bert_score is not None:
+        Los pares idénticos o vacíos se resuelven sin modelo. El resto se ordena por
+        longitud y se envía al BERTScorer del proceso en cubetas de `bucket_size` pares:
+        cada lote interno agrupa textos de longitud parecida (poco padding) y la memoria
+        de embeddings queda acotada por cubeta.
+        """
+        scores: List[Optional[float]] = [None] * len(references)
+        pending = []
+        for i, (ref, hyp) in enumerate(zip(references, hypotheses)):
+            if not ref or not hyp:
+                scores[i] = 0.0
+            elif ref.strip() == hyp.strip():
+                scores[i] = 1.0
+            else:
+                pending.append(i)
+
+        if pending and self.mode != "fuzzy":
             try:
-                # BERTScore retorna (P, R, F1)
-                _, _, f1 = bert_score([hypothesis], [reference], lang="es", verbose=False)
-                return float(f1.item())
+                scorer = get_bert_scorer(self.mode)
+                pending.sort(key=lambda i: len(references[i]) + len(hypotheses[i]))
+                for start in range(0, len(pending), bucket_size):
+                    bucket = pending[start:start + bucket_size]
+                    # BERTScore retorna (P, R, F1)
+                    _, _, f1 = scorer.score(
+                        [hypotheses[i] for i in bucket],
+                        [references[i] for i in bucket],
+                        batch_size=self.batch_size,
+                        verbose=False
+                    )
+                    for i, value in zip(bucket, f1.tolist()):
+                        scores[i] = float(value)
+                pending = [i for i in pending if scores[i] is None]
             except Exception as e:
-                logger.warning(f"Fallo BERTScore, usando fallback: {e}")
+                logger.warning(f"Fallo BERTScore en lote, usando fallback: {e}")
+                pending = [i for i in pending if scores[i] is None]
 
         # Fallback (CPU Friendly)
         # Token Sort Ratio maneja palabras desordenadas mejor que ratio simple
-        return float(fuzz.token_sort_ratio(reference, hypothesis) / 100.0)
+        for i in pending:
+            scores[i] = float(fuzz.token_sort_ratio(references[i], hypotheses[i]) / 100.0)
+        return scores
+
+    @staticmethod
+    def similarity_matrix(references: List[str], hypotheses: List[str]) -> np.ndarray:
+        """
+        Matriz de similitud (len(references) x len(hypotheses)) en una sola pasada.
+        Coseno entre embeddings codificados en lote; sin sentence-transformers,
+        Token Sort Ratio de RapidFuzz calculado en paralelo.
+        """
+        if not references or not hypotheses:
+            return np.zeros((len(references), len(hypotheses)), dtype=np.float32)
+
+        model = get_embedding_model()
+        if model is not None:
+            try:
+                # Una sola pasada de codificación para ambos documentos
+                embeddings = model.encode(
+                    list(references) + list(hypotheses),
+                    batch_size=64,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True
+                )
+                ref_embs, hyp_embs = embeddings[:len(references)], embeddings[len(references):]
+                return np.clip(ref_embs @ hyp_embs.T, 0.0, 1.0).astype(np.float32)
+            except Exception as e:
+                logger.warning(f"Fallo de embeddings, usando fallback: {e}")
+
+        return process.cdist(references, hypotheses, scorer=fuzz.token_sort_ratio, workers=-1).astype(np.float32) / 100.0
 
     @staticmethod
     def classify_change(wer_score: float, sim_score: float) -> str:
         """Determina el tipo de cambio para etiquetado."""
         if wer_score == 0.0:
             return "NO_CHANGE"
-        
+
         if wer_score < 0.05:
             return "FIX_ORTHOGRAPHY" # Cambios mínimos (puntos, tildes)
-            
+
         if wer_score < 0.2 and sim_score > 0.95:
             return "MINOR_EDIT"
-            
+
         if sim_score > 0.85:
             return "REPHRASE"   # Mismo significado, vocabulario diferente
-            
+
         if sim_score < 0.4:
             return "MAJOR_REWRITE" # Cambio radical de contenido
-            
+
         return "CONTENT_UPDATE" # Ajuste de información
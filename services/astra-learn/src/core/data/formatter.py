@@ -1,6 +1,6 @@
 import logging
 from typing import Dict, Optional, List, Any
-from .privacy import PrivacyEngine
+from .privacy import ERROR_MARKER, get_privacy_engine
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +12,7 @@ class DatasetBuilder:
     def __init__(self):
         # Intentamos inicializar el PrivacyEngine
         try:
-            self.privacy = PrivacyEngine()
+            self.privacy = get_privacy_engine()
         except Exception as e:
             logger.error(f"DatasetBuilder no pudo inicializar el PrivacyEngine: {e}")
             self.privacy = None
@@ -32,38 +32,29 @@ class DatasetBuilder:
         else:
             return "Mejora el siguiente texto para su inclusión en un acta formal."
 
-    def build_training_row(self, delta: Dict[str, Any]) -> Optional[Dict[str, str]]:
-        """
-        Procesa un delta individual. Retorna None si el delta no es apto para entrenamiento.
-        """
-        original = delta.get("original_text")
-        final = delta.get("final_text")
+    def _is_trainable(self, delta: Dict[str, Any]) -> bool:
+        """Filtros de calidad: solo ediciones reales sobre texto alineado."""
         metrics = delta.get("metrics", {})
 
-        # Filtros de Calidad
-        if not original or not final:
-            return None
-        
+        if not delta.get("original_text") or not delta.get("final_text"):
+            return False
+
         # Ignorar si no hubo cambios
         if metrics.get("classification") == "NO_CHANGE":
-            return None
+            return False
 
         # Ignorar eliminaciones o inserciones puras
         if delta.get("alignment_method") in ["NONE", "RESIDUAL"]:
-            return None
+            return False
 
-        # 1. Sanitización PII
-        if self.privacy:
-            sanitized_input, sanitized_output = self.privacy.sanitize_pair(original, final)
-        else:
-            # Si no hay privacy engine, por seguridad no generamos el dato
-            return None
+        return True
 
-        if "<ERROR_PRIVACY>" in sanitized_input:
+    def _make_row(self, delta: Dict[str, Any], sanitized_input: str, sanitized_output: str) -> Optional[Dict[str, str]]:
+        if ERROR_MARKER in sanitized_input or ERROR_MARKER in sanitized_output:
             return None
 
-        # 2. Construcción del Objeto Instruct
-        row = {
+        metrics = delta.get("metrics", {})
+        return {
             "instruction": self._determine_instruction(metrics),
             "input": sanitized_input,
             "output": sanitized_output,
@@ -73,5 +64,36 @@ class DatasetBuilder:
                 "classification": metrics.get("classification")
             }
         }
-        
-        return row
+
+    def build_training_row(self, delta: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        """
+        Procesa un delta individual. Retorna None si el delta no es apto para entrenamiento.
+        """
+        rows = self.build_training_rows([delta])
+        return rows[0] if rows else None
+
+    def build_training_rows(self, deltas: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """
+        Procesa todos los deltas de un reporte. La sanitización PII de los aptos
+        se hace en un solo lote. Los deltas descartados no generan fila.
+        """
+        # Si no hay privacy engine, por seguridad no generamos datos
+        if not self.privacy:
+            return []
+
+        candidates = [delta for delta in deltas if self._is_trainable(delta)]
+        if not candidates:
+            return []
+
+        # 1. Sanitización PII (en lote)
+        sanitized = self.privacy.sanitize_pairs(
+            [(delta["original_text"], delta["final_text"]) for delta in candidates]
+        )
+
+        # 2. Construcción del Objeto Instruct
+        rows = []
+        for delta, (sanitized_input, sanitized_output) in zip(candidates, sanitized):
+            row = self._make_row(delta, sanitized_input, sanitized_output)
+            if row:
+                rows.append(row)
+        return rows
@@ -1,21 +1,51 @@
 import logging
-from typing import Tuple, List, Dict
-from presidio_analyzer import AnalyzerEngine
+from collections import OrderedDict
+from typing import Tuple, List, Dict, Optional
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine
+from presidio_analyzer.nlp_engine import NlpEngineProvider
 from presidio_anonymizer import AnonymizerEngine
 from presidio_anonymizer.entities import OperatorConfig
 
 logger = logging.getLogger(__name__)
 
+ERROR_MARKER = "<ERROR_PRIVACY>"
+
+_shared_engine: Optional["PrivacyEngine"] = None
+
 class PrivacyEngine:
     """
     Wrapper de Microsoft Presidio con soporte para español y consistencia de entidades.
     """
-    
-    def __init__(self, language: str = "es"):
+
+    ENTITIES = ["PERSON", "PHONE_NUMBER", "EMAIL_ADDRESS", "LOCATION"]
+
+    def __init__(
+        self,
+        language: str = "es",
+        spacy_model: str = "es_core_news_md",
+        batch_size: int = 64,
+        n_process: int = 1,
+        cache_size: int = 20000
+    ):
+        """
+        Args:
+            batch_size: Textos por lote de `nlp.pipe`.
+            n_process: Procesos de spaCy para el NER (>1 reparte los lotes entre procesos).
+            cache_size: Textos ya sanitizados que se recuerdan (LRU); 0 la desactiva.
+        """
         self.language = language
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
         # Inicializa el motor de análisis (carga modelos Spacy por debajo)
         try:
-            self.analyzer = AnalyzerEngine()
+            nlp_engine = NlpEngineProvider(nlp_configuration={
+                "nlp_engine_name": "spacy",
+                "models": [{"lang_code": language, "model_name": spacy_model}]
+            }).create_engine()
+            self.analyzer = AnalyzerEngine(nlp_engine=nlp_engine, supported_languages=[language])
+            self.batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
             self.anonymizer = AnonymizerEngine()
             logger.info(f"PrivacyEngine inicializado en idioma: {language}")
         except Exception as e:
@@ -37,42 +67,81 @@ class PrivacyEngine:
         """
         Sanitiza un par de textos (Input/Output) manteniendo consistencia.
         """
-        if not original_text or not corrected_text:
-            return original_text, corrected_text
+        return self.sanitize_pairs([(original_text, corrected_text)])[0]
+
+    def sanitize_pairs(self, pairs: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        Sanitiza muchos pares en una sola pasada de NER.
+        Los reemplazos son etiquetas fijas por tipo de entidad, por lo que cada texto se
+        analiza por separado y la consistencia entre input y output se mantiene sin
+        concatenarlos. Si un lado del par está vacío el par se retorna intacto.
+        """
+        texts = [text for pair in pairs if all(pair) for text in pair]
+        sanitized = iter(self.sanitize_many(texts))
+        return [(next(sanitized), next(sanitized)) if all(pair) else pair for pair in pairs]
+
+    def sanitize_many(self, texts: List[str]) -> List[str]:
+        """
+        Sanitiza una lista de textos preservando el orden.
+        Los duplicados y los textos ya vistos (caché LRU) no se vuelven a analizar; el resto
+        pasa por `nlp.pipe` en lotes de `batch_size` (y `n_process` procesos).
+        Un lote que falla se marca con `<ERROR_PRIVACY>` en vez de filtrar PII a medias.
+        """
+        resolved: Dict[str, str] = {}
+        for text in texts:
+            if text in resolved:
+                continue
+            if not text:
+                resolved[text] = text
+            elif text in self._cache:
+                self._cache.move_to_end(text)
+                resolved[text] = self._cache[text]
+
+        pending = [text for text in dict.fromkeys(texts) if text not in resolved]
+        if pending:
+            resolved.update(self._analyze_and_anonymize(pending))
 
-        DELIMITER = " |||SPLIT_MARKER||| "
-        combined_text = f"{original_text}{DELIMITER}{corrected_text}"
+        return [resolved[text] for text in texts]
 
+    def _analyze_and_anonymize(self, texts: List[str]) -> Dict[str, str]:
+        operators = self._get_consistent_operators()
+        sanitized: Dict[str, str] = {}
         try:
-            # 1. Análisis
-            results = self.analyzer.analyze(
-                text=combined_text,
+            # 1. Análisis (spaCy nlp.pipe por debajo)
+            results_per_text = self.batch_analyzer.analyze_iterator(
+                texts,
                 language=self.language,
-                entities=["PERSON", "PHONE_NUMBER", "EMAIL_ADDRESS", "LOCATION"]
+                entities=self.ENTITIES,
+                batch_size=self.batch_size,
+                n_process=self.n_process
             )
-
             # 2. Anonimización
-            anonymized_result = self.anonymizer.anonymize(
-                text=combined_text,
-                analyzer_results=results,
-                operators=self._get_consistent_operators()
-            )
-            
-            sanitized_combined = anonymized_result.text
-
-            # 3. Separación
-            parts = sanitized_combined.split(DELIMITER)
-            if len(parts) == 2:
-                return parts[0].strip(), parts[1].strip()
-            
-            # Fallback
-            logger.warning("Delimitador de sanitización perdido. Retornando sanitización individual.")
-            return self._sanitize_single(original_text), self._sanitize_single(corrected_text)
-
+            for text, results in zip(texts, results_per_text):
+                sanitized[text] = self.anonymizer.anonymize(
+                    text=text,
+                    analyzer_results=results,
+                    operators=operators
+                ).text
+                self._remember(text, sanitized[text])
         except Exception as e:
-            logger.error(f"Fallo en sanitización: {e}")
-            return "<ERROR_PRIVACY>", "<ERROR_PRIVACY>"
+            logger.error(f"Fallo en sanitización de {len(texts)} textos: {e}")
+            for text in texts:
+                sanitized.setdefault(text, ERROR_MARKER)
+        return sanitized
+
+    def _remember(self, text: str, sanitized: str) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[text] = sanitized
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
 
-    def _sanitize_single(self, text: str) -> str:
-        results = self.analyzer.analyze(text=text, language=self.language)
-        return self.anonymizer.anonymize(text=text, analyzer_results=results, operators=self._get_consistent_operators()).text
+def get_privacy_engine() -> "PrivacyEngine":
+    """
+    PrivacyEngine compartido por el proceso: el modelo spaCy se carga una vez y la caché
+    de textos sanitizados sobrevive entre trabajos de comparación.
+    """
+    global _shared_engine
+    if _shared_engine is None:
+        _shared_engine = PrivacyEngine()
+    return _shared_engine
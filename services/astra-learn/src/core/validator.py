@@ -1,11 +1,17 @@
 import logging
 import asyncio
+from typing import List, Optional, Tuple
 from sentence_transformers import SentenceTransformer, util
 import numpy as np
+from src.config import settings
 from src.ml.judge import LLMJudge
 
 logger = logging.getLogger(__name__)
 
+# Zonas de similitud: < RED_THRESHOLD descarta, > GREEN_THRESHOLD acepta, el resto va al juez
+RED_THRESHOLD = 0.4
+GREEN_THRESHOLD = 0.85
+
 class SemanticValidator:
     def __init__(self, model_name="paraphrase-multilingual-MiniLM-L12-v2"):
         logger.info(f"Loading Semantic Validator Model: {model_name}")
@@ -46,7 +52,83 @@ class SemanticValidator:
         score = float(util.cos_sim(embeddings[0], embeddings[1])[0][0])
         
         # 2. Threshold Logic
-        if score < 0.4:
+        result = self._classify_embedding(score)
+        if result:
+            return result
+
+        # 3. LLM Judge (Yellow Zone / Ambiguous)
+        return await self._escalate(raw_text, target_text, score)
+
+    async def validate_batch(self,
+                             pairs: List[Tuple[str, str]],
+                             current_starts: Optional[List[float]] = None,
+                             last_valid_ends: Optional[List[Optional[float]]] = None,
+                             max_concurrency: Optional[int] = None) -> List[dict]:
+        """
+        Versión por lotes de `validate_pair`, con resultados en el mismo orden que `pairs`.
+        Codifica todos los textos en una sola llamada al modelo, calcula los cosenos de
+        forma vectorizada y solo escala al LLM Judge los pares ambiguos, con a lo sumo
+        `max_concurrency` llamadas simultáneas.
+        """
+        results: List[Optional[dict]] = [None] * len(pairs)
+
+        # 0. Monotonicity Check (Temporal Logic)
+        pending = []
+        for i in range(len(pairs)):
+            last_end = last_valid_ends[i] if last_valid_ends else None
+            start = current_starts[i] if current_starts else 0.0
+            if last_end is not None and start < last_end:
+                results[i] = {
+                    "status": "RED",
+                    "score": 0.0,
+                    "reasoning": f"Temporal Inconsistency: Starts at {start}s before previous ended at {last_end}s.",
+                    "source": "TEMPORAL"
+                }
+            else:
+                pending.append(i)
+
+        if not pending:
+            return results
+
+        # 1. Embeddings Similarity (una sola pasada para raw + target)
+        texts = [pairs[i][0] for i in pending] + [pairs[i][1] for i in pending]
+        loop = asyncio.get_running_loop()
+        embeddings = await loop.run_in_executor(
+            None,
+            lambda: self.model.encode(
+                texts,
+                batch_size=settings.VALIDATION_ENCODE_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+        )
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        raw_embs, target_embs = embeddings[:len(pending)], embeddings[len(pending):]
+        scores = np.einsum("ij,ij->i", raw_embs, target_embs)
+
+        # 2. Threshold Logic
+        ambiguous = []
+        for i, score in zip(pending, scores.tolist()):
+            results[i] = self._classify_embedding(score)
+            if results[i] is None:
+                ambiguous.append((i, score))
+
+        # 3. LLM Judge (concurrencia acotada)
+        if ambiguous:
+            logger.info(f"Invoking LLM Judge for {len(ambiguous)}/{len(pairs)} ambiguous pairs")
+            semaphore = asyncio.Semaphore(max_concurrency or settings.VALIDATION_JUDGE_CONCURRENCY)
+
+            async def escalate(i: int, score: float):
+                async with semaphore:
+                    results[i] = await self._escalate(pairs[i][0], pairs[i][1], score)
+
+            await asyncio.gather(*(escalate(i, score) for i, score in ambiguous))
+
+        return results
+
+    def _classify_embedding(self, score: float) -> Optional[dict]:
+        """Decisión por similitud de embeddings; None si el par cae en la zona ambigua."""
+        if score < RED_THRESHOLD:
             return { 
                 "status": "RED", 
                 "score": score, 
@@ -54,16 +136,17 @@ class SemanticValidator:
                 "source": "EMBEDDING"
             }
         
-        if score > 0.85:
+        if score > GREEN_THRESHOLD:
              return { 
                  "status": "GREEN", 
                  "score": score, 
                  "reasoning": f"High Confidence Match ({score:.2f})",
                  "source": "EMBEDDING"
              }
+        return None
 
-        # 3. LLM Judge (Yellow Zone / Ambiguous)
-        logger.info(f"Invoking LLM Judge for ambiguous pair (Score: {score:.2f})")
+    async def _escalate(self, raw_text: str, target_text: str, score: float) -> dict:
+        logger.debug(f"Invoking LLM Judge for ambiguous pair (Score: {score:.2f})")
         judge_result = await self.judge.evaluate(raw_text, target_text)
         
         final_score = judge_result["score"]
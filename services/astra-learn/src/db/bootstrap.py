@@ -0,0 +1,81 @@
+"""
+Pasos de esquema y datos que create_all no cubre, ejecutados al arrancar el servicio.
+
+create_all solo crea tablas nuevas: no agrega índices a tablas existentes ni rellena tablas
+derivadas. Aquí van, de forma idempotente:
+  - DDL explícito de los índices de training_queue (CONCURRENTLY en Postgres, sin bloquear la cola).
+  - Backfill único de training_queue_counters desde las filas PENDING ya encoladas.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from src.db.models.schema import SchemaMigration
+from src.infrastructure.queue_manager import QueueManager
+
+logger = logging.getLogger(__name__)
+
+# Clave de pg_advisory_xact_lock para serializar el arranque de varias réplicas
+BOOTSTRAP_LOCK_KEY = 0x41535452  # 'ASTR'
+QUEUE_COUNTERS_BACKFILL = "training_queue_counters_backfill"
+
+QUEUE_INDEXES = {
+    "ix_training_queue_pending_tenant_created":
+        "ON training_queue (tenant_id, created_at) WHERE status = 'PENDING'",
+    "ix_training_queue_job_id":
+        "ON training_queue (job_id)",
+}
+
+
+def run_startup_migrations(engine: Engine) -> None:
+    ensure_queue_indexes(engine)
+    backfill_queue_counters(engine)
+
+
+def ensure_queue_indexes(engine: Engine) -> None:
+    """Crea los índices de training_queue si faltan (tablas creadas antes de que existieran)."""
+    postgres = engine.dialect.name == "postgresql"
+    # CREATE INDEX CONCURRENTLY no puede correr dentro de una transacción
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name, definition in QUEUE_INDEXES.items():
+            if postgres:
+                # Un CONCURRENTLY interrumpido deja el índice INVALID; IF NOT EXISTS no lo repararía
+                invalid = conn.execute(text(
+                    "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE c.relname = :name AND NOT i.indisvalid"
+                ), {"name": name}).scalar()
+                if invalid:
+                    logger.warning(f"Índice {name} inválido (creación interrumpida): se reconstruye")
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}"))
+            else:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} {definition}"))
+
+
+def backfill_queue_counters(engine: Engine) -> bool:
+    """
+    Rellena training_queue_counters una sola vez desde la cola existente.
+    Retorna True si lo aplicó en esta llamada (False si otra réplica ya lo había hecho).
+    """
+    postgres = engine.dialect.name == "postgresql"
+    with Session(engine) as db:
+        if postgres:
+            # Una sola réplica a la vez; las demás esperan y luego ven la marca
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": BOOTSTRAP_LOCK_KEY})
+
+        if db.get(SchemaMigration, QUEUE_COUNTERS_BACKFILL) is not None:
+            return False
+
+        if postgres:
+            # Congelar encolados y checkouts mientras se recuenta (se libera en el commit)
+            db.execute(text("LOCK TABLE training_queue IN SHARE ROW EXCLUSIVE MODE"))
+
+        counts = QueueManager(db).recount_pending()
+        db.add(SchemaMigration(name=QUEUE_COUNTERS_BACKFILL, applied_at=datetime.utcnow()))
+        db.commit()
+
+    logger.info(f"Backfill de contadores de cola: {len(counts)} tenants, {sum(counts.values())} PENDING")
+    return True
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Enum, Float
+from sqlalchemy import Column, String, DateTime, Enum, Float, Integer, JSON
 from sqlalchemy.dialects.postgresql import UUID
 import enum
 from src.db.database import Base
@@ -31,3 +31,32 @@ class TrainingJob(Base):
     finished_at = Column(DateTime, nullable=True)
     
     model_version = Column(String, nullable=True) # ej: v2.1
+
+class ComparisonStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+class ComparisonJob(Base):
+    """Trabajo de comparación forense encolado para los comparison workers."""
+    __tablename__ = "comparison_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(String, index=True, nullable=False)
+    generated_artifact_ref = Column(String, nullable=False)
+    final_artifact_ref = Column(String, nullable=False)
+    session_metadata = Column(JSON, nullable=True)
+
+    status = Column(Enum(ComparisonStatus), default=ComparisonStatus.QUEUED, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+
+    # Resultado
+    report_key = Column(String, nullable=True)
+    enqueued_examples = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, JSON, Enum, Integer, Float
+from sqlalchemy import Column, String, DateTime, JSON, Enum, Integer, Float, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 import enum
 from src.db.database import Base
@@ -25,4 +25,22 @@ class TrainingQueue(Base):
     processed_at = Column(DateTime, nullable=True)
     validation_score = Column(Float, nullable=True)
     validation_reasoning = Column(String, nullable=True)
-    job_id = Column(String, nullable=True) # ID del Job de K8s que lo tomó
+    job_id = Column(String, nullable=True, index=True) # ID del Job de K8s que lo tomó
+
+    __table_args__ = (
+        # Índice parcial: solo las filas PENDING, en orden de llegada por tenant.
+        # Sirve el MIN(created_at) de las stats y el checkout FIFO sin recorrer el histórico.
+        Index(
+            "ix_training_queue_pending_tenant_created",
+            "tenant_id", "created_at",
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'")
+        ),
+    )
+
+class TenantQueueCounter(Base):
+    """Conteo de ejemplos PENDING por tenant, mantenido en la misma transacción que la cola."""
+    __tablename__ = "training_queue_counters"
+
+    tenant_id = Column(String, primary_key=True)
+    pending_count = Column(Integer, nullable=False, default=0)
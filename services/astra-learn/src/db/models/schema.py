@@ -0,0 +1,10 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime
+from src.db.database import Base
+
+class SchemaMigration(Base):
+    """Pasos de arranque de una sola vez (backfills) ya aplicados sobre esta base."""
+    __tablename__ = "schema_migrations"
+
+    name = Column(String, primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,8 +1,10 @@
 import logging
 import json
+import math
+import random
 import torch
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datasets import load_dataset
 from .metrics import MetricsEngine
 
@@ -16,6 +18,57 @@ import boto3
 
 logger = logging.getLogger(__name__)
 
+ALPACA_PROMPT = """### Instruction:
+{}
+
+### Input:
+{}
+
+### Response:
+"""
+
+# Reglas del Quality Gate
+MIN_XML_VALID_RATIO = 0.95
+WER_REGRESSION_MARGIN = 1.05
+WER_ABSOLUTE_FLOOR = 0.1
+MIN_SEMANTIC_SIMILARITY = 0.7
+# Semilla de la muestra de validación (reproducible entre corridas)
+EVAL_SAMPLE_SEED = 42
+
+def resolve_device(preferred: Optional[str] = None) -> torch.device:
+    """Dispositivo de inferencia: el indicado, o CUDA > MPS > CPU según disponibilidad."""
+    if preferred:
+        return torch.device(preferred)
+    if torch.cuda.is_available():
+        return torch.device("cuda")
+    if getattr(torch.backends, "mps", None) is not None and torch.backends.mps.is_available():
+        return torch.device("mps")
+    return torch.device("cpu")
+
+def wilson_interval(successes: int, n: int, z: float = 1.96) -> Tuple[float, float]:
+    """Intervalo de confianza de Wilson para una proporción."""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+def ratio_interval(numerators: List[float], denominators: List[float], z: float = 1.96) -> Tuple[float, float]:
+    """
+    Intervalo de confianza (método delta) para un estimador de razón sum(x) / sum(y).
+    Con errores y palabras de referencia por muestra es el intervalo del WER de corpus.
+    """
+    n = len(numerators)
+    total = sum(denominators)
+    if n < 2 or total <= 0:
+        return 0.0, math.inf
+    ratio = sum(numerators) / total
+    residual_variance = sum((x - ratio * y) ** 2 for x, y in zip(numerators, denominators)) / (n - 1)
+    margin = z * math.sqrt(residual_variance / n) / (total / n)
+    return ratio - margin, ratio + margin
+
 class EvalResult:
     def __init__(self, status: str, metrics: Dict[str, float], reasons: List[str], report_path: str):
         self.status = status
@@ -36,33 +89,118 @@ class ModelEvaluator:
     Juez automático que decide si un modelo candidato es apto para producción.
     """
     
-    def __init__(self, base_model_id: str = "unsloth/llama-3-8b-Instruct-bnb-4bit", max_seq_length: int = 2048):
+    def __init__(
+        self,
+        base_model_id: str = "unsloth/llama-3-8b-Instruct-bnb-4bit",
+        max_seq_length: int = 2048,
+        device: Optional[str] = None,
+        batch_size: int = 8,
+        max_new_tokens: int = 512
+    ):
         self.metrics_engine = MetricsEngine()
         self.base_model_id = base_model_id
         self.max_seq_length = max_seq_length
+        self.device = resolve_device(device)
+        self.batch_size = batch_size
+        self.max_new_tokens = max_new_tokens
         self.s3_client = boto3.client("s3")
 
     def _load_model(self, adapter_path: str):
-        """Carga el modelo en modo inferencia 4-bit."""
-        if FastLanguageModel is None:
-            raise RuntimeError("Unsloth no está instalado. No se puede cargar el modelo para evaluación.")
-
-        logger.info(f"Cargando adaptador para evaluación: {adapter_path}")
-        model, tokenizer = FastLanguageModel.from_pretrained(
-            model_name=adapter_path, # Carga LoRA sobre el base model automáticamente
-            max_seq_length=self.max_seq_length,
-            dtype=None,
-            load_in_4bit=True,
-        )
-        FastLanguageModel.for_inference(model)
+        """
+        Carga el modelo en modo inferencia. En CUDA usa Unsloth 4-bit; en CPU/MPS (o sin
+        Unsloth) usa transformers, lo que permite evaluar con modelos pequeños locales.
+        """
+        logger.info(f"Cargando adaptador para evaluación: {adapter_path} ({self.device})")
+        if FastLanguageModel is not None and self.device.type == "cuda":
+            model, tokenizer = FastLanguageModel.from_pretrained(
+                model_name=adapter_path, # Carga LoRA sobre el base model automáticamente
+                max_seq_length=self.max_seq_length,
+                dtype=None,
+                load_in_4bit=True,
+            )
+            FastLanguageModel.for_inference(model)
+            return model, tokenizer
+
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(adapter_path)
+        if os.path.exists(os.path.join(adapter_path, "adapter_config.json")):
+            from peft import AutoPeftModelForCausalLM
+            model = AutoPeftModelForCausalLM.from_pretrained(adapter_path)
+        else:
+            model = AutoModelForCausalLM.from_pretrained(adapter_path)
+        model.to(self.device).eval()
         return model, tokenizer
 
+    def generate_batch(self, model, tokenizer, prompts: List[str]) -> List[str]:
+        """
+        Genera respuestas para varios prompts. Los prompts se ordenan por longitud y se
+        agrupan en lotes con left-padding (necesario en modelos decoder-only); `generate`
+        deja de avanzar cada secuencia al emitir EOS y corta el lote cuando todas terminan.
+        Retorna las respuestas en el orden original.
+        """
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+
+        responses: List[Optional[str]] = [None] * len(prompts)
+        order = sorted(range(len(prompts)), key=lambda i: len(prompts[i]))
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            inputs = tokenizer(
+                [prompts[i] for i in batch],
+                return_tensors="pt",
+                padding=True
+            ).to(self.device)
+
+            with torch.no_grad():
+                outputs = model.generate(
+                    **inputs,
+                    max_new_tokens=self.max_new_tokens,
+                    use_cache=True,
+                    pad_token_id=tokenizer.pad_token_id,
+                    eos_token_id=tokenizer.eos_token_id
+                )
+
+            # Decodificar solo la respuesta nueva (con left-padding todos los prompts terminan en la misma columna)
+            new_tokens = outputs[:, inputs["input_ids"].shape[1]:]
+            decoded = tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+            for i, text in zip(batch, decoded):
+                responses[i] = text.split("### Response:\n")[-1].strip()
+        return responses
+
+    def _is_decided(self, word_errors: List[float], reference_words: List[int],
+                    xml_flags: List[bool], baseline_wer: float) -> bool:
+        """
+        Parada adaptativa: los intervalos de confianza de WER y de validez XML ya quedan
+        completamente a un lado de sus umbrales (aprobación o rechazo claros).
+        El WER se estima igual que en el gate: errores totales / palabras de referencia.
+        """
+        xml_low, xml_high = wilson_interval(sum(xml_flags), len(xml_flags))
+        # Un rechazo claro por XML decide sin importar el WER
+        if xml_high < MIN_XML_VALID_RATIO:
+            return True
+
+        wer_limit = max(baseline_wer * WER_REGRESSION_MARGIN, WER_ABSOLUTE_FLOOR)
+        wer_low, wer_high = ratio_interval(word_errors, reference_words)
+        if wer_low > wer_limit:
+            return True
+        return xml_low >= MIN_XML_VALID_RATIO and wer_high <= wer_limit
+
     def evaluate(self, 
                  adapter_path: str, 
                  val_dataset_path: str, 
                  baseline_metrics: Dict[str, float],
                  tenant_id: str,
-                 job_id: str) -> EvalResult:
+                 job_id: str,
+                 max_samples: int = 50,
+                 adaptive: bool = False,
+                 min_samples: int = 16) -> EvalResult:
+        """
+        Args:
+            max_samples: Tope de filas evaluadas (muestra aleatoria con semilla fija).
+            adaptive: Evalúa por rondas y se detiene en cuanto los intervalos de confianza
+                de WER y validez XML superan los umbrales (mínimo `min_samples` filas).
+        """
         
         logger.info("🚀 Iniciando Evaluación de Calidad (The Judge)...")
 
@@ -73,53 +211,52 @@ class ModelEvaluator:
             logger.error(f"Fallo cargando dataset de validación: {e}")
             return self._reject_fast("DATASET_ERROR", str(e))
 
-        # Sampling si es muy grande (> 50 muestras para no demorar el worker)
-        if len(dataset) > 50:
-            dataset = dataset.shuffle(seed=42).select(range(50))
+        # Muestra aleatoria acotada (para no demorar el worker). En modo adaptativo se baraja
+        # siempre: el archivo viene agrupado por documento y las rondas deciden sobre un prefijo
+        if adaptive or len(dataset) > max_samples:
+            indices = list(range(len(dataset)))
+            random.Random(EVAL_SAMPLE_SEED).shuffle(indices)
+            rows = [dataset[i] for i in indices[:max_samples]]
+        else:
+            rows = list(dataset)
 
         # 2. Inferencia
         model, tokenizer = self._load_model(adapter_path)
         
+        sources = []
         references = []
         predictions = []
-        xml_valid_count = 0
-        
-        alpaca_prompt = """### Instruction:
-{}
+        xml_flags = []
+        baseline_wer = baseline_metrics.get("wer", 1.0)
 
-### Input:
-{}
+        # Sin modo adaptativo toda la muestra es una sola ronda; con él, rondas de varios lotes
+        # (filas ya barajadas; dentro de cada ronda se ordenan por longitud)
+        round_size = max(min_samples, self.batch_size * 2) if adaptive else max(len(rows), 1)
+        for start in range(0, len(rows), round_size):
+            round_rows = rows[start:start + round_size]
+            prompts = [ALPACA_PROMPT.format(row["instruction"], row["input"]) for row in round_rows]
+            responses = self.generate_batch(model, tokenizer, prompts)
 
-### Response:
-"""
-        
-        for row in dataset:
-            prompt = alpaca_prompt.format(row["instruction"], row["input"], "")
-            inputs = tokenizer([prompt], return_tensors="pt").to("cuda")
+            for row, response in zip(round_rows, responses):
+                if response is None:
+                    continue
+                predictions.append(response)
+                references.append(row["output"])
+                sources.append(row["input"])
+                xml_flags.append(bool(self.metrics_engine.validate_xml_structure(response)))
 
-            with torch.no_grad():
-                outputs = model.generate(
-                    **inputs, 
-                    max_new_tokens=512, 
-                    use_cache=True,
-                    pad_token_id=tokenizer.eos_token_id
-                )
-            
-            # Decodificar solo la respuesta nueva
-            # Unsloth/Transformers devuelve todo el prompt + respuesta
-            decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)[0]
-            response = decoded.split("### Response:\n")[-1].strip()
-            
-            predictions.append(response)
-            references.append(row["output"])
-            
-            if self.metrics_engine.validate_xml_structure(response):
-                xml_valid_count += 1
+            if adaptive and len(predictions) >= min_samples and len(predictions) < len(rows):
+                sample_wers = self.metrics_engine.calculate_wer_per_sample(references, predictions)
+                reference_words = [max(len(r.split()), 1) for r in references]
+                word_errors = [w * n for w, n in zip(sample_wers, reference_words)]
+                if self._is_decided(word_errors, reference_words, xml_flags, baseline_wer):
+                    logger.info(f"Evaluación adaptativa decidida con {len(predictions)}/{len(rows)} muestras")
+                    break
 
         # 3. Cálculo de Métricas
         avg_wer = self.metrics_engine.calculate_wer(references, predictions)
         avg_sim = self.metrics_engine.calculate_semantic_similarity(references, predictions)
-        xml_valid_ratio = xml_valid_count / len(dataset)
+        xml_valid_ratio = sum(xml_flags) / len(xml_flags) if xml_flags else 0.0
         
         current_metrics = {
             "wer": avg_wer,
@@ -132,16 +269,15 @@ class ModelEvaluator:
         reasons = []
 
         # Regla A: XML debe ser sólido (tolerancia mínima 95% para casos edge, ideal 100%)
-        if xml_valid_ratio < 0.95:
+        if xml_valid_ratio < MIN_XML_VALID_RATIO:
             reasons.append(f"Fallo estructural crítico: XML válido solo {xml_valid_ratio:.2%}")
 
         # Regla B: No regresión severa en WER (permitir 5% de margen si mejora semántica)
-        baseline_wer = baseline_metrics.get("wer", 1.0)
-        if avg_wer > (baseline_wer * 1.05) and avg_wer > 0.1:
+        if avg_wer > (baseline_wer * WER_REGRESSION_MARGIN) and avg_wer > WER_ABSOLUTE_FLOOR:
             reasons.append(f"Regresión WER detectada: {avg_wer:.4f} > {baseline_wer:.4f}")
 
         # Regla C: Similitud mínima
-        if avg_sim < 0.7:
+        if avg_sim < MIN_SEMANTIC_SIMILARITY:
             reasons.append(f"Alucinación semántica: Similitud muy baja ({avg_sim:.2f})")
 
         if not reasons:
@@ -156,10 +292,11 @@ class ModelEvaluator:
             "metrics": current_metrics,
             "baseline": baseline_metrics,
             "reasons": reasons,
-            "sample_size": len(dataset),
+            "sample_size": len(predictions),
+            "adaptive": adaptive,
             "samples": [
-                {"input": dataset[0]["input"][:100], "pred": predictions[0][:100], "ref": references[0][:100]}
-            ] if len(dataset) > 0 else []
+                {"input": sources[0][:100], "pred": predictions[0][:100], "ref": references[0][:100]}
+            ] if predictions else []
         }
 
         # Subir a S3 (Bucket de modelos definido en config o pasado por params)
@@ -180,4 +317,4 @@ class ModelEvaluator:
         return EvalResult(status, current_metrics, reasons, f"s3://{bucket_name}/{report_key}")
 
     def _reject_fast(self, reason_code, details):
-        return EvalResult("REJECTED", {}, [f"{reason_code}: {details}"], "")
\ No newline at end of file
+        return EvalResult("REJECTED", {}, [f"{reason_code}: {details}"], "")
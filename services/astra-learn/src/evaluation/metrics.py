@@ -46,6 +46,22 @@ class MetricsEngine:
             logger.error(f"Error calculando WER: {e}")
             return 1.0
 
+    def calculate_wer_per_sample(self, references: List[str], hypotheses: List[str]) -> List[float]:
+        """WER de cada par (referencia, predicción), para intervalos de confianza."""
+        if wer is None:
+            return [0.0] * len(references)
+
+        scores = []
+        for reference, hypothesis in zip(references, hypotheses):
+            if not reference.strip():
+                scores.append(0.0 if not hypothesis.strip() else 1.0)
+                continue
+            try:
+                scores.append(float(wer(reference, hypothesis)))
+            except Exception:
+                scores.append(1.0)
+        return scores
+
     def calculate_semantic_similarity(self, references: List[str], hypotheses: List[str]) -> float:
         """Calcula similitud coseno promedio entre referencias y predicciones."""
         if not references or not hypotheses:
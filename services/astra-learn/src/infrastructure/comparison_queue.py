@@ -0,0 +1,91 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import or_, and_, update
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.db.models.job import ComparisonJob, ComparisonStatus
+
+logger = logging.getLogger(__name__)
+
+class ComparisonQueue:
+    """
+    Cola durable de trabajos de comparación sobre Postgres.
+    Los workers reclaman trabajos con 'SELECT FOR UPDATE SKIP LOCKED'; un trabajo RUNNING
+    cuyo lease expiró (worker caído) vuelve a ser reclamable hasta `max_attempts`.
+    """
+
+    def __init__(self, db: Session, max_attempts: int = None, lease_seconds: int = None):
+        self.db = db
+        self.max_attempts = max_attempts or settings.COMPARISON_MAX_ATTEMPTS
+        self.lease_seconds = lease_seconds or settings.COMPARISON_LEASE_SECONDS
+
+    def submit(self, tenant_id: str, generated_ref: str, final_ref: str, session_metadata: dict = None) -> ComparisonJob:
+        job = ComparisonJob(
+            tenant_id=tenant_id,
+            generated_artifact_ref=generated_ref,
+            final_artifact_ref=final_ref,
+            session_metadata=session_metadata or {}
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get(self, job_id) -> Optional[ComparisonJob]:
+        return self.db.get(ComparisonJob, job_id)
+
+    def claim(self, worker_id: str) -> Optional[ComparisonJob]:
+        """Reclama el trabajo más antiguo disponible y lo marca RUNNING."""
+        now = datetime.utcnow()
+        lease_expired = now - timedelta(seconds=self.lease_seconds)
+
+        job = self.db.query(ComparisonJob).filter(
+            or_(
+                ComparisonJob.status == ComparisonStatus.QUEUED,
+                and_(
+                    ComparisonJob.status == ComparisonStatus.RUNNING,
+                    ComparisonJob.started_at < lease_expired
+                )
+            ),
+            ComparisonJob.attempts < self.max_attempts
+        ).order_by(ComparisonJob.created_at).limit(1).with_for_update(skip_locked=True).first()
+
+        if job is None:
+            self.db.rollback()
+            return None
+
+        if job.status == ComparisonStatus.RUNNING:
+            logger.warning(f"Recuperando job de comparación huérfano {job.id} (worker {job.worker_id})")
+
+        job.status = ComparisonStatus.RUNNING
+        job.attempts += 1
+        job.worker_id = worker_id
+        job.started_at = now
+        self.db.commit()
+        return job
+
+    def complete(self, job: ComparisonJob, report_key: str, enqueued_examples: int) -> None:
+        job.status = ComparisonStatus.COMPLETED
+        job.report_key = report_key
+        job.enqueued_examples = enqueued_examples
+        job.error = None
+        job.finished_at = datetime.utcnow()
+        self.db.commit()
+
+    def fail(self, job_id, error: str) -> None:
+        """Devuelve el trabajo a la cola o lo marca FAILED si agotó sus intentos."""
+        self.db.rollback()
+        job = self.db.get(ComparisonJob, job_id)
+        if job is None:
+            return
+        exhausted = job.attempts >= self.max_attempts
+        self.db.execute(
+            update(ComparisonJob).where(ComparisonJob.id == job_id).values(
+                status=ComparisonStatus.FAILED if exhausted else ComparisonStatus.QUEUED,
+                error=error[:2000],
+                finished_at=datetime.utcnow() if exhausted else None
+            )
+        )
+        self.db.commit()
@@ -1,10 +1,12 @@
 import logging
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterator
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func, update
+from sqlalchemy import func, update, insert, select, delete
+from sqlalchemy.dialects import postgresql, sqlite
 
-from src.db.models.queue import TrainingQueue, QueueStatus
+from src.config import settings
+from src.db.models.queue import TrainingQueue, QueueStatus, TenantQueueCounter
 
 logger = logging.getLogger(__name__)
 
@@ -12,58 +14,157 @@ class QueueManager:
     def __init__(self, db: Session):
         self.db = db
 
+    def _adjust_pending(self, tenant_id: str, delta: int) -> int:
+        """
+        Suma `delta` al contador PENDING del tenant (UPSERT) dentro de la transacción
+        en curso y retorna el valor resultante. No hace commit.
+        """
+        dialect = self.db.get_bind().dialect.name
+        upsert = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(TenantQueueCounter)
+        stmt = upsert.values(tenant_id=tenant_id, pending_count=max(delta, 0)).on_conflict_do_update(
+            index_elements=[TenantQueueCounter.tenant_id],
+            set_={"pending_count": TenantQueueCounter.pending_count + delta}
+        ).returning(TenantQueueCounter.pending_count)
+        return self.db.execute(stmt).scalar_one()
+
     def enqueue_example(self, tenant_id: str, data: Dict) -> int:
         """Inserta un ejemplo y retorna el conteo actual pendiente."""
-        item = TrainingQueue(tenant_id=tenant_id, data_json=data)
-        self.db.add(item)
+        return self.enqueue_examples(tenant_id, [data])
+
+    def enqueue_examples(self, tenant_id: str, rows: List[Dict], commit: bool = True) -> int:
+        """
+        Inserta todos los ejemplos de un trabajo con un único INSERT multi-fila y
+        retorna el conteo pendiente, leído del contador actualizado en la misma transacción.
+        Con `commit=False` el llamador confirma la transacción (p. ej. junto al cierre del trabajo).
+        """
+        if not rows:
+            return 0
+
+        now = datetime.utcnow()
+        self.db.execute(insert(TrainingQueue), [
+            {"tenant_id": tenant_id, "data_json": data, "status": QueueStatus.PENDING, "created_at": now}
+            for data in rows
+        ])
+        pending = self._adjust_pending(tenant_id, len(rows))
+        if commit:
+            self.db.commit()
+        return pending
+
+    def insert_validated_rows(self, rows: List[Dict]) -> None:
+        """
+        Inserta filas ya clasificadas (cualquier estado, varios tenants) con un único INSERT
+        multi-fila y suma las PENDING a los contadores de su tenant en la misma transacción.
+        """
+        if not rows:
+            return
+
+        self.db.execute(insert(TrainingQueue), rows)
+        pending_by_tenant: Dict[str, int] = {}
+        for row in rows:
+            if row.get("status", QueueStatus.PENDING) == QueueStatus.PENDING:
+                pending_by_tenant[row["tenant_id"]] = pending_by_tenant.get(row["tenant_id"], 0) + 1
+        for tenant_id, count in pending_by_tenant.items():
+            self._adjust_pending(tenant_id, count)
         self.db.commit()
-        
-        # Retornar conteo rápido para logging
-        return self.db.query(func.count(TrainingQueue.id)).filter(
-            TrainingQueue.tenant_id == tenant_id,
-            TrainingQueue.status == QueueStatus.PENDING
+
+    def get_pending_count(self, tenant_id: str) -> int:
+        """Conteo PENDING del tenant, leído del contador (una fila por PK, sin escanear la cola)."""
+        count = self.db.execute(
+            select(TenantQueueCounter.pending_count).where(TenantQueueCounter.tenant_id == tenant_id)
         ).scalar()
+        return max(count or 0, 0)
 
     def get_pending_stats(self, tenant_id: str) -> Tuple[int, Optional[datetime]]:
         """Retorna (cantidad_pendiente, fecha_mas_antigua)."""
-        count = self.db.query(func.count(TrainingQueue.id)).filter(
-            TrainingQueue.tenant_id == tenant_id,
-            TrainingQueue.status == QueueStatus.PENDING
-        ).scalar()
-
+        count = self.get_pending_count(tenant_id)
         if count == 0:
             return 0, None
 
-        oldest = self.db.query(func.min(TrainingQueue.created_at)).filter(
-            TrainingQueue.tenant_id == tenant_id,
-            TrainingQueue.status == QueueStatus.PENDING
+        # Primera entrada del índice parcial (tenant_id, created_at) WHERE status = 'PENDING'
+        oldest = self.db.execute(
+            select(TrainingQueue.created_at).where(
+                TrainingQueue.tenant_id == tenant_id,
+                TrainingQueue.status == QueueStatus.PENDING
+            ).order_by(TrainingQueue.created_at).limit(1)
         ).scalar()
 
         return count, oldest
 
+    def rebuild_pending_counters(self) -> Dict[str, int]:
+        """
+        Recalcula los contadores desde la cola (reparación manual; el backfill inicial lo hace
+        src.db.bootstrap al arrancar). Hace un escaneo completo: no usar en el camino caliente.
+        """
+        counts = self.recount_pending()
+        self.db.commit()
+        return counts
+
+    def recount_pending(self) -> Dict[str, int]:
+        """Reemplaza los contadores por el conteo real de la cola. No hace commit."""
+        counts = dict(self.db.execute(
+            select(TrainingQueue.tenant_id, func.count(TrainingQueue.id))
+            .where(TrainingQueue.status == QueueStatus.PENDING)
+            .group_by(TrainingQueue.tenant_id)
+        ).all())
+
+        self.db.execute(delete(TenantQueueCounter))
+        if counts:
+            self.db.execute(insert(TenantQueueCounter), [
+                {"tenant_id": tenant_id, "pending_count": count} for tenant_id, count in counts.items()
+            ])
+        return counts
+
     def checkout_batch(self, tenant_id: str, job_id: str, limit: int = 1000) -> List[Dict]:
         """
         Marca N registros como PROCESSING atómicamente y los retorna.
         Usa 'SELECT FOR UPDATE SKIP LOCKED' para concurrencia segura.
         """
-        # 1. Seleccionar IDs
-        subquery = self.db.query(TrainingQueue.id).filter(
-            TrainingQueue.tenant_id == tenant_id,
-            TrainingQueue.status == QueueStatus.PENDING
-        ).limit(limit).with_for_update(skip_locked=True)
-
-        # 2. Actualizar estado
-        stmt = update(TrainingQueue).where(
-            TrainingQueue.id.in_(subquery)
-        ).values(
-            status=QueueStatus.PROCESSING,
-            job_id=job_id,
-            processed_at=datetime.utcnow()
-        ).returning(TrainingQueue.data_json)
-
-        result = self.db.execute(stmt)
+        claimed = self.claim_batch(tenant_id, job_id, limit)
+        rows = list(self.iter_batch(job_id)) if claimed else []
         self.db.commit()
         
-        rows = [row[0] for row in result.fetchall()]
         logger.info(f"Checkout de {len(rows)} ejemplos para Tenant {tenant_id} (Job: {job_id})")
         return rows
+
+    def claim_batch(self, tenant_id: str, job_id: str, limit: int = 1000) -> int:
+        """
+        Marca hasta `limit` registros PENDING (los más antiguos) como PROCESSING para `job_id`
+        y descuenta el contador. Retorna cuántos se tomaron. No hace commit.
+        """
+        # 1. Seleccionar IDs (recorre el índice parcial en orden de llegada)
+        subquery = self.db.query(TrainingQueue.id).filter(
+            TrainingQueue.tenant_id == tenant_id,
+            TrainingQueue.status == QueueStatus.PENDING
+        ).order_by(TrainingQueue.created_at).limit(limit).with_for_update(skip_locked=True)
+
+        # 2. Actualizar estado, sin RETURNING: el payload se lee después en streaming
+        result = self.db.execute(
+            update(TrainingQueue).where(
+                TrainingQueue.id.in_(subquery.scalar_subquery())
+            ).values(
+                status=QueueStatus.PROCESSING,
+                job_id=job_id,
+                processed_at=datetime.utcnow()
+            ).execution_options(synchronize_session=False)
+        )
+
+        claimed = result.rowcount or 0
+        if claimed:
+            self._adjust_pending(tenant_id, -claimed)
+        return claimed
+
+    def iter_batch(self, job_id: str, chunk_size: int = None) -> Iterator[Dict]:
+        """
+        Itera los `data_json` de un lote con un cursor de servidor (stream_results), de a
+        `chunk_size` filas, sin materializar el resultado completo en el driver.
+        """
+        chunk_size = chunk_size or settings.QUEUE_STREAM_CHUNK_SIZE
+        result = self.db.execute(
+            select(TrainingQueue.data_json)
+            .where(TrainingQueue.job_id == job_id)
+            .order_by(TrainingQueue.created_at)
+            .execution_options(stream_results=True, yield_per=chunk_size)
+        )
+        for partition in result.partitions(chunk_size):
+            for row in partition:
+                yield row[0]
@@ -1,45 +1,111 @@
 import boto3
+import gzip
+import io
+import itertools
 import json
 import logging
-import io
+from boto3.s3.transfer import TransferConfig
 from datetime import datetime
-from typing import List, Dict
+from typing import Dict, Iterable
 
 logger = logging.getLogger(__name__)
 
+class _BufferSink:
+    """Destino de escritura del GzipFile: acumula bytes comprimidos en un bytearray compartido."""
+    def __init__(self, buffer: bytearray):
+        self.buffer = buffer
+
+    def write(self, data) -> int:
+        self.buffer.extend(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+class GzipJsonlStream(io.RawIOBase):
+    """
+    Stream de lectura (no seekable) que serializa filas a JSONL y las comprime con gzip a
+    medida que se consume. La memoria queda acotada por el tamaño de lectura del consumidor
+    (una parte del multipart upload), no por el tamaño del lote.
+    """
+    ROWS_PER_FILL = 512
+
+    def __init__(self, rows: Iterable[Dict], compresslevel: int = 6):
+        self._rows = iter(rows)
+        self._buffer = bytearray()
+        self._gzip = gzip.GzipFile(fileobj=_BufferSink(self._buffer), mode="wb", compresslevel=compresslevel, mtime=0)
+        self._exhausted = False
+        self.rows_written = 0
+        self.bytes_in = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while len(self._buffer) < len(b) and not self._exhausted:
+            self._fill()
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        del self._buffer[:n]
+        return n
+
+    def _fill(self) -> None:
+        written = 0
+        for row in itertools.islice(self._rows, self.ROWS_PER_FILL):
+            line = (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+            self._gzip.write(line)
+            self.bytes_in += len(line)
+            written += 1
+        self.rows_written += written
+        if written == 0:
+            self._gzip.close()
+            self._exhausted = True
+
 class S3DatasetGateway:
-    def __init__(self, bucket_name: str = "astra-models"):
-        self.s3 = boto3.client('s3') # Credenciales por ENV
+    # Partes de 8MB: memoria por upload ~ MULTIPART_CHUNK_SIZE * MAX_CONCURRENCY
+    MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+    MAX_CONCURRENCY = 4
+
+    def __init__(self, bucket_name: str = "astra-models", s3_client=None):
+        self.s3 = s3_client or boto3.client('s3') # Credenciales por ENV
         self.bucket = bucket_name
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=self.MULTIPART_CHUNK_SIZE,
+            max_concurrency=self.MAX_CONCURRENCY
+        )
 
-    def upload_batch(self, tenant_id: str, rows: List[Dict]) -> str:
+    def upload_batch(self, tenant_id: str, rows: Iterable[Dict]) -> str:
         """
-        Sube un lote de ejemplos de entrenamiento a S3 en formato JSONL.
+        Sube un lote de ejemplos de entrenamiento a S3 en formato JSONL comprimido (gzip).
+        `rows` puede ser un iterador (p.ej. el cursor de QueueManager.iter_batch): se
+        consume en streaming hacia un multipart upload, con memoria constante.
         """
-        if not rows:
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
             return ""
 
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         date_folder = datetime.utcnow().strftime("%Y-%m-%d")
-        
-        file_key = f"learning_data/datasets/{tenant_id}/{date_folder}/batch_{timestamp}.jsonl"
-        
-        # Convertir a JSONL en memoria
-        buffer = io.BytesIO()
-        for row in rows:
-            line = json.dumps(row, ensure_ascii=False) + "\n"
-            buffer.write(line.encode('utf-8'))
-        
-        buffer.seek(0)
+
+        file_key = f"learning_data/datasets/{tenant_id}/{date_folder}/batch_{timestamp}.jsonl.gz"
+
+        stream = GzipJsonlStream(itertools.chain([first], rows))
 
         try:
             self.s3.upload_fileobj(
-                buffer, 
-                self.bucket, 
+                stream,
+                self.bucket,
                 file_key,
-                ExtraArgs={'ServerSideEncryption': 'AES256'}
+                ExtraArgs={
+                    'ServerSideEncryption': 'AES256',
+                    # Sin Content-Encoding: los clientes HTTP lo descomprimirían al vuelo
+                    'ContentType': 'application/gzip'
+                },
+                Config=self.transfer_config
             )
-            logger.info(f"Dataset batch subido: {file_key} ({len(rows)} items)")
+            logger.info(f"Dataset batch subido: {file_key} ({stream.rows_written} items, {stream.bytes_in} bytes sin comprimir)")
             return f"s3://{self.bucket}/{file_key}"
         except Exception as e:
             logger.error(f"Error subiendo dataset a S3: {e}")
@@ -17,8 +17,11 @@ app = FastAPI(
 
 # Inicializar Base de Datos (Para desarrollo/demo)
 from src.db.database import engine, Base
-from src.db.models import queue, job, session # Asegurar que modelos están cargados
+from src.db.models import queue, job, session, schema # Asegurar que modelos están cargados
+from src.db.bootstrap import run_startup_migrations
 Base.metadata.create_all(bind=engine)
+# Índices y backfills que create_all no aplica sobre tablas existentes
+run_startup_migrations(engine)
 
 # Registrar Rutas
 app.include_router(compare.router)
@@ -1,5 +1,7 @@
 import logging
 import os
+import shutil
+import tempfile
 import boto3
 from datasets import load_dataset, Dataset
 from transformers import PreTrainedTokenizer
@@ -11,14 +13,22 @@ class DataLoader:
     """
     Gestiona la ingesta de datasets JSONL desde S3 y su preparación para SFT (Supervised Fine-Tuning).
     """
-    def __init__(self, tokenizer: PreTrainedTokenizer):
+    def __init__(self, tokenizer: PreTrainedTokenizer, s3_client=None):
         self.tokenizer = tokenizer
-        self.s3 = boto3.client('s3')
+        self.s3 = s3_client or boto3.client('s3')
 
-    def load_from_s3(self, s3_uri: str, local_path: str = "/tmp/dataset.jsonl") -> Dataset:
-        """Descarga y carga el dataset en formato HuggingFace."""
+    def load_from_s3(self, s3_uri: str, local_dir: str = None) -> Dataset:
+        """
+        Descarga y carga el dataset en formato HuggingFace.
+        Cada llamada descarga a un directorio temporal propio (jobs concurrentes no se pisan)
+        que se borra al terminar: el Dataset queda en el caché Arrow de `datasets`.
+        Acepta JSONL plano o comprimido (.jsonl.gz).
+        """
+        bucket, key = s3_uri.replace("s3://", "").split("/", 1)
+        work_dir = tempfile.mkdtemp(prefix="astra-dataset-", dir=local_dir)
+        # Conservar el nombre (y la extensión .gz) para que `datasets` detecte la compresión
+        local_path = os.path.join(work_dir, os.path.basename(key))
         try:
-            bucket, key = s3_uri.replace("s3://", "").split("/", 1)
             logger.info(f"Descargando dataset desde {s3_uri}...")
             
             self.s3.download_file(bucket, key, local_path)
@@ -29,6 +39,8 @@ class DataLoader:
         except Exception as e:
             logger.error(f"Error cargando dataset desde S3: {e}")
             raise
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
 
     def format_prompt(self, example):
         """
@@ -92,14 +92,18 @@ class JobScheduler:
             
             # 4. Checkout y Preparación de Datos
             job_id_internal = f"train-{tenant_id}-{uuid.uuid4().hex[:8]}"
-            batch_data = self.queue.checkout_batch(tenant_id, job_id_internal, limit=self.BATCH_THRESHOLD)
+            claimed = self.queue.claim_batch(tenant_id, job_id_internal, limit=self.BATCH_THRESHOLD)
             
-            if not batch_data:
+            if not claimed:
+                self.db.rollback()
                 lock.release()
                 return 
 
-            # Subir dataset a S3
-            dataset_s3_uri = self.s3_gateway.upload_batch(tenant_id, batch_data)
+            # Subir dataset a S3 directo desde el cursor; el checkout se confirma solo si
+            # el upload termina, si falla las filas vuelven a PENDING con el rollback
+            dataset_s3_uri = self.s3_gateway.upload_batch(tenant_id, self.queue.iter_batch(job_id_internal))
+            self.db.commit()
+            logger.info(f"Checkout de {claimed} ejemplos para Tenant {tenant_id} (Job: {job_id_internal})")
             
             # 5. Despacho según Backend
             backend = settings.TRAINING_BACKEND.upper()
@@ -115,6 +119,7 @@ class JobScheduler:
 
         except Exception as e:
             logger.error(f"Fallo crítico en scheduler para {tenant_id}: {e}")
+            self.db.rollback()
             try:
                 lock.release()
             except:
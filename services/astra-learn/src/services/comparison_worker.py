@@ -0,0 +1,145 @@
+"""
+Pool de workers de comparación forense.
+
+Cada proceso carga una sola vez los modelos (BERTScore/embeddings, Presidio, spaCy) y
+los clientes (S3, Redis, K8s/RunPod) y consume trabajos de la cola durable
+`comparison_jobs`. La API solo encola; ningún trabajo pesado corre en el worker web.
+
+Uso:
+    python -m src.services.comparison_worker [--workers 2]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from typing import Dict, Any
+
+import boto3
+import redis
+
+from src.config import settings
+from src.core.comparator.alignment import ComparatorEngine
+from src.core.comparator.entity_extractor import HotfixDetector
+from src.core.data.formatter import DatasetBuilder
+from src.db.database import SessionLocal
+from src.db.models.job import ComparisonJob
+from src.infrastructure.clients.config_client import TenantConfigClient
+from src.infrastructure.comparison_queue import ComparisonQueue
+from src.infrastructure.queue_manager import QueueManager
+from src.infrastructure.redis_notifier import EventPublisher
+from src.orchestration.job_scheduler import JobScheduler
+
+logger = logging.getLogger(__name__)
+
+class ComparisonWorker:
+    def __init__(self, db=None, s3_client=None, redis_client=None, worker_id: str = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.db = db or SessionLocal()
+        self.s3 = s3_client or boto3.client('s3')
+        self.redis = redis_client or redis.from_url(settings.REDIS_URL)
+
+        # Modelos y clientes: una sola carga por proceso
+        self.engine = ComparatorEngine(self.s3)
+        self.dataset_builder = DatasetBuilder()
+        self.hotfix_detector = HotfixDetector()
+        self.config_client = TenantConfigClient()
+        self.publisher = EventPublisher(settings.REDIS_URL)
+
+        self.jobs = ComparisonQueue(self.db)
+        self.queue_manager = QueueManager(self.db)
+        self.scheduler = JobScheduler(self.db, self.redis)
+
+    def run_once(self) -> bool:
+        """Procesa un trabajo si hay alguno disponible. Retorna False si la cola está vacía."""
+        job = self.jobs.claim(self.worker_id)
+        if job is None:
+            return False
+
+        job_id = job.id
+        try:
+            self.process(job)
+        except Exception as e:
+            logger.error(f"Fallo crítico en job de comparación {job_id}: {e}")
+            self.jobs.fail(job_id, str(e))
+        return True
+
+    def run_forever(self, poll_seconds: float = None) -> None:
+        poll_seconds = poll_seconds or settings.COMPARISON_POLL_SECONDS
+        logger.info(f"Comparison worker {self.worker_id} listo")
+        while True:
+            if not self.run_once():
+                time.sleep(poll_seconds)
+
+    def process(self, job: ComparisonJob) -> Dict[str, Any]:
+        """Orquesta comparación, generación de datos y hotfixes para un trabajo."""
+        # 1. Comparar documentos para obtener deltas
+        report = self.engine.compare_documents(
+            job.generated_artifact_ref,
+            job.final_artifact_ref,
+            job.tenant_id
+        )
+
+        # 2. Construir Dataset de Entrenamiento (sanitización en lote)
+        rows = self.dataset_builder.build_training_rows(report.get("deltas", []))
+
+        # 3. Detección de Hotfixes (Aprender nombres en tiempo real)
+        new_fixes = self.hotfix_detector.detect_hotfixes(report)
+        if new_fixes:
+            asyncio.run(self._propagate_hotfixes(job.tenant_id, new_fixes))
+
+        # 4. Persistir el reporte crudo también (para auditoría/stats)
+        report_key = f"learning_data/reports/{job.tenant_id}/{report['job_id']}.json"
+        self.s3.put_object(
+            Bucket=settings.S3_BUCKET_NAME,
+            Key=report_key,
+            Body=json.dumps(report, indent=2),
+            ContentType="application/json"
+        )
+
+        # 5. Ejemplos (un solo INSERT) y cierre del trabajo en la misma transacción, después de
+        # los efectos externos: si algo falla antes, el reintento no duplica filas en la cola
+        pending = self.queue_manager.enqueue_examples(job.tenant_id, rows, commit=False)
+        self.jobs.complete(job, report_key, len(rows))
+
+        # 6. Evaluar si se debe disparar un entrenamiento automático
+        if rows:
+            logger.info(f"Encolados {len(rows)} ejemplos para Tenant {job.tenant_id} ({pending} pendientes)")
+            self.scheduler.evaluate_trigger(job.tenant_id)
+        else:
+            logger.info(f"No se generaron datos de entrenamiento útiles para el trabajo {report.get('job_id')}")
+
+        return report
+
+    async def _propagate_hotfixes(self, tenant_id: str, new_fixes: Dict[str, str]) -> None:
+        # A. Persistir en Config Service
+        success = await self.config_client.update_dictionary(tenant_id, new_fixes)
+        if success:
+            # B. Notificar a CORE en tiempo real vía Redis
+            await self.publisher.publish_hotfix(tenant_id, new_fixes)
+
+def _worker_main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    ComparisonWorker().run_forever()
+
+def run_pool(workers: int) -> None:
+    """Lanza `workers` procesos independientes, cada uno con sus propios modelos."""
+    processes = []
+    for _ in range(workers):
+        process = multiprocessing.Process(target=_worker_main)
+        process.start()
+        processes.append(process)
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=settings.COMPARISON_WORKERS)
+    args = parser.parse_args()
+    if args.workers <= 1:
+        _worker_main()
+    else:
+        run_pool(args.workers)
@@ -15,7 +15,7 @@ class DashboardService:
         Resumen 'Head-up Display' para el admin.
         Muestra cuánto falta para el próximo entrenamiento y el estado del último.
         """
-        pending_count, oldest_date = self.queue_mgr.get_pending_stats(tenant_id)
+        pending_count = self.queue_mgr.get_pending_count(tenant_id)
         last_job = self.job_repo.get_last_job(tenant_id)
         
         # Calcular progreso hacia el umbral
@@ -0,0 +1,119 @@
+"""
+Benchmark de alineación de ComparatorEngine sobre actas sintéticas.
+
+Documentos de 50/200/800 segmentos donde se perdió el 0%, 50% o 100% de los chunk_id
+(el humano además reescribe levemente cada párrafo sin ID).
+
+  - legacy: bucle por segmento final sobre todos los generados no usados,
+    con una llamada a calculate_semantic_similarity por par (comportamiento previo).
+  - batched: align_segments (matriz de similitud en lote + asignación monótona +
+    métricas por lote de los pares emparejados).
+
+El modo legacy es cuadrático en llamadas al modelo; por encima de --legacy-max-segments
+solo se informa el número de llamadas que haría.
+
+Uso:
+    python -m tests.benchmark.bench_alignment [--sizes 50 200 800] [--loss 0 0.5 1] [--legacy-max-segments 200]
+"""
+import argparse
+import json
+import random
+import time
+from unittest.mock import MagicMock
+
+from src.core.comparator.alignment import ComparatorEngine
+from src.core.comparator.metadata import TextSegment
+from src.core.comparator.metrics import MetricsEngine
+
+SUBJECTS = ["El concejal", "La secretaria", "El presidente de la corporación", "La comisión primera", "El alcalde"]
+VERBS = ["presentó", "aprobó", "rechazó", "aplazó", "sometió a votación"]
+OBJECTS = ["el proyecto de acuerdo", "la modificación presupuestal", "el informe de gestión", "la proposición", "el orden del día"]
+
+
+def build_documents(n_segments: int, loss: float, seed: int = 7):
+    rng = random.Random(seed)
+    generated, final = [], []
+    for i in range(n_segments):
+        text = (
+            f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} número {i} "
+            f"en la sesión ordinaria del día {rng.randint(1, 28)} con {rng.randint(5, 19)} votos."
+        )
+        chunk_id = f"chunk-{i:05d}"
+        generated.append(TextSegment(chunk_id=chunk_id, text=text, order_index=i, styles={}))
+
+        lost = rng.random() < loss
+        final_text = text.replace(" con ", " contando con ") if lost else text
+        final.append(TextSegment(chunk_id=None if lost else chunk_id, text=final_text, order_index=i, styles={}))
+    return generated, final
+
+
+def legacy_align(metrics: MetricsEngine, generated, final) -> dict:
+    gen_map = {s.chunk_id: s for s in generated if s.chunk_id}
+    used, calls, matched = set(), 0, 0
+    for fin_seg in final:
+        if fin_seg.chunk_id and fin_seg.chunk_id in gen_map:
+            original = gen_map[fin_seg.chunk_id]
+            used.add(fin_seg.chunk_id)
+        else:
+            original, max_sim = None, 0.0
+            for g_id, g_seg in gen_map.items():
+                if g_id in used:
+                    continue
+                sim = metrics.calculate_semantic_similarity(g_seg.text, fin_seg.text)
+                calls += 1
+                if sim > 0.85 and sim > max_sim:
+                    max_sim, original = sim, g_seg
+            if original:
+                used.add(original.chunk_id)
+        if original:
+            metrics.calculate_wer(original.text, fin_seg.text)
+            metrics.calculate_semantic_similarity(original.text, fin_seg.text)
+            calls += 1
+            matched += 1
+    return {"matched": matched, "similarity_calls": calls}
+
+
+def legacy_call_count(n_segments: int, loss: float) -> int:
+    # Cada segmento sin ID compara contra todos los generados aún libres (cota superior)
+    lost = int(n_segments * loss)
+    return n_segments + sum(n_segments - k for k in range(lost))
+
+
+def run(sizes, losses, legacy_max_segments: int) -> list:
+    metrics = MetricsEngine()
+    engine = ComparatorEngine(s3_client=MagicMock())
+    results = []
+    for n_segments in sizes:
+        for loss in losses:
+            generated, final = build_documents(n_segments, loss)
+
+            started = time.perf_counter()
+            report = engine.align_segments(generated, final)
+            batched_ms = (time.perf_counter() - started) * 1000
+
+            row = {
+                "segments": n_segments,
+                "ids_lost": loss,
+                "batched_ms": round(batched_ms, 1),
+                "batched_matched": report["stats"]["matched_segments"],
+            }
+            if n_segments <= legacy_max_segments:
+                started = time.perf_counter()
+                legacy = legacy_align(metrics, generated, final)
+                row["legacy_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                row["legacy_matched"] = legacy["matched"]
+                row["legacy_similarity_calls"] = legacy["similarity_calls"]
+                row["speedup"] = round(row["legacy_ms"] / max(batched_ms, 1e-6), 1)
+            else:
+                row["legacy_similarity_calls_estimate"] = legacy_call_count(n_segments, loss)
+            results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--loss", type=float, nargs="+", default=[0.0, 0.5, 1.0])
+    parser.add_argument("--legacy-max-segments", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.loss, args.legacy_max_segments), indent=2))
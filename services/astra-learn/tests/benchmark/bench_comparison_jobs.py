@@ -0,0 +1,157 @@
+"""
+Benchmark de throughput de trabajos de comparación (jobs/minuto) para N comparaciones
+encoladas, contra SQLite y un S3 falso en memoria.
+
+  - legacy: comportamiento previo de run_comparison_job. Instancia ComparatorEngine,
+            PrivacyEngine y HotfixDetector por trabajo y encola fila a fila, con commit y
+            COUNT(*) por fila.
+  - worker: ComparisonWorker con modelos y clientes cargados una vez, consumiendo la cola
+            durable e insertando las filas de cada trabajo con un solo INSERT.
+
+Los modelos reales se usan si están instalados (spaCy es_core_news_md para Presidio/hotfix);
+COMPARATOR_SIMILARITY_MODE=fuzzy evita BERTScore en máquinas sin GPU.
+
+Uso:
+    python -m tests.benchmark.bench_comparison_jobs [--jobs 100] [--paragraphs 120]
+"""
+import argparse
+import io
+import json
+import os
+import random
+import tempfile
+import time
+import zipfile
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from src.config import settings
+from src.core.comparator.alignment import ComparatorEngine
+from src.core.comparator.entity_extractor import HotfixDetector
+from src.core.data.formatter import DatasetBuilder
+from src.core.data.privacy import PrivacyEngine
+from src.db.database import Base
+from src.db.models.queue import TrainingQueue, QueueStatus
+from src.infrastructure.comparison_queue import ComparisonQueue
+from src.services.comparison_worker import ComparisonWorker
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+ASTRA_NS = "https://astra.ai/ooxml"
+
+
+def build_docx(paragraphs) -> bytes:
+    body = "".join(
+        (f'<w:p astra:chunkId="{cid}">' if cid else "<w:p>") + f"<w:r><w:t>{text}</w:t></w:r></w:p>"
+        for cid, text in paragraphs
+    )
+    xml = f'<w:document xmlns:w="{W_NS}" xmlns:astra="{ASTRA_NS}"><w:body>{body}</w:body></w:document>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("word/document.xml", xml)
+    return buffer.getvalue()
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def download_file(self, bucket, key, path):
+        with open(path, "wb") as f:
+            f.write(self.objects[f"{bucket}/{key}"])
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[f"{Bucket}/{Key}"] = Body
+
+
+def seed_artifacts(s3: FakeS3, n_jobs: int, n_paragraphs: int, seed: int = 5):
+    rng = random.Random(seed)
+    refs = []
+    for j in range(n_jobs):
+        generated, final = [], []
+        for i in range(n_paragraphs):
+            text = f"El concejal Juan Pérez presentó la proposición {i} del acta {j} ante la plenaria de Medellín."
+            cid = f"{j}-{i}"
+            generated.append((cid, text))
+            edited = text.replace("presentó", "radicó") if rng.random() < 0.3 else text
+            final.append((cid if rng.random() > 0.2 else None, edited))
+        s3.objects[f"bench/gen_{j}.docx"] = build_docx(generated)
+        s3.objects[f"bench/fin_{j}.docx"] = build_docx(final)
+        refs.append((f"tenant_{j % 5}", f"s3://bench/gen_{j}.docx", f"s3://bench/fin_{j}.docx"))
+    return refs
+
+
+def run_legacy(Session, s3: FakeS3, refs) -> float:
+    started = time.perf_counter()
+    for tenant_id, gen_ref, fin_ref in refs:
+        report = ComparatorEngine(s3).compare_documents(gen_ref, fin_ref, tenant_id)
+        db = Session()
+        builder = DatasetBuilder()
+        try:
+            builder.privacy = PrivacyEngine()
+        except Exception:
+            builder.privacy = None
+        for delta in report.get("deltas", []):
+            row = builder.build_training_row(delta)
+            if row:
+                db.add(TrainingQueue(tenant_id=tenant_id, data_json=row))
+                db.commit()
+                db.query(func.count(TrainingQueue.id)).filter(
+                    TrainingQueue.tenant_id == tenant_id,
+                    TrainingQueue.status == QueueStatus.PENDING
+                ).scalar()
+        db.close()
+        HotfixDetector().detect_hotfixes(report)
+        s3.put_object(Bucket="astra-models", Key=f"reports/{report['job_id']}.json", Body=json.dumps(report))
+    return time.perf_counter() - started
+
+
+def run_worker(Session, s3: FakeS3, refs) -> float:
+    db = Session()
+    queue = ComparisonQueue(db)
+    for tenant_id, gen_ref, fin_ref in refs:
+        queue.submit(tenant_id, gen_ref, fin_ref)
+
+    started = time.perf_counter()
+    worker = ComparisonWorker(db=db, s3_client=s3, redis_client=MagicMock(), worker_id="bench")
+    while worker.run_once():
+        pass
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+
+def run(n_jobs: int, n_paragraphs: int) -> list:
+    # Sin disparar entrenamientos durante la medición
+    settings.BATCH_SIZE_THRESHOLD = 10 ** 9
+    results = []
+    for mode, fn in [("legacy", run_legacy), ("worker", run_worker)]:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            Base.metadata.create_all(bind=engine)
+            Session = sessionmaker(bind=engine, autoflush=False)
+            s3 = FakeS3()
+            refs = seed_artifacts(s3, n_jobs, n_paragraphs)
+
+            elapsed = fn(Session, s3, refs)
+            with Session() as db:
+                rows = db.query(func.count(TrainingQueue.id)).scalar()
+            results.append({
+                "mode": mode,
+                "jobs": n_jobs,
+                "paragraphs_per_doc": n_paragraphs,
+                "elapsed_s": round(elapsed, 2),
+                "jobs_per_minute": round(n_jobs / elapsed * 60, 1),
+                "training_rows": rows,
+            })
+            engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--paragraphs", type=int, default=120)
+    args = parser.parse_args()
+    print(json.dumps(run(args.jobs, args.paragraphs), indent=2))
@@ -0,0 +1,85 @@
+"""
+Benchmark de memoria de la exportación de datasets de entrenamiento (por defecto 500k filas).
+
+  - legacy:    lote materializado como lista (checkout_batch) y serializado completo a un
+               BytesIO antes de subir (comportamiento previo de upload_batch).
+  - streaming: filas desde un generador (equivalente a QueueManager.iter_batch) hacia
+               S3DatasetGateway.upload_batch, con JSONL gzip consumido en partes de 8MB.
+
+El S3 falso lee el stream en partes de MULTIPART_CHUNK_SIZE y solo cuenta bytes, como
+haría el multipart upload. El pico se mide con tracemalloc.
+
+Uso:
+    python -m tests.benchmark.bench_dataset_export [--rows 500000]
+"""
+import argparse
+import io
+import json
+import time
+import tracemalloc
+
+from src.infrastructure.s3_datasets import S3DatasetGateway
+
+
+class CountingS3:
+    def __init__(self, part_size: int):
+        self.part_size = part_size
+        self.bytes_uploaded = 0
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None, Config=None):
+        while True:
+            part = fileobj.read(self.part_size)
+            if not part:
+                break
+            self.bytes_uploaded += len(part)
+
+
+def generate_rows(n_rows: int):
+    for i in range(n_rows):
+        yield {
+            "instruction": "Transcribe the audio exactly.",
+            "input": f"el concejal presentó la proposición {i} ante la plenaria " * 3,
+            "output": f"el concejal radicó la proposición {i} ante la plenaria " * 3,
+        }
+
+
+def legacy_upload(s3, rows) -> None:
+    buffer = io.BytesIO()
+    for row in rows:
+        buffer.write((json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8"))
+    buffer.seek(0)
+    s3.upload_fileobj(buffer, "astra-models", "bench.jsonl")
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(n_rows: int) -> list:
+    part_size = S3DatasetGateway.MULTIPART_CHUNK_SIZE
+    results = []
+
+    s3 = CountingS3(part_size)
+    elapsed, peak = measure(lambda: legacy_upload(s3, list(generate_rows(n_rows))))
+    results.append({"mode": "legacy", "rows": n_rows, "elapsed_s": round(elapsed, 2),
+                    "peak_mb": round(peak / 2 ** 20, 1), "uploaded_mb": round(s3.bytes_uploaded / 2 ** 20, 1)})
+
+    s3 = CountingS3(part_size)
+    gateway = S3DatasetGateway(s3_client=s3)
+    elapsed, peak = measure(lambda: gateway.upload_batch("bench", generate_rows(n_rows)))
+    results.append({"mode": "streaming", "rows": n_rows, "elapsed_s": round(elapsed, 2),
+                    "peak_mb": round(peak / 2 ** 20, 1), "uploaded_mb": round(s3.bytes_uploaded / 2 ** 20, 1)})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows), indent=2))
@@ -0,0 +1,69 @@
+"""
+Benchmark en CPU del Quality Gate con un modelo causal diminuto inicializado al azar.
+
+  - sequential: una muestra por llamada a generate (comportamiento previo).
+  - batched:    lotes ordenados por longitud con left-padding (--batch-size).
+  - adaptive:   batched + parada temprana por intervalos de confianza.
+
+Uso:
+    python -m tests.benchmark.bench_evaluator [--rows 50] [--batch-size 8] [--max-new-tokens 64]
+"""
+import argparse
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+from src.evaluation.evaluator import ALPACA_PROMPT, ModelEvaluator
+from tests.evaluation.tiny_lm import build_tiny_lm
+
+
+def build_rows(n_rows: int):
+    return [
+        {
+            "instruction": "Actúa como un redactor de actas y formaliza el siguiente texto transcrito.",
+            "input": "el concejal " + " ".join(f"palabra{j}" for j in range(5 + (i * 7) % 60)),
+            "output": "<w:p><w:r><w:t>Acta</w:t></w:r></w:p>",
+        }
+        for i in range(n_rows)
+    ]
+
+
+def run(n_rows: int, batch_size: int, max_new_tokens: int, n_layer: int, n_embd: int) -> list:
+    rows = build_rows(n_rows)
+    corpus = [ALPACA_PROMPT.format(r["instruction"], r["input"]) for r in rows] + [r["output"] for r in rows]
+    model, tokenizer = build_tiny_lm(corpus, n_layer=n_layer, n_embd=n_embd)
+
+    results = []
+    for mode, size, adaptive in [("sequential", 1, False), ("batched", batch_size, False), ("adaptive", batch_size, True)]:
+        evaluator = ModelEvaluator(device="cpu", batch_size=size, max_new_tokens=max_new_tokens)
+        evaluator.metrics_engine.calculate_semantic_similarity = MagicMock(return_value=0.9)
+        evaluator.s3_client = MagicMock()
+        evaluator._load_model = MagicMock(return_value=(model, tokenizer))
+
+        with patch("src.evaluation.evaluator.load_dataset", return_value=rows):
+            started = time.perf_counter()
+            result = evaluator.evaluate("tiny", "data.jsonl", {"wer": 0.5}, "bench", mode,
+                                        max_samples=n_rows, adaptive=adaptive)
+            elapsed = time.perf_counter() - started
+
+        report = json.loads(evaluator.s3_client.put_object.call_args.kwargs["Body"])
+        results.append({
+            "mode": mode,
+            "rows": n_rows,
+            "evaluated": report["sample_size"],
+            "batch_size": size,
+            "elapsed_s": round(elapsed, 2),
+            "decision": result.status,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--n-layer", type=int, default=4)
+    parser.add_argument("--n-embd", type=int, default=128)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.batch_size, args.max_new_tokens, args.n_layer, args.n_embd), indent=2))
@@ -0,0 +1,117 @@
+"""
+Benchmark de ForensicExtractor sobre un DOCX sintético (por defecto 5.000 párrafos) con
+marcas de revisión (w:ins/w:del), runs partidos y estilos.
+
+  - legacy:    zf.read + etree.fromstring del XML completo y tres XPath por párrafo
+               (comportamiento previo de extract_segments).
+  - iterparse: extract_segments actual (streaming filtrado a w:p, una pasada por párrafo).
+
+Cada modo corre en un proceso nuevo; la memoria se reporta como el pico de RSS
+(ru_maxrss), porque libxml2 reserva fuera del heap de Python.
+
+Uso:
+    python -m tests.benchmark.bench_extractor [--paragraphs 5000] [--runs 12]
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+import zipfile
+
+from lxml import etree
+
+from src.core.comparator.metadata import ForensicExtractor, TextSegment
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+ASTRA_NS = "https://astra.ai/ooxml"
+NS = {"w": W_NS, "astra": ASTRA_NS}
+
+
+def build_docx(path: str, n_paragraphs: int, runs: int, seed: int = 3) -> None:
+    rng = random.Random(seed)
+    parts = []
+    for i in range(n_paragraphs):
+        body = []
+        for r in range(runs):
+            word = f"palabra{i}_{r} "
+            roll = rng.random()
+            if roll < 0.15:
+                body.append(f'<w:del w:id="{i}{r}" w:author="sec"><w:r><w:rPr><w:b/></w:rPr><w:delText>{word}</w:delText></w:r></w:del>')
+            elif roll < 0.3:
+                body.append(f'<w:ins w:id="{i}{r}" w:author="sec"><w:r><w:rPr><w:i/></w:rPr><w:t xml:space="preserve">{word}</w:t></w:r></w:ins>')
+            else:
+                body.append(f'<w:r><w:rPr><w:rFonts w:ascii="Arial"/><w:sz w:val="24"/></w:rPr><w:t xml:space="preserve">{word}</w:t></w:r>')
+        ppr = '<w:pPr><w:pStyle w:val="Normal"/><w:jc w:val="both"/></w:pPr>'
+        parts.append(f'<w:p astra:chunkId="chunk-{i}">{ppr}{"".join(body)}</w:p>')
+    xml = f'<w:document xmlns:w="{W_NS}" xmlns:astra="{ASTRA_NS}"><w:body>{"".join(parts)}</w:body></w:document>'
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("word/document.xml", xml)
+
+
+def legacy_extract(docx_path: str):
+    with zipfile.ZipFile(docx_path, "r") as zf:
+        xml_content = zf.read("word/document.xml")
+    root = etree.fromstring(xml_content)
+    segments = []
+    for idx, p_node in enumerate(root.xpath("//w:p", namespaces=NS)):
+        chunk_id = p_node.get(f"{{{ASTRA_NS}}}chunkId")
+        if not chunk_id:
+            ppr = p_node.find("w:pPr", namespaces=NS)
+            if ppr is not None:
+                chunk_id = ppr.get(f"{{{ASTRA_NS}}}chunkId")
+        full_text = "".join(p_node.xpath(".//w:t/text()", namespaces=NS)).strip()
+        styles = {}
+        p_style = p_node.xpath(".//w:pStyle/@w:val", namespaces=NS)
+        if p_style:
+            styles["paragraph_style"] = p_style[0]
+        if full_text:
+            segments.append(TextSegment(chunk_id=chunk_id, text=full_text, order_index=idx, styles=styles))
+    return segments
+
+
+def _measure(mode: str, docx_path: str, results) -> None:
+    fn = legacy_extract if mode == "legacy" else ForensicExtractor().extract_segments
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    segments = fn(docx_path)
+    elapsed = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put({
+        "mode": mode,
+        "segments": len(segments),
+        "elapsed_s": round(elapsed, 3),
+        "peak_rss_mb": round(rss_after / 1024, 1),
+        "rss_growth_mb": round((rss_after - rss_before) / 1024, 1),
+        "checksum": hashlib.sha1(json.dumps([(s.chunk_id, s.text, s.order_index) for s in segments]).encode()).hexdigest(),
+    })
+
+
+def run(n_paragraphs: int, runs: int) -> list:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        docx_path = os.path.join(tmp, "acta.docx")
+        build_docx(docx_path, n_paragraphs, runs)
+        xml_mb = zipfile.ZipFile(docx_path).getinfo("word/document.xml").file_size / 2 ** 20
+        for mode in ("legacy", "iterparse"):
+            queue = multiprocessing.Queue()
+            process = multiprocessing.Process(target=_measure, args=(mode, docx_path, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            result["document_xml_mb"] = round(xml_mb, 1)
+            results.append(result)
+    assert results[0]["checksum"] == results[1]["checksum"], "Los extractores difieren"
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=12)
+    args = parser.parse_args()
+    print(json.dumps(run(args.paragraphs, args.runs), indent=2))
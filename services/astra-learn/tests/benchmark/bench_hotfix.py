@@ -0,0 +1,112 @@
+"""
+Benchmark de HotfixDetector sobre N deltas sintéticos (por defecto 10.000) y recall sobre
+las correcciones de nombre inyectadas.
+
+Los deltas mezclan:
+  - correcciones de nombre 1-a-1 ("Peres" -> "Pérez"),
+  - de distinto largo ("Jose Peres" -> "José Pérez Gómez"),
+  - con inserciones/borrados en otra parte de la frase,
+  - y ediciones que no son de entidad (ortografía, verbos).
+
+  - legacy:  `_analyze_pair` previo, `self.nlp(fix)` por candidato (solo listas de igual largo).
+  - batched: detect_hotfixes actual (alineación por opcodes + un nlp.pipe solo NER).
+
+Requiere es_core_news_md.
+
+Uso:
+    python -m tests.benchmark.bench_hotfix [--deltas 10000]
+"""
+import argparse
+import json
+import random
+import time
+
+from src.core.comparator.entity_extractor import HotfixDetector
+
+NAMES = [
+    ("Jon Peres", "John Pérez"), ("Peres", "Pérez"), ("Martines", "Martínez"),
+    ("Gomes", "Gómez"), ("Rodrigues", "Rodríguez"), ("Jose Peres", "José Pérez Gómez"),
+    ("Ana Maria Lopes", "Ana María López"), ("Medelin", "Medellín"), ("Bogota", "Bogotá"),
+    ("Sanches Ruis", "Sánchez Ruiz"), ("Fernandes", "Fernández"), ("Envigado Antioqia", "Envigado Antioquia"),
+]
+TEMPLATES = [
+    "el concejal {} presentó la proposición ante la plenaria",
+    "la palabra la tiene el honorable concejal {} para su intervención",
+    "se deja constancia de la asistencia de {} a la sesión ordinaria",
+    "el municipio de {} aprobó el presupuesto de la vigencia",
+]
+FILLERS = ["honorable", "señor", "presidente", "nuevamente"]
+NON_ENTITY = [("aprobo", "aprobó"), ("sesion", "sesión"), ("presento", "radicó")]
+
+
+def build_deltas(n_deltas: int, seed: int = 17):
+    rng = random.Random(seed)
+    deltas, expected = [], {}
+    for i in range(n_deltas):
+        template = rng.choice(TEMPLATES)
+        if rng.random() < 0.6:
+            err, fix = rng.choice(NAMES)
+            original, final = template.format(err), template.format(fix)
+            if rng.random() < 0.4:
+                # Inserción lejos del nombre: el detector previo descartaba el delta
+                words = final.split()
+                words.insert(len(words) - 1, rng.choice(FILLERS))
+                final = " ".join(words)
+            expected[err.lower()] = fix
+        else:
+            err, fix = rng.choice(NON_ENTITY)
+            original = template.format("Juan") + f" {err}"
+            final = template.format("Juan") + f" {fix}"
+        deltas.append({"original_text": original, "final_text": final, "metrics": {"classification": "MINOR_EDIT"}})
+    return deltas, expected
+
+
+def legacy_detect(detector: HotfixDetector, report):
+    hotfixes = {}
+    for delta in report["deltas"]:
+        tokens_orig = delta["original_text"].split()
+        tokens_final = delta["final_text"].split()
+        if len(tokens_orig) != len(tokens_final):
+            continue
+        diffs = []
+        for o_tok, f_tok in zip(tokens_orig, tokens_final):
+            if o_tok != f_tok:
+                o_clean, f_clean = o_tok.strip(".,;:()"), f_tok.strip(".,;:()")
+                if o_clean != f_clean:
+                    diffs.append((o_clean, f_clean))
+        if len(diffs) == 1:
+            err, fix = diffs[0]
+            doc = detector.nlp(fix)
+            if doc.ents and doc.ents[0].label_ in ["PER", "LOC", "ORG"]:
+                if not doc[0].is_stop and doc[0].pos_ != "VERB":
+                    hotfixes[err.lower()] = fix
+    return hotfixes
+
+
+def score(found, expected):
+    correct = sum(1 for err, fix in expected.items() if found.get(err) == fix)
+    wrong = sum(1 for err, fix in found.items() if expected.get(err) != fix)
+    return {"recall": round(correct / len(expected), 3), "false_positives": wrong, "emitted": len(found)}
+
+
+def run(n_deltas: int) -> list:
+    detector = HotfixDetector()
+    if detector.nlp is None:
+        raise SystemExit("es_core_news_md no está instalado")
+    deltas, expected = build_deltas(n_deltas)
+    report = {"deltas": deltas}
+
+    results = []
+    for mode, fn in [("legacy", lambda: legacy_detect(detector, report)), ("batched", lambda: detector.detect_hotfixes(report))]:
+        started = time.perf_counter()
+        found = fn()
+        elapsed = time.perf_counter() - started
+        results.append({"mode": mode, "deltas": n_deltas, "elapsed_s": round(elapsed, 2), **score(found, expected)})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deltas", type=int, default=10_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.deltas), indent=2))
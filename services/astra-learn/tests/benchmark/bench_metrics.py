@@ -0,0 +1,92 @@
+"""
+Benchmark en CPU de MetricsEngine sobre N pares (por defecto 5.000) de párrafos editados.
+
+  - legacy_singles: `bert_score.score` funcional por par (comportamiento previo).
+    Reconstruye el scorer en cada llamada, así que se mide sobre una muestra
+    (--singles-sample) y se extrapola al total.
+  - cached_singles: calculate_semantic_similarity por par con el BERTScorer del proceso.
+  - batched:        similarity_many / wer_many sobre todos los pares, por modo.
+
+Uso:
+    python -m tests.benchmark.bench_metrics [--pairs 5000] [--singles-sample 50] [--modes bertscore tiny fuzzy]
+"""
+import argparse
+import json
+import random
+import time
+
+from src.core.comparator.metrics import MetricsEngine, configure_cpu_threads
+
+WORDS = (
+    "concejal secretaria presidente comisión proyecto acuerdo presupuesto sesión votación "
+    "informe municipio aprobó rechazó modificó plenaria ordinaria extraordinaria debate "
+    "proposición ponencia artículo parágrafo recursos vigencia"
+).split()
+
+
+def build_pairs(n_pairs: int, seed: int = 11):
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(n_pairs):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 60))]
+        edited = list(words)
+        for _ in range(max(1, len(words) // 10)):
+            edited[rng.randrange(len(edited))] = rng.choice(WORDS)
+        pairs.append((" ".join(words), " ".join(edited)))
+    return pairs
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def run(n_pairs: int, singles_sample: int, modes) -> list:
+    configure_cpu_threads()
+    pairs = build_pairs(n_pairs)
+    refs = [r for r, _ in pairs]
+    hyps = [h for _, h in pairs]
+    sample = pairs[:singles_sample]
+    results = []
+
+    _, elapsed = timed(lambda: [MetricsEngine.calculate_wer(r, h) for r, h in pairs])
+    results.append({"metric": "wer", "mode": "singles", "pairs": n_pairs, "elapsed_s": round(elapsed, 3)})
+    _, elapsed = timed(lambda: MetricsEngine.wer_many(refs, hyps))
+    results.append({"metric": "wer", "mode": "batched", "pairs": n_pairs, "elapsed_s": round(elapsed, 3)})
+
+    try:
+        from bert_score import score as bert_score
+        _, elapsed = timed(lambda: [bert_score([h], [r], lang="es", verbose=False) for r, h in sample])
+        results.append({
+            "metric": "similarity", "mode": "legacy_singles", "pairs": len(sample),
+            "elapsed_s": round(elapsed, 3), "extrapolated_s": round(elapsed / len(sample) * n_pairs, 1),
+        })
+    except ImportError:
+        pass
+
+    for mode in modes:
+        engine = MetricsEngine(mode=mode)
+        # Calentamiento: la carga del modelo ocurre una sola vez por proceso
+        engine.similarity_many(refs[:2], hyps[:2])
+
+        _, elapsed = timed(lambda: [engine.calculate_semantic_similarity(r, h) for r, h in sample])
+        results.append({
+            "metric": "similarity", "mode": f"cached_singles:{engine.mode}", "pairs": len(sample),
+            "elapsed_s": round(elapsed, 3), "extrapolated_s": round(elapsed / len(sample) * n_pairs, 1),
+        })
+        _, elapsed = timed(lambda: engine.similarity_many(refs, hyps))
+        results.append({
+            "metric": "similarity", "mode": f"batched:{engine.mode}", "pairs": n_pairs,
+            "elapsed_s": round(elapsed, 3), "pairs_per_s": round(n_pairs / elapsed, 1),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=5000)
+    parser.add_argument("--singles-sample", type=int, default=50)
+    parser.add_argument("--modes", nargs="+", default=["bertscore", "tiny", "fuzzy"])
+    args = parser.parse_args()
+    print(json.dumps(run(args.pairs, args.singles_sample, args.modes), indent=2))
@@ -0,0 +1,94 @@
+"""
+Benchmark de sanitización PII sobre N pares sintéticos en español (por defecto 10.000)
+con un modelo spaCy pequeño (python -m spacy download es_core_news_sm).
+
+  - legacy:  AnalyzerEngine.analyze por par concatenado con delimitador (comportamiento
+             previo, sin contar el fallback que duplicaba el trabajo). Se mide una muestra
+             y se extrapola.
+  - batched: sanitize_pairs con nlp.pipe, para cada valor de --n-process.
+  - cached:  segunda pasada sobre los mismos pares (todo sale de la caché).
+
+Uso:
+    python -m tests.benchmark.bench_privacy [--pairs 10000] [--legacy-sample 500] [--n-process 1 2 4]
+"""
+import argparse
+import json
+import random
+import time
+
+from src.core.data.privacy import PrivacyEngine
+
+NAMES = ["Juan Pérez", "María Gómez", "Carlos Rodríguez", "Ana Martínez", "Luis Fernández", "Sofía Ramírez"]
+PLACES = ["Medellín", "Bogotá", "Cali", "Barranquilla", "Manizales"]
+TEMPLATES = [
+    "El concejal {name} solicitó la palabra para referirse al proyecto de acuerdo número {n}.",
+    "La señora {name}, residente en {place}, radicó la petición al correo {email}.",
+    "Se deja constancia de que {name} votó en contra de la proposición {n} en la sesión de {place}.",
+    "Para mayor información comunicarse al teléfono 300 {n:03d} {m:04d} con {name}.",
+]
+
+
+def build_pairs(n_pairs: int, seed: int = 3):
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(n_pairs):
+        name = rng.choice(NAMES)
+        values = dict(
+            name=name, place=rng.choice(PLACES), n=rng.randint(1, 999), m=rng.randint(0, 9999),
+            email=f"{name.split()[0].lower()}{i}@concejo.gov.co",
+        )
+        original = rng.choice(TEMPLATES).format(**values)
+        corrected = original.replace("solicitó la palabra", "pidió el uso de la palabra").replace("Se deja", "Queda")
+        pairs.append((original, corrected))
+    return pairs
+
+
+def legacy_sanitize(engine: PrivacyEngine, original: str, corrected: str):
+    delimiter = " |||SPLIT_MARKER||| "
+    combined = f"{original}{delimiter}{corrected}"
+    results = engine.analyzer.analyze(text=combined, language=engine.language, entities=engine.ENTITIES)
+    text = engine.anonymizer.anonymize(
+        text=combined, analyzer_results=results, operators=engine._get_consistent_operators()
+    ).text
+    return text.split(delimiter)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def run(n_pairs: int, legacy_sample: int, n_process_values, spacy_model: str) -> list:
+    pairs = build_pairs(n_pairs)
+    results = []
+
+    engine = PrivacyEngine(spacy_model=spacy_model, cache_size=0)
+    sample = pairs[:legacy_sample]
+    elapsed = timed(lambda: [legacy_sanitize(engine, o, c) for o, c in sample])
+    results.append({
+        "mode": "legacy", "pairs": len(sample), "elapsed_s": round(elapsed, 2),
+        "extrapolated_s": round(elapsed / len(sample) * n_pairs, 1),
+    })
+
+    for n_process in n_process_values:
+        engine = PrivacyEngine(spacy_model=spacy_model, n_process=n_process, cache_size=2 * n_pairs)
+        elapsed = timed(lambda: engine.sanitize_pairs(pairs))
+        results.append({
+            "mode": f"batched:n_process={n_process}", "pairs": n_pairs,
+            "elapsed_s": round(elapsed, 2), "pairs_per_s": round(n_pairs / elapsed, 1),
+        })
+
+    elapsed = timed(lambda: engine.sanitize_pairs(pairs))
+    results.append({"mode": "cached", "pairs": n_pairs, "elapsed_s": round(elapsed, 3)})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=10000)
+    parser.add_argument("--legacy-sample", type=int, default=500)
+    parser.add_argument("--n-process", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--spacy-model", default="es_core_news_sm")
+    args = parser.parse_args()
+    print(json.dumps(run(args.pairs, args.legacy_sample, args.n_process, args.spacy_model), indent=2))
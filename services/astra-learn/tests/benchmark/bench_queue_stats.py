@@ -0,0 +1,144 @@
+"""
+Benchmark de estadísticas de la cola de entrenamiento y del checkout con N filas
+(por defecto 1M) repartidas entre varios tenants, la mayoría ya procesadas.
+
+  - legacy:   COUNT(*) + MIN(created_at) por consulta (dashboard y evaluate_trigger) y
+              checkout con UPDATE ... RETURNING data_json + fetchall.
+  - counters: contador por tenant + primera entrada del índice parcial PENDING, y
+              checkout con claim + lectura por cursor de servidor.
+
+Usa Postgres si se indica --db-url (o BENCH_DATABASE_URL), p.ej. el de
+docker-compose.infra.yml; si no, una base SQLite temporal.
+
+Uso:
+    python -m tests.benchmark.bench_queue_stats [--rows 1000000] [--tenants 20] [--checkout 50000]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, update
+from sqlalchemy.orm import sessionmaker
+
+from src.db.database import Base
+from src.db.models.queue import TrainingQueue, QueueStatus
+from src.infrastructure.queue_manager import QueueManager
+
+
+def seed(Session, n_rows: int, n_tenants: int, pending_ratio: float = 0.1, chunk: int = 20000):
+    """Inserta `n_rows` filas; una fracción `pending_ratio` queda PENDING."""
+    start = datetime.utcnow() - timedelta(days=30)
+    payload = {"instruction": "Transcribe the audio exactly.", "input": "x" * 200, "output": "y" * 200}
+    with Session() as db:
+        for offset in range(0, n_rows, chunk):
+            batch = []
+            for i in range(offset, min(offset + chunk, n_rows)):
+                pending = (i % 100) < pending_ratio * 100
+                batch.append({
+                    "id": uuid.uuid4(),
+                    "tenant_id": f"tenant_{i % n_tenants}",
+                    "data_json": payload,
+                    "status": QueueStatus.PENDING if pending else QueueStatus.COMPLETED,
+                    "created_at": start + timedelta(seconds=i),
+                })
+            db.execute(insert(TrainingQueue), batch)
+            db.commit()
+        QueueManager(db).rebuild_pending_counters()
+
+
+def legacy_stats(db, tenant_id):
+    filters = (TrainingQueue.tenant_id == tenant_id, TrainingQueue.status == QueueStatus.PENDING)
+    count = db.query(func.count(TrainingQueue.id)).filter(*filters).scalar()
+    oldest = db.query(func.min(TrainingQueue.created_at)).filter(*filters).scalar() if count else None
+    return count, oldest
+
+
+def legacy_checkout(db, tenant_id, job_id, limit):
+    subquery = db.query(TrainingQueue.id).filter(
+        TrainingQueue.tenant_id == tenant_id,
+        TrainingQueue.status == QueueStatus.PENDING
+    ).limit(limit).with_for_update(skip_locked=True)
+    result = db.execute(
+        update(TrainingQueue).where(TrainingQueue.id.in_(subquery.scalar_subquery())).values(
+            status=QueueStatus.PROCESSING, job_id=job_id, processed_at=datetime.utcnow()
+        ).returning(TrainingQueue.data_json).execution_options(synchronize_session=False)
+    )
+    rows = [row[0] for row in result.fetchall()]
+    db.rollback()
+    return rows
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"p50_ms": round(statistics.median(samples), 3), "max_ms": round(max(samples), 3)}
+
+
+def run(db_url: str, n_rows: int, n_tenants: int, checkout: int, repeats: int) -> dict:
+    engine = create_engine(db_url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    started = time.perf_counter()
+    seed(Session, n_rows, n_tenants)
+    seed_s = time.perf_counter() - started
+
+    tenant = "tenant_0"
+    results = {"dialect": engine.dialect.name, "rows": n_rows, "tenants": n_tenants, "seed_s": round(seed_s, 1)}
+    with Session() as db:
+        manager = QueueManager(db)
+        assert legacy_stats(db, tenant) == manager.get_pending_stats(tenant)
+
+        results["dashboard"] = {
+            "legacy": timed(lambda: legacy_stats(db, tenant), repeats),
+            "counters": timed(lambda: manager.get_pending_count(tenant), repeats),
+        }
+        results["trigger_stats"] = {
+            "legacy": timed(lambda: legacy_stats(db, tenant), repeats),
+            "counters": timed(lambda: manager.get_pending_stats(tenant), repeats),
+        }
+
+        started = time.perf_counter()
+        legacy_rows = legacy_checkout(db, tenant, "bench-legacy", checkout)
+        legacy_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        claimed = manager.claim_batch(tenant, "bench-stream", checkout)
+        streamed = sum(1 for _ in manager.iter_batch("bench-stream"))
+        db.rollback()
+        stream_s = time.perf_counter() - started
+
+        results["checkout"] = {
+            "limit": checkout,
+            "legacy": {"rows": len(legacy_rows), "elapsed_s": round(legacy_s, 3)},
+            "streaming": {"rows": streamed, "claimed": claimed, "elapsed_s": round(stream_s, 3)},
+        }
+
+    engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default=os.getenv("BENCH_DATABASE_URL"))
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--checkout", type=int, default=50_000)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.db_url:
+        print(json.dumps(run(args.db_url, args.rows, args.tenants, args.checkout, args.repeats), indent=2))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            print(json.dumps(run(url, args.rows, args.tenants, args.checkout, args.repeats), indent=2))
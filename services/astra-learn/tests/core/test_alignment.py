@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from src.core.comparator.alignment import ComparatorEngine, monotone_assignment
+from src.core.comparator.metadata import TextSegment
+from src.core.comparator.metrics import MetricsEngine
+
+def seg(chunk_id, text, idx):
+    return TextSegment(chunk_id=chunk_id, text=text, order_index=idx, styles={})
+
+class TestMonotoneAssignment:
+    def test_prefers_order_preserving_total(self):
+        sim = np.array([[0.9, 0.1], [0.95, 0.9]])
+        assert monotone_assignment(sim, 0.85) == [(0, 0), (1, 1)]
+
+    def test_ignores_cells_below_threshold(self):
+        sim = np.array([[0.5, 0.2], [0.1, 0.86]])
+        assert monotone_assignment(sim, 0.85) == [(1, 1)]
+
+    def test_never_crosses(self):
+        # La fila 0 se parece a la columna 1 y la fila 1 a la columna 0: solo una sobrevive
+        sim = np.array([[0.1, 0.99], [0.9, 0.1]])
+        assert monotone_assignment(sim, 0.85) == [(0, 1)]
+
+    def test_empty(self):
+        assert monotone_assignment(np.zeros((0, 3)), 0.85) == []
+
+class TestAlignSegments:
+    @pytest.fixture
+    def engine(self):
+        with patch("src.core.comparator.alignment.boto3"):
+            engine = ComparatorEngine(s3_client=MagicMock())
+        engine.metrics = MagicMock(wraps=MetricsEngine())
+        return engine
+
+    def test_lost_ids_are_matched_in_one_batch(self, engine):
+        gen = [
+            seg("a", "El concejal Pérez presentó el proyecto de acuerdo número doce.", 0),
+            seg("b", "Se aprobó por unanimidad la modificación del presupuesto municipal.", 1),
+            seg("c", "La sesión se levantó a las nueve de la noche sin más asuntos.", 2),
+        ]
+        fin = [
+            seg("a", "El concejal Pérez presentó el proyecto de acuerdo número doce.", 0),
+            seg(None, "Se aprobó por unanimidad la modificación del presupuesto municipal 2024.", 1),
+            seg(None, "Texto completamente nuevo que agregó la secretaria general del concejo.", 2),
+        ]
+        engine.metrics.similarity_matrix = MagicMock(return_value=np.array([[0.97, 0.2], [0.1, 0.3]]))
+
+        report = engine.align_segments(gen, fin)
+
+        engine.metrics.similarity_matrix.assert_called_once()
+        methods = [d["alignment_method"] for d in report["deltas"]]
+        assert methods == ["ID_MATCH", "FUZZY_SEMANTIC", "NONE", "RESIDUAL"]
+        assert report["deltas"][1]["chunk_id"] == "b"
+        assert report["deltas"][3]["chunk_id"] == "c"
+        assert report["stats"]["matched_segments"] == 2
+        assert engine.metrics.similarity_many.call_count == 1
@@ -0,0 +1,69 @@
+import zipfile
+
+import pytest
+
+from src.core.comparator.metadata import ForensicExtractor
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+ASTRA_NS = "https://astra.ai/ooxml"
+
+def write_docx(path, body: str) -> str:
+    xml = f'<w:document xmlns:w="{W_NS}" xmlns:astra="{ASTRA_NS}"><w:body>{body}</w:body></w:document>'
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", xml)
+    return str(path)
+
+def test_extracts_ids_text_and_styles(tmp_path):
+    docx = write_docx(tmp_path / "acta.docx", (
+        '<w:p astra:chunkId="c1"><w:pPr><w:pStyle w:val="Heading1"/></w:pPr>'
+        '<w:r><w:t>ACTA </w:t></w:r><w:r><w:t>001</w:t></w:r></w:p>'
+        '<w:p><w:r><w:t>   </w:t></w:r></w:p>'
+        '<w:p><w:pPr astra:chunkId="c3"/><w:r><w:t>Orden del día</w:t></w:r></w:p>'
+        '<w:tbl><w:tr><w:tc><w:p><w:r><w:t>Celda</w:t></w:r></w:p></w:tc></w:tr></w:tbl>'
+    ))
+
+    segments = ForensicExtractor().extract_segments(docx)
+
+    assert [(s.chunk_id, s.text, s.order_index) for s in segments] == [
+        ("c1", "ACTA 001", 0),
+        ("c3", "Orden del día", 2),
+        (None, "Celda", 3),
+    ]
+    assert segments[0].styles == {"paragraph_style": "Heading1"}
+    assert segments[1].styles == {}
+
+def test_tracked_changes_keep_accepted_text(tmp_path):
+    docx = write_docx(tmp_path / "acta.docx", (
+        '<w:p astra:chunkId="c1">'
+        '<w:r><w:t xml:space="preserve">El concejal </w:t></w:r>'
+        '<w:del w:id="1" w:author="sec"><w:r><w:delText>presentó</w:delText></w:r></w:del>'
+        '<w:ins w:id="2" w:author="sec"><w:r><w:t>radicó</w:t></w:r></w:ins>'
+        '<w:r><w:t xml:space="preserve"> la proposición</w:t></w:r>'
+        '<w:del w:id="3" w:author="sec"><w:r><w:t> duplicada</w:t></w:r></w:del>'
+        '</w:p>'
+    ))
+
+    segments = ForensicExtractor().extract_segments(docx)
+
+    assert [s.text for s in segments] == ["El concejal radicó la proposición"]
+
+def test_nested_paragraphs_keep_document_order(tmp_path):
+    docx = write_docx(tmp_path / "acta.docx", (
+        '<w:p><w:r><w:t>Antes </w:t></w:r><w:r><w:pict><w:txbxContent>'
+        '<w:p astra:chunkId="inner"><w:r><w:t>Recuadro</w:t></w:r></w:p>'
+        '</w:txbxContent></w:pict></w:r></w:p>'
+        '<w:p><w:r><w:t>Después</w:t></w:r></w:p>'
+    ))
+
+    segments = ForensicExtractor().extract_segments(docx)
+
+    assert [(s.order_index, s.chunk_id) for s in segments] == [(0, None), (1, "inner"), (2, None)]
+    assert segments[0].text == "Antes Recuadro"
+
+def test_corrupt_document_raises_value_error(tmp_path):
+    path = tmp_path / "roto.docx"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", "<w:document")
+
+    with pytest.raises(ValueError):
+        ForensicExtractor().extract_segments(str(path))
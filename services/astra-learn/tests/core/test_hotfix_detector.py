@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from src.core.comparator.entity_extractor import HotfixDetector
+
+class StubNLP:
+    """NER de juguete: cualquier texto con todas las palabras capitalizadas es una PER."""
+    def __init__(self):
+        self.pipe_calls = []
+        self.enabled = None
+
+    @contextmanager
+    def select_pipes(self, enable):
+        self.enabled = enable
+        yield
+
+    def pipe(self, texts, batch_size=None):
+        texts = list(texts)
+        self.pipe_calls.append(texts)
+        for text in texts:
+            words = text.split()
+            tokens = [SimpleNamespace(text=w, is_stop=w.lower() in {"el", "la", "de"}) for w in words]
+            ents = []
+            if words and all(w[0].isupper() for w in words):
+                ents = [SimpleNamespace(label_="PER", start=0, end=len(words))]
+            yield StubDoc(tokens, ents)
+
+class StubDoc(list):
+    def __init__(self, tokens, ents):
+        super().__init__(tokens)
+        self.ents = ents
+
+def detector():
+    d = HotfixDetector.__new__(HotfixDetector)
+    d.batch_size = 64
+    d.min_occurrences = 1
+    d.nlp = StubNLP()
+    return d
+
+def delta(original, final, classification="MINOR_EDIT"):
+    return {"original_text": original, "final_text": final, "metrics": {"classification": classification}}
+
+def test_substitution_spans_of_any_length():
+    d = detector()
+
+    assert d._substitution_spans("el concejal Jon Peres habló", "el concejal John Pérez Gómez habló.") == [
+        ("Jon Peres", "John Pérez Gómez")
+    ]
+    # Una inserción en otra parte de la frase ya no descarta el delta
+    assert d._substitution_spans("la señora Martines votó", "la honorable señora Martínez votó") == [
+        ("Martines", "Martínez")
+    ]
+
+def test_detect_hotfixes_batches_ner_and_aggregates():
+    d = detector()
+    report = {"deltas": [
+        delta("intervino Jon Peres en la sesión", "intervino John Pérez en la sesión"),
+        delta("el concejal Jon Peres votó", "el concejal John Pérez votó"),
+        delta("saludo a Martines y a todos", "saludo a Martínez y a todos"),
+        delta("se aprobo el acta", "se aprobó el acta"),
+        delta("texto reescrito por completo", "Otra Cosa Distinta Aquí", classification="MAJOR_REWRITE"),
+    ]}
+
+    hotfixes = d.detect_hotfixes(report)
+
+    assert hotfixes == {"jon peres": "John Pérez", "martines": "Martínez"}
+    assert len(d.nlp.pipe_calls) == 1
+    assert d.nlp.enabled == ["ner"]
+
+def test_conflicting_fixes_are_skipped():
+    d = detector()
+    report = {"deltas": [
+        delta("habló Peres", "habló Pérez"),
+        delta("votó Peres", "votó Perea"),
+    ]}
+
+    assert d.detect_hotfixes(report) == {}
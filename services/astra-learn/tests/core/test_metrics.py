@@ -0,0 +1,56 @@
+import pytest
+import torch
+from unittest.mock import MagicMock, patch
+from src.core.comparator import metrics as metrics_module
+from src.core.comparator.metrics import MetricsEngine
+
+PAIRS = [
+    ("el concejal votó a favor", "el concejal votó en contra"),
+    ("se levanta la sesión", "se levanta la sesión"),
+    ("", "texto insertado"),
+    ("la comisión aprobó el informe de gestión anual", "la comisión aprobó el informe anual"),
+]
+
+class TestBatchedMetrics:
+    def test_wer_many_matches_single_calls(self):
+        refs, hyps = zip(*PAIRS)
+        batched = MetricsEngine.wer_many(list(refs), list(hyps))
+        singles = [MetricsEngine.calculate_wer(r, h) for r, h in PAIRS]
+        assert batched == pytest.approx(singles)
+
+    def test_fuzzy_mode_never_loads_a_model(self):
+        engine = MetricsEngine(mode="fuzzy")
+        with patch.object(metrics_module, "get_bert_scorer") as get_scorer:
+            scores = engine.similarity_many(*map(list, zip(*PAIRS)))
+        get_scorer.assert_not_called()
+        assert scores[1] == 1.0
+        assert scores[2] == 0.0
+        assert 0.0 < scores[0] < 1.0
+
+    def test_scorer_is_reused_and_bucketed_by_length(self):
+        scorer = MagicMock()
+        scorer.score.side_effect = lambda cands, refs, **_: (None, None, torch.full((len(cands),), 0.9))
+        with patch.object(metrics_module, "BERT_AVAILABLE", True):
+            engine = MetricsEngine(mode="bertscore")
+        refs = [f"referencia número {i} " * (i % 5 + 1) for i in range(10)]
+        hyps = [f"hipótesis número {i} " * (i % 5 + 1) for i in range(10)]
+
+        with patch.object(metrics_module, "get_bert_scorer", return_value=scorer) as get_scorer:
+            scores = engine.similarity_many(refs, hyps, bucket_size=4)
+            engine.similarity_many(refs[:2], hyps[:2])
+
+        assert scores == [0.9] * 10
+        assert get_scorer.call_count == 2
+        # 10 pares en cubetas de 4 -> 3 llamadas, más 1 de la segunda invocación
+        assert scorer.score.call_count == 4
+        first_bucket = scorer.score.call_args_list[0].args[0]
+        second_bucket = scorer.score.call_args_list[1].args[0]
+        assert max(map(len, first_bucket)) <= min(map(len, second_bucket))
+
+    def test_tenant_mode_override(self):
+        with patch.object(metrics_module.settings, "COMPARATOR_TENANT_SIMILARITY_MODES", {"tenant_cheap": "fuzzy"}):
+            assert MetricsEngine.for_tenant("tenant_cheap").mode == "fuzzy"
+
+    def test_unknown_mode_is_rejected(self):
+        with pytest.raises(ValueError):
+            MetricsEngine(mode="gpt")
@@ -0,0 +1,52 @@
+import re
+import pytest
+from unittest.mock import patch
+from presidio_analyzer import RecognizerResult
+from src.core.data.privacy import PrivacyEngine, ERROR_MARKER
+
+NAME = re.compile(r"Juan Pérez|María Gómez")
+
+def fake_analyze_iterator(texts, language, **kwargs):
+    fake_analyze_iterator.calls.append(list(texts))
+    return [
+        [RecognizerResult("PERSON", m.start(), m.end(), 0.85) for m in NAME.finditer(text)]
+        for text in texts
+    ]
+
+@pytest.fixture
+def engine():
+    fake_analyze_iterator.calls = []
+    with patch("src.core.data.privacy.NlpEngineProvider"), \
+         patch("src.core.data.privacy.AnalyzerEngine"), \
+         patch("src.core.data.privacy.BatchAnalyzerEngine") as MockBatch:
+        MockBatch.return_value.analyze_iterator.side_effect = fake_analyze_iterator
+        yield PrivacyEngine(cache_size=10)
+
+class TestBatchSanitization:
+    def test_pairs_are_sanitized_in_one_batch(self, engine):
+        pairs = [
+            ("Interviene Juan Pérez.", "Interviene el concejal Juan Pérez."),
+            ("Vota María Gómez", "Vota la concejal María Gómez"),
+            ("", "texto sin original"),
+        ]
+
+        result = engine.sanitize_pairs(pairs)
+
+        assert result[0] == ("Interviene <PERSONA>.", "Interviene el concejal <PERSONA>.")
+        assert result[1] == ("Vota <PERSONA>", "Vota la concejal <PERSONA>")
+        assert result[2] == ("", "texto sin original")
+        assert len(fake_analyze_iterator.calls) == 1
+        assert len(fake_analyze_iterator.calls[0]) == 4
+
+    def test_repeated_texts_hit_the_cache(self, engine):
+        engine.sanitize_many(["Interviene Juan Pérez.", "Interviene Juan Pérez."])
+        engine.sanitize_pair("Interviene Juan Pérez.", "Se levanta la sesión.")
+
+        assert fake_analyze_iterator.calls == [["Interviene Juan Pérez."], ["Se levanta la sesión."]]
+
+    def test_analyzer_failure_marks_texts(self, engine):
+        engine.batch_analyzer.analyze_iterator.side_effect = RuntimeError("spaCy caído")
+
+        assert engine.sanitize_pair("Juan Pérez", "María Gómez") == (ERROR_MARKER, ERROR_MARKER)
+        # Los fallos no se cachean
+        assert engine._cache == {}
@@ -1,8 +1,9 @@
+import json
 import pytest
 import numpy as np
 from unittest.mock import MagicMock, patch
 from src.evaluation.metrics import MetricsEngine
-from src.evaluation.evaluator import ModelEvaluator
+from src.evaluation.evaluator import ModelEvaluator, ratio_interval
 
 class TestMetricsEngine:
     @pytest.fixture
@@ -109,4 +110,90 @@ class TestModelEvaluatorLogic:
         result = evaluator.evaluate("path", "data.jsonl", baseline, "tenant1", "job1")
 
         assert result.status == "REJECTED"
-        assert any("Regresión WER" in r for r in result.reasons)
\ No newline at end of file
+        assert any("Regresión WER" in r for r in result.reasons)
+    @patch("src.evaluation.evaluator.load_dataset")
+    def test_adaptive_mode_shuffles_small_datasets(self, mock_load_data, evaluator):
+        # Archivo agrupado por documento: las rondas no deben decidir sobre ese prefijo
+        rows = [{"instruction": "i", "input": f"doc{d}-{j}", "output": "out"} for d in range(4) for j in range(5)]
+        mock_load_data.return_value = rows
+        seen = []
+        evaluator.generate_batch = MagicMock(
+            side_effect=lambda model, tok, prompts: seen.extend(prompts) or ["<w:p/>"] * len(prompts)
+        )
+        evaluator.metrics_engine.calculate_wer_per_sample.side_effect = lambda refs, preds: [0.0] * len(refs)
+
+        evaluator.evaluate("path", "data.jsonl", {"wer": 0.5}, "tenant1", "job1", max_samples=50, adaptive=True)
+
+        inputs = [p.split("### Input:\n")[1].split("\n")[0] for p in seen]
+        assert sorted(inputs) == sorted(r["input"] for r in rows)
+        assert inputs != [r["input"] for r in rows]
+
+class TestAdaptiveStopping:
+    def test_ratio_interval_is_centered_on_corpus_wer(self):
+        errors, words = [1, 0, 6, 2], [2, 10, 20, 8]
+        low, high = ratio_interval(errors, words)
+
+        corpus_wer = sum(errors) / sum(words)
+        assert low < corpus_wer < high
+        assert (low + high) / 2 == pytest.approx(corpus_wer)
+
+    def test_ratio_interval_needs_two_samples(self):
+        assert ratio_interval([1], [4]) == (0.0, float("inf"))
+
+class TestBatchedGenerationOnCPU:
+    @pytest.fixture
+    def rows(self):
+        return [
+            {"instruction": "Formaliza el texto.", "input": f"el concejal {i} dice que " + "si " * (i % 7), "output": "<w:p>Acta</w:p>"}
+            for i in range(20)
+        ]
+
+    @pytest.fixture
+    def evaluator(self, rows):
+        from tests.evaluation.tiny_lm import build_tiny_lm
+        from src.evaluation.evaluator import ALPACA_PROMPT
+
+        corpus = [ALPACA_PROMPT.format(r["instruction"], r["input"]) for r in rows]
+        model, tokenizer = build_tiny_lm(corpus + [r["output"] for r in rows])
+
+        with patch("src.evaluation.evaluator.MetricsEngine"):
+            ev = ModelEvaluator(device="cpu", batch_size=4, max_new_tokens=8)
+        ev.metrics_engine = MetricsEngine()
+        ev.metrics_engine.calculate_semantic_similarity = MagicMock(return_value=0.9)
+        ev.s3_client = MagicMock()
+        ev._load_model = MagicMock(return_value=(model, tokenizer))
+        ev.tiny = (model, tokenizer)
+        return ev
+
+    def test_batched_generation_matches_unbatched(self, evaluator, rows):
+        from src.evaluation.evaluator import ALPACA_PROMPT
+        model, tokenizer = evaluator.tiny
+        prompts = [ALPACA_PROMPT.format(r["instruction"], r["input"]) for r in rows[:6]]
+
+        batched = evaluator.generate_batch(model, tokenizer, prompts)
+        evaluator.batch_size = 1
+        singles = evaluator.generate_batch(model, tokenizer, prompts)
+
+        assert len(batched) == 6
+        assert batched == singles
+
+    @patch("src.evaluation.evaluator.load_dataset")
+    def test_evaluate_runs_on_cpu(self, mock_load_data, evaluator, rows):
+        mock_load_data.return_value = rows
+
+        result = evaluator.evaluate("tiny", "data.jsonl", {"wer": 0.5}, "tenant1", "job1")
+
+        # Un modelo aleatorio no genera XML válido: el gate lo rechaza
+        assert result.status == "REJECTED"
+        assert result.metrics["xml_valid_ratio"] < 0.95
+
+    @patch("src.evaluation.evaluator.load_dataset")
+    def test_adaptive_gate_stops_early_on_clear_rejection(self, mock_load_data, evaluator, rows):
+        mock_load_data.return_value = rows * 5
+        evaluator.metrics_engine.validate_xml_structure = MagicMock(return_value=False)
+
+        evaluator.evaluate("tiny", "data.jsonl", {"wer": 0.5}, "tenant1", "job1",
+                           max_samples=100, adaptive=True, min_samples=16)
+
+        report = json.loads(evaluator.s3_client.put_object.call_args.kwargs["Body"])
+        assert report["sample_size"] < 100
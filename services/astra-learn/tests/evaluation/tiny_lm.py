@@ -0,0 +1,26 @@
+"""Modelo causal diminuto y aleatorio para ejecutar el Quality Gate en CPU sin descargas."""
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+SPECIAL_TOKENS = ["<pad>", "<unk>", "<eos>"]
+
+
+def build_tiny_lm(corpus, seed: int = 0, n_layer: int = 2, n_embd: int = 64):
+    """Retorna (model, tokenizer) con vocabulario de palabras tomado de `corpus`."""
+    words = sorted({w for text in corpus for w in text.split()})
+    vocab = {tok: i for i, tok in enumerate(SPECIAL_TOKENS + words)}
+
+    backend = Tokenizer(models.WordLevel(vocab=vocab, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=backend, pad_token="<pad>", unk_token="<unk>", eos_token="<eos>"
+    )
+
+    torch.manual_seed(seed)
+    config = GPT2Config(
+        vocab_size=len(vocab), n_positions=1024, n_embd=n_embd, n_layer=n_layer, n_head=2,
+        bos_token_id=vocab["<eos>"], eos_token_id=vocab["<eos>"], pad_token_id=vocab["<pad>"],
+    )
+    model = GPT2LMHeadModel(config).eval()
+    return model, tokenizer
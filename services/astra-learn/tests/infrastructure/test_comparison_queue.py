@@ -0,0 +1,226 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, func, insert, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.db.database import Base
+from src.db.models.job import ComparisonJob, ComparisonStatus
+from src.db.models.queue import TrainingQueue, TenantQueueCounter
+from src.infrastructure.comparison_queue import ComparisonQueue
+from src.infrastructure.queue_manager import QueueManager
+from src.db.bootstrap import backfill_queue_counters, ensure_queue_indexes
+from src.db.models.queue import QueueStatus
+from src.services.comparison_worker import ComparisonWorker
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+
+class TestComparisonQueue:
+    def test_claim_is_fifo_and_marks_running(self, db):
+        queue = ComparisonQueue(db, max_attempts=3, lease_seconds=60)
+        first = queue.submit("tenant_a", "s3://b/gen1.docx", "s3://b/fin1.docx")
+        queue.submit("tenant_a", "s3://b/gen2.docx", "s3://b/fin2.docx")
+
+        claimed = queue.claim("worker-1")
+
+        assert claimed.id == first.id
+        assert claimed.status == ComparisonStatus.RUNNING
+        assert claimed.attempts == 1
+        assert queue.claim("worker-2").generated_artifact_ref == "s3://b/gen2.docx"
+        assert queue.claim("worker-3") is None
+
+    def test_failed_jobs_are_retried_until_exhausted(self, db):
+        queue = ComparisonQueue(db, max_attempts=2, lease_seconds=60)
+        job_id = queue.submit("tenant_a", "s3://b/gen.docx", "s3://b/fin.docx").id
+
+        queue.fail(queue.claim("w").id, "boom")
+        assert queue.get(job_id).status == ComparisonStatus.QUEUED
+
+        queue.fail(queue.claim("w").id, "boom")
+        assert queue.get(job_id).status == ComparisonStatus.FAILED
+        assert queue.claim("w") is None
+
+    def test_expired_lease_is_reclaimed(self, db):
+        queue = ComparisonQueue(db, max_attempts=3, lease_seconds=60)
+        job = queue.submit("tenant_a", "s3://b/gen.docx", "s3://b/fin.docx")
+        queue.claim("crashed-worker")
+        job.started_at = datetime.utcnow() - timedelta(seconds=120)
+        db.commit()
+
+        reclaimed = queue.claim("worker-2")
+
+        assert reclaimed.id == job.id
+        assert reclaimed.worker_id == "worker-2"
+        assert reclaimed.attempts == 2
+
+class TestBulkEnqueue:
+    def test_enqueue_examples_inserts_all_rows_and_maintains_counter(self, db):
+        manager = QueueManager(db)
+
+        assert manager.enqueue_examples("tenant_a", [{"input": str(i)} for i in range(250)]) == 250
+        assert manager.enqueue_examples("tenant_a", [{"input": "x"}]) == 251
+        assert manager.enqueue_examples("tenant_b", [{"input": "y"}]) == 1
+
+        assert db.query(func.count(TrainingQueue.id)).scalar() == 252
+        assert db.get(TenantQueueCounter, "tenant_a").pending_count == 251
+
+    def test_validated_rows_only_count_pending(self, db):
+        manager = QueueManager(db)
+        statuses = [QueueStatus.PENDING, QueueStatus.DISCARDED, QueueStatus.PENDING_REVIEW, QueueStatus.PENDING]
+        manager.insert_validated_rows([
+            {"tenant_id": tenant, "data_json": {"input": str(i)}, "status": status}
+            for i, (tenant, status) in enumerate(zip(["tenant_a", "tenant_a", "tenant_a", "tenant_b"], statuses))
+        ])
+
+        assert db.query(func.count(TrainingQueue.id)).scalar() == 4
+        assert manager.get_pending_count("tenant_a") == 1
+        assert manager.get_pending_count("tenant_b") == 1
+
+class TestPendingStats:
+    def test_stats_follow_enqueue_and_checkout(self, db):
+        manager = QueueManager(db)
+        assert manager.get_pending_stats("tenant_a") == (0, None)
+
+        manager.enqueue_examples("tenant_a", [{"input": str(i)} for i in range(10)])
+        manager.enqueue_examples("tenant_b", [{"input": "x"}])
+        count, oldest = manager.get_pending_stats("tenant_a")
+        assert count == 10
+        assert oldest == db.query(func.min(TrainingQueue.created_at)).filter(
+            TrainingQueue.tenant_id == "tenant_a"
+        ).scalar()
+
+        rows = manager.checkout_batch("tenant_a", "job-1", limit=4)
+
+        assert len(rows) == 4
+        assert manager.get_pending_count("tenant_a") == 6
+        assert manager.get_pending_count("tenant_b") == 1
+        assert db.query(func.count(TrainingQueue.id)).filter(TrainingQueue.job_id == "job-1").scalar() == 4
+
+        assert len(manager.checkout_batch("tenant_a", "job-2", limit=100)) == 6
+        assert manager.get_pending_stats("tenant_a") == (0, None)
+        assert manager.checkout_batch("tenant_a", "job-3", limit=100) == []
+
+    def test_iter_batch_streams_in_chunks(self, db):
+        manager = QueueManager(db)
+        manager.enqueue_examples("tenant_a", [{"input": str(i)} for i in range(25)])
+        assert manager.claim_batch("tenant_a", "job-1", limit=25) == 25
+
+        rows = list(manager.iter_batch("job-1", chunk_size=7))
+
+        assert sorted(int(r["input"]) for r in rows) == list(range(25))
+
+    def test_rebuild_pending_counters(self, db):
+        manager = QueueManager(db)
+        manager.enqueue_examples("tenant_a", [{"input": "a"}] * 3)
+        db.get(TenantQueueCounter, "tenant_a").pending_count = 99
+        db.commit()
+
+        assert manager.rebuild_pending_counters() == {"tenant_a": 3}
+        assert manager.get_pending_count("tenant_a") == 3
+
+class TestStartupMigrations:
+    def test_backfill_counts_rows_enqueued_before_counters(self, db):
+        # Filas PENDING escritas por la versión anterior (sin contador)
+        db.execute(insert(TrainingQueue), [
+            {"tenant_id": t, "data_json": {"input": "x"}, "status": QueueStatus.PENDING, "created_at": datetime.utcnow()}
+            for t in ["tenant_a"] * 4 + ["tenant_b"]
+        ] + [{"tenant_id": "tenant_a", "data_json": {}, "status": QueueStatus.COMPLETED, "created_at": datetime.utcnow()}])
+        db.commit()
+        manager = QueueManager(db)
+        assert manager.get_pending_stats("tenant_a") == (0, None)
+
+        assert backfill_queue_counters(db.get_bind()) is True
+        db.expire_all()
+
+        assert manager.get_pending_count("tenant_a") == 4
+        assert manager.get_pending_stats("tenant_b")[0] == 1
+
+    def test_backfill_runs_once(self, db):
+        engine = db.get_bind()
+        assert backfill_queue_counters(engine) is True
+        QueueManager(db).enqueue_examples("tenant_a", [{"input": "a"}] * 2)
+
+        assert backfill_queue_counters(engine) is False
+        assert QueueManager(db).get_pending_count("tenant_a") == 2
+
+    def test_indexes_are_added_to_existing_table(self, db):
+        engine = db.get_bind()
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_training_queue_pending_tenant_created"))
+            conn.execute(text("DROP INDEX ix_training_queue_job_id"))
+
+        ensure_queue_indexes(engine)
+        ensure_queue_indexes(engine)  # Idempotente
+
+        with engine.connect() as conn:
+            names = {r[0] for r in conn.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'training_queue'"
+            ))}
+        assert {"ix_training_queue_pending_tenant_created", "ix_training_queue_job_id"} <= names
+
+class TestComparisonWorker:
+    def _worker(self, db, s3):
+        worker = ComparisonWorker.__new__(ComparisonWorker)
+        worker.worker_id = "w"
+        worker.db = db
+        worker.s3 = s3
+        worker.engine = MagicMock()
+        worker.engine.compare_documents.return_value = {"job_id": "abc", "deltas": [{}, {}]}
+        worker.dataset_builder = MagicMock()
+        worker.dataset_builder.build_training_rows.return_value = [{"input": "a"}, {"input": "b"}]
+        worker.hotfix_detector = MagicMock()
+        worker.hotfix_detector.detect_hotfixes.return_value = {}
+        worker.scheduler = MagicMock()
+        worker.jobs = ComparisonQueue(db)
+        worker.queue_manager = QueueManager(db)
+        return worker
+
+    def test_retry_after_late_failure_does_not_duplicate_examples(self, db):
+        s3 = MagicMock()
+        s3.put_object.side_effect = [RuntimeError("S3 caído"), None]
+        worker = self._worker(db, s3)
+        job_id = worker.jobs.submit("tenant_a", "s3://b/gen.docx", "s3://b/fin.docx").id
+
+        assert worker.run_once() is True
+        assert db.get(ComparisonJob, job_id).status == ComparisonStatus.QUEUED
+        assert db.query(TrainingQueue).count() == 0
+
+        assert worker.run_once() is True
+        assert db.get(ComparisonJob, job_id).status == ComparisonStatus.COMPLETED
+        assert db.query(TrainingQueue).count() == 2
+        assert QueueManager(db).get_pending_count("tenant_a") == 2
+
+    def test_job_is_processed_once_with_bulk_insert(self, db):
+        s3 = MagicMock()
+        worker = ComparisonWorker.__new__(ComparisonWorker)
+        worker.worker_id = "w"
+        worker.db = db
+        worker.s3 = s3
+        worker.engine = MagicMock()
+        worker.engine.compare_documents.return_value = {"job_id": "abc", "deltas": [{}, {}]}
+        worker.dataset_builder = MagicMock()
+        worker.dataset_builder.build_training_rows.return_value = [{"input": "a"}, {"input": "b"}]
+        worker.hotfix_detector = MagicMock()
+        worker.hotfix_detector.detect_hotfixes.return_value = {}
+        worker.scheduler = MagicMock()
+        worker.jobs = ComparisonQueue(db)
+        worker.queue_manager = QueueManager(db)
+
+        job_id = worker.jobs.submit("tenant_a", "s3://b/gen.docx", "s3://b/fin.docx").id
+
+        assert worker.run_once() is True
+        assert worker.run_once() is False
+
+        job = db.get(ComparisonJob, job_id)
+        assert job.status == ComparisonStatus.COMPLETED
+        assert job.enqueued_examples == 2
+        assert job.report_key == "learning_data/reports/tenant_a/abc.json"
+        worker.scheduler.evaluate_trigger.assert_called_once_with("tenant_a")
+        s3.put_object.assert_called_once()
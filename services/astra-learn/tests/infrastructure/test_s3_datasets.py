@@ -0,0 +1,57 @@
+import gzip
+import json
+from unittest.mock import MagicMock
+
+from src.infrastructure.s3_datasets import S3DatasetGateway, GzipJsonlStream
+
+class FakeS3:
+    """Consume el stream en partes, como el multipart upload de boto3."""
+    def __init__(self, part_size=64 * 1024):
+        self.part_size = part_size
+        self.objects = {}
+        self.max_part = 0
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None, Config=None):
+        data = bytearray()
+        while True:
+            part = fileobj.read(self.part_size)
+            if not part:
+                break
+            self.max_part = max(self.max_part, len(part))
+            data.extend(part)
+        self.objects[f"{bucket}/{key}"] = bytes(data)
+
+def rows(n):
+    return ({"instruction": "Transcribe", "input": f"entrada {i}", "output": f"salida ñ {i}"} for i in range(n))
+
+class TestStreamingExport:
+    def test_upload_batch_roundtrip_from_generator(self):
+        s3 = FakeS3()
+        gateway = S3DatasetGateway(bucket_name="astra-models", s3_client=s3)
+
+        uri = gateway.upload_batch("tenant_a", rows(20000))
+
+        assert uri.startswith("s3://astra-models/learning_data/datasets/tenant_a/")
+        assert uri.endswith(".jsonl.gz")
+        body = s3.objects[uri.replace("s3://", "")]
+        lines = gzip.decompress(body).decode("utf-8").splitlines()
+        assert len(lines) == 20000
+        assert json.loads(lines[-1])["output"] == "salida ñ 19999"
+        assert s3.max_part <= s3.part_size
+
+    def test_empty_batch_is_not_uploaded(self):
+        s3 = MagicMock()
+        gateway = S3DatasetGateway(s3_client=s3)
+
+        assert gateway.upload_batch("tenant_a", iter([])) == ""
+        s3.upload_fileobj.assert_not_called()
+
+    def test_stream_buffer_stays_bounded(self):
+        stream = GzipJsonlStream(rows(50000))
+        peak = 0
+        while stream.read(8192):
+            peak = max(peak, len(stream._buffer))
+
+        assert stream.rows_written == 50000
+        # Lo pendiente nunca supera una lectura más lo que produce un llenado
+        assert peak < 8192 + 256 * 1024
@@ -0,0 +1,51 @@
+import gzip
+import json
+import os
+import threading
+from unittest.mock import MagicMock
+
+from src.ml.data.loader import DataLoader
+
+class FakeS3:
+    def __init__(self, objects):
+        self.objects = objects
+        self.paths = []
+        self.barrier = threading.Barrier(2)
+
+    def download_file(self, bucket, key, path):
+        self.paths.append(path)
+        with open(path, "wb") as f:
+            f.write(self.objects[f"{bucket}/{key}"])
+        # Ambas descargas quedan en disco antes de que cualquiera cargue
+        self.barrier.wait(timeout=10)
+
+def jsonl_gz(tag, n):
+    lines = "".join(json.dumps({"instruction": "i", "input": f"{tag}-{i}", "output": "o"}) + "\n" for i in range(n))
+    return gzip.compress(lines.encode("utf-8"))
+
+def test_concurrent_loads_do_not_collide(tmp_path):
+    s3 = FakeS3({
+        "astra-models/a/batch.jsonl.gz": jsonl_gz("a", 30),
+        "astra-models/b/batch.jsonl.gz": jsonl_gz("b", 50),
+    })
+    loader = DataLoader(tokenizer=MagicMock(), s3_client=s3)
+    results, errors = {}, []
+
+    def load(tag):
+        try:
+            results[tag] = loader.load_from_s3(f"s3://astra-models/{tag}/batch.jsonl.gz", local_dir=str(tmp_path))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load, args=(tag,)) for tag in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert len(set(s3.paths)) == 2
+    assert len(results["a"]) == 30 and set(x[0] for x in results["a"]["input"]) == {"a"}
+    assert len(results["b"]) == 50 and set(x[0] for x in results["b"]["input"]) == {"b"}
+    # Los temporales se limpian tras cargar
+    assert not any(os.path.exists(p) for p in s3.paths)
@@ -32,7 +32,8 @@ class TestJobSchedulerSwitch:
             
             # Setup defaults
             sched.queue.get_pending_stats.return_value = (1000, None) # Trigger por threshold
-            sched.queue.checkout_batch.return_value = [{"id": 1}]
+            sched.queue.claim_batch.return_value = 1
+            sched.queue.iter_batch.return_value = iter([{"id": 1}])
             sched.s3_gateway.upload_batch.return_value = "s3://astra-models/data.jsonl"
             sched.s3_client.generate_presigned_url.return_value = "https://s3-signed-url.com"
             
@@ -80,3 +80,75 @@ async def test_validate_pair_yellow_llm_yellow(validator):
     
     assert result["status"] == "YELLOW"
     assert result["source"] == "LLM"
+
+# --- BATCH VALIDATION ---
+
+import asyncio
+import time
+
+class StubEncoder:
+    """Embeddings deterministas por prefijo del texto; cuenta las llamadas a encode."""
+    VECTORS = {"a": VEC_A, "b": VEC_B / np.linalg.norm(VEC_B), "c": VEC_C, "d": VEC_D}
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False):
+        self.calls += 1
+        return np.stack([self.VECTORS[t[0]] for t in texts])
+
+class StubJudge:
+    """Juez con latencia fija que registra la concurrencia máxima observada."""
+    def __init__(self, latency=0.01, score=0.9):
+        self.latency = latency
+        self.score = score
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def evaluate(self, raw_text, target_text):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        return {"score": self.score, "reasoning": "stub"}
+
+@pytest.fixture
+def batch_validator():
+    v = SemanticValidator.__new__(SemanticValidator)
+    v.model = StubEncoder()
+    v.judge = StubJudge()
+    return v
+
+@pytest.mark.asyncio
+async def test_validate_batch_matches_single_pair_zones(batch_validator):
+    pairs = [("a1", "b1"), ("a2", "c2"), ("a3", "d3"), ("a4", "b4")]
+
+    results = await batch_validator.validate_batch(
+        pairs,
+        current_starts=[10.0, 10.0, 10.0, 5.0],
+        last_valid_ends=[None, None, None, 10.0]
+    )
+
+    assert [r["status"] for r in results] == ["GREEN", "RED", "GREEN", "RED"]
+    assert [r["source"] for r in results] == ["EMBEDDING", "EMBEDDING", "LLM", "TEMPORAL"]
+    assert batch_validator.model.calls == 1
+    assert batch_validator.judge.calls == 1
+
+@pytest.mark.asyncio
+async def test_validate_batch_2000_pairs_latency(batch_validator):
+    # 1 de cada 4 pares es ambiguo -> 500 llamadas al juez de 10ms con concurrencia 8
+    prefixes = ["b", "c", "d", "b"]
+    pairs = [(f"a{i}", f"{prefixes[i % 4]}{i}") for i in range(2000)]
+
+    started = time.perf_counter()
+    results = await batch_validator.validate_batch(pairs, max_concurrency=8)
+    elapsed = time.perf_counter() - started
+
+    assert len(results) == 2000
+    assert batch_validator.model.calls == 1
+    assert batch_validator.judge.calls == 500
+    assert batch_validator.judge.max_in_flight == 8
+    # Secuencial serían >= 500 * 10ms = 5s
+    assert elapsed < 5 * 500 * 0.01 / 8
@@ -6,6 +6,9 @@ class Settings(BaseSettings):
     GRPC_PORT: int = 50055  # Nuevo puerto para gRPC
     
     TENANT_CONFIG_URL: str = "http://tenant-config-service:8080"
+    TENANT_CONFIG_CACHE_TTL_SECONDS: float = 30.0   # Config fresca sin consultar al servicio
+    TENANT_CONFIG_STALE_SECONDS: float = 300.0      # Ventana stale-while-revalidate
+    TENANT_CONFIG_CHANNEL: str = "tenant-config:changed"
     CORE_URL: str = "http://astra-core:8001/v1/core"
     
     # S3 / MinIO Settings
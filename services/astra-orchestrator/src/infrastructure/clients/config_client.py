@@ -1,42 +1,209 @@
+import asyncio
 import httpx
 import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+import redis.asyncio as redis
 from src.config import settings
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 
+# loader(tenant_id, valor_en_caché) -> config. Recibe el valor previo para revalidar condicionalmente.
+ConfigLoader = Callable[[str, Optional[dict]], Awaitable[dict]]
+
+# Config de respaldo para desarrollo cuando el Config Service no responde
+DEV_FALLBACK_CONFIG = {
+    "adapter_id": "base-model-v1",
+    "style_map": {"body": "Normal", "header": "Heading 1"},
+    "zone_map": {"DEFAULT": "Body"},
+    "table_map": {}
+}
+
+class TenantConfigNotFound(Exception):
+    """El Config Service respondió 404 para el tenant."""
+
+@dataclass
+class _CacheEntry:
+    value: dict
+    fetched_at: float
+
+class TenantConfigCache:
+    """
+    Caché en proceso de configuraciones de tenant.
+
+    - TTL: dentro de `ttl_seconds` se sirve sin red.
+    - Stale-while-revalidate: hasta `stale_seconds` adicionales se sirve el valor
+      anterior y se refresca en background.
+    - Single-flight: las cargas concurrentes de un mismo tenant comparten una sola petición.
+    - Invalidación explícita (p.ej. mensaje pub/sub "config changed").
+
+    Los valores devueltos son compartidos entre llamadas: no deben mutarse.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        stale_seconds: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._clock = clock
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Se incrementa al invalidar para descartar cargas que empezaron antes
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, tenant_id: str, loader: ConfigLoader) -> dict:
+        entry = self._entries.get(tenant_id)
+        if entry is not None:
+            age = self._clock() - entry.fetched_at
+            if age < self.ttl_seconds:
+                return entry.value
+            if age < self.ttl_seconds + self.stale_seconds:
+                self._refresh(tenant_id, loader, entry.value)
+                return entry.value
+
+        try:
+            # shield: si este llamador se cancela, la carga compartida continúa para los demás
+            previous = entry.value if entry is not None else None
+            return await asyncio.shield(self._refresh(tenant_id, loader, previous))
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            # Stale-if-error: preferimos una config vieja a fallar el inicio de sesión
+            if entry is not None:
+                logger.warning(f"Config Service falló para {tenant_id}, sirviendo versión en caché: {e}")
+                return entry.value
+            raise
+
+    def invalidate(self, tenant_id: Optional[str] = None) -> None:
+        """Invalida un tenant (o todos si `tenant_id` es None)."""
+        tenants = [tenant_id] if tenant_id else list(self._entries.keys() | self._inflight.keys())
+        for tenant in tenants:
+            self._entries.pop(tenant, None)
+            self._generations[tenant] = self._generations.get(tenant, 0) + 1
+
+    def _refresh(self, tenant_id: str, loader: ConfigLoader, previous: Optional[dict] = None) -> asyncio.Task:
+        task = self._inflight.get(tenant_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(tenant_id, loader, previous))
+            self._inflight[tenant_id] = task
+            task.add_done_callback(lambda t, tenant=tenant_id: self._on_load_done(tenant, t))
+        return task
+
+    async def _load(self, tenant_id: str, loader: ConfigLoader, previous: Optional[dict]) -> dict:
+        generation = self._generations.get(tenant_id, 0)
+        value = await loader(tenant_id, previous)
+        if self._generations.get(tenant_id, 0) == generation:
+            self._entries[tenant_id] = _CacheEntry(value=value, fetched_at=self._clock())
+        return value
+
+    def _on_load_done(self, tenant_id: str, task: asyncio.Task) -> None:
+        if self._inflight.get(tenant_id) is task:
+            del self._inflight[tenant_id]
+        # Recuperar la excepción evita warnings de refrescos en background no esperados
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Carga de config fallida para {tenant_id}: {task.exception()}")
+
+# Estado compartido por el proceso (ConfigClient se instancia por request)
+tenant_config_cache = TenantConfigCache(
+    ttl_seconds=settings.TENANT_CONFIG_CACHE_TTL_SECONDS,
+    stale_seconds=settings.TENANT_CONFIG_STALE_SECONDS
+)
+_shared_http_client: Optional[httpx.AsyncClient] = None
+
+def get_shared_http_client() -> httpx.AsyncClient:
+    """Cliente HTTP con pool de conexiones keep-alive reutilizado entre requests."""
+    global _shared_http_client
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        _shared_http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(2.0),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+        )
+    return _shared_http_client
+
+async def close_shared_http_client() -> None:
+    global _shared_http_client
+    if _shared_http_client is not None:
+        await _shared_http_client.aclose()
+        _shared_http_client = None
+
 class ConfigClient:
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[TenantConfigCache] = tenant_config_cache
+    ):
         self.base_url = settings.TENANT_CONFIG_URL
-        self.timeout = httpx.Timeout(2.0)
+        self._http_client = http_client
+        self.cache = cache
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        return self._http_client or get_shared_http_client()
 
     async def get_tenant_config(self, tenant_id: str) -> dict:
         """Recupera los mapeos y el modelo del inquilino"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(f"{self.base_url}/v1/config/{tenant_id}")
-                if response.status_code == 404:
-                    # Mocking config for now if service not reachable in dev
-                    if settings.ENVIRONMENT == "development":
-                        logger.warning(f"Config service not found, returning mock config for tenant {tenant_id}")
-                        return {
-                            "adapter_id": "base-model-v1",
-                            "style_map": {"body": "Normal", "header": "Heading 1"},
-                            "zone_map": {"DEFAULT": "Body"},
-                            "table_map": {}
-                        }
-                    raise HTTPException(status_code=422, detail=f"Tenant {tenant_id} no configurado")
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError as e:
-                logger.error(f"Error conectando a Config Service: {e}")
-                # Mocking config for now if service not reachable in dev
-                if settings.ENVIRONMENT == "development":
-                     logger.warning(f"Config service connection failed, returning mock config for tenant {tenant_id}")
-                     return {
-                        "adapter_id": "base-model-v1",
-                        "style_map": {"body": "Normal", "header": "Heading 1"},
-                        "zone_map": {"DEFAULT": "Body"},
-                        "table_map": {}
-                    }
-                raise HTTPException(status_code=503, detail="Servicio de configuración no disponible")
+        try:
+            if self.cache is None:
+                return await self._fetch(tenant_id)
+            return await self.cache.get(tenant_id, self._fetch)
+        except TenantConfigNotFound:
+            # Mocking config for now if service not reachable in dev
+            if settings.ENVIRONMENT == "development":
+                logger.warning(f"Config service not found, returning mock config for tenant {tenant_id}")
+                return dict(DEV_FALLBACK_CONFIG)
+            raise HTTPException(status_code=422, detail=f"Tenant {tenant_id} no configurado")
+        except httpx.HTTPError as e:
+            logger.error(f"Error conectando a Config Service: {e}")
+            # Mocking config for now if service not reachable in dev
+            if settings.ENVIRONMENT == "development":
+                logger.warning(f"Config service connection failed, returning mock config for tenant {tenant_id}")
+                return dict(DEV_FALLBACK_CONFIG)
+            raise HTTPException(status_code=503, detail="Servicio de configuración no disponible")
+
+    async def _fetch(self, tenant_id: str, cached: Optional[dict] = None) -> dict:
+        headers = {}
+        if cached is not None and "version" in cached:
+            # Revalidación condicional: si no cambió, el servicio responde 304 sin cuerpo
+            headers["If-None-Match"] = f'"{cached["version"]}"'
+
+        response = await self.http_client.get(f"{self.base_url}/v1/config/{tenant_id}", headers=headers)
+        if response.status_code == 304 and cached is not None:
+            return cached
+        if response.status_code == 404:
+            raise TenantConfigNotFound(tenant_id)
+        response.raise_for_status()
+        return response.json()
+
+async def listen_for_config_changes(cache: TenantConfigCache = tenant_config_cache) -> None:
+    """
+    Suscriptor pub/sub de cambios de configuración emitidos por tenant-config-service.
+    El mensaje contiene el tenant_id modificado. Ante una reconexión se vacía la caché
+    completa, ya que pudieron perderse mensajes mientras no había suscripción.
+    """
+    backoff = 1.0
+    while True:
+        # Conexión dedicada sin socket_timeout: la suscripción permanece inactiva largos periodos
+        client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(settings.TENANT_CONFIG_CHANNEL)
+            cache.invalidate()
+            backoff = 1.0
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                tenant_id = message.get("data") or None
+                cache.invalidate(tenant_id)
+                logger.info(f"Config de tenant {tenant_id or '*'} invalidada por pub/sub")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Suscripción a cambios de config perdida ({e}); reintentando en {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+        finally:
+            await pubsub.close()
+            await client.close()
@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
 from src.config import settings
@@ -5,6 +6,7 @@ from src.api.routes import health
 from src.api.routes import jobs, webhooks
 from src.controllers import session, assets, training
 from src.middleware.auth import AuthMiddleware
+from src.infrastructure.clients.config_client import listen_for_config_changes, close_shared_http_client
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -60,6 +62,16 @@ app.include_router(jobs.router)
 app.include_router(training.router)
 app.include_router(webhooks.router)
 
+@app.on_event("startup")
+async def start_config_listener():
+    # Invalida la caché local de configuración cuando tenant-config-service publica cambios
+    app.state.config_listener = asyncio.create_task(listen_for_config_changes())
+
+@app.on_event("shutdown")
+async def stop_config_listener():
+    app.state.config_listener.cancel()
+    await close_shared_http_client()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
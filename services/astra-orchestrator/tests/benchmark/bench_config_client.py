@@ -0,0 +1,86 @@
+"""
+Benchmark de inicio de sesión: 500 arranques concurrentes para 20 tenants
+contra un Config Service simulado (latencia fija, en proceso).
+
+  - legacy: un httpx.AsyncClient nuevo por llamada y sin caché (comportamiento previo).
+  - cached: cliente con pool compartido + caché TTL/SWR + single-flight.
+
+Uso:
+    python -m tests.benchmark.bench_config_client [--sessions 500] [--tenants 20] [--latency-ms 15]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from src.infrastructure.clients.config_client import ConfigClient, TenantConfigCache
+
+
+def build_transport(latency_s: float, counter: dict) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        counter["requests"] += 1
+        await asyncio.sleep(latency_s)
+        tenant_id = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json={
+            "tenant_id": tenant_id,
+            "adapter_id": "base-model-v1",
+            "style_map": {f"Estilo {i}": f"ASTRA_{i}" for i in range(200)},
+            "zone_map": {},
+            "table_map": {},
+        })
+    return httpx.MockTransport(handler)
+
+
+async def run_legacy(n_sessions: int, n_tenants: int, latency_s: float) -> dict:
+    counter = {"requests": 0}
+    transport = build_transport(latency_s, counter)
+
+    async def start(i: int):
+        # Patrón previo: cliente nuevo por llamada, sin caché
+        async with httpx.AsyncClient(transport=transport, timeout=2.0) as client:
+            response = await client.get(f"http://config/v1/config/tenant_{i % n_tenants}")
+            return response.json()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[start(i) for i in range(n_sessions)])
+    return {"elapsed_s": time.perf_counter() - started, "upstream_requests": counter["requests"]}
+
+
+async def run_cached(n_sessions: int, n_tenants: int, latency_s: float) -> dict:
+    counter = {"requests": 0}
+    http_client = httpx.AsyncClient(transport=build_transport(latency_s, counter), timeout=2.0)
+    cache = TenantConfigCache(ttl_seconds=30, stale_seconds=300)
+    client = ConfigClient(http_client=http_client, cache=cache)
+    client.base_url = "http://config"
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client.get_tenant_config(f"tenant_{i % n_tenants}") for i in range(n_sessions)])
+    elapsed = time.perf_counter() - started
+    await http_client.aclose()
+    return {"elapsed_s": elapsed, "upstream_requests": counter["requests"]}
+
+
+def run(n_sessions: int, n_tenants: int, latency_ms: float) -> list:
+    latency_s = latency_ms / 1000
+    results = []
+    for mode, fn in [("legacy", run_legacy), ("cached", run_cached)]:
+        stats = asyncio.run(fn(n_sessions, n_tenants, latency_s))
+        results.append({
+            "mode": mode,
+            "sessions": n_sessions,
+            "tenants": n_tenants,
+            "elapsed_ms": round(stats["elapsed_s"] * 1000, 1),
+            "upstream_requests": stats["upstream_requests"],
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=15.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sessions, args.tenants, args.latency_ms), indent=2))
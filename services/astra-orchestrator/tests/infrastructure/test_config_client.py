@@ -0,0 +1,107 @@
+import asyncio
+import httpx
+import pytest
+from src.infrastructure.clients.config_client import ConfigClient, TenantConfigCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def build_client(clock: FakeClock, latency: float = 0.0, fail: bool = False):
+    calls = {"count": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        await asyncio.sleep(latency)
+        if fail:
+            raise httpx.ConnectError("down", request=request)
+        tenant_id = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json={"tenant_id": tenant_id, "version": str(calls["count"]), "style_map": {}})
+
+    cache = TenantConfigCache(ttl_seconds=30, stale_seconds=300, clock=clock)
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://config")
+    client = ConfigClient(http_client=http_client, cache=cache)
+    client.base_url = "http://config"
+    return client, cache, calls
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_are_coalesced():
+    client, _, calls = build_client(FakeClock(), latency=0.01)
+
+    results = await asyncio.gather(*[client.get_tenant_config("tenant_a") for _ in range(50)])
+
+    assert calls["count"] == 1
+    assert all(r["tenant_id"] == "tenant_a" for r in results)
+
+@pytest.mark.asyncio
+async def test_fresh_entries_skip_network():
+    clock = FakeClock()
+    client, _, calls = build_client(clock)
+
+    await client.get_tenant_config("tenant_a")
+    clock.now = 10
+    await client.get_tenant_config("tenant_a")
+
+    assert calls["count"] == 1
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_while_revalidating():
+    clock = FakeClock()
+    client, _, calls = build_client(clock)
+    first = await client.get_tenant_config("tenant_a")
+
+    clock.now = 60
+    stale = await client.get_tenant_config("tenant_a")
+    await asyncio.sleep(0.05)  # Dejar correr el refresco en background
+    fresh = await client.get_tenant_config("tenant_a")
+
+    assert stale["version"] == first["version"] == "1"
+    assert fresh["version"] == "2"
+    assert calls["count"] == 2
+
+@pytest.mark.asyncio
+async def test_invalidation_forces_refetch():
+    client, cache, calls = build_client(FakeClock())
+    await client.get_tenant_config("tenant_a")
+
+    cache.invalidate("tenant_a")
+    refreshed = await client.get_tenant_config("tenant_a")
+
+    assert refreshed["version"] == "2"
+    assert calls["count"] == 2
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_when_service_is_down():
+    clock = FakeClock()
+    client, cache, _ = build_client(clock)
+    cached = await client.get_tenant_config("tenant_a")
+
+    failing_client, _, _ = build_client(clock, fail=True)
+    failing_client.cache = cache
+    clock.now = 10_000  # Fuera de la ventana stale-while-revalidate
+
+    assert await failing_client.get_tenant_config("tenant_a") == cached
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_revalidated_with_etag():
+    clock = FakeClock()
+    seen_headers = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen_headers.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"7"':
+            return httpx.Response(304, headers={"ETag": '"7"'})
+        return httpx.Response(200, json={"tenant_id": "tenant_a", "version": 7, "style_map": {"a": "b"}})
+
+    cache = TenantConfigCache(ttl_seconds=30, stale_seconds=0, clock=clock)
+    client = ConfigClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)), cache=cache)
+    first = await client.get_tenant_config("tenant_a")
+
+    clock.now = 60
+    second = await client.get_tenant_config("tenant_a")
+
+    assert seen_headers == [None, '"7"']
+    assert second == first
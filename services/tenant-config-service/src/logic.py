@@ -1,70 +1,226 @@
-import json
+import asyncio
 import logging
-from sqlalchemy.orm import Session
-from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import select, literal, Text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert, array, JSONB
 from fastapi import HTTPException
 from .models import TenantConfig
 from .schemas import TenantConfigUpdate, TenantConfigResponse
-from .database import redis_client
+from .database import redis_client, SessionLocal, CONFIG_CHANGED_CHANNEL
 
 logger = logging.getLogger(__name__)
 CACHE_TTL = 3600  # 1 hora
 
-def get_config(db: Session, tenant_id: str) -> TenantConfigResponse:
-    cache_key = f"config:{tenant_id}"
+# Campos que admite un JSON Merge Patch (RFC 7386)
+MAP_FIELDS = ("style_map", "zone_map", "table_map")
+SCALAR_FIELDS = ("active_skeleton_id",)
 
+# Single-flight: una sola carga desde Postgres por tenant, compartida por los misses concurrentes
+_inflight: Dict[str, asyncio.Task] = {}
+# Se incrementa en cada update para que una carga iniciada antes no repueble la caché con datos viejos
+_generations: Dict[str, int] = {}
+
+def _cache_key(tenant_id: str) -> str:
+    return f"config:{tenant_id}"
+
+def _version_key(tenant_id: str) -> str:
+    return f"config_version:{tenant_id}"
+
+def make_etag(version: int) -> str:
+    return f'"{version}"'
+
+def etag_matches(if_none_match: Optional[str], version: int) -> bool:
+    """Evalúa un header If-None-Match (lista de ETags, débiles o '*') contra la versión actual."""
+    if not if_none_match:
+        return False
+    etag = make_etag(version)
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+async def _read_cache(tenant_id: str) -> Tuple[Optional[int], Optional[bytes]]:
+    if not redis_client:
+        return None, None
+    try:
+        version, payload = await redis_client.mget(_version_key(tenant_id), _cache_key(tenant_id))
+        return (int(version) if version is not None else None), payload
+    except Exception as e:
+        logger.warning(f"Redis no disponible al leer config de {tenant_id}: {e}")
+        return None, None
+
+async def _write_cache(tenant_id: str, version: int, payload: bytes) -> None:
+    if not redis_client:
+        return
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.setex(_cache_key(tenant_id), CACHE_TTL, payload)
+            pipe.setex(_version_key(tenant_id), CACHE_TTL, version)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"No se pudo cachear config de {tenant_id}: {e}")
+
+async def get_config_payload(tenant_id: str) -> Tuple[int, bytes]:
+    """
+    Retorna (versión, JSON serializado). En cache hit los bytes de Redis se devuelven
+    tal cual, sin deserializar ni volver a serializar mapas potencialmente enormes.
+    """
     # 1. Intentar leer de Redis (Fast Path)
+    version, payload = await _read_cache(tenant_id)
+    if payload is not None and version is not None:
+        logger.debug(f"Cache HIT para {tenant_id}")
+        return version, payload
+
+    # 2. Leer de Postgres (Slow Path), coalesciendo misses concurrentes
+    task = _inflight.get(tenant_id)
+    if task is None:
+        task = asyncio.ensure_future(_load_and_cache(tenant_id))
+        _inflight[tenant_id] = task
+        task.add_done_callback(lambda t, tenant=tenant_id: _clear_inflight(tenant, t))
+    # shield: la cancelación de un request no aborta la carga compartida
+    return await asyncio.shield(task)
+
+async def get_config_version(tenant_id: str) -> int:
+    """Versión actual del tenant; solo lee la llave pequeña de Redis en el caso común."""
     if redis_client:
-        cached_data = redis_client.get(cache_key)
-        if cached_data:
-            logger.debug(f"Cache HIT para {tenant_id}")
-            return TenantConfigResponse(**json.loads(cached_data))
+        try:
+            version = await redis_client.get(_version_key(tenant_id))
+            if version is not None:
+                return int(version)
+        except Exception as e:
+            logger.warning(f"Redis no disponible al leer versión de {tenant_id}: {e}")
+    version, _ = await get_config_payload(tenant_id)
+    return version
 
-    # 2. Leer de Postgres (Slow Path)
-    logger.debug(f"Cache MISS para {tenant_id}, consultando DB")
-    config = db.query(TenantConfig).filter(TenantConfig.tenant_id == tenant_id).first()
+async def get_config(tenant_id: str) -> TenantConfigResponse:
+    _, payload = await get_config_payload(tenant_id)
+    return TenantConfigResponse.model_validate_json(payload)
+
+def _clear_inflight(tenant_id: str, task: asyncio.Task) -> None:
+    if _inflight.get(tenant_id) is task:
+        del _inflight[tenant_id]
+
+async def _load_from_db(tenant_id: str) -> TenantConfigResponse:
+    # Sesión propia: la carga sobrevive al request que la originó
+    async with SessionLocal() as db:
+        result = await db.execute(select(TenantConfig).where(TenantConfig.tenant_id == tenant_id))
+        config = result.scalar_one_or_none()
 
     if not config:
         # Retornar configuración vacía por defecto si no existe
-        # Esto permite "Cold Starts" sin errores 404
-        config = TenantConfig(tenant_id=tenant_id)
+        # Esto permite "Cold Starts" sin errores 404 (versión 0 = nunca configurado)
+        return TenantConfigResponse(tenant_id=tenant_id, updated_at=datetime.utcnow(), version=0)
+
+    return TenantConfigResponse.model_validate(config)
+
+async def _load_and_cache(tenant_id: str) -> Tuple[int, bytes]:
+    generation = _generations.get(tenant_id, 0)
+    logger.debug(f"Cache MISS para {tenant_id}, consultando DB")
+
+    response_model = await _load_from_db(tenant_id)
 
     # 3. Serializar y guardar en Redis
+    payload = response_model.model_dump_json().encode("utf-8")
+    if _generations.get(tenant_id, 0) == generation:
+        await _write_cache(tenant_id, response_model.version, payload)
+
+    return response_model.version, payload
+
+async def _publish_change(tenant_id: str, config: TenantConfig) -> TenantConfigResponse:
+    """Write-through de la fila devuelta por el UPSERT y notificación a los suscriptores."""
+    _generations[tenant_id] = _generations.get(tenant_id, 0) + 1
     response_model = TenantConfigResponse.model_validate(config)
-    
+
+    await _write_cache(tenant_id, response_model.version, response_model.model_dump_json().encode("utf-8"))
     if redis_client:
-        redis_client.setex(
-            cache_key,
-            CACHE_TTL,
-            response_model.model_dump_json()
-        )
+        try:
+            await redis_client.publish(CONFIG_CHANGED_CHANNEL, tenant_id)
+        except Exception as e:
+            logger.warning(f"No se pudo publicar el cambio de config de {tenant_id}: {e}")
+    logger.info(f"Config de {tenant_id} actualizada a versión {response_model.version}")
 
     return response_model
 
-def update_config(db: Session, tenant_id: str, payload: TenantConfigUpdate) -> TenantConfigResponse:
-    # 1. Preparar datos para UPSERT
+async def update_config(db: AsyncSession, tenant_id: str, payload: TenantConfigUpdate) -> TenantConfigResponse:
+    """Reemplazo completo de los campos enviados (PUT)."""
     update_data = payload.model_dump(exclude_unset=True)
-    
-    # Si viene un diccionario parcial, deberíamos hacer merge profundo, 
-    # pero para este diseño asumimos que el cliente envía el mapa completo o manejamos reemplazo.
-    # Aquí usamos reemplazo por simplicidad y atomicidad.
-    
+    table = TenantConfig.__table__
+
     stmt = insert(TenantConfig).values(
         tenant_id=tenant_id,
+        version=1,
         **update_data
     ).on_conflict_do_update(
         index_elements=['tenant_id'],
-        set_=update_data
-    )
-    
-    db.execute(stmt)
-    db.commit()
+        set_={**update_data, "version": table.c.version + 1, "updated_at": datetime.utcnow()}
+    ).returning(TenantConfig)
 
-    # 2. Invalidar Caché (Write-Through / Invalidate strategy)
-    if redis_client:
-        cache_key = f"config:{tenant_id}"
-        redis_client.delete(cache_key)
-        logger.info(f"Cache invalidada para {tenant_id}")
+    result = await db.execute(stmt)
+    config = result.scalar_one()
+    await db.commit()
+
+    # Retornar la fila del UPSERT: no hace falta volver a consultar
+    return await _publish_change(tenant_id, config)
+
+async def patch_config(
+    db: AsyncSession,
+    tenant_id: str,
+    patch: Dict[str, Any],
+    if_match: Optional[int] = None
+) -> TenantConfigResponse:
+    """
+    Aplica un JSON Merge Patch (RFC 7386) sobre la configuración, directamente en Postgres.
+
+    En los mapas, cada llave con valor string se agrega/reemplaza y cada llave con `null`
+    se elimina; un mapa en `null` se vacía. Solo viajan las entradas modificadas, nunca
+    el mapa completo. Con `if_match`, el update solo se aplica si la versión actual coincide.
+    """
+    if not isinstance(patch, dict):
+        raise HTTPException(422, "El merge patch debe ser un objeto JSON")
+
+    table = TenantConfig.__table__
+    insert_values: Dict[str, Any] = {"tenant_id": tenant_id, "version": 1}
+    set_: Dict[str, Any] = {"version": table.c.version + 1, "updated_at": datetime.utcnow()}
+
+    for field, value in patch.items():
+        if field in SCALAR_FIELDS:
+            insert_values[field] = value
+            set_[field] = value
+        elif field in MAP_FIELDS:
+            if value is None:
+                insert_values[field] = {}
+                set_[field] = literal({}, JSONB)
+                continue
+            if not isinstance(value, dict) or any(v is not None and not isinstance(v, str) for v in value.values()):
+                raise HTTPException(422, f"'{field}' debe ser un objeto de strings (o null para eliminar llaves)")
+
+            additions = {k: v for k, v in value.items() if v is not None}
+            removals = [k for k, v in value.items() if v is None]
+            insert_values[field] = additions
+
+            expression = table.c[field]
+            if additions:
+                expression = expression.op("||")(literal(additions, JSONB))
+            if removals:
+                expression = expression.op("-")(array(removals, type_=Text))
+            set_[field] = expression
+        else:
+            raise HTTPException(422, f"Campo no soportado en merge patch: '{field}'")
+
+    stmt = insert(TenantConfig).values(**insert_values).on_conflict_do_update(
+        index_elements=['tenant_id'],
+        set_=set_,
+        where=(table.c.version == if_match) if if_match is not None else None
+    ).returning(TenantConfig)
+
+    result = await db.execute(stmt)
+    config = result.scalar_one_or_none()
+    if config is None:
+        await db.rollback()
+        raise HTTPException(412, f"La configuración de {tenant_id} cambió (If-Match: {if_match})")
+    await db.commit()
 
-    # 3. Retornar dato fresco
-    return get_config(db, tenant_id)
+    return await _publish_change(tenant_id, config)
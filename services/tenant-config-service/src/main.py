@@ -1,35 +1,86 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import FastAPI, Depends, HTTPException, Header, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from .database import get_db, init_db
 from . import logic, schemas
 
 app = FastAPI(title="ASTRA Tenant Config Service", version="1.0.0")
 
 @app.on_event("startup")
-def on_startup():
-    init_db()
+async def on_startup():
+    await init_db()
+
+def _cache_headers(version: int) -> dict:
+    # no-cache: el cliente puede guardar la respuesta pero debe revalidar con If-None-Match
+    return {"ETag": logic.make_etag(version), "Cache-Control": "no-cache"}
 
 @app.get("/health")
 def health_check():
     return {"status": "ok", "service": "tenant-config"}
 
-@app.get("/v1/config/{tenant_id}", response_model=schemas.TenantConfigResponse)
-def get_tenant_configuration(tenant_id: str, db: Session = Depends(get_db)):
+@app.get(
+    "/v1/config/{tenant_id}",
+    response_model=schemas.TenantConfigResponse,
+    responses={304: {"description": "La configuración no cambió (If-None-Match)"}}
+)
+async def get_tenant_configuration(
+    tenant_id: str,
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Retorna la configuración completa consolidada para un inquilino.
     Usado por ASTRA-ORCHESTRATOR al inicio de sesión.
+    Soporta revalidación condicional: con `If-None-Match` vigente responde 304 sin cuerpo.
     """
-    return logic.get_config(db, tenant_id)
+    if if_none_match:
+        version = await logic.get_config_version(tenant_id)
+        if logic.etag_matches(if_none_match, version):
+            return Response(status_code=304, headers=_cache_headers(version))
+
+    version, payload = await logic.get_config_payload(tenant_id)
+    return Response(content=payload, media_type="application/json", headers=_cache_headers(version))
+
+@app.put("/v1/config/{tenant_id}", response_model=schemas.TenantConfigResponse)
+async def replace_tenant_configuration(
+    tenant_id: str,
+    payload: schemas.TenantConfigUpdate,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Reemplaza los campos enviados por completo (mapas incluidos).
+    Usado por ADMIN-UI (manual).
+    """
+    result = await logic.update_config(db, tenant_id, payload)
+    response.headers.update(_cache_headers(result.version))
+    return result
 
 @app.patch("/v1/config/{tenant_id}", response_model=schemas.TenantConfigResponse)
-def update_tenant_configuration(
-    tenant_id: str, 
-    payload: schemas.TenantConfigUpdate, 
-    db: Session = Depends(get_db)
+async def update_tenant_configuration(
+    tenant_id: str,
+    request: Request,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Actualiza parcial o totalmente la configuración.
-    Usado por ASTRA-INGEST (automático) o ADMIN-UI (manual).
-    Fuerza la invalidación de caché.
+    Actualización parcial vía JSON Merge Patch (application/merge-patch+json).
+    Usado por ASTRA-INGEST (automático): solo envía las entradas modificadas de cada mapa.
+    `If-Match` opcional para control de concurrencia optimista.
+    Actualiza la caché y publica el cambio a los suscriptores.
     """
-    return logic.update_config(db, tenant_id, payload)
+    try:
+        patch = await request.json()
+    except ValueError:
+        raise HTTPException(400, "Cuerpo JSON inválido")
+
+    expected_version = None
+    if if_match:
+        try:
+            expected_version = int(if_match.strip().removeprefix("W/").strip('"'))
+        except ValueError:
+            raise HTTPException(400, "If-Match debe ser un ETag de versión")
+
+    result = await logic.patch_config(db, tenant_id, patch, if_match=expected_version)
+    response.headers.update(_cache_headers(result.version))
+    return result
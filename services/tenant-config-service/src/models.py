@@ -1,8 +1,7 @@
-from sqlalchemy import Column, String, DateTime, text
+from sqlalchemy import Column, String, DateTime, Integer, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
-import uuid
 
 Base = declarative_base()
 
@@ -31,4 +30,5 @@ class TenantConfig(Base):
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    version = Column(String, default=lambda: str(uuid.uuid4())) # Para control de concurrencia
+    # Versión monotónica por tenant (ETag / control de concurrencia optimista)
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
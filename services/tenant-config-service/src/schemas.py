@@ -14,7 +14,7 @@ class TenantConfigUpdate(TenantConfigBase):
 class TenantConfigResponse(TenantConfigBase):
     tenant_id: str
     updated_at: datetime
-    version: str
+    version: int
 
     class Config:
         from_attributes = True
@@ -0,0 +1,108 @@
+import time
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from src import logic
+from src.main import app
+from src.schemas import TenantConfigResponse
+
+class FakePipeline:
+    def __init__(self, store: dict):
+        self.store = store
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.ops.append((key, value))
+
+    async def execute(self):
+        for key, value in self.ops:
+            self.store[key] = value if isinstance(value, bytes) else str(value).encode()
+
+class FakeRedis:
+    """Subconjunto mínimo de redis.asyncio usado por logic.py."""
+
+    def __init__(self):
+        self.store = {}
+        self.published = []
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def mget(self, *keys):
+        return [self.store.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.store)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+@pytest.fixture
+def client(monkeypatch):
+    db_loads = {"count": 0}
+
+    async def fake_load_from_db(tenant_id: str) -> TenantConfigResponse:
+        db_loads["count"] += 1
+        # Config "grande": ~50k zonas (~2.5MB serializado)
+        zone_map = {f"template-{i:06d}": f"ZONE_PLACEHOLDER_{i:06d}" for i in range(50_000)}
+        return TenantConfigResponse(
+            tenant_id=tenant_id, updated_at=datetime.utcnow(), version=7, zone_map=zone_map
+        )
+
+    monkeypatch.setattr(logic, "redis_client", FakeRedis())
+    monkeypatch.setattr(logic, "_load_from_db", fake_load_from_db)
+    monkeypatch.setattr(logic, "_generations", {})
+    test_client = TestClient(app)
+    test_client.db_loads = db_loads
+    return test_client
+
+def test_etag_helpers():
+    assert logic.make_etag(3) == '"3"'
+    assert logic.etag_matches('"3"', 3)
+    assert logic.etag_matches('W/"3"', 3)
+    assert logic.etag_matches('"1", "3"', 3)
+    assert logic.etag_matches("*", 3)
+    assert not logic.etag_matches('"2"', 3)
+    assert not logic.etag_matches(None, 3)
+
+def test_repeated_fetches_revalidate_without_body(client):
+    first = client.get("/v1/config/tenant_big")
+    assert first.status_code == 200
+    assert first.headers["etag"] == '"7"'
+    full_bytes = len(first.content)
+    assert full_bytes > 1_000_000
+
+    rounds = 20
+    start = time.perf_counter()
+    for _ in range(rounds):
+        response = client.get("/v1/config/tenant_big")
+        assert response.status_code == 200
+    full_latency = (time.perf_counter() - start) / rounds
+
+    revalidated_bytes = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        response = client.get("/v1/config/tenant_big", headers={"If-None-Match": first.headers["etag"]})
+        assert response.status_code == 304
+        assert response.headers["etag"] == '"7"'
+        revalidated_bytes += len(response.content)
+    conditional_latency = (time.perf_counter() - start) / rounds
+
+    assert revalidated_bytes == 0
+    # El 304 solo lee la llave de versión: no transfiere ni copia los ~2.5MB del cuerpo
+    assert conditional_latency < full_latency
+    # Solo la primera lectura llega a Postgres; el resto sale de Redis
+    assert client.db_loads["count"] == 1
+
+def test_stale_etag_returns_new_body(client):
+    response = client.get("/v1/config/tenant_big", headers={"If-None-Match": '"6"'})
+
+    assert response.status_code == 200
+    assert response.json()["version"] == 7
+    assert response.headers["etag"] == '"7"'
@@ -0,0 +1,127 @@
+import re
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from src import logic
+from src.database import get_db
+from src.main import app
+from src.models import TenantConfig
+from tests.test_conditional_fetch import FakeRedis
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def scalar_one_or_none(self):
+        return self.row
+
+class FakeSession:
+    """Registra el UPSERT emitido y devuelve la fila indicada (None = el WHERE de If-Match no aplicó)."""
+
+    def __init__(self):
+        self.row = None
+        self.statements = []
+        self.committed = False
+        self.rolled_back = False
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return FakeResult(self.row)
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        self.rolled_back = True
+
+def _row(version: int, **maps) -> TenantConfig:
+    return TenantConfig(
+        tenant_id="tenant_a", version=version, updated_at=datetime.utcnow(), active_skeleton_id=None,
+        style_map=maps.get("style_map", {}), zone_map=maps.get("zone_map", {}), table_map=maps.get("table_map", {})
+    )
+
+def _compile(stmt):
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    return str(compiled), compiled.params
+
+@pytest.fixture
+def client(monkeypatch):
+    session = FakeSession()
+
+    async def override_get_db():
+        yield session
+
+    redis = FakeRedis()
+    monkeypatch.setattr(logic, "redis_client", redis)
+    monkeypatch.setattr(logic, "_generations", {})
+    app.dependency_overrides[get_db] = override_get_db
+    test_client = TestClient(app)
+    test_client.session = session
+    test_client.redis = redis
+    yield test_client
+    app.dependency_overrides.pop(get_db, None)
+
+def test_patch_adds_and_removes_map_keys(client):
+    client.session.row = _row(2, zone_map={"tpl-1": "ZONE_HEADER", "tpl-3": "ZONE_BODY"})
+
+    response = client.patch("/v1/config/tenant_a", json={"zone_map": {"tpl-3": "ZONE_BODY", "tpl-2": None}})
+
+    assert response.status_code == 200
+    assert response.json()["zone_map"] == {"tpl-1": "ZONE_HEADER", "tpl-3": "ZONE_BODY"}
+    sql, params = _compile(client.session.statements[0])
+    # Se fusiona en Postgres: `||` agrega/reemplaza y `- text[]` elimina las llaves en null
+    assert "tenant_configs.zone_map ||" in sql
+    assert re.search(r"- ARRAY\[", sql)
+    assert {"tpl-3": "ZONE_BODY"} in params.values()
+    assert "tpl-2" in params.values()
+    # Solo viajan las entradas modificadas, nunca el mapa completo
+    assert "tpl-1" not in str(params)
+    assert client.session.committed
+
+def test_patch_null_map_clears_it(client):
+    client.session.row = _row(2)
+
+    response = client.patch("/v1/config/tenant_a", json={"style_map": None})
+
+    assert response.status_code == 200
+    sql, params = _compile(client.session.statements[0])
+    assert re.search(r"style_map = ", sql)
+    assert "tenant_configs.style_map ||" not in sql
+    assert {} in params.values()
+
+def test_patch_increments_version(client):
+    client.session.row = _row(3)
+
+    response = client.patch("/v1/config/tenant_a", json={"active_skeleton_id": "skel-9"})
+
+    assert response.status_code == 200
+    sql, _ = _compile(client.session.statements[0])
+    assert re.search(r"version = \(?tenant_configs\.version \+ ", sql)
+    # ETag, caché y notificación siguen la versión devuelta por el UPSERT
+    assert response.headers["etag"] == '"3"'
+    assert response.json()["version"] == 3
+    assert client.redis.store["config_version:tenant_a"] == b"3"
+    assert client.redis.published == [(logic.CONFIG_CHANGED_CHANNEL, "tenant_a")]
+
+def test_stale_if_match_returns_412(client):
+    client.session.row = None
+
+    response = client.patch(
+        "/v1/config/tenant_a", json={"zone_map": {"tpl-1": "ZONE_X"}}, headers={"If-Match": '"4"'}
+    )
+
+    assert response.status_code == 412
+    sql, params = _compile(client.session.statements[0])
+    assert re.search(r"WHERE tenant_configs\.version = ", sql)
+    assert 4 in params.values()
+    assert client.session.rolled_back and not client.session.committed
+    assert client.redis.published == []
+
+def test_invalid_patches_are_rejected(client):
+    assert client.patch("/v1/config/tenant_a", json={"unknown_map": {}}).status_code == 422
+    assert client.patch("/v1/config/tenant_a", json={"zone_map": {"tpl-1": 5}}).status_code == 422
+    assert client.patch(
+        "/v1/config/tenant_a", json={"zone_map": {}}, headers={"If-Match": "abc"}
+    ).status_code == 400
+    assert client.session.statements == []